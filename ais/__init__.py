@@ -16,37 +16,53 @@ See Also:
 License: Apache 2.0
 """
 
-# FIX: is this really the right way to do things?
-# Definitely helps with tab completion and less user code
-
-import ais.ais_msg_1_handcoded
-import ais.ais_msg_2_handcoded
-import ais.ais_msg_3_handcoded
-import ais.ais_msg_4_handcoded
-import ais.ais_msg_5
-import ais.ais_msg_6
-import ais.ais_msg_7_handcoded
-import ais.ais_msg_8
-import ais.ais_msg_9
-import ais.ais_msg_10
-import ais.ais_msg_11
-import ais.ais_msg_12
-# import ais.ais_msg_13
-import ais.ais_msg_14
-import ais.ais_msg_15
-# import ais.ais_msg_16
-# import ais.ais_msg_17
-import ais.ais_msg_18
-import ais.ais_msg_19
-import ais.ais_msg_20
-import ais.ais_msg_21
-import ais.ais_msg_22
-# import ais.ais_msg_23
-import ais.ais_msg_24_handcoded
-# import ais.ais_msg_24
-# import ais.ais_msg_25
-# import ais.ais_msg_26
-# import ais.ais_msg_27
+import sys
+from UserDict import DictMixin
+
+from aisutils import binary
+
+
+class LazyModules(DictMixin):
+    """Dictionary of message modules that only imports a module the first
+    time it is looked up.  Importing all of the message modules takes a
+    noticeable part of the run time of short scripts.
+
+    >>> mods = LazyModules({5: 'ais_msg_5'})
+    >>> 5 in mods
+    True
+    >>> mods[5].__name__
+    'ais.ais_msg_5'
+    """
+
+    def __init__(self, names):
+        """
+        @param names: key to the module name within the ais package
+        """
+        self.names = names
+        self.modules = {}
+
+    def __getitem__(self, key):
+        try:
+            return self.modules[key]
+        except KeyError:
+            pass
+        name = 'ais.' + self.names[key]
+        __import__(name)
+        self.modules[key] = sys.modules[name]
+        return self.modules[key]
+
+    def __contains__(self, key):
+        return key in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def keys(self):
+        return self.names.keys()
+
+    def __len__(self):
+        return len(self.names)
+
 
 msgNames = {
     1: 'Position, Class A',  # FIX: Explain difference between 1..3.
@@ -78,65 +94,106 @@ msgNames = {
     }
 """Messages in the main AIS name space."""
 
-msgModByNumber = {
-    1: ais.ais_msg_1_handcoded,
-    2: ais.ais_msg_2_handcoded,
-    3: ais.ais_msg_3_handcoded,
-    4: ais.ais_msg_4_handcoded,
-    5: ais.ais_msg_5,
-    6: ais.ais_msg_6,
-    7: ais.ais_msg_7_handcoded,
-    8: ais.ais_msg_8,
-    9: ais.ais_msg_9,
-    10: ais.ais_msg_10,
-    # 11: ais.ais_msg_11,
-    12: ais.ais_msg_12,
-    # 13: ais.ais_msg_13,
-    14: ais.ais_msg_14,
-    15: ais.ais_msg_15,
-    # 16: ais.ais_msg_16,
-    # 17: ais.ais_msg_17,
-    18: ais.ais_msg_18,
-    19: ais.ais_msg_19,
-    20: ais.ais_msg_20,
-    21: ais.ais_msg_21,
-    22: ais.ais_msg_22,
-    # 23: ais.ais_msg_23,
-    24: ais.ais_msg_24_handcoded,
-    # 24: ais.ais_msg_24,
-    # 25: ais.ais_msg_25,
-    # 26: ais.ais_msg_26,
-    # 27: ais.ais_msg_27,
-    }
+msgModByNumber = LazyModules({
+    1: 'ais_msg_1_handcoded',
+    2: 'ais_msg_2_handcoded',
+    3: 'ais_msg_3_handcoded',
+    4: 'ais_msg_4_handcoded',
+    5: 'ais_msg_5',
+    6: 'ais_msg_6',
+    7: 'ais_msg_7_handcoded',
+    8: 'ais_msg_8',
+    9: 'ais_msg_9',
+    10: 'ais_msg_10',
+    # 11: 'ais_msg_11',
+    12: 'ais_msg_12',
+    # 13: 'ais_msg_13',
+    14: 'ais_msg_14',
+    15: 'ais_msg_15',
+    # 16: 'ais_msg_16',
+    # 17: 'ais_msg_17',
+    18: 'ais_msg_18',
+    19: 'ais_msg_19',
+    20: 'ais_msg_20',
+    21: 'ais_msg_21',
+    22: 'ais_msg_22',
+    # 23: 'ais_msg_23',
+    24: 'ais_msg_24_handcoded',
+    # 24: 'ais_msg_24',
+    # 25: 'ais_msg_25',
+    # 26: 'ais_msg_26',
+    # 27: 'ais_msg_27',
+    })
 """Allow easier decoding of messages without having to write as much code."""
 
-msgModByFirstChar = {
-    '1': ais.ais_msg_1_handcoded,
-    '2': ais.ais_msg_2_handcoded,
-    '3': ais.ais_msg_3_handcoded,
-    '4': ais.ais_msg_4_handcoded,
-    '5': ais.ais_msg_5,
-    '6': ais.ais_msg_6,
-    '7': ais.ais_msg_7_handcoded,
-    '8': ais.ais_msg_8,
-    '9': ais.ais_msg_9,
-    ':': ais.ais_msg_10,
-    #';': ais.ais_msg_11,
-    '<': ais.ais_msg_12,
-    # '=': ais.ais_msg_13,
-    '>': ais.ais_msg_14,
-    '?': ais.ais_msg_15,
-    # '@': ais.ais_msg_16
-    # 'A': ais.ais_msg_17,
-    'B': ais.ais_msg_18,
-    'C': ais.ais_msg_19,
-    'D': ais.ais_msg_20,
-    'E': ais.ais_msg_21,
-    'F': ais.ais_msg_22,
-    # 'G': ais.ais_msg_23,
-    'H': ais.ais_msg_24_handcoded,
-    # 'H': ais.ais_msg_24,
-    # 'I': ais.ais_msg_25,
-    # 'J': ais.ais_msg_26,
-    # 'K': ais.ais_msg_26,
-}
+msgModByFirstChar = LazyModules({
+    '1': 'ais_msg_1_handcoded',
+    '2': 'ais_msg_2_handcoded',
+    '3': 'ais_msg_3_handcoded',
+    '4': 'ais_msg_4_handcoded',
+    '5': 'ais_msg_5',
+    '6': 'ais_msg_6',
+    '7': 'ais_msg_7_handcoded',
+    '8': 'ais_msg_8',
+    '9': 'ais_msg_9',
+    ':': 'ais_msg_10',
+    #';': 'ais_msg_11',
+    '<': 'ais_msg_12',
+    # '=': 'ais_msg_13',
+    '>': 'ais_msg_14',
+    '?': 'ais_msg_15',
+    # '@': 'ais_msg_16',
+    # 'A': 'ais_msg_17',
+    'B': 'ais_msg_18',
+    'C': 'ais_msg_19',
+    'D': 'ais_msg_20',
+    'E': 'ais_msg_21',
+    'F': 'ais_msg_22',
+    # 'G': 'ais_msg_23',
+    'H': 'ais_msg_24_handcoded',
+    # 'H': 'ais_msg_24',
+    # 'I': 'ais_msg_25',
+    # 'J': 'ais_msg_26',
+    # 'K': 'ais_msg_26',
+})
+
+
+def decode_fields(payload, fields, numeric='decimal'):
+    """Decode only some of the fields of a message.
+
+    Uses the per field decodeX functions of the module from
+    msgModByFirstChar, so the payload is only converted to bits once
+    and the other fields are never looked at.  Fields without their own
+    decoder (e.g. the commstate of the handcoded messages) fall back to
+    a full decode.
+
+    >>> r = decode_fields('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06', ('UserID', 'longitude'))
+    >>> r['UserID'], str(r['longitude'])
+    (356302000, '-71.62614333333333333333333333')
+    >>> decode_fields('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06', ('latitude',), numeric='float')
+    {'latitude': 40.392358333333334}
+
+    @param payload: armored AIS payload (NMEA field 5).  It may be cut
+        short if the fields are all at the start of the message.
+    @param fields: sequence of field names as used by decode()
+    @param numeric: 'decimal' or 'float' as for decode()
+    @rtype: dict
+    @return: field name to value for just the fields asked for
+    @raise KeyError: for an unknown message type or field
+    @raise ValueError: numeric is not 'decimal' or 'float'
+    """
+    if numeric not in ('decimal', 'float'):
+        raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    msgMod = msgModByFirstChar[payload[0]]
+    bv = binary.ais6topackedbits(payload)
+    r = {}
+    full = None
+    for name in fields:
+        decodeFunc = getattr(msgMod, 'decode' + name, None)
+        if decodeFunc is not None:
+            r[name] = decodeFunc(bv, numeric=numeric)
+            continue
+        if full is None:
+            full = msgMod.decode(bv, numeric=numeric)
+        r[name] = full[name]
+    return r
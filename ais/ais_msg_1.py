@@ -22,7 +22,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 # Optimization of the true and false bit.
@@ -172,7 +171,79 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 1
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params.get('NavigationStatus',15)
+    if x >> 4: raise ValueError('NavigationStatus does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('ROT',-128)
+    if not -0x80 <= x < 0x80: raise ValueError('ROT does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | (x & 0xff)
+    if 'SOG' in params:
+        x = int(Decimal(params['SOG'])*Decimal('10'))
+    else:
+        x = 1023
+    if x >> 10: raise ValueError('SOG does not fit in 10 bits: %r' % (x,))
+    v = (v << 10) | x
+    x = params['PositionAccuracy']
+    if x >> 1: raise ValueError('PositionAccuracy does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    if 'longitude' in params:
+        x = int(Decimal(params['longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'latitude' in params:
+        x = int(Decimal(params['latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    if 'COG' in params:
+        x = int(Decimal(params['COG'])*Decimal('10'))
+    else:
+        x = 3600
+    if x >> 12: raise ValueError('COG does not fit in 12 bits: %r' % (x,))
+    v = (v << 12) | x
+    x = params.get('TrueHeading',511)
+    if x >> 9: raise ValueError('TrueHeading does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('TimeStamp',60)
+    if x >> 6: raise ValueError('TimeStamp does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    v = (v << 4) | 0
+    v = (v << 1) | 0
+    x = params['RAIM']
+    v = (v << 1) | (1 if x else 0)
+    x = params['state_syncstate']
+    if x >> 2: raise ValueError('state_syncstate does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['state_slottimeout']
+    if x >> 3: raise ValueError('state_slottimeout does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    x = params['state_slotoffset']
+    if x >> 14: raise ValueError('state_slotoffset does not fit in 14 bits: %r' % (x,))
+    v = (v << 14) | x
+    return binary.PackedBits(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     """Unpack a position message.
 
     Fields in params:
@@ -197,10 +268,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     """
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -210,11 +284,11 @@ def decode(bv, validate=False):
     r['UserID']=int(bv[8:38])
     r['NavigationStatus']=int(bv[38:42])
     r['ROT']=binary.signedIntFromBV(bv[42:50])
-    r['SOG']=Decimal(int(bv[50:60]))/Decimal('10')
+    r['SOG']=Decimal(int(bv[50:60]))/Decimal('10') if 'float'!=numeric else int(bv[50:60])/10.0
     r['PositionAccuracy']=int(bv[60:61])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
-    r['COG']=Decimal(int(bv[116:128]))/Decimal('10')
+    r['longitude']=Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[61:89])/600000.0
+    r['latitude']=Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[89:116])/600000.0
+    r['COG']=Decimal(int(bv[116:128]))/Decimal('10') if 'float'!=numeric else int(bv[116:128])/10.0
     r['TrueHeading']=int(bv[128:137])
     r['TimeStamp']=int(bv[137:143])
     r['RegionalReserved']=0
@@ -225,58 +299,62 @@ def decode(bv, validate=False):
     r['state_slotoffset']=int(bv[154:168])
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeNavigationStatus(bv, validate=False):
+def decodeNavigationStatus(bv, validate=False, numeric='decimal'):
     return int(bv[38:42])
 
-def decodeROT(bv, validate=False):
+def decodeROT(bv, validate=False, numeric='decimal'):
     return binary.signedIntFromBV(bv[42:50])
 
-def decodeSOG(bv, validate=False):
-    return Decimal(int(bv[50:60]))/Decimal('10')
+def decodeSOG(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[50:60]))/Decimal('10') if 'float'!=numeric else int(bv[50:60])/10.0
 
-def decodePositionAccuracy(bv, validate=False):
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
     return int(bv[60:61])
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[61:89])/600000.0
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[89:116])/600000.0
 
-def decodeCOG(bv, validate=False):
-    return Decimal(int(bv[116:128]))/Decimal('10')
+def decodeCOG(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[116:128]))/Decimal('10') if 'float'!=numeric else int(bv[116:128])/10.0
 
-def decodeTrueHeading(bv, validate=False):
+def decodeTrueHeading(bv, validate=False, numeric='decimal'):
     return int(bv[128:137])
 
-def decodeTimeStamp(bv, validate=False):
+def decodeTimeStamp(bv, validate=False, numeric='decimal'):
     return int(bv[137:143])
 
-def decodeRegionalReserved(bv, validate=False):
+def decodeRegionalReserved(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeRAIM(bv, validate=False):
+def decodeRAIM(bv, validate=False, numeric='decimal'):
     return bool(int(bv[148:149]))
 
-def decodestate_syncstate(bv, validate=False):
+def decodestate_syncstate(bv, validate=False, numeric='decimal'):
     return int(bv[149:151])
 
-def decodestate_slottimeout(bv, validate=False):
+def decodestate_slottimeout(bv, validate=False, numeric='decimal'):
     return int(bv[151:154])
 
-def decodestate_slotoffset(bv, validate=False):
+def decodestate_slotoffset(bv, validate=False, numeric='decimal'):
     return int(bv[154:168])
 
 
@@ -1144,6 +1222,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
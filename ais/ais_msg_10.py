@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 fieldList = (
     'MessageID',
@@ -91,7 +90,32 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 10
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    x = params['DestID']
+    if x >> 30: raise ValueError('DestID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    return binary.PackedBits(v,72)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a utcquery message.
 
     Fields in params:
@@ -104,10 +128,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -120,22 +147,22 @@ def decode(bv, validate=False):
     r['Spare2']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 10
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare1(bv, validate=False):
+def decodeSpare1(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeDestID(bv, validate=False):
+def decodeDestID(bv, validate=False, numeric='decimal'):
     return int(bv[40:70])
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -591,6 +618,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 TrueBV  = BitVector(bitstring="1")
 FalseBV = BitVector(bitstring="0")
@@ -174,7 +173,75 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 11
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params.get('Time_year',0)
+    if x >> 14: raise ValueError('Time_year does not fit in 14 bits: %r' % (x,))
+    v = (v << 14) | x
+    x = params.get('Time_month',0)
+    if x >> 4: raise ValueError('Time_month does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('Time_day',0)
+    if x >> 5: raise ValueError('Time_day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('Time_hour',24)
+    if x >> 5: raise ValueError('Time_hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('Time_min',60)
+    if x >> 6: raise ValueError('Time_min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('Time_sec',60)
+    if x >> 6: raise ValueError('Time_sec does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['PositionAccuracy']
+    if x >> 1: raise ValueError('PositionAccuracy does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    if 'Position_longitude' in params:
+        x = int(Decimal(params['Position_longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('Position_longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'Position_latitude' in params:
+        x = int(Decimal(params['Position_latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('Position_latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('fixtype',0)
+    if x >> 4: raise ValueError('fixtype does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    v = (v << 10) | 0
+    x = params['RAIM']
+    v = (v << 1) | (1 if x else 0)
+    x = params['state_syncstate']
+    if x >> 2: raise ValueError('state_syncstate does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['state_slottimeout']
+    if x >> 3: raise ValueError('state_slottimeout does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    x = params['state_slotoffset']
+    if x >> 14: raise ValueError('state_slotoffset does not fit in 14 bits: %r' % (x,))
+    v = (v << 14) | x
+    return binary.PackedBits(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a bsreport message.
 
     Fields in params:
@@ -199,10 +266,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -217,8 +287,8 @@ def decode(bv, validate=False):
     r['Time_min']=int(bv[66:72])
     r['Time_sec']=int(bv[72:78])
     r['PositionAccuracy']=int(bv[78:79])
-    r['Position_longitude']=Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000')
-    r['Position_latitude']=Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000')
+    r['Position_longitude']=Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[79:107])/600000.0
+    r['Position_latitude']=Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[107:134])/600000.0
     r['fixtype']=int(bv[134:138])
     r['Spare']=0
     r['RAIM']=bool(int(bv[148:149]))
@@ -227,58 +297,60 @@ def decode(bv, validate=False):
     r['state_slotoffset']=int(bv[154:168])
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeTime_year(bv, validate=False):
+def decodeTime_year(bv, validate=False, numeric='decimal'):
     return int(bv[38:52])
 
-def decodeTime_month(bv, validate=False):
+def decodeTime_month(bv, validate=False, numeric='decimal'):
     return int(bv[52:56])
 
-def decodeTime_day(bv, validate=False):
+def decodeTime_day(bv, validate=False, numeric='decimal'):
     return int(bv[56:61])
 
-def decodeTime_hour(bv, validate=False):
+def decodeTime_hour(bv, validate=False, numeric='decimal'):
     return int(bv[61:66])
 
-def decodeTime_min(bv, validate=False):
+def decodeTime_min(bv, validate=False, numeric='decimal'):
     return int(bv[66:72])
 
-def decodeTime_sec(bv, validate=False):
+def decodeTime_sec(bv, validate=False, numeric='decimal'):
     return int(bv[72:78])
 
-def decodePositionAccuracy(bv, validate=False):
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
     return int(bv[78:79])
 
-def decodePosition_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000')
+def decodePosition_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[79:107])/600000.0
 
-def decodePosition_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000')
+def decodePosition_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[107:134])/600000.0
 
-def decodefixtype(bv, validate=False):
+def decodefixtype(bv, validate=False, numeric='decimal'):
     return int(bv[134:138])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeRAIM(bv, validate=False):
+def decodeRAIM(bv, validate=False, numeric='decimal'):
     return bool(int(bv[148:149]))
 
-def decodestate_syncstate(bv, validate=False):
+def decodestate_syncstate(bv, validate=False, numeric='decimal'):
     return int(bv[149:151])
 
-def decodestate_slottimeout(bv, validate=False):
+def decodestate_slottimeout(bv, validate=False, numeric='decimal'):
     return int(bv[151:154])
 
-def decodestate_slotoffset(bv, validate=False):
+def decodestate_slotoffset(bv, validate=False, numeric='decimal'):
     return int(bv[154:168])
 
 
@@ -1099,6 +1171,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 TrueBV  = BitVector(bitstring="1")
 FalseBV = BitVector(bitstring="0")
@@ -103,7 +102,36 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 6
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['SeqNum']
+    if x >> 2: raise ValueError('SeqNum does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['DestinationID']
+    if x >> 30: raise ValueError('DestinationID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['RetransmitFlag']
+    v = (v << 1) | (1 if x else 0)
+    v = (v << 1) | 0
+    return binary.PackedBits(v,72)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a asrm message.
 
     Fields in params:
@@ -117,10 +145,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -134,25 +165,25 @@ def decode(bv, validate=False):
     r['Spare']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 6
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSeqNum(bv, validate=False):
+def decodeSeqNum(bv, validate=False, numeric='decimal'):
     return int(bv[38:40])
 
-def decodeDestinationID(bv, validate=False):
+def decodeDestinationID(bv, validate=False, numeric='decimal'):
     return int(bv[40:70])
 
-def decodeRetransmitFlag(bv, validate=False):
+def decodeRetransmitFlag(bv, validate=False, numeric='decimal'):
     return bool(int(bv[70:71]))
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -627,6 +658,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
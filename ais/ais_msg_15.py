@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 fieldList = (
     'MessageID',
@@ -126,7 +125,54 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 15
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['DestID']
+    if x >> 30: raise ValueError('DestID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['MessageID1']
+    if x >> 6: raise ValueError('MessageID1 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['SlotOffset']
+    if x >> 6: raise ValueError('SlotOffset does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    v = (v << 2) | 0
+    x = params['MessageID12']
+    if x >> 6: raise ValueError('MessageID12 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['SlotOffset12']
+    if x >> 6: raise ValueError('SlotOffset12 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    v = (v << 2) | 0
+    x = params['DestID2']
+    if x >> 30: raise ValueError('DestID2 does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['MessageID2']
+    if x >> 6: raise ValueError('MessageID2 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['SlotOffset2']
+    if x >> 6: raise ValueError('SlotOffset2 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    v = (v << 2) | 0
+    return binary.PackedBits(v,140)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a interrogation message.
 
     Fields in params:
@@ -147,10 +193,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -171,46 +220,46 @@ def decode(bv, validate=False):
     r['Spare3']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 15
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeDestID(bv, validate=False):
+def decodeDestID(bv, validate=False, numeric='decimal'):
     return int(bv[38:68])
 
-def decodeMessageID1(bv, validate=False):
+def decodeMessageID1(bv, validate=False, numeric='decimal'):
     return int(bv[68:74])
 
-def decodeSlotOffset(bv, validate=False):
+def decodeSlotOffset(bv, validate=False, numeric='decimal'):
     return int(bv[74:80])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeMessageID12(bv, validate=False):
+def decodeMessageID12(bv, validate=False, numeric='decimal'):
     return int(bv[82:88])
 
-def decodeSlotOffset12(bv, validate=False):
+def decodeSlotOffset12(bv, validate=False, numeric='decimal'):
     return int(bv[88:94])
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeDestID2(bv, validate=False):
+def decodeDestID2(bv, validate=False, numeric='decimal'):
     return int(bv[96:126])
 
-def decodeMessageID2(bv, validate=False):
+def decodeMessageID2(bv, validate=False, numeric='decimal'):
     return int(bv[126:132])
 
-def decodeSlotOffset2(bv, validate=False):
+def decodeSlotOffset2(bv, validate=False, numeric='decimal'):
     return int(bv[132:138])
 
-def decodeSpare3(bv, validate=False):
+def decodeSpare3(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -810,6 +859,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -22,7 +22,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 
 fieldList = (
@@ -105,7 +104,43 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 17
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    if 'x' in params:
+        x = int(Decimal(params['x'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x20000 <= x < 0x20000: raise ValueError('x does not fit in 18 bits: %r' % (x,))
+    v = (v << 18) | (x & 0x3ffff)
+    if 'y' in params:
+        x = int(Decimal(params['y'])*Decimal('600'))
+    else:
+        x = 54600
+    if not -0x10000 <= x < 0x10000: raise ValueError('y does not fit in 17 bits: %r' % (x,))
+    v = (v << 17) | (x & 0x1ffff)
+    v = (v << 5) | 0
+    x = params['BinaryData']
+    v = (v << len(x)) | int(x)
+    return binary.PackedBits(v,80+len(params['BinaryData']))
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a gnss_correction message.
 
     Fields in params:
@@ -120,10 +155,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -132,34 +170,36 @@ def decode(bv, validate=False):
     r['RepeatIndicator']=int(bv[6:8])
     r['UserID']=int(bv[8:38])
     r['Spare']=0
-    r['x']=Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
-    r['y']=Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
+    r['x']=Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[40:58])/600.0
+    r['y']=Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[58:75])/600.0
     r['Spare2']=0
     r['BinaryData']=bv[80:]
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 17
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodex(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
+def decodex(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[40:58])/600.0
 
-def decodey(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
+def decodey(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[58:75])/600.0
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeBinaryData(bv, validate=False):
+def decodeBinaryData(bv, validate=False, numeric='decimal'):
     return bv[80:]
 
 
@@ -650,6 +690,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -3,8 +3,6 @@
 """Adds SOTDMA commstate to messages 1 and 2."""
 
 from decimal import Decimal
-from optparse import OptionParser
-import StringIO
 import sys
 
 from BitVector import BitVector
@@ -14,6 +12,19 @@ from aisutils import binary
 import commstate
 from aisutils import sqlhelp
 
+# Per field decoders for ais.decode_fields.  The commstate fields are
+# only available from decode().
+from ais_msg_1 import (decodeMessageID, decodeRepeatIndicator, decodeUserID,
+    decodeNavigationStatus, decodeROT, decodeSOG, decodePositionAccuracy,
+    decodelongitude, decodelatitude, decodeCOG, decodeTrueHeading,
+    decodeTimeStamp, decodeRegionalReserved, decodeSpare, decodeRAIM)
+
+# The generated insert adds every decoded field, so it also handles the
+# commstate fields.
+from ais_msg_1 import sqlInsert, sqlInsertStr
+# Same table and PostGIS columns as the generated module.
+from ais_msg_1 import dbTableName, toPgFields, fromPgFields, pgTypes
+
 fieldList = (
     'MessageID',
     'RepeatIndicator',
@@ -36,18 +47,19 @@ def decode_aivdm(msg):
     bv = binary.ais6tobitvec(msg.split(',')[5])
     print decode(bv)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     r = {}
     r['MessageID']=int(bv[:6])
     r['RepeatIndicator']=int(bv[6:8])
     r['UserID']=int(bv[8:38])
     r['NavigationStatus']=int(bv[38:42])
     r['ROT']=binary.signedIntFromBV(bv[42:50])
-    r['SOG']=Decimal(int(bv[50:60]))/Decimal('10')
+    r['SOG']=Decimal(int(bv[50:60]))/Decimal('10') if 'float'!=numeric else int(bv[50:60])/10.0
     r['PositionAccuracy']=int(bv[60:61])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
-    r['COG']=Decimal(int(bv[116:128]))/Decimal('10')
+    r['longitude']=Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[61:89])/600000.0
+    r['latitude']=Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[89:116])/600000.0
+    r['COG']=Decimal(int(bv[116:128]))/Decimal('10') if 'float'!=numeric else int(bv[116:128])/10.0
     r['TrueHeading']=int(bv[128:137])
     r['TimeStamp']=int(bv[137:143])
     r['RegionalReserved']=0
@@ -213,6 +225,7 @@ def addMsgOptions(parser):
 
 def main():
 
+	from optparse import OptionParser
 	parser = OptionParser(usage="%prog [options]")
 
 	parser.add_option('-v','--verbose',dest='verbose',default=False,
@@ -279,6 +292,7 @@ def main():
 		# Make a csv separated list of fields that will be displayed for csv
 		if None == options.fieldList: options.fieldList = fieldList
 		
+		import StringIO
 		buf = StringIO.StringIO()
 		for field in options.fieldList:
 			buf.write(field+',')
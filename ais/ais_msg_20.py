@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 fieldList = (
     'MessageID',
@@ -199,7 +198,77 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 20
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    x = params.get('offset1',0)
+    if x >> 12: raise ValueError('offset1 does not fit in 12 bits: %r' % (x,))
+    v = (v << 12) | x
+    x = params.get('numslots1',0)
+    if x >> 4: raise ValueError('numslots1 does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('timeout1',0)
+    if x >> 3: raise ValueError('timeout1 does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    x = params.get('increment1',0)
+    if x >> 11: raise ValueError('increment1 does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    x = params.get('offset2',0)
+    if x >> 12: raise ValueError('offset2 does not fit in 12 bits: %r' % (x,))
+    v = (v << 12) | x
+    x = params.get('numslots2',0)
+    if x >> 4: raise ValueError('numslots2 does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('timeout2',0)
+    if x >> 3: raise ValueError('timeout2 does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    x = params.get('increment2',0)
+    if x >> 11: raise ValueError('increment2 does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    x = params.get('offset3',0)
+    if x >> 12: raise ValueError('offset3 does not fit in 12 bits: %r' % (x,))
+    v = (v << 12) | x
+    x = params.get('numslots3',0)
+    if x >> 4: raise ValueError('numslots3 does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('timeout3',0)
+    if x >> 3: raise ValueError('timeout3 does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    x = params.get('increment3',0)
+    if x >> 11: raise ValueError('increment3 does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    x = params.get('offset4',0)
+    if x >> 12: raise ValueError('offset4 does not fit in 12 bits: %r' % (x,))
+    v = (v << 12) | x
+    x = params.get('numslots4',0)
+    if x >> 4: raise ValueError('numslots4 does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('timeout4',0)
+    if x >> 3: raise ValueError('timeout4 does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    x = params.get('increment4',0)
+    if x >> 11: raise ValueError('increment4 does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    v = (v << 6) | 0
+    return binary.PackedBits(v,166)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a datalinkmng message.
 
     Fields in params:
@@ -227,10 +296,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -261,67 +333,67 @@ def decode(bv, validate=False):
     r['variablespare']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 20
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeoffset1(bv, validate=False):
+def decodeoffset1(bv, validate=False, numeric='decimal'):
     return int(bv[40:52])
 
-def decodenumslots1(bv, validate=False):
+def decodenumslots1(bv, validate=False, numeric='decimal'):
     return int(bv[52:56])
 
-def decodetimeout1(bv, validate=False):
+def decodetimeout1(bv, validate=False, numeric='decimal'):
     return int(bv[56:59])
 
-def decodeincrement1(bv, validate=False):
+def decodeincrement1(bv, validate=False, numeric='decimal'):
     return int(bv[59:70])
 
-def decodeoffset2(bv, validate=False):
+def decodeoffset2(bv, validate=False, numeric='decimal'):
     return int(bv[70:82])
 
-def decodenumslots2(bv, validate=False):
+def decodenumslots2(bv, validate=False, numeric='decimal'):
     return int(bv[82:86])
 
-def decodetimeout2(bv, validate=False):
+def decodetimeout2(bv, validate=False, numeric='decimal'):
     return int(bv[86:89])
 
-def decodeincrement2(bv, validate=False):
+def decodeincrement2(bv, validate=False, numeric='decimal'):
     return int(bv[89:100])
 
-def decodeoffset3(bv, validate=False):
+def decodeoffset3(bv, validate=False, numeric='decimal'):
     return int(bv[100:112])
 
-def decodenumslots3(bv, validate=False):
+def decodenumslots3(bv, validate=False, numeric='decimal'):
     return int(bv[112:116])
 
-def decodetimeout3(bv, validate=False):
+def decodetimeout3(bv, validate=False, numeric='decimal'):
     return int(bv[116:119])
 
-def decodeincrement3(bv, validate=False):
+def decodeincrement3(bv, validate=False, numeric='decimal'):
     return int(bv[119:130])
 
-def decodeoffset4(bv, validate=False):
+def decodeoffset4(bv, validate=False, numeric='decimal'):
     return int(bv[130:142])
 
-def decodenumslots4(bv, validate=False):
+def decodenumslots4(bv, validate=False, numeric='decimal'):
     return int(bv[142:146])
 
-def decodetimeout4(bv, validate=False):
+def decodetimeout4(bv, validate=False, numeric='decimal'):
     return int(bv[146:149])
 
-def decodeincrement4(bv, validate=False):
+def decodeincrement4(bv, validate=False, numeric='decimal'):
     return int(bv[149:160])
 
-def decodevariablespare(bv, validate=False):
+def decodevariablespare(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1062,6 +1134,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
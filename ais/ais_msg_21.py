@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 TrueBV  = BitVector(bitstring="1")
 FalseBV = BitVector(bitstring="0")
@@ -185,7 +184,77 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 21
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params.get('type',0)
+    if x >> 5: raise ValueError('type does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('name','@@@@@@@@@@@@@@@@@@@@')
+    v = (v << 120) | aisstring.encodeInt(x,120)
+    x = params['PositionAccuracy']
+    if x >> 1: raise ValueError('PositionAccuracy does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    if 'longitude' in params:
+        x = int(Decimal(params['longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'latitude' in params:
+        x = int(Decimal(params['latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('dimA',0)
+    if x >> 9: raise ValueError('dimA does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('dimB',0)
+    if x >> 9: raise ValueError('dimB does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('dimC',0)
+    if x >> 6: raise ValueError('dimC does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('dimD',0)
+    if x >> 6: raise ValueError('dimD does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('FixType',0)
+    if x >> 4: raise ValueError('FixType does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['timestamp']
+    if x >> 6: raise ValueError('timestamp does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['OffPosition']
+    v = (v << 1) | (1 if x else 0)
+    x = params['status']
+    if x >> 8: raise ValueError('status does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params['RAIM']
+    v = (v << 1) | (1 if x else 0)
+    x = params['virtual_aton_flag']
+    v = (v << 1) | (1 if x else 0)
+    x = params['assigned_mode_flag']
+    v = (v << 1) | (1 if x else 0)
+    v = (v << 1) | 0
+    return binary.PackedBits(v,272)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a AidsToNavReport message.
 
     Fields in params:
@@ -212,10 +281,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -226,8 +298,8 @@ def decode(bv, validate=False):
     r['type']=int(bv[38:43])
     r['name']=aisstring.decode(bv[43:163])
     r['PositionAccuracy']=int(bv[163:164])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[164:192]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[192:219]))/Decimal('600000')
+    r['longitude']=Decimal(binary.signedIntFromBV(bv[164:192]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[164:192])/600000.0
+    r['latitude']=Decimal(binary.signedIntFromBV(bv[192:219]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[192:219])/600000.0
     r['dimA']=int(bv[219:228])
     r['dimB']=int(bv[228:237])
     r['dimC']=int(bv[237:243])
@@ -242,64 +314,66 @@ def decode(bv, validate=False):
     r['spare']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 21
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodetype(bv, validate=False):
+def decodetype(bv, validate=False, numeric='decimal'):
     return int(bv[38:43])
 
-def decodename(bv, validate=False):
+def decodename(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[43:163])
 
-def decodePositionAccuracy(bv, validate=False):
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
     return int(bv[163:164])
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[164:192]))/Decimal('600000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[164:192]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[164:192])/600000.0
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[192:219]))/Decimal('600000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[192:219]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[192:219])/600000.0
 
-def decodedimA(bv, validate=False):
+def decodedimA(bv, validate=False, numeric='decimal'):
     return int(bv[219:228])
 
-def decodedimB(bv, validate=False):
+def decodedimB(bv, validate=False, numeric='decimal'):
     return int(bv[228:237])
 
-def decodedimC(bv, validate=False):
+def decodedimC(bv, validate=False, numeric='decimal'):
     return int(bv[237:243])
 
-def decodedimD(bv, validate=False):
+def decodedimD(bv, validate=False, numeric='decimal'):
     return int(bv[243:249])
 
-def decodeFixType(bv, validate=False):
+def decodeFixType(bv, validate=False, numeric='decimal'):
     return int(bv[249:253])
 
-def decodetimestamp(bv, validate=False):
+def decodetimestamp(bv, validate=False, numeric='decimal'):
     return int(bv[253:259])
 
-def decodeOffPosition(bv, validate=False):
+def decodeOffPosition(bv, validate=False, numeric='decimal'):
     return bool(int(bv[259:260]))
 
-def decodestatus(bv, validate=False):
+def decodestatus(bv, validate=False, numeric='decimal'):
     return int(bv[260:268])
 
-def decodeRAIM(bv, validate=False):
+def decodeRAIM(bv, validate=False, numeric='decimal'):
     return bool(int(bv[268:269]))
 
-def decodevirtual_aton_flag(bv, validate=False):
+def decodevirtual_aton_flag(bv, validate=False, numeric='decimal'):
     return bool(int(bv[269:270]))
 
-def decodeassigned_mode_flag(bv, validate=False):
+def decodeassigned_mode_flag(bv, validate=False, numeric='decimal'):
     return bool(int(bv[270:271]))
 
-def decodespare(bv, validate=False):
+def decodespare(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1281,6 +1355,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -40,7 +40,6 @@ import math
 from BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
-from aisutils import uscg
 from aisutils import sqlhelp
 
 # FIX: check to see if these will be needed
@@ -1328,6 +1327,7 @@ def main():
             #print "result:",binary.bitvectoais6(bits)[0]
                 print binary.bitvectoais6(bits)[0]
         elif 'nmea'==options.ioType:
+            from aisutils import uscg
             nmea = uscg.create_nmea(bits)
             print nmea
         else:
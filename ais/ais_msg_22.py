@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 
 fieldList = (
@@ -154,7 +153,77 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 22
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    x = params['ChanA']
+    if x >> 12: raise ValueError('ChanA does not fit in 12 bits: %r' % (x,))
+    v = (v << 12) | x
+    x = params['ChanB']
+    if x >> 12: raise ValueError('ChanB does not fit in 12 bits: %r' % (x,))
+    v = (v << 12) | x
+    x = params['TxRxMode']
+    if x >> 4: raise ValueError('TxRxMode does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['power']
+    if x >> 1: raise ValueError('power does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    if 'corner1_lon' in params:
+        x = int(Decimal(params['corner1_lon'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x20000 <= x < 0x20000: raise ValueError('corner1_lon does not fit in 18 bits: %r' % (x,))
+    v = (v << 18) | (x & 0x3ffff)
+    if 'corner1_lat' in params:
+        x = int(Decimal(params['corner1_lat'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x10000 <= x < 0x10000: raise ValueError('corner1_lat does not fit in 17 bits: %r' % (x,))
+    v = (v << 17) | (x & 0x1ffff)
+    if 'corner2_lon' in params:
+        x = int(Decimal(params['corner2_lon'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x20000 <= x < 0x20000: raise ValueError('corner2_lon does not fit in 18 bits: %r' % (x,))
+    v = (v << 18) | (x & 0x3ffff)
+    if 'corner2_lat' in params:
+        x = int(Decimal(params['corner2_lat'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x10000 <= x < 0x10000: raise ValueError('corner2_lat does not fit in 17 bits: %r' % (x,))
+    v = (v << 17) | (x & 0x1ffff)
+    x = params['IndicatorType']
+    if x >> 1: raise ValueError('IndicatorType does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    x = params['ChanABandwidth']
+    if x >> 1: raise ValueError('ChanABandwidth does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    x = params['ChanBBandwidth']
+    if x >> 1: raise ValueError('ChanBBandwidth does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    x = params['TransZoneSize']
+    if x >> 3: raise ValueError('TransZoneSize does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    v = (v << 23) | 0
+    return binary.PackedBits(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a ChanMngmt message.
 
     Fields in params:
@@ -178,10 +247,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -194,10 +266,10 @@ def decode(bv, validate=False):
     r['ChanB']=int(bv[52:64])
     r['TxRxMode']=int(bv[64:68])
     r['power']=int(bv[68:69])
-    r['corner1_lon']=Decimal(binary.signedIntFromBV(bv[69:87]))/Decimal('600')
-    r['corner1_lat']=Decimal(binary.signedIntFromBV(bv[87:104]))/Decimal('600')
-    r['corner2_lon']=Decimal(binary.signedIntFromBV(bv[104:122]))/Decimal('600')
-    r['corner2_lat']=Decimal(binary.signedIntFromBV(bv[122:139]))/Decimal('600')
+    r['corner1_lon']=Decimal(binary.signedIntFromBV(bv[69:87]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[69:87])/600.0
+    r['corner1_lat']=Decimal(binary.signedIntFromBV(bv[87:104]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[87:104])/600.0
+    r['corner2_lon']=Decimal(binary.signedIntFromBV(bv[104:122]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[104:122])/600.0
+    r['corner2_lat']=Decimal(binary.signedIntFromBV(bv[122:139]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[122:139])/600.0
     r['IndicatorType']=int(bv[139:140])
     r['ChanABandwidth']=int(bv[140:141])
     r['ChanBBandwidth']=int(bv[141:142])
@@ -205,55 +277,59 @@ def decode(bv, validate=False):
     r['Spare2']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 22
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeChanA(bv, validate=False):
+def decodeChanA(bv, validate=False, numeric='decimal'):
     return int(bv[40:52])
 
-def decodeChanB(bv, validate=False):
+def decodeChanB(bv, validate=False, numeric='decimal'):
     return int(bv[52:64])
 
-def decodeTxRxMode(bv, validate=False):
+def decodeTxRxMode(bv, validate=False, numeric='decimal'):
     return int(bv[64:68])
 
-def decodepower(bv, validate=False):
+def decodepower(bv, validate=False, numeric='decimal'):
     return int(bv[68:69])
 
-def decodecorner1_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[69:87]))/Decimal('600')
+def decodecorner1_lon(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[69:87]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[69:87])/600.0
 
-def decodecorner1_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[87:104]))/Decimal('600')
+def decodecorner1_lat(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[87:104]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[87:104])/600.0
 
-def decodecorner2_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[104:122]))/Decimal('600')
+def decodecorner2_lon(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[104:122]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[104:122])/600.0
 
-def decodecorner2_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[122:139]))/Decimal('600')
+def decodecorner2_lat(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[122:139]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[122:139])/600.0
 
-def decodeIndicatorType(bv, validate=False):
+def decodeIndicatorType(bv, validate=False, numeric='decimal'):
     return int(bv[139:140])
 
-def decodeChanABandwidth(bv, validate=False):
+def decodeChanABandwidth(bv, validate=False, numeric='decimal'):
     return int(bv[140:141])
 
-def decodeChanBBandwidth(bv, validate=False):
+def decodeChanBBandwidth(bv, validate=False, numeric='decimal'):
     return int(bv[141:142])
 
-def decodeTransZoneSize(bv, validate=False):
+def decodeTransZoneSize(bv, validate=False, numeric='decimal'):
     return int(bv[142:145])
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1023,6 +1099,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 
 fieldList = (
@@ -149,7 +148,69 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 23
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    if 'corner1_lon' in params:
+        x = int(Decimal(params['corner1_lon'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x20000 <= x < 0x20000: raise ValueError('corner1_lon does not fit in 18 bits: %r' % (x,))
+    v = (v << 18) | (x & 0x3ffff)
+    if 'corner1_lat' in params:
+        x = int(Decimal(params['corner1_lat'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x10000 <= x < 0x10000: raise ValueError('corner1_lat does not fit in 17 bits: %r' % (x,))
+    v = (v << 17) | (x & 0x1ffff)
+    if 'corner2_lon' in params:
+        x = int(Decimal(params['corner2_lon'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x20000 <= x < 0x20000: raise ValueError('corner2_lon does not fit in 18 bits: %r' % (x,))
+    v = (v << 18) | (x & 0x3ffff)
+    if 'corner2_lat' in params:
+        x = int(Decimal(params['corner2_lat'])*Decimal('600'))
+    else:
+        x = 108600
+    if not -0x10000 <= x < 0x10000: raise ValueError('corner2_lat does not fit in 17 bits: %r' % (x,))
+    v = (v << 17) | (x & 0x1ffff)
+    x = params['StationType']
+    if x >> 4: raise ValueError('StationType does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('shipandcargo',0)
+    if x >> 8: raise ValueError('shipandcargo does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    v = (v << 22) | 0
+    x = params['TxRxMode']
+    if x >> 4: raise ValueError('TxRxMode does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['ReportingInterval']
+    if x >> 4: raise ValueError('ReportingInterval does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['QuietTime']
+    if x >> 22: raise ValueError('QuietTime does not fit in 22 bits: %r' % (x,))
+    v = (v << 22) | x
+    v = (v << 6) | 0
+    return binary.PackedBits(v,180)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a ChanMngmt message.
 
     Fields in params:
@@ -171,10 +232,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -183,10 +247,10 @@ def decode(bv, validate=False):
     r['RepeatIndicator']=int(bv[6:8])
     r['UserID']=int(bv[8:38])
     r['Spare']=0
-    r['corner1_lon']=Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
-    r['corner1_lat']=Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
-    r['corner2_lon']=Decimal(binary.signedIntFromBV(bv[75:93]))/Decimal('600')
-    r['corner2_lat']=Decimal(binary.signedIntFromBV(bv[93:110]))/Decimal('600')
+    r['corner1_lon']=Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[40:58])/600.0
+    r['corner1_lat']=Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[58:75])/600.0
+    r['corner2_lon']=Decimal(binary.signedIntFromBV(bv[75:93]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[75:93])/600.0
+    r['corner2_lat']=Decimal(binary.signedIntFromBV(bv[93:110]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[93:110])/600.0
     r['StationType']=int(bv[110:114])
     r['shipandcargo']=int(bv[114:122])
     r['Spare2']=0
@@ -196,49 +260,53 @@ def decode(bv, validate=False):
     r['Spare3']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 23
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodecorner1_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
+def decodecorner1_lon(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[40:58])/600.0
 
-def decodecorner1_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
+def decodecorner1_lat(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[58:75])/600.0
 
-def decodecorner2_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[75:93]))/Decimal('600')
+def decodecorner2_lon(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[75:93]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[75:93])/600.0
 
-def decodecorner2_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[93:110]))/Decimal('600')
+def decodecorner2_lat(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[93:110]))/Decimal('600') if 'float'!=numeric else binary.signedIntFromBV(bv[93:110])/600.0
 
-def decodeStationType(bv, validate=False):
+def decodeStationType(bv, validate=False, numeric='decimal'):
     return int(bv[110:114])
 
-def decodeshipandcargo(bv, validate=False):
+def decodeshipandcargo(bv, validate=False, numeric='decimal'):
     return int(bv[114:122])
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeTxRxMode(bv, validate=False):
+def decodeTxRxMode(bv, validate=False, numeric='decimal'):
     return int(bv[144:148])
 
-def decodeReportingInterval(bv, validate=False):
+def decodeReportingInterval(bv, validate=False, numeric='decimal'):
     return int(bv[148:152])
 
-def decodeQuietTime(bv, validate=False):
+def decodeQuietTime(bv, validate=False, numeric='decimal'):
     return int(bv[152:174])
 
-def decodeSpare3(bv, validate=False):
+def decodeSpare3(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1143,6 +1211,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
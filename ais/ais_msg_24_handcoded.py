@@ -86,7 +86,7 @@ def encode(params, validate=False):
 
   return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
   '''Unpack a b_staticdata
 
   Fields in params:
@@ -97,10 +97,13 @@ def decode(bv, validate=False):
   @type bv: BitVector
   @param bv: Bits defining a message
   @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+  @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
   @rtype: dict
   @return: params
+  @raise ValueError: numeric is not 'decimal' or 'float'
   '''
 
+  if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
   if len(bv) not in (160,162,168): # 162 is 160 with 2 bits padding
     print 'warning... len is not 160 or 168.  Found',len(bv)
 
@@ -132,13 +135,13 @@ def decode(bv, validate=False):
 
   return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
   return 24
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
   return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
   return int(bv[8:38])
 
 ### Removed lots
@@ -5,13 +5,10 @@
 Adds commstate to the msg 4 definition.
 """
 from decimal import Decimal
-from optparse import OptionParser
 import os
 import sys
-import StringIO
 import unittest
 
-from aisutils import uscg
 from BitVector import BitVector
 
 from aisutils import aisstring
@@ -19,6 +16,20 @@ from aisutils import binary
 import commstate
 from aisutils import sqlhelp
 
+# Per field decoders for ais.decode_fields.  The commstate fields are
+# only available from decode().
+from ais_msg_4 import (decodeMessageID, decodeRepeatIndicator, decodeUserID,
+    decodeTime_year, decodeTime_month, decodeTime_day, decodeTime_hour,
+    decodeTime_min, decodeTime_sec, decodePositionAccuracy,
+    decodePosition_longitude, decodePosition_latitude, decodefixtype,
+    decodeSpare, decodeRAIM)
+
+# The generated insert adds every decoded field, so it also handles the
+# commstate fields.
+from ais_msg_4 import sqlInsert, sqlInsertStr
+# Same table and PostGIS columns as the generated module.
+from ais_msg_4 import dbTableName, toPgFields, fromPgFields, pgTypes
+
 # TODO(schwehr): from ais_msg_4 import *.
 
 
@@ -44,7 +55,7 @@ def decode_aivdm(msg):
     bv = binary.ais6tobitvec(msg.split(',')[5])
     print decode(bv)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     """Unpack a bsreport message.
 
     Fields in params:
@@ -69,10 +80,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     """
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     r = {}
     r['MessageID'] = 4
     r['RepeatIndicator'] = int(bv[6:8])
@@ -84,8 +98,8 @@ def decode(bv, validate=False):
     r['Time_min'] = int(bv[66:72])
     r['Time_sec'] = int(bv[72:78])
     r['PositionAccuracy'] = int(bv[78:79])
-    r['Position_longitude'] = Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000')
-    r['Position_latitude'] = Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000')
+    r['Position_longitude'] = Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[79:107])/600000.0
+    r['Position_latitude'] = Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[107:134])/600000.0
     r['fixtype'] = int(bv[134:138])
     r['Spare'] = 0
     r['RAIM'] = bool(int(bv[148:149]))
@@ -224,6 +238,7 @@ def printFields(params, out=sys.stdout, format='std', fieldList=None, dbType='po
 
 
 def main():
+    from optparse import OptionParser
     parser = OptionParser(usage="%prog [options]")
 
     parser.add_option('--unit-test',dest='unittest',default=False,action='store_true',
@@ -331,6 +346,7 @@ def main():
 
         # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
         elif 'nmea'==options.ioType:
+            from aisutils import uscg
             nmea = uscg.create_nmea(bits)
             print nmea
         else: sys.exit('ERROR: unknown ioType.  Help!')
@@ -349,6 +365,7 @@ def main():
     if options.printCsvfieldList:
         # Make a csv separated list of fields that will be displayed for csv
         if None == options.fieldList: options.fieldList = fieldList
+        import StringIO
         buf = StringIO.StringIO()
         for field in options.fieldList:
             buf.write(field+',')
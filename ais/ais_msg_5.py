@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 
 fieldList = (
@@ -200,7 +199,79 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 5
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params.get('AISversion',0)
+    if x >> 2: raise ValueError('AISversion does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params.get('IMOnumber',0)
+    if x >> 30: raise ValueError('IMOnumber does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params.get('callsign','@@@@@@@')
+    v = (v << 42) | aisstring.encodeInt(x,42)
+    x = params.get('name','@@@@@@@@@@@@@@@@@@@@')
+    v = (v << 120) | aisstring.encodeInt(x,120)
+    x = params.get('shipandcargo',0)
+    if x >> 8: raise ValueError('shipandcargo does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params.get('dimA',0)
+    if x >> 9: raise ValueError('dimA does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('dimB',0)
+    if x >> 9: raise ValueError('dimB does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('dimC',0)
+    if x >> 6: raise ValueError('dimC does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('dimD',0)
+    if x >> 6: raise ValueError('dimD does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('fixtype',0)
+    if x >> 4: raise ValueError('fixtype does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('ETAmonth',0)
+    if x >> 4: raise ValueError('ETAmonth does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('ETAday',0)
+    if x >> 5: raise ValueError('ETAday does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('ETAhour',24)
+    if x >> 5: raise ValueError('ETAhour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('ETAminute',60)
+    if x >> 6: raise ValueError('ETAminute does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    if 'draught' in params:
+        x = int(Decimal(params['draught'])*Decimal('10'))
+    else:
+        x = 0
+    if x >> 8: raise ValueError('draught does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params.get('destination','@@@@@@@@@@@@@@@@@@@@')
+    v = (v << 120) | aisstring.encodeInt(x,120)
+    x = params['dte']
+    if x >> 1: raise ValueError('dte does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    v = (v << 1) | 0
+    return binary.PackedBits(v,424)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a shipdata message.
 
     Fields in params:
@@ -228,10 +299,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -253,73 +327,74 @@ def decode(bv, validate=False):
     r['ETAday']=int(bv[278:283])
     r['ETAhour']=int(bv[283:288])
     r['ETAminute']=int(bv[288:294])
-    r['draught']=Decimal(int(bv[294:302]))/Decimal('10')
+    r['draught']=Decimal(int(bv[294:302]))/Decimal('10') if 'float'!=numeric else int(bv[294:302])/10.0
     r['destination']=aisstring.decode(bv[302:422])
     r['dte']=int(bv[422:423])
     r['Spare']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 5
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeAISversion(bv, validate=False):
+def decodeAISversion(bv, validate=False, numeric='decimal'):
     return int(bv[38:40])
 
-def decodeIMOnumber(bv, validate=False):
+def decodeIMOnumber(bv, validate=False, numeric='decimal'):
     return int(bv[40:70])
 
-def decodecallsign(bv, validate=False):
+def decodecallsign(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[70:112])
 
-def decodename(bv, validate=False):
+def decodename(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[112:232])
 
-def decodeshipandcargo(bv, validate=False):
+def decodeshipandcargo(bv, validate=False, numeric='decimal'):
     return int(bv[232:240])
 
-def decodedimA(bv, validate=False):
+def decodedimA(bv, validate=False, numeric='decimal'):
     return int(bv[240:249])
 
-def decodedimB(bv, validate=False):
+def decodedimB(bv, validate=False, numeric='decimal'):
     return int(bv[249:258])
 
-def decodedimC(bv, validate=False):
+def decodedimC(bv, validate=False, numeric='decimal'):
     return int(bv[258:264])
 
-def decodedimD(bv, validate=False):
+def decodedimD(bv, validate=False, numeric='decimal'):
     return int(bv[264:270])
 
-def decodefixtype(bv, validate=False):
+def decodefixtype(bv, validate=False, numeric='decimal'):
     return int(bv[270:274])
 
-def decodeETAmonth(bv, validate=False):
+def decodeETAmonth(bv, validate=False, numeric='decimal'):
     return int(bv[274:278])
 
-def decodeETAday(bv, validate=False):
+def decodeETAday(bv, validate=False, numeric='decimal'):
     return int(bv[278:283])
 
-def decodeETAhour(bv, validate=False):
+def decodeETAhour(bv, validate=False, numeric='decimal'):
     return int(bv[283:288])
 
-def decodeETAminute(bv, validate=False):
+def decodeETAminute(bv, validate=False, numeric='decimal'):
     return int(bv[288:294])
 
-def decodedraught(bv, validate=False):
-    return Decimal(int(bv[294:302]))/Decimal('10')
+def decodedraught(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[294:302]))/Decimal('10') if 'float'!=numeric else int(bv[294:302])/10.0
 
-def decodedestination(bv, validate=False):
+def decodedestination(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[302:422])
 
-def decodedte(bv, validate=False):
+def decodedte(bv, validate=False, numeric='decimal'):
     return int(bv[422:423])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1304,6 +1379,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -25,7 +25,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 TrueBV  = BitVector(bitstring="1")
 FalseBV = BitVector(bitstring="0")
@@ -114,7 +113,44 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 6
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['SeqNum']
+    if x >> 2: raise ValueError('SeqNum does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['DestinationID']
+    if x >> 30: raise ValueError('DestinationID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['RetransmitFlag']
+    v = (v << 1) | (1 if x else 0)
+    v = (v << 1) | 0
+    x = params['dac']
+    if x >> 10: raise ValueError('dac does not fit in 10 bits: %r' % (x,))
+    v = (v << 10) | x
+    x = params['fi']
+    if x >> 6: raise ValueError('fi does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['BinaryData']
+    v = (v << len(x)) | int(x)
+    return binary.PackedBits(v,88+len(params['BinaryData']))
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a abm message.
 
     Fields in params:
@@ -131,10 +167,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -151,34 +190,34 @@ def decode(bv, validate=False):
     r['BinaryData']=bv[88:]
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 6
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSeqNum(bv, validate=False):
+def decodeSeqNum(bv, validate=False, numeric='decimal'):
     return int(bv[38:40])
 
-def decodeDestinationID(bv, validate=False):
+def decodeDestinationID(bv, validate=False, numeric='decimal'):
     return int(bv[40:70])
 
-def decodeRetransmitFlag(bv, validate=False):
+def decodeRetransmitFlag(bv, validate=False, numeric='decimal'):
     return bool(int(bv[70:71]))
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return int(bv[72:82])
 
-def decodefi(bv, validate=False):
+def decodefi(bv, validate=False, numeric='decimal'):
     return int(bv[82:88])
 
-def decodeBinaryData(bv, validate=False):
+def decodeBinaryData(bv, validate=False, numeric='decimal'):
     return bv[88:]
 
 
@@ -709,6 +748,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
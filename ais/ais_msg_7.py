@@ -23,7 +23,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 
 fieldList = (
@@ -116,7 +115,52 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 7
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    x = params['DestID1']
+    if x >> 30: raise ValueError('DestID1 does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['SeqID1']
+    if x >> 2: raise ValueError('SeqID1 does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['DestID2']
+    if x >> 30: raise ValueError('DestID2 does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['SeqID2']
+    if x >> 2: raise ValueError('SeqID2 does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['DestID3']
+    if x >> 30: raise ValueError('DestID3 does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['SeqID3']
+    if x >> 2: raise ValueError('SeqID3 does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['DestID4']
+    if x >> 30: raise ValueError('DestID4 does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['SeqID4']
+    if x >> 2: raise ValueError('SeqID4 does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    return binary.PackedBits(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a binack message.
 
     Fields in params:
@@ -135,10 +179,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -157,40 +204,40 @@ def decode(bv, validate=False):
     r['SeqID4']=int(bv[166:168])
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 7
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeDestID1(bv, validate=False):
+def decodeDestID1(bv, validate=False, numeric='decimal'):
     return int(bv[40:70])
 
-def decodeSeqID1(bv, validate=False):
+def decodeSeqID1(bv, validate=False, numeric='decimal'):
     return int(bv[70:72])
 
-def decodeDestID2(bv, validate=False):
+def decodeDestID2(bv, validate=False, numeric='decimal'):
     return int(bv[72:102])
 
-def decodeSeqID2(bv, validate=False):
+def decodeSeqID2(bv, validate=False, numeric='decimal'):
     return int(bv[102:104])
 
-def decodeDestID3(bv, validate=False):
+def decodeDestID3(bv, validate=False, numeric='decimal'):
     return int(bv[104:134])
 
-def decodeSeqID3(bv, validate=False):
+def decodeSeqID3(bv, validate=False, numeric='decimal'):
     return int(bv[134:136])
 
-def decodeDestID4(bv, validate=False):
+def decodeDestID4(bv, validate=False, numeric='decimal'):
     return int(bv[136:166])
 
-def decodeSeqID4(bv, validate=False):
+def decodeSeqID4(bv, validate=False, numeric='decimal'):
     return int(bv[166:168])
 
 
@@ -759,6 +806,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -39,7 +39,6 @@ from decimal import Decimal
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 from BitVector import BitVector
 
@@ -142,7 +141,7 @@ def encode(params, validate=False):
 
 	return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
 	'''Unpack a binack message
 
 	Fields in params:
@@ -161,6 +160,7 @@ def decode(bv, validate=False):
 	@type bv: BitVector
 	@param bv: Bits defining a message
 	@param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+	@param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
 	@rtype: dict
 	@return: params
 	'''
@@ -190,40 +190,40 @@ def decode(bv, validate=False):
 	r['SeqID4']=int(bv[166:168])
 	return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
 	return 7
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
 	return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
 	return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
 	return 0
 
-def decodeDestID1(bv, validate=False):
+def decodeDestID1(bv, validate=False, numeric='decimal'):
 	return int(bv[40:70])
 
-def decodeSeqID1(bv, validate=False):
+def decodeSeqID1(bv, validate=False, numeric='decimal'):
 	return int(bv[70:72])
 
-def decodeDestID2(bv, validate=False):
+def decodeDestID2(bv, validate=False, numeric='decimal'):
 	return int(bv[72:102])
 
-def decodeSeqID2(bv, validate=False):
+def decodeSeqID2(bv, validate=False, numeric='decimal'):
 	return int(bv[102:104])
 
-def decodeDestID3(bv, validate=False):
+def decodeDestID3(bv, validate=False, numeric='decimal'):
 	return int(bv[104:134])
 
-def decodeSeqID3(bv, validate=False):
+def decodeSeqID3(bv, validate=False, numeric='decimal'):
 	return int(bv[134:136])
 
-def decodeDestID4(bv, validate=False):
+def decodeDestID4(bv, validate=False, numeric='decimal'):
 	return int(bv[136:166])
 
-def decodeSeqID4(bv, validate=False):
+def decodeSeqID4(bv, validate=False, numeric='decimal'):
 	return int(bv[166:168])
 
 
@@ -789,6 +789,7 @@ def main():
 
 		# FIX: Do not emit this option for the binary message payloads.  Does not make sense.
 		elif 'nmea'==options.ioType:
+                    from aisutils import uscg
                     nmea = uscg.create_nmea(bits)
                     print nmea
 		else: sys.exit('ERROR: unknown ioType.  Help!')
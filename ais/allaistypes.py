@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -118,7 +117,43 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 16) | 366
+    v = (v << 8) | 122
+    x = params.get('unavail_uint',3)
+    if x >> 2: raise ValueError('unavail_uint does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['anUInt']
+    if x >> 2: raise ValueError('anUInt does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['anInt']
+    if not -0x4 <= x < 0x4: raise ValueError('anInt does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | (x & 0x7)
+    x = params['aBool']
+    v = (v << 1) | (1 if x else 0)
+    x = params['aStr']
+    v = (v << 30) | aisstring.encodeInt(x,30)
+    x = int(Decimal(params['anUDecimal'])*Decimal('10'))
+    if x >> 16: raise ValueError('anUDecimal does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    x = int(Decimal(params['aDecimal'])*Decimal('10'))
+    if not -0x8000 <= x < 0x8000: raise ValueError('aDecimal does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | (x & 0xffff)
+    x = params['aFloat']
+    v = (v << 32) | binary.float2uint(x)
+    return binary.PackedBits(v,126)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a alltypesmsg message.
 
     Fields in params:
@@ -135,10 +170,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -150,39 +188,41 @@ def decode(bv, validate=False):
     r['anInt']=binary.signedIntFromBV(bv[28:31])
     r['aBool']=bool(int(bv[31:32]))
     r['aStr']=aisstring.decode(bv[32:62])
-    r['anUDecimal']=Decimal(int(bv[62:78]))/Decimal('10')
-    r['aDecimal']=Decimal(binary.signedIntFromBV(bv[78:94]))/Decimal('10')
+    r['anUDecimal']=Decimal(int(bv[62:78]))/Decimal('10') if 'float'!=numeric else int(bv[62:78])/10.0
+    r['aDecimal']=Decimal(binary.signedIntFromBV(bv[78:94]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[78:94])/10.0
     r['aFloat']=binary.bitvec2float(bv[94:126])
     return r
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodereqDecimal(bv, validate=False):
+def decodereqDecimal(bv, validate=False, numeric='decimal'):
     return 122/Decimal('1')
 
-def decodeunavail_uint(bv, validate=False):
+def decodeunavail_uint(bv, validate=False, numeric='decimal'):
     return int(bv[24:26])
 
-def decodeanUInt(bv, validate=False):
+def decodeanUInt(bv, validate=False, numeric='decimal'):
     return int(bv[26:28])
 
-def decodeanInt(bv, validate=False):
+def decodeanInt(bv, validate=False, numeric='decimal'):
     return binary.signedIntFromBV(bv[28:31])
 
-def decodeaBool(bv, validate=False):
+def decodeaBool(bv, validate=False, numeric='decimal'):
     return bool(int(bv[31:32]))
 
-def decodeaStr(bv, validate=False):
+def decodeaStr(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[32:62])
 
-def decodeanUDecimal(bv, validate=False):
-    return Decimal(int(bv[62:78]))/Decimal('10')
+def decodeanUDecimal(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[62:78]))/Decimal('10') if 'float'!=numeric else int(bv[62:78])/10.0
 
-def decodeaDecimal(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[78:94]))/Decimal('10')
+def decodeaDecimal(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[78:94]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[78:94])/10.0
 
-def decodeaFloat(bv, validate=False):
+def decodeaFloat(bv, validate=False, numeric='decimal'):
     return binary.bitvec2float(bv[94:126])
 
 
@@ -700,6 +740,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
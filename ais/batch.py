@@ -0,0 +1,308 @@
+__author__    = 'Kurt Schwehr'
+__copyright__ = '2010'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Decode many class A (1, 2, 3) and class B (18, 19) position reports at
+once with numpy.  The 6 bit de-armoring and the field extraction are
+done on whole arrays rather than one message at a time.
+
+The field names are the same as those from decode() in the handcoded
+1-3 modules and ais_msg_18/19.  Scaled fields (SOG, COG, longitude,
+latitude) are floats as from decode(bv, numeric='float').  The
+SOTDMA commstate fields of messages 1 and 2 that do not apply to a
+message are set to -1.
+
+@requires: U{numpy<http://numpy.scipy.org/>}
+@since: 2010-Mar-01
+'''
+
+import numpy
+
+from aisutils import aisstring
+
+# Each field is (name, start bit, end bit, kind, scale)
+#   kind is one of uint, int, bool, zero (always 0), udecimal, decimal,
+#   aisstr6 or commstate (filled in by _commstate)
+
+class_a_fields = (
+    ('MessageID',        0,   6, 'uint', None),
+    ('RepeatIndicator',  6,   8, 'uint', None),
+    ('UserID',           8,  38, 'uint', None),
+    ('NavigationStatus',38,  42, 'uint', None),
+    ('ROT',             42,  50, 'int', None),
+    ('SOG',             50,  60, 'udecimal', 10.),
+    ('PositionAccuracy',60,  61, 'uint', None),
+    ('longitude',       61,  89, 'decimal', 600000.),
+    ('latitude',        89, 116, 'decimal', 600000.),
+    ('COG',            116, 128, 'udecimal', 10.),
+    ('TrueHeading',    128, 137, 'uint', None),
+    ('TimeStamp',      137, 143, 'uint', None),
+    ('RegionalReserved',143,147, 'zero', None),
+    ('Spare',          147, 148, 'zero', None),
+    ('RAIM',           148, 149, 'bool', None),
+    )
+'''Messages 1, 2 and 3 up to the commstate'''
+
+msg_1_fields = class_a_fields + (
+    ('sync_state',     149, 151, 'uint', None),
+    ('slot_timeout',   151, 154, 'uint', None),
+    ('received_stations', 154, 168, 'commstate', None),
+    ('slot_number',       154, 168, 'commstate', None),
+    ('commstate_utc_hour',154, 159, 'commstate', None),
+    ('commstate_utc_min', 159, 166, 'commstate', None),
+    ('commstate_utc_spare',166,168, 'commstate', None),
+    ('slot_offset',       154, 168, 'commstate', None),
+    )
+'''Messages 1 and 2 with the SOTDMA commstate as in ais_msg_1_handcoded'''
+
+msg_3_fields = class_a_fields + (
+    ('sync_state',       149, 151, 'uint', None),
+    ('slot_increment',   151, 164, 'uint', None),
+    ('slots_to_allocate',164, 167, 'uint', None),
+    ('keep_flag',        167, 168, 'uint', None),
+    )
+'''Message 3 with the ITDMA commstate as in ais_msg_3_handcoded'''
+
+msg_18_fields = (
+    ('MessageID',        0,   6, 'uint', None),
+    ('RepeatIndicator',  6,   8, 'uint', None),
+    ('UserID',           8,  38, 'uint', None),
+    ('Reserved1',       38,  46, 'zero', None),
+    ('SOG',             46,  56, 'udecimal', 10.),
+    ('PositionAccuracy',56,  57, 'uint', None),
+    ('longitude',       57,  85, 'decimal', 600000.),
+    ('latitude',        85, 112, 'decimal', 600000.),
+    ('COG',            112, 124, 'udecimal', 10.),
+    ('TrueHeading',    124, 133, 'uint', None),
+    ('TimeStamp',      133, 139, 'uint', None),
+    ('Spare',          139, 141, 'zero', None),
+    ('cs_unit',        141, 142, 'bool', None),
+    ('display_flag',   142, 143, 'bool', None),
+    ('dsc_flag',       143, 144, 'bool', None),
+    ('band_flag',      144, 145, 'bool', None),
+    ('msg22_flag',     145, 146, 'bool', None),
+    ('mode_flag',      146, 147, 'bool', None),
+    ('RAIM',           147, 148, 'bool', None),
+    ('CommStateSelector',148,149,'uint', None),
+    ('CommState',      149, 168, 'uint', None),
+    )
+'''Message 18 as in ais_msg_18'''
+
+msg_19_fields = (
+    ('MessageID',        0,   6, 'uint', None),
+    ('RepeatIndicator',  6,   8, 'uint', None),
+    ('UserID',           8,  38, 'uint', None),
+    ('Spare',           38,  46, 'zero', None),
+    ('SOG',             46,  56, 'udecimal', 10.),
+    ('PositionAccuracy',56,  57, 'uint', None),
+    ('longitude',       57,  85, 'decimal', 600000.),
+    ('latitude',        85, 112, 'decimal', 600000.),
+    ('COG',            112, 124, 'udecimal', 10.),
+    ('TrueHeading',    124, 133, 'uint', None),
+    ('TimeStamp',      133, 139, 'uint', None),
+    ('Spare2',         139, 143, 'zero', None),
+    ('name',           143, 263, 'aisstr6', None),
+    ('shipandcargo',   263, 271, 'uint', None),
+    ('dimA',           271, 280, 'uint', None),
+    ('dimB',           280, 289, 'uint', None),
+    ('dimC',           289, 295, 'uint', None),
+    ('dimD',           295, 301, 'uint', None),
+    ('fixtype',        301, 305, 'uint', None),
+    ('RAIM',           305, 306, 'bool', None),
+    ('DTE',            306, 307, 'uint', None),
+    ('Spare3',         307, 312, 'zero', None),
+    )
+'''Message 19 as in ais_msg_19'''
+
+layouts = {
+    '1': msg_1_fields,
+    '2': msg_1_fields,
+    '3': msg_3_fields,
+    'B': msg_18_fields,
+    'C': msg_19_fields,
+    }
+'''Field layout by the first character of the payload'''
+
+payload_chars = {
+    '1': 28, '2': 28, '3': 28, 'B': 28, 'C': 52,
+    }
+'''Number of payload characters for each message without pad bits'''
+
+commstate_fields = [name for name, start, end, kind, scale in msg_1_fields if kind == 'commstate']
+'''Columns that are -1 when they do not apply to a message'''
+
+_characterLUT = numpy.array([ord(c) for c in aisstring.characterLUT], dtype=numpy.uint8)
+
+
+def _dtype(name, start, end, kind):
+    numbits = end - start
+    if kind in ('decimal', 'udecimal'): return (name, numpy.float64)
+    if kind == 'bool': return (name, numpy.bool_)
+    if kind == 'aisstr6': return (name, 'S%d' % (numbits / 6))
+    if kind == 'commstate': return (name, numpy.int16)  # -1 when not used
+    if kind != 'int': numbits += 1  # Signed types so that values come back as int rather than long
+    for size in (8, 16, 32):
+        if numbits <= size:
+            return (name, 'i%d' % (size / 8))
+    return (name, numpy.int64)
+
+
+def dtype(fields):
+    '''numpy structured dtype for a layout (e.g. msg_1_fields)'''
+    return numpy.dtype([_dtype(name, start, end, kind) for name, start, end, kind, scale in fields])
+
+
+def payloads_to_bits(payloads, numchars):
+    '''
+    De-armor payloads into a matrix of bits
+
+    >>> payloads_to_bits(['1w'], 2).tolist()
+    [[0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1]]
+
+    @param payloads: armored payloads that are at least numchars long
+    @param numchars: number of characters to use from each payload
+    @return: uint8 array with one row of 6*numchars bits per payload
+    '''
+    buf = ''.join([payload[:numchars] for payload in payloads])
+    if len(buf) != numchars * len(payloads):
+        raise ValueError('payloads must have at least %d characters' % numchars)
+    sixbit = numpy.frombuffer(buf, dtype=numpy.uint8).reshape(len(payloads), numchars) - 48
+    sixbit[sixbit > 40] -= 8
+    bits = numpy.unpackbits((sixbit << 2)[:, :, numpy.newaxis], axis=2)[:, :, :6]
+    return bits.reshape(len(payloads), 6 * numchars)
+
+
+def _uint(bits, start, end):
+    weights = numpy.left_shift(1, numpy.arange(end - start - 1, -1, -1, dtype=numpy.int64))
+    return bits[:, start:end].dot(weights)
+
+
+def _int(bits, start, end):
+    val = _uint(bits, start, end)
+    return val - ((val >> (end - start - 1)) << (end - start))
+
+
+def _aisstr6(bits, start, end):
+    numchars = (end - start) / 6
+    codes = bits[:, start:end].reshape(len(bits), numchars, 6).dot(numpy.array([32, 16, 8, 4, 2, 1]))
+    return numpy.ascontiguousarray(_characterLUT[codes]).view('S%d' % numchars).ravel()
+
+
+def _commstate(bits, r):
+    'Fill in the SOTDMA commstate columns following commstate.sotdma_parse_bits'
+    timeout = r['slot_timeout']
+    sub = _uint(bits, 154, 168)
+    for name in ('received_stations', 'slot_number', 'commstate_utc_hour',
+                 'commstate_utc_min', 'commstate_utc_spare', 'slot_offset'):
+        r[name] = -1
+    has_stations = (timeout == 3) | (timeout == 5) | (timeout == 7)
+    has_slot = (timeout == 2) | (timeout == 4) | (timeout == 6)
+    has_utc = timeout == 1
+    has_offset = timeout == 0
+    r['received_stations'][has_stations] = sub[has_stations]
+    r['slot_number'][has_slot] = sub[has_slot]
+    r['commstate_utc_hour'][has_utc] = (sub >> 9)[has_utc]
+    r['commstate_utc_min'][has_utc] = ((sub >> 2) & 0x7f)[has_utc]
+    r['commstate_utc_spare'][has_utc] = (sub & 0x3)[has_utc]
+    r['slot_offset'][has_offset] = sub[has_offset]
+
+
+def decode(payloads, columns=False):
+    '''
+    Decode a batch of position reports that all have the same layout:
+    all 1 and 2, all 3, all 18, or all 19.
+
+    >>> r = decode(['15Cjtd0Oj;Jp7ilG7=UkKBoB0<06', '15Mj23P000G?q7fK>g:o7@1:0L3S'])
+    >>> r['UserID'].tolist()
+    [356302000, 366772750]
+    >>> '%.6f' % r['longitude'][0]
+    '-71.626143'
+
+    @param payloads: armored payloads (NMEA field 5).  Extra characters
+        such as pad bits are ignored.
+    @param columns: return a dict of column arrays rather than a structured array
+    @return: numpy structured array with one record per payload
+    @raise ValueError: if the payloads have different layouts or are too short
+    '''
+    if len(payloads) == 0:
+        raise ValueError('no payloads to decode')
+    first = payloads[0][:1]
+    if first not in layouts:
+        raise ValueError('not a position report: %s' % (payloads[0],))
+    fields = layouts[first]
+    for payload in payloads:
+        if layouts.get(payload[:1]) is not fields:
+            raise ValueError('mixed message layouts in batch: %s and %s' % (payloads[0], payload))
+
+    bits = payloads_to_bits(payloads, payload_chars[first])
+    r = numpy.zeros(len(payloads), dtype=dtype(fields))
+    for name, start, end, kind, scale in fields:
+        if kind in ('uint', 'bool'): r[name] = _uint(bits, start, end)
+        elif kind == 'int': r[name] = _int(bits, start, end)
+        elif kind == 'udecimal': r[name] = _uint(bits, start, end) / scale
+        elif kind == 'decimal': r[name] = _int(bits, start, end) / scale
+        elif kind == 'aisstr6': r[name] = _aisstr6(bits, start, end)
+    if fields is msg_1_fields:
+        _commstate(bits, r)
+
+    if columns:
+        return dict([(name, r[name]) for name in r.dtype.names])
+    return r
+
+
+def record_to_dict(record):
+    '''
+    Convert one record from decode() to a dict like decode(bv, numeric='float')
+
+    Commstate fields that do not apply to the message are left out.
+    '''
+    r = {}
+    for name in record.dtype.names:
+        value = record[name].item()
+        if value == -1 and name in commstate_fields:
+            continue  # Not used by this message
+        r[name] = value
+    return r
+
+
+def decoded_lines(lines, chunk_size=10000):
+    '''
+    Generator that decodes the position reports of a stream of NMEA lines
+    in batches.  Lines are yielded in the order that they were read.
+
+    @param lines: iterable of NMEA lines (e.g. an open file)
+    @param chunk_size: number of lines to read before decoding
+    @return: (line, msg_dict) where msg_dict is None for lines that were
+        not decoded (not single sentence 1, 2, 3, 18, or 19 messages of
+        the right length)
+    '''
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            for result in _decode_chunk(chunk):
+                yield result
+            chunk = []
+    for result in _decode_chunk(chunk):
+        yield result
+
+
+def _decode_chunk(lines):
+    msg_dicts = [None] * len(lines)
+    groups = {}  # layout -> (indices, payloads)
+    for index, line in enumerate(lines):
+        fields = line.split(',', 7)
+        if len(fields) < 7 or fields[1] != '1': continue
+        payload = fields[5]
+        first = payload[:1]
+        if first not in layouts: continue
+        if len(payload) != payload_chars[first]: continue
+        indices, payloads = groups.setdefault(id(layouts[first]), ([], []))
+        indices.append(index)
+        payloads.append(payload)
+    for indices, payloads in groups.values():
+        records = decode(payloads)
+        for index, record in zip(indices, records):
+            msg_dicts[index] = record_to_dict(record)
+    return zip(lines, msg_dicts)
@@ -0,0 +1,112 @@
+"""Cache decoded messages by their armored payload.
+
+On a network of receivers the same message is heard by several
+stations, so the same payload shows up again within a second or two.
+DecodeCache keeps the most recently used decoded messages so that the
+copies do not need to be decoded again.
+
+>>> cache = DecodeCache(max_size=2)
+>>> cache.decode('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06')['UserID']
+356302000
+>>> cache.decode('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06')['UserID']
+356302000
+>>> cache.hits, cache.misses
+(1, 1)
+
+License: Apache 2.0
+"""
+
+from collections import OrderedDict
+import time
+
+from aisutils import binary
+import ais
+
+
+class DecodeCache(object):
+    """Bounded least recently used cache in front of the decode functions
+    of ais.msgModByFirstChar.
+
+    Entries are dropped when there are more than max_size of them
+    (evictions) or when they are older than ttl_sec (expired).  Message
+    timestamps (e.g. the USCG cg_sec) can be passed in so that the time
+    to live follows the data rather than the wall clock when replaying
+    old logs.
+
+    @ivar hits: decodes answered from the cache
+    @ivar misses: decodes that had to be done
+    @ivar evictions: entries dropped to stay under max_size
+    @ivar expired: entries dropped because they were older than ttl_sec
+    """
+
+    def __init__(self, max_size=10000, ttl_sec=None, numeric='decimal'):
+        """
+        @param max_size: most decoded messages to keep
+        @param ttl_sec: seconds to keep a decoded message or None to keep
+            them until they are evicted
+        @param numeric: 'decimal' or 'float' passed to the decoders
+        """
+        assert max_size > 0
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self.numeric = numeric
+        self.entries = OrderedDict()  # (payload, fill_bits) -> (time, msg_dict)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def decode(self, payload, fill_bits=0, timestamp=None):
+        """Decode a payload or get the decoded message from the cache.
+
+        @param payload: armored AIS payload (NMEA field 5) of a complete message
+        @param fill_bits: number of pad bits at the end of the payload
+        @param timestamp: UNIX UTC seconds of the message for the time to
+            live [default: now]
+        @return: decoded message.  This is a copy that the caller may change.
+        @rtype: dict
+        @raise KeyError: message type not in ais.msgModByFirstChar
+        """
+        key = (payload, fill_bits)
+        if self.ttl_sec is not None and timestamp is None:
+            timestamp = time.time()
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            if self.ttl_sec is not None and timestamp - entry[0] > self.ttl_sec:
+                self.expired += 1
+                entry = None
+            else:
+                self.hits += 1
+                self.entries[key] = entry  # Now the most recently used
+                return dict(entry[1])
+
+        self.misses += 1
+        bits = binary.ais6topackedbits(payload)
+        if fill_bits:
+            bits = bits[:len(bits) - fill_bits]
+        msg_dict = ais.msgModByFirstChar[payload[0]].decode(bits, numeric=self.numeric)
+        self.entries[key] = (timestamp, msg_dict)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return dict(msg_dict)
+
+    def stats(self):
+        """
+        @return: counters for logging
+        @rtype: dict
+        """
+        return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'expired': self.expired}
+
+    def __str__(self):
+        total = self.hits + self.misses
+        rate = 0.
+        if total:
+            rate = 100. * self.hits / total
+        return ('decode cache: %(size)d entries, %(hits)d hits, %(misses)d misses, '
+                '%(evictions)d evictions, %(expired)d expired' % self.stats()
+                + ' (%.1f%% hit rate)' % rate)
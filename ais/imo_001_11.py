@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -354,7 +353,178 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 8
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    v = (v << 10) | 1
+    v = (v << 6) | 11
+    if 'latitude' in params:
+        x = int(Decimal(params['latitude'])*Decimal('60000'))
+    else:
+        x = 5460000
+    if not -0x800000 <= x < 0x800000: raise ValueError('latitude does not fit in 24 bits: %r' % (x,))
+    v = (v << 24) | (x & 0xffffff)
+    if 'longitude' in params:
+        x = int(Decimal(params['longitude'])*Decimal('60000'))
+    else:
+        x = 10860000
+    if not -0x1000000 <= x < 0x1000000: raise ValueError('longitude does not fit in 25 bits: %r' % (x,))
+    v = (v << 25) | (x & 0x1ffffff)
+    x = params['day']
+    if x >> 5: raise ValueError('day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('hour',31)
+    if x >> 5: raise ValueError('hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('min',63)
+    if x >> 6: raise ValueError('min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('avewind',127)
+    if x >> 7: raise ValueError('avewind does not fit in 7 bits: %r' % (x,))
+    v = (v << 7) | x
+    x = params.get('windgust',127)
+    if x >> 7: raise ValueError('windgust does not fit in 7 bits: %r' % (x,))
+    v = (v << 7) | x
+    x = params.get('winddir',511)
+    if x >> 9: raise ValueError('winddir does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('windgustdir',511)
+    if x >> 9: raise ValueError('windgustdir does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    if 'airtemp' in params:
+        x = int(Decimal(params['airtemp'])*Decimal('10'))
+    else:
+        x = 1023
+    if not -0x400 <= x < 0x400: raise ValueError('airtemp does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | (x & 0x7ff)
+    x = params.get('relhumid',127)
+    if x >> 7: raise ValueError('relhumid does not fit in 7 bits: %r' % (x,))
+    v = (v << 7) | x
+    if 'dewpoint' in params:
+        x = int(Decimal(params['dewpoint'])*Decimal('10'))
+    else:
+        x = 511
+    if not -0x200 <= x < 0x200: raise ValueError('dewpoint does not fit in 10 bits: %r' % (x,))
+    v = (v << 10) | (x & 0x3ff)
+    if 'airpressure' in params:
+        x = int(Decimal(params['airpressure']-(800))*Decimal('1'))
+    else:
+        x = 1311
+    if x >> 9: raise ValueError('airpressure does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('airpressuretrend',3)
+    if x >> 2: raise ValueError('airpressuretrend does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    if 'horizvis' in params:
+        x = int(Decimal(params['horizvis'])*Decimal('10'))
+    else:
+        x = 255
+    if x >> 8: raise ValueError('horizvis does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = int(Decimal(params['waterlevel'])*Decimal('10'))
+    if not -0x100 <= x < 0x100: raise ValueError('waterlevel does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | (x & 0x1ff)
+    x = params.get('waterleveltrend',3)
+    if x >> 2: raise ValueError('waterleveltrend does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    if 'surfcurspeed' in params:
+        x = int(Decimal(params['surfcurspeed'])*Decimal('10'))
+    else:
+        x = 255
+    if x >> 8: raise ValueError('surfcurspeed does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params.get('surfcurdir',511)
+    if x >> 9: raise ValueError('surfcurdir does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    if 'curspeed2' in params:
+        x = int(Decimal(params['curspeed2'])*Decimal('10'))
+    else:
+        x = 255
+    if x >> 8: raise ValueError('curspeed2 does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params.get('curdir2',511)
+    if x >> 9: raise ValueError('curdir2 does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('curlevel2',31)
+    if x >> 5: raise ValueError('curlevel2 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    if 'curspeed3' in params:
+        x = int(Decimal(params['curspeed3'])*Decimal('10'))
+    else:
+        x = 255
+    if x >> 8: raise ValueError('curspeed3 does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params.get('curdir3',511)
+    if x >> 9: raise ValueError('curdir3 does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('curlevel3',31)
+    if x >> 5: raise ValueError('curlevel3 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    if 'sigwaveheight' in params:
+        x = int(Decimal(params['sigwaveheight'])*Decimal('10'))
+    else:
+        x = 255
+    if x >> 8: raise ValueError('sigwaveheight does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params.get('waveperiod',63)
+    if x >> 6: raise ValueError('waveperiod does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('wavedir',511)
+    if x >> 9: raise ValueError('wavedir does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    if 'swellheight' in params:
+        x = int(Decimal(params['swellheight'])*Decimal('10'))
+    else:
+        x = 255
+    if x >> 8: raise ValueError('swellheight does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params.get('swellperiod',63)
+    if x >> 6: raise ValueError('swellperiod does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('swelldir',511)
+    if x >> 9: raise ValueError('swelldir does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    x = params.get('seastate',15)
+    if x >> 4: raise ValueError('seastate does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    if 'watertemp' in params:
+        x = int(Decimal(params['watertemp']-(-10))*Decimal('10'))
+    else:
+        x = 923
+    if x >> 10: raise ValueError('watertemp does not fit in 10 bits: %r' % (x,))
+    v = (v << 10) | x
+    x = params.get('preciptype',7)
+    if x >> 3: raise ValueError('preciptype does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    if 'salinity' in params:
+        x = int(Decimal(params['salinity'])*Decimal('10'))
+    else:
+        x = 923
+    if not -0x100 <= x < 0x100: raise ValueError('salinity does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | (x & 0x1ff)
+    x = params.get('ice',3)
+    if x >> 2: raise ValueError('ice does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    v = (v << 6) | 0
+    return binary.PackedBits(v,352)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a imo_met_hydro message.
 
     Fields in params:
@@ -404,10 +574,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -418,8 +591,8 @@ def decode(bv, validate=False):
     r['Spare']=0
     r['dac']=1
     r['fid']=11
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[56:80]))/Decimal('60000')
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[80:105]))/Decimal('60000')
+    r['latitude']=Decimal(binary.signedIntFromBV(bv[56:80]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[56:80])/60000.0
+    r['longitude']=Decimal(binary.signedIntFromBV(bv[80:105]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[80:105])/60000.0
     r['day']=int(bv[105:110])
     r['hour']=int(bv[110:115])
     r['min']=int(bv[115:121])
@@ -427,163 +600,177 @@ def decode(bv, validate=False):
     r['windgust']=int(bv[128:135])
     r['winddir']=int(bv[135:144])
     r['windgustdir']=int(bv[144:153])
-    r['airtemp']=Decimal(binary.signedIntFromBV(bv[153:164]))/Decimal('10')
+    r['airtemp']=Decimal(binary.signedIntFromBV(bv[153:164]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[153:164])/10.0
     r['relhumid']=int(bv[164:171])
-    r['dewpoint']=Decimal(binary.signedIntFromBV(bv[171:181]))/Decimal('10')
-    r['airpressure']=Decimal(int(bv[181:190]))/Decimal('1')+Decimal('800')
+    r['dewpoint']=Decimal(binary.signedIntFromBV(bv[171:181]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[171:181])/10.0
+    r['airpressure']=Decimal(int(bv[181:190]))/Decimal('1')+Decimal('800') if 'float'!=numeric else int(bv[181:190])/1.0+800.0
     r['airpressuretrend']=int(bv[190:192])
-    r['horizvis']=Decimal(int(bv[192:200]))/Decimal('10')
-    r['waterlevel']=Decimal(binary.signedIntFromBV(bv[200:209]))/Decimal('10')
+    r['horizvis']=Decimal(int(bv[192:200]))/Decimal('10') if 'float'!=numeric else int(bv[192:200])/10.0
+    r['waterlevel']=Decimal(binary.signedIntFromBV(bv[200:209]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[200:209])/10.0
     r['waterleveltrend']=int(bv[209:211])
-    r['surfcurspeed']=Decimal(int(bv[211:219]))/Decimal('10')
+    r['surfcurspeed']=Decimal(int(bv[211:219]))/Decimal('10') if 'float'!=numeric else int(bv[211:219])/10.0
     r['surfcurdir']=int(bv[219:228])
-    r['curspeed2']=Decimal(int(bv[228:236]))/Decimal('10')
+    r['curspeed2']=Decimal(int(bv[228:236]))/Decimal('10') if 'float'!=numeric else int(bv[228:236])/10.0
     r['curdir2']=int(bv[236:245])
     r['curlevel2']=int(bv[245:250])
-    r['curspeed3']=Decimal(int(bv[250:258]))/Decimal('10')
+    r['curspeed3']=Decimal(int(bv[250:258]))/Decimal('10') if 'float'!=numeric else int(bv[250:258])/10.0
     r['curdir3']=int(bv[258:267])
     r['curlevel3']=int(bv[267:272])
-    r['sigwaveheight']=Decimal(int(bv[272:280]))/Decimal('10')
+    r['sigwaveheight']=Decimal(int(bv[272:280]))/Decimal('10') if 'float'!=numeric else int(bv[272:280])/10.0
     r['waveperiod']=int(bv[280:286])
     r['wavedir']=int(bv[286:295])
-    r['swellheight']=Decimal(int(bv[295:303]))/Decimal('10')
+    r['swellheight']=Decimal(int(bv[295:303]))/Decimal('10') if 'float'!=numeric else int(bv[295:303])/10.0
     r['swellperiod']=int(bv[303:309])
     r['swelldir']=int(bv[309:318])
     r['seastate']=int(bv[318:322])
-    r['watertemp']=Decimal(int(bv[322:332]))/Decimal('10')+Decimal('-10')
+    r['watertemp']=Decimal(int(bv[322:332]))/Decimal('10')+Decimal('-10') if 'float'!=numeric else int(bv[322:332])/10.0-10.0
     r['preciptype']=int(bv[332:335])
-    r['salinity']=Decimal(binary.signedIntFromBV(bv[335:344]))/Decimal('10')
+    r['salinity']=Decimal(binary.signedIntFromBV(bv[335:344]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[335:344])/10.0
     r['ice']=int(bv[344:346])
     r['Spare2']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[56:80]))/Decimal('60000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[56:80]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[56:80])/60000.0
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[80:105]))/Decimal('60000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[80:105]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[80:105])/60000.0
 
-def decodeday(bv, validate=False):
+def decodeday(bv, validate=False, numeric='decimal'):
     return int(bv[105:110])
 
-def decodehour(bv, validate=False):
+def decodehour(bv, validate=False, numeric='decimal'):
     return int(bv[110:115])
 
-def decodemin(bv, validate=False):
+def decodemin(bv, validate=False, numeric='decimal'):
     return int(bv[115:121])
 
-def decodeavewind(bv, validate=False):
+def decodeavewind(bv, validate=False, numeric='decimal'):
     return int(bv[121:128])
 
-def decodewindgust(bv, validate=False):
+def decodewindgust(bv, validate=False, numeric='decimal'):
     return int(bv[128:135])
 
-def decodewinddir(bv, validate=False):
+def decodewinddir(bv, validate=False, numeric='decimal'):
     return int(bv[135:144])
 
-def decodewindgustdir(bv, validate=False):
+def decodewindgustdir(bv, validate=False, numeric='decimal'):
     return int(bv[144:153])
 
-def decodeairtemp(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[153:164]))/Decimal('10')
+def decodeairtemp(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[153:164]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[153:164])/10.0
 
-def decoderelhumid(bv, validate=False):
+def decoderelhumid(bv, validate=False, numeric='decimal'):
     return int(bv[164:171])
 
-def decodedewpoint(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[171:181]))/Decimal('10')
+def decodedewpoint(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[171:181]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[171:181])/10.0
 
-def decodeairpressure(bv, validate=False):
-    return Decimal(int(bv[181:190]))/Decimal('1')+Decimal('800')
+def decodeairpressure(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[181:190]))/Decimal('1')+Decimal('800') if 'float'!=numeric else int(bv[181:190])/1.0+800.0
 
-def decodeairpressuretrend(bv, validate=False):
+def decodeairpressuretrend(bv, validate=False, numeric='decimal'):
     return int(bv[190:192])
 
-def decodehorizvis(bv, validate=False):
-    return Decimal(int(bv[192:200]))/Decimal('10')
+def decodehorizvis(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[192:200]))/Decimal('10') if 'float'!=numeric else int(bv[192:200])/10.0
 
-def decodewaterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[200:209]))/Decimal('10')
+def decodewaterlevel(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[200:209]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[200:209])/10.0
 
-def decodewaterleveltrend(bv, validate=False):
+def decodewaterleveltrend(bv, validate=False, numeric='decimal'):
     return int(bv[209:211])
 
-def decodesurfcurspeed(bv, validate=False):
-    return Decimal(int(bv[211:219]))/Decimal('10')
+def decodesurfcurspeed(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[211:219]))/Decimal('10') if 'float'!=numeric else int(bv[211:219])/10.0
 
-def decodesurfcurdir(bv, validate=False):
+def decodesurfcurdir(bv, validate=False, numeric='decimal'):
     return int(bv[219:228])
 
-def decodecurspeed2(bv, validate=False):
-    return Decimal(int(bv[228:236]))/Decimal('10')
+def decodecurspeed2(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[228:236]))/Decimal('10') if 'float'!=numeric else int(bv[228:236])/10.0
 
-def decodecurdir2(bv, validate=False):
+def decodecurdir2(bv, validate=False, numeric='decimal'):
     return int(bv[236:245])
 
-def decodecurlevel2(bv, validate=False):
+def decodecurlevel2(bv, validate=False, numeric='decimal'):
     return int(bv[245:250])
 
-def decodecurspeed3(bv, validate=False):
-    return Decimal(int(bv[250:258]))/Decimal('10')
+def decodecurspeed3(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[250:258]))/Decimal('10') if 'float'!=numeric else int(bv[250:258])/10.0
 
-def decodecurdir3(bv, validate=False):
+def decodecurdir3(bv, validate=False, numeric='decimal'):
     return int(bv[258:267])
 
-def decodecurlevel3(bv, validate=False):
+def decodecurlevel3(bv, validate=False, numeric='decimal'):
     return int(bv[267:272])
 
-def decodesigwaveheight(bv, validate=False):
-    return Decimal(int(bv[272:280]))/Decimal('10')
+def decodesigwaveheight(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[272:280]))/Decimal('10') if 'float'!=numeric else int(bv[272:280])/10.0
 
-def decodewaveperiod(bv, validate=False):
+def decodewaveperiod(bv, validate=False, numeric='decimal'):
     return int(bv[280:286])
 
-def decodewavedir(bv, validate=False):
+def decodewavedir(bv, validate=False, numeric='decimal'):
     return int(bv[286:295])
 
-def decodeswellheight(bv, validate=False):
-    return Decimal(int(bv[295:303]))/Decimal('10')
+def decodeswellheight(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[295:303]))/Decimal('10') if 'float'!=numeric else int(bv[295:303])/10.0
 
-def decodeswellperiod(bv, validate=False):
+def decodeswellperiod(bv, validate=False, numeric='decimal'):
     return int(bv[303:309])
 
-def decodeswelldir(bv, validate=False):
+def decodeswelldir(bv, validate=False, numeric='decimal'):
     return int(bv[309:318])
 
-def decodeseastate(bv, validate=False):
+def decodeseastate(bv, validate=False, numeric='decimal'):
     return int(bv[318:322])
 
-def decodewatertemp(bv, validate=False):
-    return Decimal(int(bv[322:332]))/Decimal('10')+Decimal('-10')
+def decodewatertemp(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[322:332]))/Decimal('10')+Decimal('-10') if 'float'!=numeric else int(bv[322:332])/10.0-10.0
 
-def decodepreciptype(bv, validate=False):
+def decodepreciptype(bv, validate=False, numeric='decimal'):
     return int(bv[332:335])
 
-def decodesalinity(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[335:344]))/Decimal('10')
+def decodesalinity(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[335:344]))/Decimal('10') if 'float'!=numeric else binary.signedIntFromBV(bv[335:344])/10.0
 
-def decodeice(bv, validate=False):
+def decodeice(bv, validate=False, numeric='decimal'):
     return int(bv[344:346])
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1905,6 +2092,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -40,7 +40,6 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import sqlhelp
-from aisutils import uscg
 from aisutils import binary
 
 # FIX: check to see if these will be needed
@@ -1923,6 +1922,7 @@ def main():
 
 		# FIX: Do not emit this option for the binary message payloads.  Does not make sense.
 		elif 'nmea'==options.ioType:
+                    from aisutils import uscg
                     nmea = uscg.create_nmea(bits)
                     print nmea
 		else: sys.exit('ERROR: unknown ioType.  Help!')
@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -169,7 +168,67 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 8
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    v = (v << 10) | 1
+    v = (v << 6) | 11
+    x = params.get('reason','@@@@@@@@@@@@@@@@@@@@')
+    v = (v << 120) | aisstring.encodeInt(x,120)
+    x = params.get('from','@@@@@@@@@@@@@@@@@@@@')
+    v = (v << 120) | aisstring.encodeInt(x,120)
+    x = params.get('to','@@@@@@@@@@@@@@@@@@@@')
+    v = (v << 120) | aisstring.encodeInt(x,120)
+    x = params.get('radius',1001)
+    if x >> 10: raise ValueError('radius does not fit in 10 bits: %r' % (x,))
+    v = (v << 10) | x
+    x = params['unit']
+    if x >> 2: raise ValueError('unit does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['closingday']
+    if x >> 5: raise ValueError('closingday does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['closingmonth']
+    if x >> 4: raise ValueError('closingmonth does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['fromhour']
+    if x >> 5: raise ValueError('fromhour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['frommin']
+    if x >> 6: raise ValueError('frommin does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['today']
+    if x >> 5: raise ValueError('today does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['tomonth']
+    if x >> 4: raise ValueError('tomonth does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['tohour']
+    if x >> 5: raise ValueError('tohour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['tomin']
+    if x >> 6: raise ValueError('tomin does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    v = (v << 4) | 0
+    return binary.PackedBits(v,472)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a imo_fairway_closed message.
 
     Fields in params:
@@ -196,10 +255,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -226,64 +288,64 @@ def decode(bv, validate=False):
     r['spare2']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodereason(bv, validate=False):
+def decodereason(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[56:176])
 
-def decodefrom(bv, validate=False):
+def decodefrom(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[176:296])
 
-def decodeto(bv, validate=False):
+def decodeto(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[296:416])
 
-def decoderadius(bv, validate=False):
+def decoderadius(bv, validate=False, numeric='decimal'):
     return int(bv[416:426])
 
-def decodeunit(bv, validate=False):
+def decodeunit(bv, validate=False, numeric='decimal'):
     return int(bv[426:428])
 
-def decodeclosingday(bv, validate=False):
+def decodeclosingday(bv, validate=False, numeric='decimal'):
     return int(bv[428:433])
 
-def decodeclosingmonth(bv, validate=False):
+def decodeclosingmonth(bv, validate=False, numeric='decimal'):
     return int(bv[433:437])
 
-def decodefromhour(bv, validate=False):
+def decodefromhour(bv, validate=False, numeric='decimal'):
     return int(bv[437:442])
 
-def decodefrommin(bv, validate=False):
+def decodefrommin(bv, validate=False, numeric='decimal'):
     return int(bv[442:448])
 
-def decodetoday(bv, validate=False):
+def decodetoday(bv, validate=False, numeric='decimal'):
     return int(bv[448:453])
 
-def decodetomonth(bv, validate=False):
+def decodetomonth(bv, validate=False, numeric='decimal'):
     return int(bv[453:457])
 
-def decodetohour(bv, validate=False):
+def decodetohour(bv, validate=False, numeric='decimal'):
     return int(bv[457:462])
 
-def decodetomin(bv, validate=False):
+def decodetomin(bv, validate=False, numeric='decimal'):
     return int(bv[462:468])
 
-def decodespare2(bv, validate=False):
+def decodespare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1013,6 +1075,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
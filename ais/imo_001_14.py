@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -305,7 +304,143 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 6
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['SeqNum']
+    if x >> 2: raise ValueError('SeqNum does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['DestinationID']
+    if x >> 30: raise ValueError('DestinationID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    x = params['RetransmitFlag']
+    v = (v << 1) | (1 if x else 0)
+    v = (v << 1) | 0
+    v = (v << 10) | 1
+    v = (v << 6) | 11
+    x = params.get('month',0)
+    if x >> 4: raise ValueError('month does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params.get('day',0)
+    if x >> 5: raise ValueError('day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    if 'window1_longitude' in params:
+        x = int(Decimal(params['window1_longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('window1_longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'window1_latitude' in params:
+        x = int(Decimal(params['window1_latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('window1_latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('fromhour1',24)
+    if x >> 5: raise ValueError('fromhour1 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('frommin1',60)
+    if x >> 6: raise ValueError('frommin1 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('tohour1',24)
+    if x >> 5: raise ValueError('tohour1 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('tomin1',60)
+    if x >> 6: raise ValueError('tomin1 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('curdir1',360)
+    if x >> 9: raise ValueError('curdir1 does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    if 'curspeed1' in params:
+        x = int(Decimal(params['curspeed1'])*Decimal('10'))
+    else:
+        x = 127
+    if x >> 7: raise ValueError('curspeed1 does not fit in 7 bits: %r' % (x,))
+    v = (v << 7) | x
+    if 'window2_longitude' in params:
+        x = int(Decimal(params['window2_longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('window2_longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'window2_latitude' in params:
+        x = int(Decimal(params['window2_latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('window2_latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('fromhour2',24)
+    if x >> 5: raise ValueError('fromhour2 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('frommin2',60)
+    if x >> 6: raise ValueError('frommin2 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('tohour2',24)
+    if x >> 5: raise ValueError('tohour2 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('tomin2',60)
+    if x >> 6: raise ValueError('tomin2 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('curdir2',360)
+    if x >> 9: raise ValueError('curdir2 does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    if 'curspeed2' in params:
+        x = int(Decimal(params['curspeed2'])*Decimal('10'))
+    else:
+        x = 127
+    if x >> 7: raise ValueError('curspeed2 does not fit in 7 bits: %r' % (x,))
+    v = (v << 7) | x
+    if 'window3_longitude' in params:
+        x = int(Decimal(params['window3_longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('window3_longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'window3_latitude' in params:
+        x = int(Decimal(params['window3_latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('window3_latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('fromhour3',24)
+    if x >> 5: raise ValueError('fromhour3 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('frommin3',60)
+    if x >> 6: raise ValueError('frommin3 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('tohour3',24)
+    if x >> 5: raise ValueError('tohour3 does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('tomin3',60)
+    if x >> 6: raise ValueError('tomin3 does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('curdir3',360)
+    if x >> 9: raise ValueError('curdir3 does not fit in 9 bits: %r' % (x,))
+    v = (v << 9) | x
+    if 'curspeed3' in params:
+        x = int(Decimal(params['curspeed3'])*Decimal('10'))
+    else:
+        x = 127
+    if x >> 7: raise ValueError('curspeed3 does not fit in 7 bits: %r' % (x,))
+    v = (v << 7) | x
+    return binary.PackedBits(v,376)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a imo_tidal_window message.
 
     Fields in params:
@@ -347,10 +482,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -366,136 +504,145 @@ def decode(bv, validate=False):
     r['fid']=11
     r['month']=int(bv[88:92])
     r['day']=int(bv[92:97])
-    r['window1_longitude']=Decimal(binary.signedIntFromBV(bv[97:125]))/Decimal('600000')
-    r['window1_latitude']=Decimal(binary.signedIntFromBV(bv[125:152]))/Decimal('600000')
+    r['window1_longitude']=Decimal(binary.signedIntFromBV(bv[97:125]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[97:125])/600000.0
+    r['window1_latitude']=Decimal(binary.signedIntFromBV(bv[125:152]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[125:152])/600000.0
     r['fromhour1']=int(bv[152:157])
     r['frommin1']=int(bv[157:163])
     r['tohour1']=int(bv[163:168])
     r['tomin1']=int(bv[168:174])
     r['curdir1']=int(bv[174:183])
-    r['curspeed1']=Decimal(int(bv[183:190]))/Decimal('10')
-    r['window2_longitude']=Decimal(binary.signedIntFromBV(bv[190:218]))/Decimal('600000')
-    r['window2_latitude']=Decimal(binary.signedIntFromBV(bv[218:245]))/Decimal('600000')
+    r['curspeed1']=Decimal(int(bv[183:190]))/Decimal('10') if 'float'!=numeric else int(bv[183:190])/10.0
+    r['window2_longitude']=Decimal(binary.signedIntFromBV(bv[190:218]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[190:218])/600000.0
+    r['window2_latitude']=Decimal(binary.signedIntFromBV(bv[218:245]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[218:245])/600000.0
     r['fromhour2']=int(bv[245:250])
     r['frommin2']=int(bv[250:256])
     r['tohour2']=int(bv[256:261])
     r['tomin2']=int(bv[261:267])
     r['curdir2']=int(bv[267:276])
-    r['curspeed2']=Decimal(int(bv[276:283]))/Decimal('10')
-    r['window3_longitude']=Decimal(binary.signedIntFromBV(bv[283:311]))/Decimal('600000')
-    r['window3_latitude']=Decimal(binary.signedIntFromBV(bv[311:338]))/Decimal('600000')
+    r['curspeed2']=Decimal(int(bv[276:283]))/Decimal('10') if 'float'!=numeric else int(bv[276:283])/10.0
+    r['window3_longitude']=Decimal(binary.signedIntFromBV(bv[283:311]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[283:311])/600000.0
+    r['window3_latitude']=Decimal(binary.signedIntFromBV(bv[311:338]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[311:338])/600000.0
     r['fromhour3']=int(bv[338:343])
     r['frommin3']=int(bv[343:349])
     r['tohour3']=int(bv[349:354])
     r['tomin3']=int(bv[354:360])
     r['curdir3']=int(bv[360:369])
-    r['curspeed3']=Decimal(int(bv[369:376]))/Decimal('10')
+    r['curspeed3']=Decimal(int(bv[369:376]))/Decimal('10') if 'float'!=numeric else int(bv[369:376])/10.0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 6
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSeqNum(bv, validate=False):
+def decodeSeqNum(bv, validate=False, numeric='decimal'):
     return int(bv[38:40])
 
-def decodeDestinationID(bv, validate=False):
+def decodeDestinationID(bv, validate=False, numeric='decimal'):
     return int(bv[40:70])
 
-def decodeRetransmitFlag(bv, validate=False):
+def decodeRetransmitFlag(bv, validate=False, numeric='decimal'):
     return bool(int(bv[70:71]))
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodemonth(bv, validate=False):
+def decodemonth(bv, validate=False, numeric='decimal'):
     return int(bv[88:92])
 
-def decodeday(bv, validate=False):
+def decodeday(bv, validate=False, numeric='decimal'):
     return int(bv[92:97])
 
-def decodewindow1_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[97:125]))/Decimal('600000')
+def decodewindow1_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[97:125]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[97:125])/600000.0
 
-def decodewindow1_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[125:152]))/Decimal('600000')
+def decodewindow1_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[125:152]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[125:152])/600000.0
 
-def decodefromhour1(bv, validate=False):
+def decodefromhour1(bv, validate=False, numeric='decimal'):
     return int(bv[152:157])
 
-def decodefrommin1(bv, validate=False):
+def decodefrommin1(bv, validate=False, numeric='decimal'):
     return int(bv[157:163])
 
-def decodetohour1(bv, validate=False):
+def decodetohour1(bv, validate=False, numeric='decimal'):
     return int(bv[163:168])
 
-def decodetomin1(bv, validate=False):
+def decodetomin1(bv, validate=False, numeric='decimal'):
     return int(bv[168:174])
 
-def decodecurdir1(bv, validate=False):
+def decodecurdir1(bv, validate=False, numeric='decimal'):
     return int(bv[174:183])
 
-def decodecurspeed1(bv, validate=False):
-    return Decimal(int(bv[183:190]))/Decimal('10')
+def decodecurspeed1(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[183:190]))/Decimal('10') if 'float'!=numeric else int(bv[183:190])/10.0
 
-def decodewindow2_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[190:218]))/Decimal('600000')
+def decodewindow2_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[190:218]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[190:218])/600000.0
 
-def decodewindow2_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[218:245]))/Decimal('600000')
+def decodewindow2_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[218:245]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[218:245])/600000.0
 
-def decodefromhour2(bv, validate=False):
+def decodefromhour2(bv, validate=False, numeric='decimal'):
     return int(bv[245:250])
 
-def decodefrommin2(bv, validate=False):
+def decodefrommin2(bv, validate=False, numeric='decimal'):
     return int(bv[250:256])
 
-def decodetohour2(bv, validate=False):
+def decodetohour2(bv, validate=False, numeric='decimal'):
     return int(bv[256:261])
 
-def decodetomin2(bv, validate=False):
+def decodetomin2(bv, validate=False, numeric='decimal'):
     return int(bv[261:267])
 
-def decodecurdir2(bv, validate=False):
+def decodecurdir2(bv, validate=False, numeric='decimal'):
     return int(bv[267:276])
 
-def decodecurspeed2(bv, validate=False):
-    return Decimal(int(bv[276:283]))/Decimal('10')
+def decodecurspeed2(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[276:283]))/Decimal('10') if 'float'!=numeric else int(bv[276:283])/10.0
 
-def decodewindow3_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[283:311]))/Decimal('600000')
+def decodewindow3_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[283:311]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[283:311])/600000.0
 
-def decodewindow3_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[311:338]))/Decimal('600000')
+def decodewindow3_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[311:338]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[311:338])/600000.0
 
-def decodefromhour3(bv, validate=False):
+def decodefromhour3(bv, validate=False, numeric='decimal'):
     return int(bv[338:343])
 
-def decodefrommin3(bv, validate=False):
+def decodefrommin3(bv, validate=False, numeric='decimal'):
     return int(bv[343:349])
 
-def decodetohour3(bv, validate=False):
+def decodetohour3(bv, validate=False, numeric='decimal'):
     return int(bv[349:354])
 
-def decodetomin3(bv, validate=False):
+def decodetomin3(bv, validate=False, numeric='decimal'):
     return int(bv[354:360])
 
-def decodecurdir3(bv, validate=False):
+def decodecurdir3(bv, validate=False, numeric='decimal'):
     return int(bv[360:369])
 
-def decodecurspeed3(bv, validate=False):
-    return Decimal(int(bv[369:376]))/Decimal('10')
+def decodecurspeed3(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(int(bv[369:376]))/Decimal('10') if 'float'!=numeric else int(bv[369:376])/10.0
 
 
 def printHtml(params, out=sys.stdout):
@@ -1580,6 +1727,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
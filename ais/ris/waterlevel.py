@@ -17,7 +17,6 @@ which should be packaged with the resulting files.
 
  TODO(schwehr):FIX: put in a description of the message here with fields and types.
 """
-import doctest
 import sys
 from decimal import Decimal
 import unittest
@@ -27,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -170,7 +168,72 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 8
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    v = (v << 10) | 0
+    v = (v << 6) | 1
+    x = params['country']
+    v = (v << 12) | aisstring.encodeInt(x,12)
+    x = params['id1_id']
+    if x >> 11: raise ValueError('id1_id does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    x = params['id1_sign']
+    if x >> 1: raise ValueError('id1_sign does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    x = int(Decimal(params['id1_waterlevel'])*Decimal('100'))
+    if not -0x400 <= x < 0x400: raise ValueError('id1_waterlevel does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | (x & 0x7ff)
+    v = (v << 2) | 0
+    x = params['id2_id']
+    if x >> 11: raise ValueError('id2_id does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    x = params['id2_sign']
+    if x >> 1: raise ValueError('id2_sign does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    x = int(Decimal(params['id2_waterlevel'])*Decimal('100'))
+    if not -0x400 <= x < 0x400: raise ValueError('id2_waterlevel does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | (x & 0x7ff)
+    v = (v << 2) | 0
+    x = params['id3_id']
+    if x >> 11: raise ValueError('id3_id does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    x = params['id3_sign']
+    if x >> 1: raise ValueError('id3_sign does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    x = int(Decimal(params['id3_waterlevel'])*Decimal('100'))
+    if not -0x400 <= x < 0x400: raise ValueError('id3_waterlevel does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | (x & 0x7ff)
+    v = (v << 2) | 0
+    x = params['id4_id']
+    if x >> 11: raise ValueError('id4_id does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | x
+    x = params['id4_sign']
+    if x >> 1: raise ValueError('id4_sign does not fit in 1 bits: %r' % (x,))
+    v = (v << 1) | x
+    x = int(Decimal(params['id4_waterlevel'])*Decimal('100'))
+    if not -0x400 <= x < 0x400: raise ValueError('id4_waterlevel does not fit in 11 bits: %r' % (x,))
+    v = (v << 11) | (x & 0x7ff)
+    v = (v << 2) | 0
+    return binary.PackedBits(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a ris_waterlevel message.
 
     Fields in params:
@@ -200,10 +263,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -217,89 +283,93 @@ def decode(bv, validate=False):
     r['country']=aisstring.decode(bv[56:68])
     r['id1_id']=int(bv[68:79])
     r['id1_sign']=int(bv[79:80])
-    r['id1_waterlevel']=Decimal(binary.signedIntFromBV(bv[80:91]))/Decimal('100')
+    r['id1_waterlevel']=Decimal(binary.signedIntFromBV(bv[80:91]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[80:91])/100.0
     r['id1_i_have_no_idea']=0
     r['id2_id']=int(bv[93:104])
     r['id2_sign']=int(bv[104:105])
-    r['id2_waterlevel']=Decimal(binary.signedIntFromBV(bv[105:116]))/Decimal('100')
+    r['id2_waterlevel']=Decimal(binary.signedIntFromBV(bv[105:116]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[105:116])/100.0
     r['id2_i_have_no_idea']=0
     r['id3_id']=int(bv[118:129])
     r['id3_sign']=int(bv[129:130])
-    r['id3_waterlevel']=Decimal(binary.signedIntFromBV(bv[130:141]))/Decimal('100')
+    r['id3_waterlevel']=Decimal(binary.signedIntFromBV(bv[130:141]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[130:141])/100.0
     r['id3_i_have_no_idea']=0
     r['id4_id']=int(bv[143:154])
     r['id4_sign']=int(bv[154:155])
-    r['id4_waterlevel']=Decimal(binary.signedIntFromBV(bv[155:166]))/Decimal('100')
+    r['id4_waterlevel']=Decimal(binary.signedIntFromBV(bv[155:166]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[155:166])/100.0
     r['id4_i_have_no_idea']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 000
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodecountry(bv, validate=False):
+def decodecountry(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[56:68])
 
-def decodeid1_id(bv, validate=False):
+def decodeid1_id(bv, validate=False, numeric='decimal'):
     return int(bv[68:79])
 
-def decodeid1_sign(bv, validate=False):
+def decodeid1_sign(bv, validate=False, numeric='decimal'):
     return int(bv[79:80])
 
-def decodeid1_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[80:91]))/Decimal('100')
+def decodeid1_waterlevel(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[80:91]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[80:91])/100.0
 
-def decodeid1_i_have_no_idea(bv, validate=False):
+def decodeid1_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeid2_id(bv, validate=False):
+def decodeid2_id(bv, validate=False, numeric='decimal'):
     return int(bv[93:104])
 
-def decodeid2_sign(bv, validate=False):
+def decodeid2_sign(bv, validate=False, numeric='decimal'):
     return int(bv[104:105])
 
-def decodeid2_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[105:116]))/Decimal('100')
+def decodeid2_waterlevel(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[105:116]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[105:116])/100.0
 
-def decodeid2_i_have_no_idea(bv, validate=False):
+def decodeid2_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeid3_id(bv, validate=False):
+def decodeid3_id(bv, validate=False, numeric='decimal'):
     return int(bv[118:129])
 
-def decodeid3_sign(bv, validate=False):
+def decodeid3_sign(bv, validate=False, numeric='decimal'):
     return int(bv[129:130])
 
-def decodeid3_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[130:141]))/Decimal('100')
+def decodeid3_waterlevel(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[130:141]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[130:141])/100.0
 
-def decodeid3_i_have_no_idea(bv, validate=False):
+def decodeid3_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeid4_id(bv, validate=False):
+def decodeid4_id(bv, validate=False, numeric='decimal'):
     return int(bv[143:154])
 
-def decodeid4_sign(bv, validate=False):
+def decodeid4_sign(bv, validate=False, numeric='decimal'):
     return int(bv[154:155])
 
-def decodeid4_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[155:166]))/Decimal('100')
+def decodeid4_waterlevel(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[155:166]))/Decimal('100') if 'float'!=numeric else binary.signedIntFromBV(bv[155:166])/100.0
 
-def decodeid4_i_have_no_idea(bv, validate=False):
+def decodeid4_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1059,6 +1129,7 @@ def main():
             if options.verbose:
               sys.argv.append('-v')
 
+            import doctest
             numfail, numtests = doctest.testmod()
             if not numfail:
                 print 'ok'
@@ -1134,6 +1205,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -17,7 +17,6 @@ which should be packaged with the resulting files.
 
  TODO(schwehr):FIX: put in a description of the message here with fields and types.
 """
-import doctest
 import sys
 from decimal import Decimal
 import unittest
@@ -27,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -123,7 +121,49 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    x = params['time_month']
+    if x >> 4: raise ValueError('time_month does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['time_day']
+    if x >> 5: raise ValueError('time_day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time_hour']
+    if x >> 5: raise ValueError('time_hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time_min']
+    if x >> 6: raise ValueError('time_min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('lockid','@@@@@@@')
+    v = (v << 42) | aisstring.encodeInt(x,42)
+    if 'pos_longitude' in params:
+        x = int(Decimal(params['pos_longitude'])*Decimal('60000'))
+    else:
+        x = 10860000
+    if not -0x1000000 <= x < 0x1000000: raise ValueError('pos_longitude does not fit in 25 bits: %r' % (x,))
+    v = (v << 25) | (x & 0x1ffffff)
+    if 'pos_latitude' in params:
+        x = int(Decimal(params['pos_latitude'])*Decimal('60000'))
+    else:
+        x = 5460000
+    if not -0x800000 <= x < 0x800000: raise ValueError('pos_latitude does not fit in 24 bits: %r' % (x,))
+    v = (v << 24) | (x & 0xffffff)
+    v = (v << 19) | 0
+    x = params['lockschedules']
+    v = (v << len(x)) | int(x)
+    return binary.PackedBits(v,130+len(params['lockschedules']))
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a sls_lockorder message.
 
     Fields in params:
@@ -139,10 +179,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -152,37 +195,39 @@ def decode(bv, validate=False):
     r['time_hour']=int(bv[9:14])
     r['time_min']=int(bv[14:20])
     r['lockid']=aisstring.decode(bv[20:62])
-    r['pos_longitude']=Decimal(binary.signedIntFromBV(bv[62:87]))/Decimal('60000')
-    r['pos_latitude']=Decimal(binary.signedIntFromBV(bv[87:111]))/Decimal('60000')
+    r['pos_longitude']=Decimal(binary.signedIntFromBV(bv[62:87]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[62:87])/60000.0
+    r['pos_latitude']=Decimal(binary.signedIntFromBV(bv[87:111]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[87:111])/60000.0
     r['reserved']=0
     r['lockschedules']=bv[130:]
     return r
 
-def decodetime_month(bv, validate=False):
+def decodetime_month(bv, validate=False, numeric='decimal'):
     return int(bv[0:4])
 
-def decodetime_day(bv, validate=False):
+def decodetime_day(bv, validate=False, numeric='decimal'):
     return int(bv[4:9])
 
-def decodetime_hour(bv, validate=False):
+def decodetime_hour(bv, validate=False, numeric='decimal'):
     return int(bv[9:14])
 
-def decodetime_min(bv, validate=False):
+def decodetime_min(bv, validate=False, numeric='decimal'):
     return int(bv[14:20])
 
-def decodelockid(bv, validate=False):
+def decodelockid(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[20:62])
 
-def decodepos_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[62:87]))/Decimal('60000')
+def decodepos_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[62:87]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[62:87])/60000.0
 
-def decodepos_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[87:111]))/Decimal('60000')
+def decodepos_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[87:111]))/Decimal('60000') if 'float'!=numeric else binary.signedIntFromBV(bv[87:111])/60000.0
 
-def decodereserved(bv, validate=False):
+def decodereserved(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodelockschedules(bv, validate=False):
+def decodelockschedules(bv, validate=False, numeric='decimal'):
     return bv[130:]
 
 
@@ -690,6 +735,7 @@ def main():
             if options.verbose:
               sys.argv.append('-v')
 
+            import doctest
             numfail, numtests = doctest.testmod()
             if not numfail:
                 print 'ok'
@@ -744,6 +790,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -17,7 +17,6 @@ which should be packaged with the resulting files.
 
  TODO(schwehr):FIX: put in a description of the message here with fields and types.
 """
-import doctest
 import sys
 from decimal import Decimal
 import unittest
@@ -27,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -107,7 +105,37 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    x = params.get('vessel','@@@@@@@@@@@@@@@')
+    v = (v << 90) | aisstring.encodeInt(x,90)
+    x = params['direction']
+    v = (v << 1) | (1 if x else 0)
+    x = params['ETA_month']
+    if x >> 4: raise ValueError('ETA_month does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['ETA_day']
+    if x >> 5: raise ValueError('ETA_day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['ETA_hour']
+    if x >> 5: raise ValueError('ETA_hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['ETA_min']
+    if x >> 6: raise ValueError('ETA_min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    v = (v << 19) | 0
+    return binary.PackedBits(v,130)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a sls_lockschedule message.
 
     Fields in params:
@@ -121,10 +149,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -138,25 +169,25 @@ def decode(bv, validate=False):
     r['reserved']=0
     return r
 
-def decodevessel(bv, validate=False):
+def decodevessel(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[0:90])
 
-def decodedirection(bv, validate=False):
+def decodedirection(bv, validate=False, numeric='decimal'):
     return bool(int(bv[90:91]))
 
-def decodeETA_month(bv, validate=False):
+def decodeETA_month(bv, validate=False, numeric='decimal'):
     return int(bv[91:95])
 
-def decodeETA_day(bv, validate=False):
+def decodeETA_day(bv, validate=False, numeric='decimal'):
     return int(bv[95:100])
 
-def decodeETA_hour(bv, validate=False):
+def decodeETA_hour(bv, validate=False, numeric='decimal'):
     return int(bv[100:105])
 
-def decodeETA_min(bv, validate=False):
+def decodeETA_min(bv, validate=False, numeric='decimal'):
     return int(bv[105:111])
 
-def decodereserved(bv, validate=False):
+def decodereserved(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -602,6 +633,7 @@ def main():
             if options.verbose:
               sys.argv.append('-v')
 
+            import doctest
             numfail, numtests = doctest.testmod()
             if not numfail:
                 print 'ok'
@@ -652,6 +684,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
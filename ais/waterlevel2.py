@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -152,7 +151,56 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 8
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    v = (v << 10) | 366
+    v = (v << 6) | 63
+    x = params['month']
+    if x >> 4: raise ValueError('month does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['day']
+    if x >> 5: raise ValueError('day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['hour']
+    if x >> 5: raise ValueError('hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['min']
+    if x >> 6: raise ValueError('min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('stationid','@@@@@@@')
+    v = (v << 42) | aisstring.encodeInt(x,42)
+    x = params.get('waterlevel',-32768)
+    if not -0x8000 <= x < 0x8000: raise ValueError('waterlevel does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | (x & 0xffff)
+    x = params.get('datum',31)
+    if x >> 5: raise ValueError('datum does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params.get('sigma',127)
+    if x >> 7: raise ValueError('sigma does not fit in 7 bits: %r' % (x,))
+    v = (v << 7) | x
+    x = params.get('source',0)
+    if x >> 3: raise ValueError('source does not fit in 3 bits: %r' % (x,))
+    v = (v << 3) | x
+    return binary.PackedBits(v,149)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a waterlevel message.
 
     Fields in params:
@@ -174,10 +222,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -199,49 +250,49 @@ def decode(bv, validate=False):
     r['source']=int(bv[146:149])
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 63
 
-def decodemonth(bv, validate=False):
+def decodemonth(bv, validate=False, numeric='decimal'):
     return int(bv[56:60])
 
-def decodeday(bv, validate=False):
+def decodeday(bv, validate=False, numeric='decimal'):
     return int(bv[60:65])
 
-def decodehour(bv, validate=False):
+def decodehour(bv, validate=False, numeric='decimal'):
     return int(bv[65:70])
 
-def decodemin(bv, validate=False):
+def decodemin(bv, validate=False, numeric='decimal'):
     return int(bv[70:76])
 
-def decodestationid(bv, validate=False):
+def decodestationid(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[76:118])
 
-def decodewaterlevel(bv, validate=False):
+def decodewaterlevel(bv, validate=False, numeric='decimal'):
     return binary.signedIntFromBV(bv[118:134])
 
-def decodedatum(bv, validate=False):
+def decodedatum(bv, validate=False, numeric='decimal'):
     return int(bv[134:139])
 
-def decodesigma(bv, validate=False):
+def decodesigma(bv, validate=False, numeric='decimal'):
     return int(bv[139:146])
 
-def decodesource(bv, validate=False):
+def decodesource(bv, validate=False, numeric='decimal'):
     return int(bv[146:149])
 
 
@@ -923,6 +974,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -163,7 +162,66 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 8
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    v = (v << 10) | 366
+    v = (v << 6) | 63
+    v = (v << 12) | 1
+    x = params['month']
+    if x >> 4: raise ValueError('month does not fit in 4 bits: %r' % (x,))
+    v = (v << 4) | x
+    x = params['day']
+    if x >> 5: raise ValueError('day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['hour']
+    if x >> 5: raise ValueError('hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['min']
+    if x >> 6: raise ValueError('min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params['sec']
+    if x >> 6: raise ValueError('sec does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    x = params.get('stationid','@@@@@@@')
+    v = (v << 42) | aisstring.encodeInt(x,42)
+    if 'longitude' in params:
+        x = int(Decimal(params['longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'latitude' in params:
+        x = int(Decimal(params['latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('timetoexpire',0)
+    if x >> 16: raise ValueError('timetoexpire does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    x = params.get('radius',65534)
+    if x >> 16: raise ValueError('radius does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    return binary.PackedBits(v,223)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a whalenotice message.
 
     Fields in params:
@@ -187,10 +245,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -208,61 +269,63 @@ def decode(bv, validate=False):
     r['min']=int(bv[82:88])
     r['sec']=int(bv[88:94])
     r['stationid']=aisstring.decode(bv[94:136])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[136:164]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[164:191]))/Decimal('600000')
+    r['longitude']=Decimal(binary.signedIntFromBV(bv[136:164]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[136:164])/600000.0
+    r['latitude']=Decimal(binary.signedIntFromBV(bv[164:191]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[164:191])/600000.0
     r['timetoexpire']=int(bv[191:207])
     r['radius']=int(bv[207:223])
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 63
 
-def decodeefid(bv, validate=False):
+def decodeefid(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodemonth(bv, validate=False):
+def decodemonth(bv, validate=False, numeric='decimal'):
     return int(bv[68:72])
 
-def decodeday(bv, validate=False):
+def decodeday(bv, validate=False, numeric='decimal'):
     return int(bv[72:77])
 
-def decodehour(bv, validate=False):
+def decodehour(bv, validate=False, numeric='decimal'):
     return int(bv[77:82])
 
-def decodemin(bv, validate=False):
+def decodemin(bv, validate=False, numeric='decimal'):
     return int(bv[82:88])
 
-def decodesec(bv, validate=False):
+def decodesec(bv, validate=False, numeric='decimal'):
     return int(bv[88:94])
 
-def decodestationid(bv, validate=False):
+def decodestationid(bv, validate=False, numeric='decimal'):
     return aisstring.decode(bv[94:136])
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[136:164]))/Decimal('600000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[136:164]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[136:164])/600000.0
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[164:191]))/Decimal('600000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[164:191]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[164:191])/600000.0
 
-def decodetimetoexpire(bv, validate=False):
+def decodetimetoexpire(bv, validate=False, numeric='decimal'):
     return int(bv[191:207])
 
-def decoderadius(bv, validate=False):
+def decoderadius(bv, validate=False, numeric='decimal'):
     return int(bv[207:223])
 
 
@@ -960,6 +1023,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
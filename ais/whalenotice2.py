@@ -26,7 +26,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -266,7 +265,125 @@ def encode(params, validate=False):
 
     return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def encodePacked(params, validate=False):
+    """Create the same bits as encode(), but shift each field into one integer
+    rather than joining a BitVector per field.
+
+    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
+    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @rtype: binary.PackedBits
+    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits
+    @raise ValueError: a field value does not fit in its number of bits
+    """
+    v = 0
+    v = (v << 6) | 8
+    x = params.get('RepeatIndicator',0)
+    if x >> 2: raise ValueError('RepeatIndicator does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params['UserID']
+    if x >> 30: raise ValueError('UserID does not fit in 30 bits: %r' % (x,))
+    v = (v << 30) | x
+    v = (v << 2) | 0
+    v = (v << 10) | 366
+    v = (v << 6) | 63
+    v = (v << 12) | 1
+    x = params.get('numreports',0)
+    if x >> 2: raise ValueError('numreports does not fit in 2 bits: %r' % (x,))
+    v = (v << 2) | x
+    x = params.get('stationid1',0)
+    if x >> 8: raise ValueError('stationid1 does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params['time1_day']
+    if x >> 5: raise ValueError('time1_day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time1_hour']
+    if x >> 5: raise ValueError('time1_hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time1_min']
+    if x >> 6: raise ValueError('time1_min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    if 'center1_longitude' in params:
+        x = int(Decimal(params['center1_longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('center1_longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'center1_latitude' in params:
+        x = int(Decimal(params['center1_latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('center1_latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('timetoexpire1',65535)
+    if x >> 16: raise ValueError('timetoexpire1 does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    x = params.get('radius1',65534)
+    if x >> 16: raise ValueError('radius1 does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    x = params.get('stationid2',0)
+    if x >> 8: raise ValueError('stationid2 does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params['time2_day']
+    if x >> 5: raise ValueError('time2_day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time2_hour']
+    if x >> 5: raise ValueError('time2_hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time2_min']
+    if x >> 6: raise ValueError('time2_min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    if 'center2_longitude' in params:
+        x = int(Decimal(params['center2_longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('center2_longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'center2_latitude' in params:
+        x = int(Decimal(params['center2_latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('center2_latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('timetoexpire2',65535)
+    if x >> 16: raise ValueError('timetoexpire2 does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    x = params.get('radius2',65534)
+    if x >> 16: raise ValueError('radius2 does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    x = params.get('stationid3',0)
+    if x >> 8: raise ValueError('stationid3 does not fit in 8 bits: %r' % (x,))
+    v = (v << 8) | x
+    x = params['time3_day']
+    if x >> 5: raise ValueError('time3_day does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time3_hour']
+    if x >> 5: raise ValueError('time3_hour does not fit in 5 bits: %r' % (x,))
+    v = (v << 5) | x
+    x = params['time3_min']
+    if x >> 6: raise ValueError('time3_min does not fit in 6 bits: %r' % (x,))
+    v = (v << 6) | x
+    if 'center3_longitude' in params:
+        x = int(Decimal(params['center3_longitude'])*Decimal('600000'))
+    else:
+        x = 108600000
+    if not -0x8000000 <= x < 0x8000000: raise ValueError('center3_longitude does not fit in 28 bits: %r' % (x,))
+    v = (v << 28) | (x & 0xfffffff)
+    if 'center3_latitude' in params:
+        x = int(Decimal(params['center3_latitude'])*Decimal('600000'))
+    else:
+        x = 54600000
+    if not -0x4000000 <= x < 0x4000000: raise ValueError('center3_latitude does not fit in 27 bits: %r' % (x,))
+    v = (v << 27) | (x & 0x7ffffff)
+    x = params.get('timetoexpire3',65535)
+    if x >> 16: raise ValueError('timetoexpire3 does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    x = params.get('radius3',65534)
+    if x >> 16: raise ValueError('radius3 does not fit in 16 bits: %r' % (x,))
+    v = (v << 16) | x
+    v = (v << 21) | 0
+    return binary.PackedBits(v,424)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a whalenotice message.
 
     Fields in params:
@@ -306,10 +423,13 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: 'decimal' for exact Decimal values or 'float' for faster floats
     @rtype: dict
     @return: params
+    @raise ValueError: numeric is not 'decimal' or 'float'
     '''
 
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
     #Would be nice to check the bit count here..
     #if validate:
     #    assert (len(bv)==FIX: SOME NUMBER)
@@ -326,126 +446,132 @@ def decode(bv, validate=False):
     r['time1_day']=int(bv[78:83])
     r['time1_hour']=int(bv[83:88])
     r['time1_min']=int(bv[88:94])
-    r['center1_longitude']=Decimal(binary.signedIntFromBV(bv[94:122]))/Decimal('600000')
-    r['center1_latitude']=Decimal(binary.signedIntFromBV(bv[122:149]))/Decimal('600000')
+    r['center1_longitude']=Decimal(binary.signedIntFromBV(bv[94:122]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[94:122])/600000.0
+    r['center1_latitude']=Decimal(binary.signedIntFromBV(bv[122:149]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[122:149])/600000.0
     r['timetoexpire1']=int(bv[149:165])
     r['radius1']=int(bv[165:181])
     r['stationid2']=int(bv[181:189])
     r['time2_day']=int(bv[189:194])
     r['time2_hour']=int(bv[194:199])
     r['time2_min']=int(bv[199:205])
-    r['center2_longitude']=Decimal(binary.signedIntFromBV(bv[205:233]))/Decimal('600000')
-    r['center2_latitude']=Decimal(binary.signedIntFromBV(bv[233:260]))/Decimal('600000')
+    r['center2_longitude']=Decimal(binary.signedIntFromBV(bv[205:233]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[205:233])/600000.0
+    r['center2_latitude']=Decimal(binary.signedIntFromBV(bv[233:260]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[233:260])/600000.0
     r['timetoexpire2']=int(bv[260:276])
     r['radius2']=int(bv[276:292])
     r['stationid3']=int(bv[292:300])
     r['time3_day']=int(bv[300:305])
     r['time3_hour']=int(bv[305:310])
     r['time3_min']=int(bv[310:316])
-    r['center3_longitude']=Decimal(binary.signedIntFromBV(bv[316:344]))/Decimal('600000')
-    r['center3_latitude']=Decimal(binary.signedIntFromBV(bv[344:371]))/Decimal('600000')
+    r['center3_longitude']=Decimal(binary.signedIntFromBV(bv[316:344]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[316:344])/600000.0
+    r['center3_latitude']=Decimal(binary.signedIntFromBV(bv[344:371]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[344:371])/600000.0
     r['timetoexpire3']=int(bv[371:387])
     r['radius3']=int(bv[387:403])
     r['Spare2']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
     return int(bv[6:8])
 
-def decodeUserID(bv, validate=False):
+def decodeUserID(bv, validate=False, numeric='decimal'):
     return int(bv[8:38])
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 63
 
-def decodeefid(bv, validate=False):
+def decodeefid(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodenumreports(bv, validate=False):
+def decodenumreports(bv, validate=False, numeric='decimal'):
     return int(bv[68:70])
 
-def decodestationid1(bv, validate=False):
+def decodestationid1(bv, validate=False, numeric='decimal'):
     return int(bv[70:78])
 
-def decodetime1_day(bv, validate=False):
+def decodetime1_day(bv, validate=False, numeric='decimal'):
     return int(bv[78:83])
 
-def decodetime1_hour(bv, validate=False):
+def decodetime1_hour(bv, validate=False, numeric='decimal'):
     return int(bv[83:88])
 
-def decodetime1_min(bv, validate=False):
+def decodetime1_min(bv, validate=False, numeric='decimal'):
     return int(bv[88:94])
 
-def decodecenter1_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[94:122]))/Decimal('600000')
+def decodecenter1_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[94:122]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[94:122])/600000.0
 
-def decodecenter1_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[122:149]))/Decimal('600000')
+def decodecenter1_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[122:149]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[122:149])/600000.0
 
-def decodetimetoexpire1(bv, validate=False):
+def decodetimetoexpire1(bv, validate=False, numeric='decimal'):
     return int(bv[149:165])
 
-def decoderadius1(bv, validate=False):
+def decoderadius1(bv, validate=False, numeric='decimal'):
     return int(bv[165:181])
 
-def decodestationid2(bv, validate=False):
+def decodestationid2(bv, validate=False, numeric='decimal'):
     return int(bv[181:189])
 
-def decodetime2_day(bv, validate=False):
+def decodetime2_day(bv, validate=False, numeric='decimal'):
     return int(bv[189:194])
 
-def decodetime2_hour(bv, validate=False):
+def decodetime2_hour(bv, validate=False, numeric='decimal'):
     return int(bv[194:199])
 
-def decodetime2_min(bv, validate=False):
+def decodetime2_min(bv, validate=False, numeric='decimal'):
     return int(bv[199:205])
 
-def decodecenter2_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[205:233]))/Decimal('600000')
+def decodecenter2_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[205:233]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[205:233])/600000.0
 
-def decodecenter2_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[233:260]))/Decimal('600000')
+def decodecenter2_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[233:260]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[233:260])/600000.0
 
-def decodetimetoexpire2(bv, validate=False):
+def decodetimetoexpire2(bv, validate=False, numeric='decimal'):
     return int(bv[260:276])
 
-def decoderadius2(bv, validate=False):
+def decoderadius2(bv, validate=False, numeric='decimal'):
     return int(bv[276:292])
 
-def decodestationid3(bv, validate=False):
+def decodestationid3(bv, validate=False, numeric='decimal'):
     return int(bv[292:300])
 
-def decodetime3_day(bv, validate=False):
+def decodetime3_day(bv, validate=False, numeric='decimal'):
     return int(bv[300:305])
 
-def decodetime3_hour(bv, validate=False):
+def decodetime3_hour(bv, validate=False, numeric='decimal'):
     return int(bv[305:310])
 
-def decodetime3_min(bv, validate=False):
+def decodetime3_min(bv, validate=False, numeric='decimal'):
     return int(bv[310:316])
 
-def decodecenter3_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[316:344]))/Decimal('600000')
+def decodecenter3_longitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[316:344]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[316:344])/600000.0
 
-def decodecenter3_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[344:371]))/Decimal('600000')
+def decodecenter3_latitude(bv, validate=False, numeric='decimal'):
+    if numeric not in ('decimal','float'): raise ValueError('numeric must be decimal or float: %r' % (numeric,))
+    return Decimal(binary.signedIntFromBV(bv[344:371]))/Decimal('600000') if 'float'!=numeric else binary.signedIntFromBV(bv[344:371])/600000.0
 
-def decodetimetoexpire3(bv, validate=False):
+def decodetimetoexpire3(bv, validate=False, numeric='decimal'):
     return int(bv[371:387])
 
-def decoderadius3(bv, validate=False):
+def decoderadius3(bv, validate=False, numeric='decimal'):
     return int(bv[387:403])
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
@@ -1495,6 +1621,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
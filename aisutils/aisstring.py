@@ -205,6 +205,29 @@ def encode(string,bitSize=None):
 	bv = bv+BitVector(size=extra)
     return bv
 
+def encodeInt(string,bitSize):
+    '''
+    Encode a string as one integer holding the same bits as encode().
+
+    >>> encodeInt('AB',18) == int(encode('AB',18))
+    True
+
+    @param string: python ascii string to encode.
+    @type string: str
+    @param bitSize: how many bits should this take.  must be a multiple of 6
+    @type bitSize: int
+    @return: enocded bits for the string
+    @rtype: int or long
+    @raise ValueError: the string needs more than bitSize bits
+    '''
+    extra = bitSize - 6*len(string)
+    if extra < 0:
+	raise ValueError('string longer than specified bit count: "'+string+'" %d' % bitSize)
+    value = 0
+    for c in string:
+	value = (value << 6) | characterDict[c]
+    return value << extra
+
 def unpad(string,removeBlanks=True):
     """
     Remove AIS string padding
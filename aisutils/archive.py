@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+"""Archive decoded AIS as a directory of columns for each day.
+
+The offline analyses decode the NMEA text again for every run.
+ArchiveWriter decodes normalized USCG logs once and writes each UTC
+day to its own directory:
+
+  YYYYMMDD/mmsi.npy, cg_sec.npy, lon.npy, ...  position reports
+  YYYYMMDD/static.npy                          type 5 and 24 reports
+  YYYYMMDD/stations.txt                        station names by number
+
+The position columns are plain NumPy .npy arrays sorted by cg_sec, so
+the reader memory maps them and finds a time range with a binary
+search.  Only the columns that are used are ever read from disk.  The
+static data is one structured array with a row per message.
+
+>>> import tempfile, shutil
+>>> d = tempfile.mkdtemp()
+>>> writer = ArchiveWriter(d)
+>>> writer.add_lines(['!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r003669958,1085889680'])
+>>> writer.close()
+>>> archive = Archive(d)
+>>> archive.days()
+['20040530']
+>>> p = archive.positions(mmsi=[356302000])
+>>> int(p['mmsi'][0]), '%.5f' % p['lon'][0], p['station'][0]
+(356302000, '-71.62614', 'r003669958')
+>>> shutil.rmtree(d)
+
+@requires: U{numpy<http://numpy.scipy.org/>}
+@license: Apache 2.0
+"""
+
+import array
+import datetime
+import os
+import sys
+
+import numpy
+
+import binary
+import logscan
+import reassemble
+
+position_columns = (
+    ('mmsi', 'u4', 'I'),
+    ('cg_sec', 'u4', 'I'),
+    ('lon', 'f8', 'd'),
+    ('lat', 'f8', 'd'),
+    ('sog', 'f4', 'f'),
+    ('cog', 'f4', 'f'),
+    ('heading', 'u2', 'H'),
+    ('station', 'u2', 'H'),
+    ('msgtype', 'u1', 'B'),
+    )
+'(name, numpy dtype, array typecode) of each position column'
+
+static_dtype = numpy.dtype([
+    ('mmsi', 'u4'), ('cg_sec', 'u4'), ('msgtype', 'u1'), ('partnum', 'i1'),
+    ('imo', 'u4'), ('callsign', 'S7'), ('name', 'S20'), ('shipandcargo', 'u1'),
+    ('dimA', 'u2'), ('dimB', 'u2'), ('dimC', 'u1'), ('dimD', 'u1'),
+    ('destination', 'S20'), ('station', 'u2'),
+    ])
+'One row of the static side table.  partnum is -1 for type 5.'
+
+def dayName(cg_sec):
+    '@return: YYYYMMDD of the UTC day of a timestamp'
+    return datetime.datetime.utcfromtimestamp(int(cg_sec)).strftime('%Y%m%d')
+
+def utcSeconds(when):
+    'UNIX UTC seconds from seconds or a UTC datetime'
+    if isinstance(when, datetime.datetime):
+        return (when - datetime.datetime(1970, 1, 1)).total_seconds()
+    return when
+
+
+class _Day(object):
+    'Columns of one day being collected by the writer'
+    def __init__(self):
+        self.columns = dict([(name, array.array(typecode)) for name, dtype, typecode in position_columns])
+        self.static = []
+        self.stations = {}  # name -> number
+
+    def station(self, name):
+        number = self.stations.get(name)
+        if number is None:
+            number = self.stations[name] = len(self.stations)
+        return number
+
+
+class ArchiveWriter(object):
+    '''Decode normalized logs into the day directories of an archive.
+
+    Days are kept in memory until close().  A day that is already in
+    the archive has the new rows merged in.
+
+    @ivar positions: position rows added
+    @ivar statics: static rows added
+    @ivar skipped: lines that were not archived
+    '''
+    def __init__(self, directory, verbose=False):
+        self.directory = directory
+        self.v = verbose
+        self.days = {}  # YYYYMMDD -> _Day
+        self.positions = 0
+        self.statics = 0
+        self.skipped = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _day(self, cg_sec):
+        name = dayName(cg_sec)
+        day = self.days.get(name)
+        if day is None:
+            day = self.days[name] = _Day()
+        return day
+
+    def add_lines(self, lines):
+        '''Decode and collect the lines of a USCG log.
+
+        Multi-line messages are put back together first, so raw logs
+        work as well as normalized ones.  Position reports are decoded
+        in batches with ais.batch.  Lines without a timestamp or
+        station are skipped.
+        '''
+        from ais import batch
+        for line, msg in batch.decoded_lines(reassemble.reassemble(lines)):
+            cg_sec = logscan.cg_sec(line)
+            station = logscan.station(line)
+            if cg_sec is None or station is None:
+                self.skipped += 1
+                continue
+            if msg is not None:
+                self.add_position(cg_sec, station, msg)
+            elif logscan.first_char(line) in ('5', 'H') and line.split(',', 2)[1] == '1':
+                self.add_static_line(line, cg_sec, station)
+            else:
+                self.skipped += 1
+
+    def add_position(self, cg_sec, station, msg):
+        '''
+        @param msg: position report from ais.batch or decode(numeric='float')
+        '''
+        day = self._day(cg_sec)
+        columns = day.columns
+        columns['mmsi'].append(msg['UserID'])
+        columns['cg_sec'].append(int(cg_sec))
+        columns['lon'].append(msg['longitude'])
+        columns['lat'].append(msg['latitude'])
+        columns['sog'].append(msg['SOG'])
+        columns['cog'].append(msg['COG'])
+        columns['heading'].append(msg['TrueHeading'])
+        columns['station'].append(day.station(station))
+        columns['msgtype'].append(msg['MessageID'])
+        self.positions += 1
+
+    def add_static_line(self, line, cg_sec, station):
+        'Decode a whole (one sentence) type 5 or 24 message into the static table'
+        import ais
+        payload = logscan.payload(line)
+        try:
+            msg = ais.msgModByFirstChar[payload[0]].decode(binary.ais6topackedbits(payload), numeric='float')
+        except Exception, e:
+            if self.v:
+                sys.stderr.write('# bad static message %s: %s\n' % (str(e), line))
+            self.skipped += 1
+            return
+        if msg.get('partnum', -1) not in (-1, 0, 1):
+            self.skipped += 1
+            return
+        day = self._day(cg_sec)
+        day.static.append((
+            msg['UserID'], int(cg_sec), msg['MessageID'], msg.get('partnum', -1),
+            msg.get('IMOnumber', 0), msg.get('callsign', '').rstrip(' @'),
+            msg.get('name', '').rstrip(' @'), msg.get('shipandcargo', 0),
+            msg.get('dimA', 0), msg.get('dimB', 0), msg.get('dimC', 0), msg.get('dimD', 0),
+            msg.get('destination', '').rstrip(' @'), day.station(station)))
+        self.statics += 1
+
+    def close(self):
+        'Write all of the days collected'
+        for name in sorted(self.days):
+            self._write(name, self.days.pop(name))
+
+    def _write(self, name, day):
+        path = os.path.join(self.directory, name)
+        stations = [None] * len(day.stations)
+        for station, number in day.stations.iteritems():
+            stations[number] = station
+        columns = dict([(column, numpy.frombuffer(day.columns[column], dtype=dtype) if len(day.columns[column])
+                         else numpy.zeros(0, dtype))
+                        for column, dtype, typecode in position_columns])
+        static = numpy.array(day.static, dtype=static_dtype)
+
+        if os.path.isdir(path):
+            # Add the rows that are already there with the station numbers of this day
+            old = ArchiveDay(path)
+            remap = []
+            for station in old.stations:
+                if station not in day.stations:
+                    day.stations[station] = len(stations)
+                    stations.append(station)
+                remap.append(day.stations[station])
+            remap = numpy.array(remap, dtype='u2')
+            for column, dtype, typecode in position_columns:
+                old_column = old.column(column)
+                if column == 'station' and len(old_column):
+                    old_column = remap[old_column]
+                columns[column] = numpy.concatenate((old_column, columns[column]))
+            old_static = numpy.array(old.static())
+            if len(old_static):
+                old_static['station'] = remap[old_static['station']]
+            static = numpy.concatenate((old_static, static))
+            del old
+        else:
+            os.makedirs(path)
+
+        order = numpy.argsort(columns['cg_sec'], kind='mergesort')
+        for column, dtype, typecode in position_columns:
+            numpy.save(os.path.join(path, column + '.npy'), columns[column][order])
+        numpy.save(os.path.join(path, 'static.npy'), static[numpy.argsort(static['cg_sec'], kind='mergesort')])
+        out = open(os.path.join(path, 'stations.txt'), 'w')
+        for station in stations:
+            out.write(station + '\n')
+        out.close()
+        if self.v:
+            sys.stderr.write('wrote %s: %d positions, %d static\n' % (path, len(order), len(static)))
+
+    def __str__(self):
+        return 'archive: %d positions, %d static, %d skipped' % (self.positions, self.statics, self.skipped)
+
+
+class ArchiveDay(object):
+    '''Memory mapped columns of one day.
+
+    @ivar stations: station names by number
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.stations = [line.rstrip('\n') for line in open(os.path.join(path, 'stations.txt'))]
+        self.columns = {}
+
+    def column(self, name):
+        '@return: memory mapped array of a position column'
+        c = self.columns.get(name)
+        if c is None:
+            c = self.columns[name] = numpy.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+        return c
+
+    def __len__(self):
+        return len(self.column('cg_sec'))
+
+    def static(self):
+        '@return: memory mapped static table'
+        return numpy.load(os.path.join(self.path, 'static.npy'), mmap_mode='r')
+
+    def select(self, start=None, end=None, mmsi=None):
+        '''
+        @param start: first cg_sec to include or None
+        @param end: cg_sec to stop before or None
+        @param mmsi: sequence of MMSIs to keep or None for all
+        @return: a slice or an index array of the rows wanted
+        '''
+        cg_sec = self.column('cg_sec')
+        first = 0
+        last = len(cg_sec)
+        if start is not None:
+            first = int(numpy.searchsorted(cg_sec, start, side='left'))
+        if end is not None:
+            last = int(numpy.searchsorted(cg_sec, end, side='left'))
+        rows = slice(first, last)
+        if mmsi is not None:
+            mask = numpy.in1d(self.column('mmsi')[rows], numpy.asarray(mmsi, dtype='u4'))
+            rows = numpy.flatnonzero(mask) + first
+        return rows
+
+
+class Archive(object):
+    '''Read the days of an archive made by ArchiveWriter.'''
+    def __init__(self, directory):
+        self.directory = directory
+
+    def days(self, start=None, end=None):
+        '''
+        @param start: UNIX UTC seconds or a UTC datetime or None
+        @param end: UNIX UTC seconds or a UTC datetime or None
+        @return: YYYYMMDD names of the days that overlap start to end
+        '''
+        names = sorted([name for name in os.listdir(self.directory)
+                        if len(name) == 8 and name.isdigit()
+                        and os.path.isdir(os.path.join(self.directory, name))])
+        if start is not None:
+            first = dayName(utcSeconds(start))
+            names = [name for name in names if name >= first]
+        if end is not None:
+            last = dayName(utcSeconds(end))
+            names = [name for name in names if name <= last]
+        return names
+
+    def day(self, name):
+        '@return: ArchiveDay for YYYYMMDD'
+        return ArchiveDay(os.path.join(self.directory, name))
+
+    def positions(self, start=None, end=None, mmsi=None, columns=None):
+        '''Position reports from start up to end for some vessels.
+
+        @param start: UNIX UTC seconds or a UTC datetime or None
+        @param end: UNIX UTC seconds or a UTC datetime to stop before or None
+        @param mmsi: MMSIs to include or None for all
+        @param columns: position columns wanted [default: all]
+        @return: dict of column name to array, in cg_sec order.  The
+            station column has the station names.
+        '''
+        if start is not None: start = utcSeconds(start)
+        if end is not None: end = utcSeconds(end)
+        if columns is None:
+            columns = [name for name, dtype, typecode in position_columns]
+        dtypes = dict([(name, dtype) for name, dtype, typecode in position_columns])
+        parts = dict([(name, []) for name in columns])
+        for name in self.days(start, end):
+            day = self.day(name)
+            rows = day.select(start, end, mmsi)
+            for column in columns:
+                values = day.column(column)[rows]
+                if column == 'station':
+                    values = numpy.array(day.stations, dtype=object)[values] if len(values) else numpy.zeros(0, object)
+                parts[column].append(values)
+        result = {}
+        for column in columns:
+            if parts[column]:
+                result[column] = numpy.concatenate(parts[column])
+            elif column == 'station':
+                result[column] = numpy.zeros(0, object)
+            else:
+                result[column] = numpy.zeros(0, dtypes[column])
+        return result
+
+    def static(self, start=None, end=None, mmsi=None):
+        '''Static reports from start up to end for some vessels.
+
+        @param start: UNIX UTC seconds or a UTC datetime or None
+        @param end: UNIX UTC seconds or a UTC datetime to stop before or None
+        @param mmsi: MMSIs to include or None for all
+        @return: structured array of the static rows, with the station
+            numbers of each day
+        '''
+        if start is not None: start = utcSeconds(start)
+        if end is not None: end = utcSeconds(end)
+        parts = []
+        for name in self.days(start, end):
+            static = self.day(name).static()
+            mask = numpy.ones(len(static), bool)
+            if start is not None:
+                mask &= static['cg_sec'] >= start
+            if end is not None:
+                mask &= static['cg_sec'] < end
+            if mmsi is not None:
+                mask &= numpy.in1d(static['mmsi'], numpy.asarray(mmsi, dtype='u4'))
+            parts.append(static[mask])
+        if not parts:
+            return numpy.zeros(0, static_dtype)
+        return numpy.concatenate(parts)
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
@@ -68,6 +68,20 @@ def float2bitvec(floatval):
         bvList.append(bv1)
     return joinBV(bvList)
 
+def float2uint(floatval):
+    '''
+    Get the IEEE floating point bits for a python float as an unsigned
+    integer.  These are the same bits as float2bitvec.
+
+    >>> float2uint(1.0) == int(float2bitvec(1.0))
+    True
+
+    @type floatval: number
+    @rtype: int or long
+    @return: 32 bits
+    '''
+    return struct.unpack('!I',struct.pack('!f',floatval))[0]
+
 def bitvec2float(bv):
     '''
     Convert a 32 bit bitvector representing an IEEE float into a python float
@@ -192,20 +206,31 @@ def signedIntFromBV(bv):
 
     Positive values decode like so:
 
+    >>> signedIntFromBV(BitVector(bitstring='0110'))
+    6
+
     Here are some negative integer examples:
 
+    >>> signedIntFromBV(BitVector(bitstring='1110'))
+    -2
+    >>> signedIntFromBV(BitVector(bitstring='1000'))
+    -8
+    >>> signedIntFromBV(PackedBits(int('1110',2),4))
+    -2
+
     @param bv: Bits to treat as an signed int
-    @type bv: BitVector
+    @type bv: BitVector or PackedBits
     @return: Signed integer
     @rtype: int
 
     @note: Does not know the difference between byte orders.
     '''
-    if 0==bv[0]: return int(bv)
-    # Nope, so it is negative
-    val = int(addone(~(bv[1:])))
-    if 0 != val: return -val
-    return -(int(bv))
+    size = len(bv)
+    val = int(bv)
+    if val >> (size-1):
+        # Top bit is set, so it is negative
+        return val - (1 << size)
+    return val
 
 # This is a better thing to no than the craziness in the slow
 #aisstr6_encode = [chr(i+64) for i in range(32)] + [chr(i+32) for i in range(32)]
@@ -348,6 +373,151 @@ def ais6tobitvec(str6):
             bvtotal[i+start] = bv[i]
     return bvtotal
 
+
+class PackedBits(object):
+    '''
+    Read only bits stored as one python integer and a bit count.
+
+    Acts enough like a BitVector to be passed to the decode functions
+    of the ais message modules.  Slices and int() are shifts and
+    masks rather than bit by bit copies.
+
+    >>> bits = PackedBits(int('0110111',2),7)
+    >>> len(bits)
+    7
+    >>> int(bits[1:4])
+    6
+    >>> bits[0], bits[-1]
+    (0, 1)
+    >>> str(bits[-3:])
+    '111'
+
+    @see: ais6topackedbits
+    '''
+    __slots__ = ('value','size')
+
+    def __init__(self,value=0,size=0):
+        '''
+        @param value: unsigned integer holding the bits.  The last bit is the least significant.
+        @type value: int or long
+        @param size: number of bits
+        @type size: int
+        '''
+        self.value = value
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __int__(self):
+        return int(self.value)
+
+    __long__ = __int__
+    __index__ = __int__
+
+    def __getitem__(self,key):
+        '''Return a bit for an index or a new PackedBits for a slice'''
+        if isinstance(key,slice):
+            for index in (key.start,key.stop):
+                if index is not None and index > self.size:
+                    # BitVector also refuses, so short messages are not decoded
+                    raise ValueError('slice past the end of %d bits: %d' % (self.size,index))
+            start,end,step = key.indices(self.size)
+            if step != 1:
+                raise IndexError('PackedBits slices can not have a step')
+            if end <= start:
+                return PackedBits(0,0)
+            width = end - start
+            return PackedBits((self.value >> (self.size-end)) & ((1 << width)-1),width)
+        if key < 0:
+            key += self.size
+        if key < 0 or key >= self.size:
+            raise IndexError('bit index out of range: %d' % key)
+        return int((self.value >> (self.size-1-key)) & 1)
+
+    def __invert__(self):
+        return PackedBits(self.value ^ ((1 << self.size)-1),self.size)
+
+    def __add__(self,other):
+        '''Concatenate with another PackedBits or a BitVector'''
+        return PackedBits((self.value << len(other)) | int(other),self.size+len(other))
+
+    def __eq__(self,other):
+        return self.size == len(other) and self.value == int(other)
+
+    def __ne__(self,other):
+        return not self.__eq__(other)
+
+    def __str__(self):
+        '''The bits as a string of 0 and 1 characters like BitVector'''
+        if 0 == self.size:
+            return ''
+        return bin(self.value)[2:].zfill(self.size)
+
+    def __repr__(self):
+        return 'PackedBits(%d,%d)' % (self.value,self.size)
+
+    def toBitVector(self):
+        '''
+        @return: the same bits for code that needs a real BitVector
+        @rtype: BitVector
+        '''
+        return BitVector(bitstring=str(self))
+
+
+decodeBitStr = dict([(c,str(bv)) for c,bv in decode.items()])
+'''
+Lookup the 6 character string of 0s and 1s for an ais 6-bit character
+'''
+
+def ais6topackedbits(str6):
+    '''Convert an ITU AIS 6 bit string into PackedBits.  This is the same
+    as ais6tobitvec, but much faster, so use this on the decode path.
+
+    >>> bits = ais6topackedbits('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06')
+    >>> len(bits)
+    168
+    >>> int(bits[8:38])
+    356302000
+    >>> str(bits) == str(ais6tobitvec('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06'))
+    True
+
+    @param str6: ASCII that as it appears in the NMEA string
+    @type str6: string
+    @return: decoded bits including any pad bits at the end
+    @rtype: PackedBits
+    '''
+    if 0 == len(str6):
+        return PackedBits(0,0)
+    return PackedBits(int(''.join([decodeBitStr[c] for c in str6]),2),6*len(str6))
+
+def alignedIntFromBV(bv,size):
+    '''Integer of the first size bits of a BitVector or PackedBits.  Extra
+    bits at the end (e.g. pad bits) are dropped.  Used by the shift and
+    mask decoders from aisxmlbinmsg2py --packed.
+
+    >>> alignedIntFromBV(PackedBits(int('101100',2),6),4)
+    11
+    >>> alignedIntFromBV(BitVector(bitstring='101'),5)
+    Traceback (most recent call last):
+    ...
+    ValueError: message too short: 3 bits of 5
+
+    @param bv: bits of a message
+    @type bv: BitVector or PackedBits
+    @param size: number of bits the decoder expects
+    @type size: int
+    @rtype: int or long
+    @raise ValueError: if there are fewer than size bits
+    '''
+    if isinstance(bv,PackedBits):
+        value,length = bv.value,bv.size
+    else:
+        value,length = int(bv),len(bv)
+    if length < size:
+        raise ValueError('message too short: %d bits of %d' % (length,size))
+    return value >> (length-size)
+
 def getPadding(bv):
     '''
     Return the number of bits that need to be padded for a bit vector
@@ -398,6 +568,26 @@ def bitvectoais6(bv,doPadding=True):
     return aisStr, pad
 
 
+def packedbitstoais6(bits):
+    '''Convert PackedBits to an ITU AIS 6 bit string.  Same as
+    bitvectoais6, but without building a BitVector.  Zero bits are
+    added to the end to reach a multiple of 6 bits.
+
+    >>> packedbitstoais6(ais6topackedbits('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06'))
+    ('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06', 0)
+    >>> packedbitstoais6(PackedBits(int('1111111',2),7))
+    ('wP', 5)
+
+    @param bits: message bits (must be already stuffed)
+    @type bits: PackedBits
+    @return: str6 ASCII that as it appears in the NMEA string and the number of fill bits
+    @rtype: str, int
+    '''
+    pad = (6 - bits.size % 6) % 6
+    value = bits.value << pad
+    numChars = (bits.size + pad) / 6
+    return ''.join([encode[(value >> (6*i)) & 0x3f] for i in range(numChars-1,-1,-1)]), pad
+
 def stuffBits(bv):
     """Apply bit stuffing - add extra bytes to long sequences
 
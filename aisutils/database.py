@@ -28,6 +28,7 @@ import traceback
 import psycopg2 as psycopg
 
 import ais
+import partition
 
 def checkpoint():
     import inspect
@@ -83,7 +84,7 @@ CREATE TABLE payload (
 
 
 
-def createTables(cx,dbType='sqlite',includeList=None, excludeList=None,verbose=False):
+def createTables(cx,dbType='sqlite',includeList=None, excludeList=None,verbose=False,partitionBy=None):
     '''
     @param cx: database connection
     @type cx: db API 2.0 object
@@ -93,7 +94,14 @@ def createTables(cx,dbType='sqlite',includeList=None, excludeList=None,verbose=F
     @type includeList: list of integers
     @param excludeList: If a list of message numbers is passed, all but these are created
     @type excludeList: list of integers
+    @param partitionBy: day or hour to split the position tables up by
+        time (see aisutils.partition) or None for one table each.
+        Only for postgres.
+    @raise ValueError: if partitionBy is given for sqlite, which is
+        not partitioned.
     '''
+    if partitionBy and dbType=='sqlite':
+        raise ValueError('partitioned position tables are only supported with postgres')
     cu = cx.cursor()
 
     tables=[]
@@ -113,6 +121,10 @@ def createTables(cx,dbType='sqlite',includeList=None, excludeList=None,verbose=F
 
     cx.commit()
 
+    if partitionBy and dbType=='postgres':
+        partition.partitionTables(cx,[table for table in partition.partitioned_tables if table in tables],
+                                  partitionBy,verbose=verbose)
+
 def dropTables(cx,includeList=None, excludeList=None,verbose=False):
     '''
     Kiss your data goodbye
@@ -187,170 +199,66 @@ def rebuild_track_lines(cx,vessels=None
                         ,startTime=None
                         ,verbose=False):
     '''
+    Rebuild the track lines with one set based INSERT ... SELECT rather
+    than a query for each vessel.  Use this for a cold start.
+    nais2postgis keeps the lines up to date after that (see
+    aisutils.vessels).
+
+    Class A (position) and class B (positionb) reports are both used.
+    Points at 181,91 (no position) are skipped.
+
     @param vessels: if None, do all vessels in the tables, otherwise a set of MMSI values
     @param trackTable: the database table where to put the lines
     @param limitPoints: max number of points in a track line
+    @param trackKey: not used.  The rows are replaced.
     @param startTime: oldest timestamp to allow in the track lines
     @type startTime: datetime
+    @return: number of track lines written
     '''
     v = verbose
     cu = cx.cursor()
 
     if v:
-        sys.stderr.write('\nREBUILD_TRACK_LINES\n')
-    #
-    # position table - Class A
-    #
-    vesselsUpdated=0
-    if vessels is None:
-        if startTime:
-            sql = 'SELECT distinct(userid) FROM position WHERE cg_timestamp > %s;'
-            print 'FIX remove sql == ',sql
-            sys.stderr.write('FIX: remove  startTime: %s   now: %s \n' % (str(startTime),str(datetime.datetime.utcnow())))
-            cu.execute(sql,(startTime,))
-        else:
-            cu.execute('SELECT distinct(userid) FROM position;')
-        vessels = set()
-        for v in cu.fetchall():
-            vessels.add(v[0])
-
-    if v:
-        sys.stderr.write('\nrebuild_track_lines\n')
-        #sys.stderr.write('  vessels %s\n' % str(vessels))
-        sys.stderr.write('  Number of vessels %d\n' % len(vessels))
-        sys.stderr.write('  startTime: %s   now: %s \n' % (str(startTime),str(datetime.datetime.utcnow())))
-
-    for vessel in vessels:
-
-        query='SELECT AsText(position) FROM position WHERE userid=%s'
-        if startTime is not None:
-            query += ' AND cg_timestamp > %s'
-        query+=' ORDER BY cg_sec DESC'
-        if limitPoints is not None: query+=' LIMIT '+str(limitPoints)
-        query+=';'
-
-        #print 'startTime should be set',startTime
-        if startTime is not None:
-            #print 'FIX: q', (query % (vessel,startTime))
-            cu.execute(query,(vessel,startTime))
-        else:
-            sys.exit ('NO!!!')
-            cu.execute(query,(vessel,))
-        linePoints=[]
-        #lineLen=0
-        for row in cu.fetchall():
-            #lineLen+=1
-            #print 'A point on the line',row[0]
-            x,y = row[0].split()
-            x = x.split('(')[1]
-            y = y.split(')')[0]
-            #print 'x,y',x,y
-            if x=='181' and y=='91':
-                if v:
-                    sys.stderr.write('skipping point with no position: %s %s\n' % (vessel,row))
-                continue
-            linePoints.append(row[0].split('(')[1].split(')')[0])
-        if len(linePoints)<2:#lineLen<2:
-            if v:
-                sys.stderr.write('Line needs at least 2 points for vessel %s\n' % vessel)
-            cu.execute ('SELECT '+trackKey+' FROM '+trackTable+' WHERE userid = %s;',( vessel,))
-            row = cu.fetchall()
-            if len(row)>0:
-                if v:
-                    sys.stderr.write('dropping vessel %s from track\n' % vessel)
-                cu.execute('DELETE FROM '+trackTable+' WHERE userid = %s;',(vessel,))
-            continue
-        lineWKT='LINESTRING('+','.join(linePoints)+')'
-        if v:
-            sys.stderr.write(str(len(linePoints))+' points used for vessel '+str(vessel)+'\n')
-        # Get the most recent vessel name
-        #if v: print 'Getting name...'
-        cu.execute('SELECT name FROM shipdata WHERE userid='+str(vessel)+' LIMIT 1')
-
-        # Always strip the junk off the name
-        name = cu.fetchall()
-        if len(name)==1:
-            name=name[0][0].strip('@ ')
-        else:
-            name=str(vessel)
-
-        if name=="":
-            name=str(vessel)
-        #sys.stderr.write('a NAME for '+str(vessel)+' is "'+name+'"\n')
-
-        cu.execute('SELECT '+trackKey+' FROM '+trackTable+' WHERE userid='+str(vessel)+'\n')
-        track_keys = cu.fetchall()
-        #print 'track_keys',track_keys
-        now = datetime.datetime.utcnow()
-        if len(track_keys)==0:
-            # Does not exist in the database, so insert a new line
-            query = 'INSERT INTO track_lines (userid,name,track,update_timestamp) VALUES (%s,%s,GeomFromText(%s,4326),%s);'
-            try:
-                cu.execute(query,(vessel,name,lineWKT,now))
-            except psycopg.ProgrammingError,inst:
-                sys.stderr.write('psycopg2 execute flailed: '+str(inst)+'\n')
-                traceback.print_exc(file=sys.stderr)
-            else:
-                vesselsUpdated += 1
-        elif len(track_keys)==1:
-            # Need to replace an existing row
-            query = 'UPDATE track_lines SET name = %s, track = GeomFromText(%s,4326), update_timestamp = %s WHERE '+trackKey+' = %s'
-            key = track_keys[0][0]
-            try:
-                cu.execute(query,(name,lineWKT,now,key))
-            except psycopg.ProgrammingError,inst:
-                sys.stderr.write('psycopg2 execute flailed: '+str(inst)+'\n')
-                traceback.print_exc(file=sys.stderr)
-            else:
-                vesselsUpdated += 1
-        else:
-            # How did this happen???
-            sys.stderr.write('ERROR: database corrupted ... too many track lines for '+str(vessel)+'\n')
-
-    if vesselsUpdated>0:
-        cx.commit()
-        if v: sys.stderr.write('Updated tracks ... '+str(vesselsUpdated)+' tracks updated\n')
-
-    #
-    # Handle class B reports here
-    #
+        sys.stderr.write('\nREBUILD_TRACK_LINES (%s to %s)\n' % (str(startTime),str(datetime.datetime.utcnow())))
 
+    where = 'NOT (X(position) = 181 AND Y(position) = 91)'
+    params = []
     if startTime is not None:
-        #cu2 = cx.cursor()
-        print '*** Removing track_lines older than', startTime
-        #checkpoint()
-        cu.execute('SELECT COUNT(userid) FROM track_lines;')
-        #checkpoint()
-        count = cu.fetchone()
-        #checkpoint()
-        print 'COUNT track_lines "%s"' % count
-
-        #checkpoint()
-
-        import traceback
-
-        sql = 'DELETE FROM track_lines WHERE userid IN (SELECT userid FROM track_lines WHERE update_timestamp < %s);'
-        #try:
-        #    checkpoint()
-        cu.execute(sql,(startTime,))
-        #checkpoint()
-        #try:
-        cx.commit()
-        #except psycopg.ProgrammingError,inst:
-        #    sys.stderr.write('psycopg2 execute flailed: '+str(inst)+'\n')
-        #    traceback.print_exc(file=sys.stderr)
-
-        #checkpoint()
-
-        cu.execute('SELECT COUNT(userid) FROM track_lines;')
-        #checkpoint()
-        print 'AFTER COUNT track_lines',cu.fetchone()[0]
-
-        print 'done cleaning track_lines based on startTime'
+        where += ' AND cg_timestamp > %s'
+        params.append(startTime)
+    if vessels is not None:
+        where += ' AND userid = ANY(%s)'
+        params.append(list(vessels))
+    params = params * 2 # position and positionb
 
+    if vessels is None:
+        cu.execute('DELETE FROM '+trackTable+';')
+    else:
+        cu.execute('DELETE FROM '+trackTable+' WHERE userid = ANY(%s);',(list(vessels),))
+
+    # MakeLine takes the points in the order of the sorted subquery
+    points = ('SELECT userid,position,cg_sec FROM position WHERE ' + where +
+              ' UNION ALL SELECT userid,position,cg_sec FROM positionb WHERE ' + where)
+    recent = ('SELECT userid,position,cg_sec,'
+              'row_number() OVER (PARTITION BY userid ORDER BY cg_sec DESC) AS n '
+              'FROM (' + points + ') AS points')
+    if limitPoints is not None:
+        recent = 'SELECT * FROM (' + recent + ') AS numbered WHERE n <= ' + str(int(limitPoints))
+    name = ("COALESCE("
+            "(SELECT NULLIF(rtrim(name,' @'),'') FROM shipdata WHERE shipdata.userid = track.userid LIMIT 1),"
+            "(SELECT NULLIF(rtrim(name,' @'),'') FROM b_staticdata WHERE b_staticdata.userid = track.userid AND partnum = 0 LIMIT 1),"
+            "CAST(track.userid AS VARCHAR))")
+    sql = ('INSERT INTO ' + trackTable + ' (userid,name,track) '
+           'SELECT track.userid,' + name + ',MakeLine(track.position) '
+           'FROM (' + recent + ' ORDER BY userid,cg_sec DESC) AS track '
+           'GROUP BY track.userid HAVING COUNT(*) > 1;')
+    cu.execute(sql,params)
+    vesselsUpdated = cu.rowcount
+    cx.commit()
 
     if v:
-        sys.stderr.write('Leaving REBUILD_TRACK_LINES\n')
+        sys.stderr.write('Updated tracks ... '+str(vesselsUpdated)+' tracks updated\n')
+    return vesselsUpdated
 
 
 def rebuild_last_position(cx
@@ -498,8 +406,10 @@ def rebuild_last_position(cx
         print 'COUNT last_position',cu.fetchone()
 
         # Remove old points to keep the database lean... go back a few days
-        sql = 'DELETE FROM position WHERE key IN (SELECT key FROM position WHERE cg_timestamp < %s);'
+        # Whole partitions are dropped and the rest only touches the partition with when in it
         when = startTime - datetime.timedelta(days=4)
+        partition.dropPartitions(cx,'position',when,verbose=verbose)
+        sql = 'DELETE FROM position WHERE cg_timestamp < %s;'
         cu.execute(sql,(when,))
 
         sql = 'DELETE FROM last_position WHERE key IN (SELECT key FROM last_position WHERE cg_timestamp < %s);'
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""Find AIS messages that have already been heard.
+
+The same payload is often received by several stations and some feeds
+repeat lines.  TrackDuplicates keeps the recent payloads in a dict for
+O(1) lookups and in a deque in the order they were seen, so the old
+ones can be dropped from the front in O(1) when they fall out of the
+lookback by count or by USCG timestamp.
+
+Each message type can have its own time window.  Position reports are
+only repeated for a short time, while a type 5 with the same ship data
+can be a duplicate hours later.
+
+BloomDuplicates answers the same question in a fixed amount of memory
+for reprocessing months of logs with a long lookback.  It can report a
+new payload as a duplicate with a small, estimated probability.
+
+>>> dups = TrackDuplicates(lookback_length=2, lookback_time_sec=None)
+>>> [dups.check_packet(None, payload) for payload in ('a', 'b', 'a', 'c', 'a')]
+[(1, False), (2, False), (1, True), (3, False), (4, False)]
+
+@license: Apache 2.0
+"""
+
+from collections import deque
+import hashlib
+import math
+import struct
+
+type_windows = {'1': 30*60, '2': 30*60, '3': 30*60, '5': 6*60*60}
+'Seconds to look back for each message type character for --type-windows'
+
+
+class TrackDuplicates(object):
+    '''Handle a feed and assign packet identifiers for duplicates.
+
+    Does not distinguish duplicates coming from the same receiver
+    (should that ever happen).
+
+    @ivar dups: number of duplicates found
+    @ivar newest_time_sec: newest timestamp seen (UNIX UTC seconds)
+    '''
+
+    def __init__(self, lookback_length=None, lookback_time_sec=5*60, type_windows=None):
+        '''
+        @param lookback_length: most payloads to remember for each time
+            window or None for no limit
+        @param lookback_time_sec: seconds to remember payloads or None
+            for no limit
+        @param type_windows: seconds to remember payloads for each
+            message type character (e.g. the module type_windows).
+            Other types use lookback_time_sec.
+        @type type_windows: dict
+        '''
+        self.lookback_length = lookback_length
+        self.lookback_time_sec = lookback_time_sec
+        self.type_windows = type_windows or {}
+
+        self.rings = {}  # window -> ({payload: pkt_id}, deque of (time_sec, payload) oldest first)
+
+        self.next_new_id = 1 # skip zero: useful to not have a zero... bool(0) is False
+        self.newest_time_sec = 0  # Unix UTC sec
+        self.dups = 0
+
+    def __len__(self):
+        return sum([len(seen) for seen, ring in self.rings.itervalues()])
+
+    def check_packet(self, time_sec, payload):
+        '''Remember a payload and say if it is a duplicate.
+
+        @param time_sec: USCG timestamp or None if there is none
+        @param payload: the text in the 5th position of any message... the encoded message
+        @return: packet id and True if the payload was already seen
+        '''
+        window = self.type_windows.get(payload[:1], self.lookback_time_sec)
+        try:
+            seen, ring = self.rings[window]
+        except KeyError:
+            seen, ring = self.rings[window] = ({}, deque())
+
+        if time_sec is None:
+            time_sec = self.newest_time_sec
+        elif self.newest_time_sec < time_sec:
+            self.newest_time_sec = time_sec
+
+        if window and ring and ring[0][0] < self.newest_time_sec - window:
+            threshold_time = self.newest_time_sec - window
+            while ring and ring[0][0] < threshold_time:
+                del seen[ring.popleft()[1]]
+
+        pkt_id = seen.get(payload)
+        if pkt_id is not None:
+            self.dups += 1
+            return pkt_id, True
+
+        pkt_id = self.next_new_id
+        self.next_new_id += 1
+        seen[payload] = pkt_id
+        ring.append((time_sec, payload))
+        if self.lookback_length and len(ring) > self.lookback_length:
+            del seen[ring.popleft()[1]]
+        return pkt_id, False
+
+    def is_dup(self, time_sec, payload):
+        '@return: True if the payload was already seen'
+        return self.check_packet(time_sec, payload)[1]
+
+
+class BloomDuplicates(object):
+    '''Duplicate check with a Bloom filter for each bucket of time.
+
+    The lookback is split into buckets of USCG time.  New payloads go
+    into the newest bucket's filter and a whole bucket is dropped once
+    it is older than the lookback, so nothing ever has to be removed
+    from a filter.  A payload is remembered for at least lookback minus
+    one bucket of time.  Lines without a timestamp go in the newest bucket.
+
+    >>> dups = BloomDuplicates(lookback_time_sec=60, buckets=2, max_bytes=1024)
+    >>> [dups.is_dup(t, payload) for t, payload in ((0,'a'), (10,'a'), (40,'b'), (70,'a'), (100,'a'))]
+    [False, True, False, False, True]
+
+    @ivar dups: number of duplicates found
+    @ivar count: number of payloads added
+    @ivar capacity: payloads a bucket can hold before the false
+        positive rate goes over what was asked for
+    '''
+
+    def __init__(self, lookback_time_sec=6*60*60, fp_rate=0.001, max_bytes=64<<20, buckets=6,
+                 capacity=None):
+        '''
+        @param lookback_time_sec: seconds to remember payloads
+        @param fp_rate: false positive rate wanted for a full bucket
+        @param max_bytes: memory ceiling for all of the filters
+        @param buckets: number of pieces to split the lookback into.
+            More buckets frees memory sooner, but costs more lookups.
+        @param capacity: expected payloads per bucket.  The filters are
+            sized to fit that many at fp_rate, but no larger than
+            max_bytes.  [default: use all of max_bytes]
+        '''
+        assert 0 < fp_rate < 1
+        self.bucket_sec = float(lookback_time_sec) / buckets
+        self.num_buckets = buckets
+        self.num_hashes = max(1, int(round(-math.log(fp_rate, 2))))
+        self.hash_range = range(self.num_hashes)
+        bits = max(64, (max_bytes // buckets) * 8)
+        if capacity:
+            bits = min(bits, max(64, int(-capacity * math.log(fp_rate) / math.log(2)**2)))
+        self.num_bits = bits
+        self.capacity = int(bits * math.log(2)**2 / -math.log(fp_rate))
+
+        self.buckets = deque()  # [start_sec, bytearray, bits set], oldest first
+        self.newest_time_sec = 0
+        self.dups = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _probes(self, payload):
+        '@return: (byte, bit mask) for each hash of the payload'
+        h1, h2 = struct.unpack('<QQ', hashlib.md5(payload).digest())
+        m = self.num_bits
+        return [(i >> 3, 1 << (i & 7)) for i in [(h1 + j*h2) % m for j in self.hash_range]]
+
+    def _advance(self, time_sec):
+        'Start a new bucket if needed and drop the ones that are too old'
+        start = math.floor(time_sec / self.bucket_sec) * self.bucket_sec
+        buckets = self.buckets
+        if not buckets or buckets[-1][0] < start:
+            buckets.append([start, bytearray((self.num_bits + 7) // 8), 0])
+            oldest = start - (self.num_buckets - 1) * self.bucket_sec
+            while buckets[0][0] < oldest:
+                buckets.popleft()
+
+    def is_dup(self, time_sec, payload):
+        '''
+        @param time_sec: USCG timestamp or None if there is none
+        @param payload: the text in the 5th position of any message
+        @return: True if the payload was probably already seen
+        '''
+        if time_sec is not None and self.newest_time_sec < time_sec:
+            self.newest_time_sec = time_sec
+        if not self.buckets or self.newest_time_sec >= self.buckets[-1][0] + self.bucket_sec:
+            self._advance(self.newest_time_sec)
+
+        probes = self._probes(payload)
+        for bucket in reversed(self.buckets):
+            bits = bucket[1]
+            for byte, mask in probes:
+                if not bits[byte] & mask:
+                    break
+            else:
+                self.dups += 1
+                return True
+
+        bucket = self.buckets[-1]
+        bits = bucket[1]
+        for byte, mask in probes:
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                bucket[2] += 1
+        self.count += 1
+        return False
+
+    def fp_rate(self):
+        '''Estimate the chance that a new payload is called a duplicate
+        from how full the filters are now.'''
+        miss = 1.0
+        for start, bits, bits_set in self.buckets:
+            miss *= 1 - (float(bits_set) / self.num_bits) ** self.num_hashes
+        return 1 - miss
+
+    def memory(self):
+        '@return: bytes used by the filters'
+        return len(self.buckets) * ((self.num_bits + 7) // 8)
+
+    def __str__(self):
+        return ('bloom dedup: %d payloads, %d dups, %d buckets of %g sec, %d bytes, '
+                'capacity %d per bucket, estimated false positive rate %.2g' %
+                (self.count, self.dups, len(self.buckets), self.bucket_sec, self.memory(),
+                 self.capacity, self.fp_rate()))
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
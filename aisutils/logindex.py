@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+"""Sparse time index of the byte ranges in a USCG log file.
+
+Finding an hour of traffic in a daily log used to mean reading the
+whole file.  A log has a small sidecar file (log name + .idx) with
+one line for each run of lines whose USCG timestamps fall in the same
+bucket of time (a minute by default):
+
+  start offset, end offset, bucket, min cg_sec, max cg_sec, lines,
+  station counts and message type counts
+
+The timestamps in a log are not always in order (see ais_info.Uptime).
+Each entry keeps the smallest and largest timestamp of its lines, so
+a line that goes back in time only widens the entry it is in.  When
+time goes back by more than back_sec (e.g. a clock that was reset), a
+new entry is started.  A time range query reads every entry whose
+timestamps overlap the range and then checks the timestamp of each
+line, so out of order lines are never missed.  Anything written to the
+log after the last entry of the index is always read.
+
+The index is written while logging by IndexedLog (used by
+LogFileWithRotate and port_server.py) or afterwards by updateIndex
+(scripts/ais_log_index.py).
+
+>>> indexer = Indexer(bucket_sec=60)
+>>> offset = 0
+>>> for line in ('!AIVDM,1,1,,B,1a,0*00,r1,100', '!AIVDM,1,1,,B,5a,0*00,r2,95', '!AIVDM,1,1,,B,1b,0*00,r1,185'):
+...     indexer.add(line, offset, offset + len(line) + 1)
+...     offset += len(line) + 1
+>>> [(e.start, e.end, e.bucket, e.min_sec, e.max_sec, e.types) for e in indexer.finish()]
+[(0, 57, 60.0, 95.0, 100.0, {'1': 1, '5': 1}), (57, 86, 180.0, 185.0, 185.0, {'1': 1})]
+
+@license: Apache 2.0
+"""
+
+import mmap
+import os
+
+import logscan
+
+index_suffix = '.idx'
+'Added to the log file name for the name of its index'
+
+header_prefix = '# logindex 1 bucket_sec '
+
+
+class Entry(object):
+    '''One run of lines in a bucket of time.
+
+    @ivar start: offset of the first line
+    @ivar end: offset just past the last line
+    @ivar bucket: start of the time bucket (UNIX UTC seconds) or None
+        if no line has a timestamp yet
+    @ivar min_sec: smallest timestamp of the lines or None
+    @ivar max_sec: largest timestamp of the lines or None
+    @ivar lines: number of lines with a timestamp
+    @ivar stations: station name to number of lines
+    @ivar types: message type character (first payload character) to number of lines
+    '''
+    __slots__ = ('start', 'end', 'bucket', 'min_sec', 'max_sec', 'lines', 'stations', 'types')
+
+    def __init__(self, start, bucket=None):
+        self.start = start
+        self.end = start
+        self.bucket = bucket
+        self.min_sec = None
+        self.max_sec = None
+        self.lines = 0
+        self.stations = {}
+        self.types = {}
+
+    def overlaps(self, start=None, end=None):
+        '@return: True if there are lines from start up to end'
+        if self.min_sec is None:
+            return False
+        if start is not None and self.max_sec < start:
+            return False
+        if end is not None and self.min_sec >= end:
+            return False
+        return True
+
+    def __str__(self):
+        def counts(d):
+            return ','.join(['%s:%d' % item for item in sorted(d.items())])
+        def number(value):
+            if value is None:
+                return '-'
+            return '%.15g' % value
+        return '\t'.join((str(self.start), str(self.end), number(self.bucket), number(self.min_sec),
+                          number(self.max_sec), str(self.lines), counts(self.stations), counts(self.types)))
+
+    @classmethod
+    def parse(cls, text):
+        '@return: Entry from a line made by str()'
+        fields = text.rstrip('\r\n').split('\t')
+        def number(value):
+            if value == '-':
+                return None
+            return float(value)
+        def counts(value):
+            if not value:
+                return {}
+            return dict([(key, int(count)) for key, count in [item.rsplit(':', 1) for item in value.split(',')]])
+        e = cls(int(fields[0]), number(fields[2]))
+        e.end = int(fields[1])
+        e.min_sec = number(fields[3])
+        e.max_sec = number(fields[4])
+        e.lines = int(fields[5])
+        e.stations = counts(fields[6])
+        e.types = counts(fields[7])
+        return e
+
+
+class Indexer(object):
+    '''Split the lines of a log into entries as they are written or read.
+
+    @ivar entries: finished entries when there is no out file
+    '''
+    def __init__(self, bucket_sec=60, out=None, back_sec=300):
+        '''
+        @param bucket_sec: seconds of time in each entry
+        @param out: file to write each finished entry to or None to keep them in entries
+        @param back_sec: how far time can go back before a new entry is started
+        '''
+        self.bucket_sec = bucket_sec
+        self.back_sec = back_sec
+        self.out = out
+        self.entries = []
+        self.entry = None
+
+    def _finish_entry(self):
+        entry = self.entry
+        self.entry = None
+        if entry is None or entry.end == entry.start:
+            return
+        if self.out is not None:
+            self.out.write(str(entry) + '\n')
+            self.out.flush()
+        else:
+            self.entries.append(entry)
+
+    def add(self, line, offset, end):
+        '''
+        @param line: log line without the line ending
+        @param offset: offset of the start of the line in the log
+        @param end: offset just past the line ending
+        '''
+        cg_sec = None
+        if line and line[0] != '#':
+            cg_sec = logscan.cg_sec(line)
+        entry = self.entry
+        if cg_sec is not None:
+            bucket = cg_sec - cg_sec % self.bucket_sec
+            if entry is not None and entry.bucket is not None and (
+                    bucket > entry.bucket or cg_sec < entry.bucket - self.back_sec):
+                self._finish_entry()
+                entry = None
+            if entry is None:
+                entry = self.entry = Entry(offset, bucket)
+            elif entry.bucket is None:
+                entry.bucket = bucket
+            if entry.min_sec is None or cg_sec < entry.min_sec: entry.min_sec = cg_sec
+            if entry.max_sec is None or cg_sec > entry.max_sec: entry.max_sec = cg_sec
+            entry.lines += 1
+            station = logscan.station(line)
+            if station is not None:
+                entry.stations[station] = entry.stations.get(station, 0) + 1
+            msg_type = logscan.first_char(line)
+            if msg_type is not None:
+                entry.types[msg_type] = entry.types.get(msg_type, 0) + 1
+        elif entry is None:
+            entry = self.entry = Entry(offset)
+        entry.end = end
+
+    def add_file(self, f, offset=0):
+        '''Index the lines of an open file from its current position.
+
+        @param offset: offset of the current position of f
+        @return: offset of the end of the last line added
+        '''
+        for raw in f:
+            if not raw.endswith('\n'):
+                break  # Still being written
+            end = offset + len(raw)
+            self.add(raw.rstrip('\r\n'), offset, end)
+            offset = end
+        return offset
+
+    def finish(self):
+        '''Finish the entry in progress.
+
+        @return: the entries kept in memory
+        '''
+        self._finish_entry()
+        return self.entries
+
+
+class IndexedLog(object):
+    '''A log file opened for append that keeps its index up to date.
+
+    Works like a file for write, flush and close.  Writes do not have
+    to be whole lines.
+    '''
+    def __init__(self, filename, bucket_sec=60):
+        self.name = filename
+        self.log = open(filename, 'a')
+        self.offset = updateIndex(filename, bucket_sec)
+        f = open(filename, 'rb')
+        f.seek(self.offset)
+        self.partial = f.read()  # A line that was not finished
+        f.close()
+        index = open(filename + index_suffix, 'a')
+        self.indexer = Indexer(readHeader(filename + index_suffix) or bucket_sec, index)
+
+    def write(self, data):
+        self.log.write(data)
+        if '\n' not in data:
+            self.partial += data
+            return
+        lines = (self.partial + data).split('\n')
+        self.partial = lines.pop()
+        add = self.indexer.add
+        offset = self.offset
+        for line in lines:
+            end = offset + len(line) + 1
+            add(line.rstrip('\r'), offset, end)
+            offset = end
+        self.offset = offset
+
+    def flush(self):
+        self.log.flush()
+
+    def close(self):
+        self.log.close()
+        self.indexer.finish()
+        self.indexer.out.close()
+
+
+def readHeader(filename):
+    '@return: bucket_sec of an index file or None if it has no header'
+    try:
+        first = open(filename).readline()
+    except IOError:
+        return None
+    if not first.startswith(header_prefix):
+        return None
+    return float(first[len(header_prefix):])
+
+def readIndex(filename):
+    '''
+    @param filename: name of the index file
+    @return: bucket_sec and the list of entries
+    '''
+    f = open(filename)
+    first = f.readline()
+    if not first.startswith(header_prefix):
+        raise ValueError('not a log index: %s' % filename)
+    bucket_sec = float(first[len(header_prefix):])
+    entries = [Entry.parse(line) for line in f if line.strip() and line[0] != '#']
+    return bucket_sec, entries
+
+def updateIndex(log_filename, bucket_sec=60, verbose=False):
+    '''Index the lines of a log that are not in its index yet.
+
+    An index that does not match the log (e.g. the log was replaced by
+    a shorter one) is rebuilt.
+
+    @return: offset of the end of the indexed lines
+    '''
+    index_filename = log_filename + index_suffix
+    size = os.path.getsize(log_filename)
+    offset = 0
+    entries = []
+    if os.path.exists(index_filename):
+        try:
+            bucket_sec, entries = readIndex(index_filename)
+        except ValueError:
+            entries = None
+        if entries and entries[-1].end > size:
+            entries = None
+        if entries:
+            offset = entries[-1].end
+    if entries is None or not os.path.exists(index_filename):
+        out = open(index_filename, 'w')
+        out.write(header_prefix + '%g\n' % bucket_sec)
+        offset = 0
+    else:
+        out = open(index_filename, 'a')
+    if offset < size:
+        f = open(log_filename, 'rb')
+        f.seek(offset)
+        indexer = Indexer(bucket_sec, out)
+        offset = indexer.add_file(f, offset)
+        indexer.finish()
+        f.close()
+    out.close()
+    return offset
+
+def ranges(entries, start=None, end=None):
+    '''
+    @return: (start offset, end offset) of the parts of the log that
+        have lines from start up to end, with neighbors merged
+    '''
+    result = []
+    for entry in entries:
+        if not entry.overlaps(start, end):
+            continue
+        if result and result[-1][1] == entry.start:
+            result[-1][1] = entry.end
+        else:
+            result.append([entry.start, entry.end])
+    return [tuple(r) for r in result]
+
+def counts(entries, start=None, end=None):
+    '''
+    Add up the station and message type counts of the entries that
+    overlap start to end.  Entries that are only partly in the range
+    count all of their lines.
+
+    @return: lines, {station: count}, {type: count}
+    '''
+    lines = 0
+    stations = {}
+    types = {}
+    for entry in entries:
+        if not entry.overlaps(start, end):
+            continue
+        lines += entry.lines
+        for key, count in entry.stations.iteritems():
+            stations[key] = stations.get(key, 0) + count
+        for key, count in entry.types.iteritems():
+            types[key] = types.get(key, 0) + count
+    return lines, stations, types
+
+def scan_time(log_filename, start=None, end=None):
+    '''Lines with a USCG timestamp from start up to end.
+
+    Only the parts of the log that the index points at are read.  If
+    there is no index, the whole log is read.
+
+    @param start: UNIX UTC seconds or None
+    @param end: UNIX UTC seconds to stop before or None
+    @return: iterator of lines without the line endings, in log order
+    '''
+    f = open(log_filename, 'rb')
+    try:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, EnvironmentError):
+        f.close()
+        return iter(())  # Empty file
+    f.close()
+    size = len(data)
+    parts = [(0, size)]
+    try:
+        bucket_sec, entries = readIndex(log_filename + index_suffix)
+    except (IOError, ValueError):
+        entries = None
+    if entries is not None and (not entries or entries[-1].end <= size):
+        parts = ranges(entries, start, end)
+        indexed_end = entries and entries[-1].end or 0
+        if indexed_end < size:
+            parts.append((indexed_end, size))
+    return _scan_parts(data, parts, start, end)
+
+def _scan_parts(data, parts, start, end):
+    for part_start, part_end in parts:
+        for lines in logscan.scan_blocks(data, start=part_start, end=part_end):
+            for line in lines:
+                cg_sec = logscan.cg_sec(line)
+                if cg_sec is None:
+                    continue
+                if start is not None and cg_sec < start: continue
+                if end is not None and cg_sec >= end: continue
+                yield line
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
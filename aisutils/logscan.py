@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""Scan USCG N-AIS log files without splitting every line.
+
+A day of N-AIS logs is several gigabytes.  Most of the summary tools
+only need the message type character, the station or the timestamp of
+each line, but were splitting the whole line to get at one field.
+
+scan() memory maps the log and splits it into lines a block at a time
+so that python does not have to buffer the file or run any code for
+each line.  Comment lines (#) and
+blank lines are skipped.  The field functions below pull one field out
+of a line with a limited split or rfind instead of splitting the whole
+line.
+
+>>> line = '!AIVDM,1,1,,A,14`qQb0000o?u?DK>Smo2E`v0404,0*1A,r003669987,1152921693'
+>>> first_char(line), station(line), cg_sec(line)
+('1', 'r003669987', 1152921693.0)
+>>> list(scan_string('# 2006-07-15\\n\\n' + line + '\\r\\n')) == [line]
+True
+
+@license: Apache 2.0
+"""
+
+import itertools
+import mmap
+
+
+def payload(line):
+    """
+    @return: armored AIS payload (NMEA field 5) or None for short lines
+    """
+    try:
+        return line.split(',',6)[5]
+    except IndexError:
+        return None
+
+def first_char(line):
+    """First payload character.  This is the message type for the first
+    sentence of a message.
+
+    @return: one character or None for short lines
+    """
+    try:
+        return line.split(',',6)[5][:1] or None
+    except IndexError:
+        return None
+
+def sentence_num(line):
+    """
+    @return: the sentence number field (e.g. '1') or None
+    """
+    try:
+        return line.split(',',3)[2]
+    except IndexError:
+        return None
+
+def channel(line):
+    """
+    @return: the AIS channel field ('A', 'B' or '') or None
+    """
+    try:
+        return line.split(',',5)[4]
+    except IndexError:
+        return None
+
+def station(line):
+    """Receive station of a USCG line.
+
+    The station is usually next to the timestamp, so try there first
+    and only then look through the rest of the fields after the
+    checksum.
+
+    >>> station('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,s1234,r003669958,S4321,1085889680')
+    'r003669958'
+    >>> station('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63') is None
+    True
+
+    Only the fields after the checksum are looked at, so the payload of
+    a line without a USCG tail is never taken for the station.
+
+    >>> station('!AIVDM,1,1,,B,B52K>;h00Fc>jpUlNV@ikwpUoP06,0*4C') is None
+    True
+    >>> station('!AIVDM,1,1,,B,B52K>;h00Fc>jpUlNV@ikwpUoP06,0*4C,1241481600') is None
+    True
+
+    @return: station with the leading r or b or None
+    """
+    fields = line.rstrip().rsplit(',',2)
+    for field in fields[:0:-1]:
+        if '*' in field:
+            return None  # Reached the checksum
+        if field[:1] in ('r','b','R','B') and len(field) > 1:
+            return field
+    if len(fields) < 3:
+        return None
+    for field in fields[0].split(',')[:6:-1]:
+        if '*' in field:
+            break
+        if field[:1] in ('r','b','R','B') and len(field) > 1:
+            return field
+    return None
+
+def cg_sec(line):
+    """
+    @return: the trailing UNIX UTC timestamp as a float or None
+    """
+    try:
+        return float(line[line.rfind(',')+1:])
+    except ValueError:
+        return None
+
+
+def scan_blocks(data, comments=False, start=0, end=None, block_size=1<<20):
+    """Yield lists of the lines in a str or mmap without the line endings.
+
+    Each block is split into lines by str.splitlines, so there is no
+    python code run for each line unless the block has comments or
+    blank lines to drop.
+
+    @param comments: also keep lines that start with a #
+    @param start: offset of the start of a line to start at
+    @param end: offset to stop at [default: end of data]
+    @param block_size: about how many bytes to split into lines at once
+    """
+    if end is None:
+        end = len(data)
+    pos = start
+    while pos < end:
+        stop = data.find('\n', min(pos+block_size,end)-1, end)
+        if stop < 0:
+            stop = end
+        else:
+            stop += 1
+        block = data[pos:stop]
+        lines = block.splitlines()
+        if not comments and '#' in block:
+            lines = [line for line in lines if line and line[0] != '#']
+        elif '' in lines:
+            lines = [line for line in lines if line]
+        yield lines
+        pos = stop
+
+
+def scan_string(data, comments=False, start=0, end=None):
+    """Iterate over the lines in a str or mmap without the line endings.
+
+    @param comments: also yield lines that start with a #
+    @param start: offset of the start of a line to start at
+    @param end: offset to stop at [default: end of data]
+    """
+    return itertools.chain.from_iterable(scan_blocks(data, comments, start, end))
+
+
+def _scan_file(f, comments):
+    for line in f:
+        line = line.rstrip('\r\n')
+        if not line or (line[0] == '#' and not comments):
+            continue
+        yield line
+
+
+def scan(filename, comments=False):
+    """Iterate over the lines of a log file without the line endings.
+
+    The file is memory mapped.  Things that can not be mapped
+    (e.g. pipes and empty files) are read one line at a time.
+
+    @param filename: name of the file or an open file
+    @param comments: also yield lines that start with a #
+    """
+    if isinstance(filename, basestring):
+        f = open(filename, 'rb')
+    else:
+        f = filename
+    try:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, EnvironmentError, AttributeError):
+        return _scan_file(f, comments)
+    if f is not filename:
+        f.close() # The map stays valid
+    return scan_string(data, comments)
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
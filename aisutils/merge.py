@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""Merge the copies of a transmission heard by several receivers.
+
+With overlapping receivers, each transmission shows up once per station
+that heard it.  ReceiverMerge groups the lines with the same payload
+that arrive within a window of USCG time into one Transmission.  The
+Transmission keeps every reception with its station, s (RSSI),
+d (dBm), T (time of arrival) and S (slot) fields and picks one
+reception as the primary copy: the strongest signal or the earliest
+arrival.
+
+>>> lines = ['!AIVDM,1,1,,B,15Mwq1WP01rB2crBh5G:6?v200Rj,0*59,s28057,d-95,T49.46,S1855,rRDSULI1,1224516422',
+...          '!AIVDM,1,1,,B,15Mwq1WP01rB2crBh5G:6?v200Rj,0*59,s29001,d-88,T49.46,S1855,rRDSULI2,1224516422',
+...          '!AIVDM,1,1,,A,14`qQb0000o?u?DK>Smo2E`v0404,0*1A,r003669987,1224516430']
+>>> for t in merge(lines): print t.primary.station, t.stations()
+rRDSULI2 ['rRDSULI1', 'rRDSULI2']
+r003669987 ['r003669987']
+
+Multi-line messages must be normalized first.
+
+@license: Apache 2.0
+"""
+
+from collections import deque
+
+import uscg
+
+def strongest(msg):
+    '@return: sort key where a larger key is a better reception'
+    return (msg.signalStrength is not None, msg.signalStrength, msg.rssi)
+
+def earliest(msg):
+    '@return: sort key where a larger key is an earlier reception'
+    return (msg.cg_sec is not None, -(msg.cg_sec or 0), -(msg.timeOfArrival or 0))
+
+best_functions = {'strongest':strongest, 'earliest':earliest}
+'Ways to pick the primary copy of a transmission'
+
+
+class Transmission(object):
+    """One message and all of the stations that received it.
+
+    @ivar line: NMEA line of the primary reception
+    @ivar primary: UscgNmea of the primary reception
+    @ivar receptions: UscgNmea for every copy in the order received
+    @ivar first_sec: USCG time of the first copy
+    """
+    __slots__ = ('line','primary','receptions','first_sec','key')
+
+    def __init__(self,line,msg,first_sec,key):
+        self.line = line
+        self.primary = msg
+        self.receptions = [msg]
+        self.first_sec = first_sec
+        self.key = key
+
+    def stations(self):
+        '@return: the station of each reception'
+        return [msg.station for msg in self.receptions]
+
+    def __len__(self):
+        return len(self.receptions)
+
+
+class ReceiverMerge(object):
+    """Group copies of a transmission from different receivers.
+
+    Transmissions come out of done() in the order they were first heard
+    once the USCG time has moved more than window seconds past them.
+
+    @ivar transmissions: transmissions finished
+    @ivar receptions: AIS lines merged into transmissions
+    """
+    def __init__(self,window=2,best='strongest'):
+        """
+        @param window: seconds after the first copy to accept more copies
+        @param best: 'strongest' or 'earliest' to pick the primary copy
+        """
+        self.window = window
+        self.better = best_functions[best]
+        self.pending = {}      # (payload,fillbits) -> Transmission
+        self.order = deque()   # Transmissions oldest first
+        self.newest_time_sec = 0
+        self.transmissions = 0
+        self.receptions = 0
+
+    def add(self,line):
+        """Take the next line.
+
+        @param line: normalized USCG NMEA line
+        @return: None if the line was merged or the stripped line if it
+            can not be merged and should be passed along
+        """
+        line = line.strip()
+        msg = uscg.parse(line)
+        if msg is None or msg.totalSentences != 1:
+            return line
+
+        if msg.cg_sec is None:
+            time_sec = self.newest_time_sec
+        else:
+            time_sec = msg.cg_sec
+            if self.newest_time_sec < time_sec:
+                self.newest_time_sec = time_sec
+
+        self.receptions += 1
+        key = (msg.contents,msg.fillbits)
+        t = self.pending.get(key)
+        if t is None or time_sec > t.first_sec + self.window:
+            t = Transmission(line,msg,time_sec,key)
+            self.pending[key] = t  # A later copy of an old transmission starts a new one
+            self.order.append(t)
+            return None
+
+        t.receptions.append(msg)
+        if self.better(msg) > self.better(t.primary):
+            t.primary = msg
+            t.line = line
+        return None
+
+    def _pop(self):
+        t = self.order.popleft()
+        if self.pending.get(t.key) is t:
+            del self.pending[t.key]
+        self.transmissions += 1
+        return t
+
+    def done(self):
+        """Yield the transmissions that can not get any more copies"""
+        order = self.order
+        threshold = self.newest_time_sec - self.window
+        while order and order[0].first_sec < threshold:
+            yield self._pop()
+
+    def flush(self):
+        """Yield all of the remaining transmissions (e.g. at the end of the input)"""
+        while self.order:
+            yield self._pop()
+
+
+def merge(lines,window=2,best='strongest'):
+    """Yield a Transmission for each message in the lines.
+
+    Lines that can not be merged (e.g. not AIS) are dropped.
+
+    @param lines: iterable of normalized USCG NMEA lines
+    @param window: seconds after the first copy to accept more copies
+    @param best: 'strongest' or 'earliest'
+    """
+    merger = ReceiverMerge(window,best)
+    for line in lines:
+        merger.add(line)
+        for t in merger.done():
+            yield t
+    for t in merger.flush():
+        yield t
+
+
+def ordered(merger,lines):
+    """Yield the Transmissions and the lines that can not be merged in
+    the order of the input.
+
+    A line that is passed through (a comment, a $ sentence or part of
+    a multi-line message) is held until every transmission first heard
+    before it has come out, so it does not move ahead of them.
+
+    >>> lines = ['!AIVDM,1,1,,B,15Mwq1WP01rB2crBh5G:6?v200Rj,0*59,rA,1000', '# comment']
+    >>> [getattr(item,'line',item) for item in ordered(ReceiverMerge(),lines)]
+    ['!AIVDM,1,1,,B,15Mwq1WP01rB2crBh5G:6?v200Rj,0*59,rA,1000', '# comment']
+
+    @param merger: ReceiverMerge
+    @param lines: iterable of normalized USCG NMEA lines
+    @return: iterator of Transmissions and stripped lines
+    """
+    held = deque()  # (transmissions before it, line)
+    add = merger.add
+    for line in lines:
+        line = add(line)
+        if line is not None:
+            held.append((merger.transmissions + len(merger.order),line))
+        for t in merger.done():
+            while held and held[0][0] < merger.transmissions:
+                yield held.popleft()[1]
+            yield t
+        while held and held[0][0] <= merger.transmissions:
+            yield held.popleft()[1]
+    for t in merger.flush():
+        while held and held[0][0] < merger.transmissions:
+            yield held.popleft()[1]
+        yield t
+    while held:
+        yield held.popleft()[1]
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
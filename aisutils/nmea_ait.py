@@ -32,7 +32,7 @@ standard.  I refuse to do multi-line output.
 '''
 import nmea.checksum
 import uscg
-import ais
+import ais.ais_msg_1
 from math import *
 
 
@@ -25,26 +25,25 @@ Convert AIS messages from AIVDM binary to IVS C&C NMEA strings
 
 import nmea.checksum
 import uscg
-import ais
+import ais.ais_msg_1
 from math import *
 import datetime
 
 def msg_1_to_cnc(nmea_str):
-    match_obj = uscg.uscg_ais_nmea_regex.search(nmea_str.strip())
-    if match_obj is None:
+    msg = uscg.parse(nmea_str)
+    if msg is None:
         # throw exception
         print 'no match!',nmea_str
         return None
-    grp = match_obj.group
 
-    bv = ais.binary.ais6tobitvec(grp('body'))
+    bv = ais.binary.ais6tobitvec(msg.contents)
     body = ais.ais_msg_1.decode(bv)
 
     #ais.ais_msg_1.printFields(body)
 
     r = ['$C&C',]
     r.append(str(body['UserID'])) # Vehicle name
-    r.append(datetime.datetime.utcfromtimestamp(float(grp('timeStamp'))).strftime('%H:%M:%S.0'))
+    r.append(datetime.datetime.utcfromtimestamp(msg.cg_sec).strftime('%H:%M:%S.0'))
     r.append(str(float(body['longitude'])))
     r.append(str(float(body['latitude'])))
     heading = body['TrueHeading']
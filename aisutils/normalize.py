@@ -23,109 +23,63 @@ Rewrite from the command line only ais_normalize
 @see: U{Queue<http://www.python.org/doc/current/lib/QueueObjects.html>}
 '''
 
-import sys
 import Queue
-import uscg
-import ais.nmea
-#from decimal import Decimal
-#from BitVector import BitVector
-#import StringIO
-
-
-#from ais.nmea import isChecksumValid,checksumStr # Needed for checksums
-#import ais.nmea
+import sys
+from reassemble import Reassembler
 
 class Normalize(Queue.Queue):
     '''
     Provide a channel that normalizes messages.  Try to model it like a Queue.
+
+    The work is done by L{reassemble.Reassembler}, the same code that
+    ais_normalize uses.  Message times come from the USCG timestamps
+    so that replaying old logs behaves the same as live data.
+
+    @ivar reassembler: the reassembly state and counters
     '''
-    def __init__(self,maxsize=0,ttl=30,verbose=False):
+    def __init__(self,maxsize=0,ttl=30,verbose=False,max_per_station=50,window=None,
+                 treatABequal=False,allow_missing_timestamps=False,errors=sys.stderr):
         '''
-        param ttl: number of seconds that a message fragment can live
+        @param ttl: number of seconds that a message fragment can live
+        @param max_per_station: most messages in progress for a station.
+            The oldest is dropped to make room.
+        @param window: seconds the parts of a message can span [default: ttl]
+        @param errors: file to report dropped fragments to or None
         '''
         Queue.Queue.__init__(self,maxsize)
-        self.mostRecentTime=0 # Seconds from UTC epoch
-        self.ttl=ttl
-        self.stations={}  # Buffer by station
-        self.v=verbose
-
-    def cull(self):
+        if window is None: window=ttl
+        self.reassembler = Reassembler(window=window,treatABequal=treatABequal,
+                                       allow_missing_timestamps=allow_missing_timestamps,
+                                       ttl=ttl,max_per_station=max_per_station,verbose=verbose,
+                                       errors=errors)
+
+    completed = property(lambda self: self.reassembler.completed,
+                         doc='multi-line messages put together')
+    dropped = property(lambda self: self.reassembler.dropped,
+                       doc='fragments thrown away before their message was done')
+    expired = property(lambda self: self.reassembler.expired,
+                       doc='fragments older than the ttl')
+    mostRecentTime = property(lambda self: self.reassembler.mostRecentTime,
+                              doc='Seconds from UTC epoch of the newest message')
+
+    def fragments(self):
+        '@return: number of fragments waiting for the rest of their message'
+        return self.reassembler.fragments()
+
+    def stats(self):
         '''
-        Drop messages older than the ttl
+        @return: counters for logging
+        @rtype: dict
         '''
-        pass
+        return self.reassembler.stats()
 
-    def put(self,uscgNmeaStr,block=True,timeout=None):
-
-        cgMsg = uscg.UscgNmea(uscgNmeaStr)
-        if self.mostRecentTime<cgMsg.cg_sec:
-            self.mostRecentTime = cgMsg.cg_sec
-
-
-        # single line message needs no help
-        if 1 == cgMsg.totalSentences:
-            Queue.Queue.put(self,uscgNmeaStr,block,timeout)
-            return
-
-        if cgMsg.sentenceNum!=cgMsg.totalSentences:
-            station = cgMsg.station
-            if station not in self.stations:
-                self.stations[station] = [cgMsg,]
-            else:
-                #print 'self.stations[station]',station,type(self.stations[station])
-                self.stations[station].append(cgMsg)
-            self.cull()  # Clean house so the buffers do not get too large
-            return
+    def __str__(self):
+        return str(self.reassembler)
 
-        # We have a final sentence, so construct the whole deal
-
-        # Only can happen the first time we see a station and have not seen the first sentence
-        if cgMsg.station not in self.stations:
-            sys.stderr.write('dropping dangling fragment\n')
-            return
-
-        cgMsgFinal = cgMsg
-        stationList = self.stations[cgMsgFinal.station]
-
-        parts=[]
-        payloads=[]
-
-        del cgMsg
-
-        for msg in stationList:
-            if (msg.aisChannel == cgMsgFinal.aisChannel
-                and msg.sequentialMsgId == cgMsgFinal.sequentialMsgId
-                ):
-                if msg.sentenceNum==1:
-                    cgMsgFinal.cg_sec=msg.cg_sec # Save the first timestamp
-                parts.append(msg)
-                payloads.append(msg.contents)#.getBitVector)
-                assert(msg.fillbits==0)
-
-        #print 'num parts',len(parts)
-
-        #print 'before',len(stationList)
-        for cgMsg in parts:
-            stationList.remove(cgMsg)
-        #print 'after',len(stationList)
-
-        if len(parts)!=cgMsgFinal.totalSentences-1:
-            if self.v: sys.stderr.write('partial message.  Discarding\n')
+    def put(self,uscgNmeaStr,block=True,timeout=None):
+        line = self.reassembler.add(uscgNmeaStr)
+        if line is None:
             return
-
-        payloads.append(cgMsgFinal.contents)
-        #print 'payloads:', payloads
-
-        # The fill bits will not change
-        #bv = payloads[0]
-        payload = ''.join(payloads)
-        #print payload
-        #parts.append(cgMsgFinal.getBitVector)
-
-        cgMsgFinal.totalSentences=1
-        cgMsgFinal.sentenceNum=1
-        cgMsgFinal.contents = payload
-        cgMsgFinal.checksumStr = ais.nmea.checksumStr(payload)
-        newNmeaStr = cgMsgFinal.buildNmea()
-        #print 'queuing',newNmeaStr
-        Queue.Queue.put(self,newNmeaStr,block,timeout)
+        if line == uscgNmeaStr.strip():
+            line = uscgNmeaStr  # Passed through, so keep the line ending
+        Queue.Queue.put(self,line,block,timeout)
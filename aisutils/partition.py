@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+"""Split the position tables into a table for each day or hour.
+
+With one big position table, expiring old reports is a DELETE of
+millions of rows that the reaper can not keep up with.  Partitioned,
+expiring a day is dropping a table.
+
+PostgreSQL: position and positionb stay as the parent tables from
+sqlCreate() and each period gets a child table with a CHECK on
+cg_timestamp that INHERITS the parent.  An insert trigger on the parent
+sends each row (INSERT or COPY) to its child and makes the child the
+first time it is needed.  With constraint_exclusion (the default of
+'partition' since 8.4), a query on the parent with a cg_timestamp range
+only reads the children that overlap.  Rows without a cg_timestamp stay
+in the parent.
+
+SQLite is not partitioned.  A sqlite database from ais_build_sqlite.py
+is one file for a set of logs, so ais-db only allows --partition and
+--expire-days with postgres.
+
+>>> partitionName('position', 1241481600, 'day'), partitionName('position', 1241481600, 'hour')
+('position_20090505', 'position_2009050500')
+>>> periodStart('position_2009050513')
+datetime.datetime(2009, 5, 5, 13, 0)
+
+@license: Apache 2.0
+"""
+
+import datetime
+import os
+import sys
+
+partitioned_tables = ('position', 'positionb')
+'Tables that are split up by time'
+
+periods = {'day':('%Y%m%d', datetime.timedelta(days=1)),
+           'hour':('%Y%m%d%H', datetime.timedelta(hours=1))}
+'Suffix format and length of each partition period'
+
+pg_formats = {'day':'YYYYMMDD', 'hour':'YYYYMMDDHH24'}
+'PostgreSQL to_char formats that match the periods'
+
+def _datetime(when):
+    'UNIX UTC seconds or a datetime to a datetime'
+    if isinstance(when, datetime.datetime):
+        return when.replace(tzinfo=None) - (when.utcoffset() or datetime.timedelta(0))
+    return datetime.datetime.utcfromtimestamp(int(when))
+
+def partitionName(table, when, period='day'):
+    '''
+    @param when: UNIX UTC seconds or a UTC datetime
+    @param period: day or hour
+    @return: name of the partition of table that holds when
+    '''
+    return table + '_' + _datetime(when).strftime(periods[period][0])
+
+def periodStart(name):
+    '''
+    @param name: partition table or file name (e.g. position_20090505)
+    @return: start of the period or None if name is not a partition
+    @rtype: datetime
+    '''
+    suffix = os.path.splitext(os.path.basename(name))[0].split('_')[-1]
+    for fmt, length in periods.itervalues():
+        if len(suffix) == len(datetime.datetime(2000,1,1).strftime(fmt)):
+            try:
+                return datetime.datetime.strptime(suffix, fmt)
+            except ValueError:
+                return None
+    return None
+
+def periodOf(name):
+    '@return: day or hour for a partition name'
+    suffix = os.path.splitext(os.path.basename(name))[0].split('_')[-1]
+    if len(suffix) == 10:
+        return 'hour'
+    return 'day'
+
+
+######################################################################
+# PostgreSQL
+
+def triggerSql(table, period='day'):
+    '''
+    @return: SQL for the insert trigger that sends rows to the partitions of table
+    '''
+    return '''CREATE OR REPLACE FUNCTION %(table)s_partition_insert() RETURNS trigger AS $$
+DECLARE
+  start TIMESTAMP;
+  child TEXT;
+BEGIN
+  IF NEW.cg_timestamp IS NULL THEN
+    RETURN NEW;
+  END IF;
+  start := date_trunc('%(period)s', NEW.cg_timestamp);
+  child := '%(table)s_' || to_char(start, '%(fmt)s');
+  BEGIN
+    EXECUTE 'INSERT INTO ' || quote_ident(child) || ' SELECT ($1).*' USING NEW;
+  EXCEPTION WHEN undefined_table THEN
+    EXECUTE 'CREATE TABLE ' || quote_ident(child) || ' (CHECK (cg_timestamp >= '
+      || quote_literal(start) || ' AND cg_timestamp < '
+      || quote_literal(start + interval '1 %(period)s') || ')) INHERITS (%(table)s)';
+    EXECUTE 'CREATE INDEX ' || quote_ident(child || '_cg_timestamp') || ' ON ' || quote_ident(child) || ' (cg_timestamp)';
+    EXECUTE 'CREATE INDEX ' || quote_ident(child || '_userid') || ' ON ' || quote_ident(child) || ' (userid)';
+    EXECUTE 'INSERT INTO ' || quote_ident(child) || ' SELECT ($1).*' USING NEW;
+  END;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS %(table)s_partition ON %(table)s;
+CREATE TRIGGER %(table)s_partition BEFORE INSERT ON %(table)s
+  FOR EACH ROW EXECUTE PROCEDURE %(table)s_partition_insert();''' % {
+        'table':table, 'period':period, 'fmt':pg_formats[period]}
+
+def createPartition(cx, table, when, period='day'):
+    '''Make the child table for a period before any rows arrive.
+
+    @param when: UNIX UTC seconds or a UTC datetime in the period
+    @return: name of the child table
+    '''
+    name = partitionName(table, when, period)
+    start = periodStart(name)
+    cu = cx.cursor()
+    cu.execute('SELECT 1 FROM pg_class WHERE relname = %s;', (name,))
+    if cu.fetchall():
+        return name
+    cu.execute('CREATE TABLE ' + name + ' (CHECK (cg_timestamp >= %s AND cg_timestamp < %s)) INHERITS (' + table + ');',
+               (start, start + periods[period][1]))
+    cu.execute('CREATE INDEX ' + name + '_cg_timestamp ON ' + name + ' (cg_timestamp);')
+    cu.execute('CREATE INDEX ' + name + '_userid ON ' + name + ' (userid);')
+    cx.commit()
+    return name
+
+def partitionTables(cx, tables=partitioned_tables, period='day', ahead=1, verbose=False):
+    '''Partition tables made by createTables.
+
+    @param ahead: periods after the current one to make now
+    '''
+    cu = cx.cursor()
+    now = datetime.datetime.utcnow()
+    for table in tables:
+        if verbose:
+            sys.stderr.write('partitioning %s by %s\n' % (table, period))
+        cu.execute(triggerSql(table, period))
+        cx.commit()
+        for i in range(ahead + 1):
+            createPartition(cx, table, now + i * periods[period][1], period)
+
+def listPartitions(cx, table):
+    '''
+    @return: names of the child tables of table, oldest first
+    '''
+    cu = cx.cursor()
+    cu.execute('SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+               'JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s;', (table,))
+    names = [row[0] for row in cu.fetchall() if periodStart(row[0]) is not None]
+    names.sort(key=periodStart)
+    return names
+
+def dropPartitions(cx, table, before, verbose=False):
+    '''Expire the partitions whose whole period is before a time.
+
+    The drops are not committed, so they go in with the rest of the
+    caller's transaction.
+
+    @param before: UNIX UTC seconds or a UTC datetime
+    @return: names of the tables dropped
+    '''
+    before = _datetime(before)
+    cu = cx.cursor()
+    dropped = []
+    for name in listPartitions(cx, table):
+        if periodStart(name) + periods[periodOf(name)][1] > before:
+            break
+        if verbose:
+            sys.stderr.write('dropping %s\n' % name)
+        cu.execute('DROP TABLE ' + name + ';')
+        dropped.append(name)
+    return dropped
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+r"""Load AIS messages into PostgreSQL with COPY FROM STDIN.
+
+An INSERT per message spends most of its time on round trips and
+parsing SQL.  CopyLoader keeps the rows for each table as COPY text
+and sends a whole chunk at once with cursor.copy_expert.  The columns
+come from the generated sqlCreate() of each message module, so the
+rows fit the tables from ais_build_postgis.py -C and
+aisutils.database.createTables.  Geometry is sent as hex EWKB, which
+PostGIS reads without parsing WKT.
+
+When the database refuses a chunk (e.g. a string too long for its
+VARCHAR), the chunk is rolled back and split in half until the bad rows
+are found.  Those are counted as rejected and written to the rejects
+file.  The rest of the rows still get loaded.
+
+>>> copy_value(None), copy_value(True), copy_value('a\tb\\c')
+('\\N', 't', 'a\\tb\\\\c')
+
+@see: U{COPY<http://www.postgresql.org/docs/current/static/sql-copy.html>}
+@license: Apache 2.0
+"""
+
+import StringIO
+import sys
+import time
+
+import binary
+import uscg
+import wkb
+
+copy_msgs = (1, 2, 3, 4, 5, 18)
+'Message numbers loaded by default: position, bsreport, shipdata and positionb'
+
+point_fields = ('longitude', 'latitude')
+'Fields for a POINT when the message module does not say'
+
+def copy_value(value):
+    '''
+    @param value: decoded value from a message (None for NULL)
+    @return: value in the COPY text format
+    @rtype: str
+    '''
+    if value is None:
+        return r'\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, float):
+        return repr(value)
+    value = str(value)
+    if '\\' in value or '\t' in value or '\n' in value or '\r' in value:
+        value = value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return value
+
+
+class Table(object):
+    '''COPY columns for the table of one message module.
+
+    >>> import ais
+    >>> t = Table(ais.msgModByNumber[18])
+    >>> t.name, t.fields[:3], t.geometry
+    ('positionb', ['MessageID', 'RepeatIndicator', 'UserID'], [('Position', 4326, ('longitude', 'latitude'))])
+
+    @ivar name: table name
+    @ivar fields: sqlCreate fields in column order without the primary key
+    @ivar geometry: (field, SRID, (x field, y field)) for each PostGIS POINT
+    @ivar sql: the COPY command
+    '''
+    def __init__(self, msgMod):
+        '''
+        @param msgMod: message module with sqlCreate (e.g. ais.ais_msg_18)
+        '''
+        create = msgMod.sqlCreate(dbType='postgres')
+        self.name = create.table.lower()
+        self.fields = [field for field, typeStr in zip(create.fields, create.types)
+                       if 'PRIMARY KEY' not in typeStr]
+        fromPgFields = getattr(msgMod, 'fromPgFields', {})
+        self.geometry = []
+        for field, typeName, dimension, SRID in create.postgis:
+            if typeName != 'POINT':
+                raise ValueError('Can only COPY POINT geometry, not %s for %s' % (typeName, field))
+            self.geometry.append((field, int(SRID), fromPgFields.get(field, point_fields)))
+        columns = [field.lower() for field in self.fields] + [g[0].lower() for g in self.geometry]
+        self.sql = 'COPY %s (%s) FROM STDIN' % (self.name, ','.join(columns))
+
+    def row(self, params):
+        '''
+        @param params: decoded message plus any cg_ fields
+        @return: line of COPY text.  Missing fields are NULL.
+        '''
+        values = [copy_value(params.get(field)) for field in self.fields]
+        for field, SRID, (x, y) in self.geometry:
+            x = params.get(x)
+            y = params.get(y)
+            if x is None or y is None:
+                values.append(r'\N')
+            else:
+                values.append(wkb.point(float(x), float(y), SRID))
+        return '\t'.join(values) + '\n'
+
+
+class CopyLoader(object):
+    '''Buffer rows for each table and COPY them in chunks.
+
+    @ivar rows: rows loaded
+    @ivar rejected: rows the database would not take
+    @ivar bad: lines that could not be decoded
+    @ivar chunks: COPY commands that went in
+    @ivar counts: rows loaded for each table
+    '''
+    def __init__(self, cx, chunk_size=10000, rejects=None, msgs=copy_msgs, wanted=None,
+                 latest=(), verbose=False):
+        '''
+        @param cx: psycopg2 connection.  Each chunk is committed.
+        @param chunk_size: rows to send in each COPY
+        @param rejects: file to write the table and COPY text of rejected rows to
+        @param msgs: message numbers to load with add_line
+        @param wanted: function of the decoded message that returns
+            False for positions to skip (e.g. outside a bounding box)
+        @param latest: tables (e.g. shipdata) that only keep the newest
+            row for each UserID.  Those rows are loaded by finish().
+        '''
+        self.cx = cx
+        self.cu = cx.cursor()
+        self.chunk_size = chunk_size
+        self.rejects = rejects
+        self.msgChars = set([chr(num + 48) if num < 40 else chr(num + 56) for num in msgs])
+        self.wanted = wanted
+        self.latest = dict([(name, {}) for name in latest])  # table -> {UserID: (Table, params)}
+        self.v = verbose
+
+        self.tables = {}   # message module name -> Table
+        self.pending = {}  # Table -> COPY lines
+        self.start = time.time()
+        self.copy_sec = 0.
+        self.rows = 0
+        self.rejected = 0
+        self.bad = 0
+        self.chunks = 0
+        self.counts = {}
+
+    def table(self, msgMod):
+        '@return: the Table for a message module'
+        t = self.tables.get(msgMod.__name__)
+        if t is None:
+            t = Table(msgMod)
+            for other in self.tables.itervalues():
+                if other.sql == t.sql:
+                    t = other  # Messages 1, 2 and 3 share the position rows
+                    break
+            self.tables[msgMod.__name__] = t
+        return t
+
+    def add(self, table, params):
+        '''Queue one row.  Sends a COPY once the table has chunk_size rows.
+
+        @type table: Table
+        @param params: decoded message plus any cg_ fields
+        '''
+        latest = self.latest.get(table.name)
+        if latest is not None:
+            latest[params['UserID']] = (table, params)
+            return
+        lines = self.pending.get(table)
+        if lines is None:
+            lines = self.pending[table] = []
+        lines.append(table.row(params))
+        if len(lines) >= self.chunk_size:
+            self.flush(table)
+
+    def add_line(self, line):
+        '''Decode a normalized USCG NMEA line and queue its row.
+
+        @return: True if a row was queued
+        '''
+        import ais
+        msg = uscg.parse(line)
+        if msg is None or msg.totalSentences != 1 or msg.msgTypeChar not in self.msgChars:
+            return False
+        msgMod = ais.msgModByFirstChar[msg.msgTypeChar]
+        try:
+            params = msgMod.decode(binary.ais6topackedbits(msg.contents))
+        except Exception, e:
+            if self.v:
+                sys.stderr.write('# bad message %s: %s\n' % (str(e), line.strip()))
+            self.bad += 1
+            return False
+        if self.wanted is not None and 'longitude' in params and not self.wanted(params):
+            return False
+        if params['MessageID'] == 5:
+            for field in ('name', 'callsign', 'destination'):
+                params[field] = params[field].strip('@').strip()
+        if msg.cg_sec is not None:
+            params['cg_sec'] = int(msg.cg_sec)
+            params['cg_timestamp'] = msg.sqlTimestampStr
+        params['cg_r'] = msg.station
+        self.add(self.table(msgMod), params)
+        return True
+
+    def flush(self, table=None):
+        '''COPY the rows waiting for one table or for all of them'''
+        if table is None:
+            tables = self.pending.keys()
+        else:
+            tables = [table]
+        for table in tables:
+            lines = self.pending.pop(table, None)
+            if lines:
+                start = time.time()
+                self._copy(table, lines)
+                self.copy_sec += time.time() - start
+                if self.v:
+                    sys.stderr.write(str(self) + '\n')
+
+    def finish(self):
+        '''Replace the rows of the latest tables and COPY everything left'''
+        for name, latest in self.latest.iteritems():
+            if not latest:
+                continue
+            self.cu.execute('DELETE FROM ' + name + ' WHERE userid = ANY(%s);', (latest.keys(),))
+            self.cx.commit()
+            for table, params in latest.itervalues():
+                self.pending.setdefault(table, []).append(table.row(params))
+            latest.clear()
+        self.flush()
+
+    def _copy(self, table, lines):
+        'COPY the lines, splitting the chunk to find the rows that fail'
+        try:
+            self.cu.copy_expert(table.sql, StringIO.StringIO(''.join(lines)))
+            self.cx.commit()
+        except Exception, e:
+            self.cx.rollback()
+            if len(lines) == 1:
+                self.rejected += 1
+                if self.v:
+                    sys.stderr.write('# rejected %s row: %s\n' % (table.name, str(e).strip()))
+                if self.rejects is not None:
+                    self.rejects.write(table.name + '\t' + lines[0])
+                return
+            half = len(lines) // 2
+            self._copy(table, lines[:half])
+            self._copy(table, lines[half:])
+            return
+        self.rows += len(lines)
+        self.chunks += 1
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(lines)
+
+    def rate(self):
+        '@return: rows loaded per second since the loader was made'
+        elapsed = time.time() - self.start
+        if elapsed <= 0:
+            return 0.
+        return self.rows / elapsed
+
+    def __str__(self):
+        return ('copy: %d rows (%s) in %d chunks, %d rejected, %d bad, %.1f sec in COPY, %.0f rows/sec' %
+                (self.rows, ', '.join(['%s %d' % item for item in sorted(self.counts.items())]),
+                 self.chunks, self.rejected, self.bad, self.copy_sec, self.rate()))
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
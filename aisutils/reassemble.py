@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""Put multi-line AIS messages back together into one line.
+
+This is the reassembly used by both scripts/ais_normalize.py and
+aisutils.normalize.Normalize.  Fragments are buffered by
+(station, seqId, channel), so finishing a message is a dictionary
+lookup.  Only the messages that are in flight are kept: fragments
+older than ttl seconds of message time are expired and each station
+can only have max_per_station messages in progress.
+
+>>> lines = ['!AIVDM,2,1,4,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j,0*56,r003669708,1152921692',
+...          '!AIVDM,1,1,,A,14`qQb0000o?u?DK>Smo2E`v0404,0*1A,r003669987,1152921693',
+...          '!AIVDM,2,2,4,B,@H8888888888880,2*2B,r003669708,1152921692']
+>>> for line in reassemble(lines): print line
+!AIVDM,1,1,,A,14`qQb0000o?u?DK>Smo2E`v0404,0*1A,r003669987,1152921693
+!AIVDM,1,1,4,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j@H8888888888880,2*6F,r003669708,1152921692
+
+@license: Apache 2.0
+"""
+
+import sys
+from collections import OrderedDict
+
+import nmea
+
+class Reassembler(object):
+    """Reassembly state for one stream of lines.
+
+    @ivar completed: multi-line messages put together
+    @ivar dropped: fragments thrown away because the message was
+        incomplete, the first sentence was never seen, the sequence id
+        was reused, the parts were too far apart in time or the station
+        had too many messages in progress
+    @ivar expired: fragments older than the ttl
+    @ivar invalid_checksums: lines with a bad checksum
+    @ivar mostRecentTime: newest USCG timestamp seen
+    @ivar line_num: lines added so far
+    """
+    def __init__(self,
+                 window=2,
+                 treatABequal=False,
+                 allow_missing_timestamps=False,
+                 allowUnknown=False,
+                 validateChecksum=False,
+                 pass_invalid_checksums=False,
+                 ttl=30,
+                 max_per_station=50,
+                 verbose=False,
+                 errors=None):
+        """
+        @param window: number of seconds to allow the later parts of a
+            multiline message to span
+        @param treatABequal: put together parts from channels A and B
+        @param allow_missing_timestamps: do not drop messages without a
+            trailing timestamp
+        @param allowUnknown: use UNKNOWN for lines without a station
+        @param validateChecksum: check the checksum of each AIS line
+        @param pass_invalid_checksums: keep lines that fail the checksum
+        @param ttl: seconds of message time to keep fragments
+        @param max_per_station: most messages in progress for a station.
+            The oldest is dropped to make room.
+        @param verbose: write the errors to stderr if errors is None
+        @param errors: file to write each line that is dropped to, with
+            its line number and why, or None to only count them
+        """
+        self.window = window
+        self.treatABequal = treatABequal
+        self.allow_missing_timestamps = allow_missing_timestamps
+        self.allowUnknown = allowUnknown
+        self.validateChecksum = validateChecksum
+        self.pass_invalid_checksums = pass_invalid_checksums
+        self.ttl = ttl
+        self.max_per_station = max_per_station
+        self.v = verbose
+        if errors is None and verbose:
+            errors = sys.stderr
+        self.errors = errors
+
+        self.stations = {}  # station -> OrderedDict((seqId,chan) -> [(payload,age,timestamp),...]) oldest first
+        self.mostRecentTime = 0
+        self.lastCull = 0
+        self.completed = 0
+        self.dropped = 0
+        self.expired = 0
+        self.invalid_checksums = 0
+        self.line_num = 0
+
+    def fragments(self):
+        '@return: number of fragments waiting for the rest of their message'
+        return sum([sum([len(parts) for parts in inProgress.itervalues()])
+                    for inProgress in self.stations.itervalues()])
+
+    def stats(self):
+        """
+        @return: counters for logging
+        @rtype: dict
+        """
+        return {'stations':len(self.stations), 'fragments':self.fragments(),
+                'completed':self.completed, 'dropped':self.dropped, 'expired':self.expired,
+                'invalid_checksums':self.invalid_checksums}
+
+    def __str__(self):
+        return ('normalize: %(fragments)d fragments from %(stations)d stations, '
+                '%(completed)d completed, %(dropped)d dropped, %(expired)d expired' % self.stats())
+
+    def cull(self):
+        """Drop fragments whose first sentence is older than the ttl"""
+        oldest = self.mostRecentTime - self.ttl
+        for station in self.stations.keys():
+            inProgress = self.stations[station]
+            while inProgress:
+                key,parts = inProgress.iteritems().next()
+                if parts[0][1] >= oldest:
+                    break
+                del inProgress[key]
+                self.expired += len(parts)
+            if not inProgress:
+                del self.stations[station]
+        self.lastCull = self.mostRecentTime
+
+    def _error(self,msg,line):
+        if self.errors is not None:
+            self.errors.write('ERROR line %d: %s\n  %s\n' % (self.line_num,msg,line))
+
+    def add(self,line):
+        """Take the next line.
+
+        @param line: NMEA line.  Lines that are not AIS VDM/VDO pass through.
+        @return: the line if it needs no help, the new single line if
+            this finished a message, or None
+        """
+        self.line_num += 1
+        line = line.strip()  # Get rid of DOS issues.
+        if len(line) < 7 or line[3:6] not in ('VDM','VDO'):
+            return line
+
+        if self.validateChecksum and not nmea.isChecksumValid(line):
+            self.invalid_checksums += 1
+            self._error('invalid checksum',line)
+            if not self.pass_invalid_checksums:
+                return None
+
+        fields = line.split(',')
+        if len(fields) < 7:
+            self._error('not enough fields',line)
+            return None
+
+        if fields[1] == '1':  # Easy case
+            return line
+
+        try:
+            timestamp = float(fields[-1])
+        except ValueError:
+            timestamp = None
+        else:
+            if timestamp > self.mostRecentTime:
+                self.mostRecentTime = timestamp
+                if timestamp - self.lastCull >= 1:
+                    self.cull()  # Clean house so the buffers do not get too large
+
+        station = None  # USCG Receive Stations
+        for i in range(len(fields)-1,6,-1):
+            if fields[i][:1] in ('r','b','R','B','D'):
+                station = fields[i]
+                break
+        if station is None:
+            if not self.allowUnknown:
+                self._error('no station found',line)
+                self.dropped += 1
+                return None
+            station = 'UNKNOWN'
+
+        if self.treatABequal:
+            key = fields[3]
+        else:
+            key = (fields[3],fields[4])  # seqId and Channel make a unique stream
+
+        inProgress = self.stations.get(station)
+        if fields[2] == '1':
+            if inProgress is None:
+                inProgress = self.stations[station] = OrderedDict()
+            parts = inProgress.pop(key,None)
+            if parts is not None:
+                self.dropped += len(parts)  # Overwrite any partials
+            elif len(inProgress) >= self.max_per_station:
+                self.dropped += len(inProgress.popitem(last=False)[1])
+            if timestamp is None:
+                inProgress[key] = [(fields[5],self.mostRecentTime,None)]
+            else:
+                inProgress[key] = [(fields[5],timestamp,timestamp)]
+            return None
+
+        parts = None
+        if inProgress is not None:
+            parts = inProgress.get(key)
+        try:
+            sentenceNum = int(fields[2])
+            totNumSentences = int(fields[1])
+        except ValueError:
+            sentenceNum = totNumSentences = 0
+        if parts is None or len(parts) != sentenceNum-1:
+            self._error('do not have the preceding packets for line',line)
+            if parts is not None:
+                del inProgress[key]
+                self.dropped += len(parts)
+            self.dropped += 1
+            return None
+
+        parts.append((fields[5],timestamp,timestamp))
+        if sentenceNum != totNumSentences:
+            return None
+
+        # Finished a message
+        del inProgress[key]
+        if not inProgress:
+            del self.stations[station]
+
+        for part in parts:
+            if part[2] is None or timestamp is None:
+                if not self.allow_missing_timestamps:
+                    self._error('missing timestamp',line)
+                    self.dropped += len(parts)
+                    return None
+            elif abs(part[2] - timestamp) > self.window:
+                self._error('timestamps not all the same for %s' % fields[-1],line)
+                self.dropped += len(parts)
+                return None
+        self.completed += 1
+
+        # Try to mirror orgininal lines in the packet as much as possible.
+        # Keep the same seqId and channel, but make a single line message.
+        checksumed_str = ','.join((fields[0],'1,1',fields[3],fields[4],
+                                   ''.join([part[0] for part in parts]),
+                                   fields[6].split('*')[0]+'*'))
+        tail = fields[7:]
+        if timestamp is None:
+            tail = tail[:-1]  # Allowed missing timestamp and it is missing.
+        if tail:
+            return checksumed_str + nmea.checksumStr(checksumed_str) + ',' + ','.join(tail)
+        return checksumed_str + nmea.checksumStr(checksumed_str)
+
+
+def reassemble(lines, **options):
+    """Yield the lines with the multi-line messages put together.
+
+    Works on a stream, so only the fragments in flight are kept in memory.
+
+    @param lines: iterable of NMEA lines (e.g. an open file)
+    @param options: keyword arguments for Reassembler
+    @return: lines without the line endings
+    """
+    add = Reassembler(**options).add
+    for line in lines:
+        line = add(line)
+        if line is not None:
+            yield line
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
@@ -19,6 +19,8 @@ import os
 import time
 import sys
 
+import logindex
+
 SERIAL_SPEEDS = [
         #0, 50, 75, 110,
         #134, 150, 200,
@@ -79,13 +81,19 @@ def create_daemon():
 
 # Did I want to subclass file?
 class LogFileWithRotate():
-    def __init__(self,prefix='log-', station='runknown', uscg_format=True,verbose=False):
+    def __init__(self,prefix='log-', station='runknown', uscg_format=True,verbose=False,index_bucket_sec=None):
+        '''
+        @param index_bucket_sec: keep a time index next to each log
+            (see aisutils.logindex) with entries this many seconds long
+            or None for no index
+        '''
         self.v = verbose
         self.prefix=prefix
         self.log_filename=None
         self.log_file=None
         self.station=station
         self.uscg_format=uscg_format
+        self.index_bucket_sec=index_bucket_sec
         self.open()
 
     def open(self):
@@ -97,7 +105,10 @@ class LogFileWithRotate():
         now = self.current_date = datetime.datetime.utcnow()
         self.log_filename = self.prefix+now.strftime('%Y-%m-%d')
         if self.v: print 'opening log file: %s' % self.log_filename
-        self.log_file = file(self.log_filename,'a')
+        if self.index_bucket_sec:
+            self.log_file = logindex.IndexedLog(self.log_filename,self.index_bucket_sec)
+        else:
+            self.log_file = file(self.log_filename,'a')
         self.write_header()
 
     def write_header(self):
@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+"""Split a day of processing into shards and merge what they find.
+
+A day of logs is processed one input file or one station at a time
+(a shard).  Shards do not depend on each other, so they can run in a
+pool of processes.  The results of each shard are small and can be
+added together in any order:
+
+  - lines, duplicates dropped and loader errors
+  - message type counts of the VDM lines (as in
+    scripts/ais_traffic_analysis.py)
+  - the set of MMSIs heard
+  - runs of time with traffic, from which the uptime is found the way
+    scripts/ais_info.py does it: a gap of min_gap_sec or more between
+    timestamps is downtime
+
+Runs from different shards are joined when they overlap or are less
+than min_gap_sec apart, so a gap in one file that another file covers
+is not downtime.  Times that go backwards stay in their run rather
+than being counted as a gap twice.
+
+Progress is kept in a journal with a line for each finished shard.  A
+crashed day is restarted with the same journal and only the shards
+that had not finished are run again.
+
+>>> a = Summary(min_gap_sec=2)
+>>> for t in (0, 1, 2, 10, 11): a.add_line('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r1,%d' % t)
+>>> a.finish()
+>>> a.runs
+[(0, 2), (10, 11)]
+>>> b = Summary(min_gap_sec=2)
+>>> for t in (3, 4, 5): b.add_line('!AIVDM,1,1,,B,55Cjtd0Oj;Jp,0*63,r2,%d' % t)
+>>> a.merge(b)
+>>> a.lines, a.types, a.runs, a.total_gap()
+(8, {'1': 5, '5': 3}, [(0, 5), (10, 11)], 5)
+
+@license: Apache 2.0
+"""
+
+import datetime
+import os
+
+import logscan
+
+journal_name = 'progress'
+'Name of the journal in a work directory'
+
+day_sec = 24 * 60 * 60
+
+
+def message_type(char):
+    '''
+    >>> message_type('1'), message_type('5'), message_type('H'), message_type('w')
+    (1, 5, 24, 63)
+
+    @param char: first payload character
+    @return: AIS message number (0..63)
+    '''
+    value = ord(char) - 48
+    if value > 40:
+        value -= 8
+    return value
+
+
+def joinRuns(runs, min_gap_sec):
+    '''Sort the runs and join the ones that are less than min_gap_sec apart.
+
+    >>> joinRuns([(10, 12), (0, 5), (6, 8), (3, 4)], 2)
+    [(0, 8), (10, 12)]
+
+    @param runs: (start, end) UNIX UTC seconds
+    @return: new list of runs
+    '''
+    result = []
+    for start, end in sorted(runs):
+        if result and start - result[-1][1] < min_gap_sec:
+            if end > result[-1][1]:
+                result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+class Summary(object):
+    '''What was found in a shard or in several shards added together.
+
+    @ivar lines: lines kept
+    @ivar dups: duplicate lines dropped
+    @ivar errors: lines the loader could not decode or insert
+    @ivar types: first payload character to number of VDM lines
+    @ivar mmsi: set of the MMSIs of the decoded messages
+    @ivar runs: sorted (start, end) UNIX UTC seconds with traffic
+    '''
+    def __init__(self, min_gap_sec=2):
+        '''
+        @param min_gap_sec: minimum number of seconds to consider offline
+        '''
+        self.min_gap_sec = min_gap_sec
+        self.lines = 0
+        self.dups = 0
+        self.errors = 0
+        self.types = {}
+        self.mmsi = set()
+        self.runs = []
+        self.run = None  # Run in progress
+
+    def add_time(self, timestamp):
+        '@param timestamp: UNIX UTC seconds'
+        timestamp = int(timestamp)
+        run = self.run
+        if run is not None and run[0] - self.min_gap_sec < timestamp < run[1] + self.min_gap_sec:
+            if timestamp > run[1]: run[1] = timestamp
+            elif timestamp < run[0]: run[0] = timestamp
+            return
+        self._finish_run()
+        self.run = [timestamp, timestamp]
+
+    def _finish_run(self):
+        if self.run is not None:
+            self.runs.append(tuple(self.run))
+            self.run = None
+
+    def add_line(self, line):
+        'Count a normalized line that is not a duplicate'
+        self.lines += 1
+        if line[3:7] == 'VDM,':  # Only count what other ships sent
+            char = logscan.first_char(line)
+            if char is not None:
+                self.types[char] = self.types.get(char, 0) + 1
+        cg_sec = logscan.cg_sec(line)
+        if cg_sec is not None:
+            self.add_time(cg_sec)
+
+    def finish(self):
+        'Finish the run in progress and put the runs in order'
+        self._finish_run()
+        self.runs = joinRuns(self.runs, self.min_gap_sec)
+
+    def merge(self, other):
+        'Add the results of another summary to this one'
+        self.finish()
+        other.finish()
+        self.lines += other.lines
+        self.dups += other.dups
+        self.errors += other.errors
+        for char, count in other.types.iteritems():
+            self.types[char] = self.types.get(char, 0) + count
+        self.mmsi.update(other.mmsi)
+        self.runs = joinRuns(self.runs + other.runs, self.min_gap_sec)
+
+    def type_counts(self):
+        '@return: list of the number of messages of each type 0..63'
+        counts = [0] * 64
+        for char, count in self.types.iteritems():
+            try:
+                counts[message_type(char)] += count
+            except IndexError:
+                pass  # Not a payload character
+        return counts
+
+    def time_range(self):
+        '@return: first and last timestamp or None, None'
+        self.finish()
+        if not self.runs:
+            return None, None
+        return self.runs[0][0], self.runs[-1][1]
+
+    def gaps(self):
+        '@return: list of (start, end) with no traffic between the runs'
+        self.finish()
+        return [(self.runs[i][1], self.runs[i + 1][0]) for i in range(len(self.runs) - 1)]
+
+    def total_gap(self):
+        '@return: seconds of downtime between the first and last timestamps'
+        return sum([end - start for start, end in self.gaps()])
+
+    def up_time(self):
+        '''Percent uptime for each UTC day from the first to the last
+        timestamp, as in ais_info.Uptime.up_time
+
+        >>> s = Summary()
+        >>> s.runs = [(1241481600, 1241481600 + 6*3600), (1241481600 + 18*3600, 1241568000 + 12*3600)]
+        >>> s.up_time()
+        [(2009125, 50.0), (2009126, 100.0)]
+
+        @return: list of (YYYYJJJ, percent)
+        '''
+        first, last = self.time_range()
+        if first is None:
+            return []
+        down = {}
+        for start, end in self.gaps():
+            while start < end:
+                day_end = start - start % day_sec + day_sec
+                stop = min(end, day_end)
+                down[start - start % day_sec] = down.get(start - start % day_sec, 0) + stop - start
+                start = stop
+        results = []
+        day = first - first % day_sec
+        while day <= last:
+            key = int(datetime.datetime.utcfromtimestamp(day).strftime('%Y%j'))
+            results.append((key, 100 - 100. * down.get(day, 0) / day_sec))
+            day += day_sec
+        return results
+
+    def write(self, filename):
+        '''Save the summary.  The file is written under a temporary name
+        and renamed, so a crash never leaves half of a summary.'''
+        self.finish()
+        tmp = filename + '.tmp'
+        o = open(tmp, 'w')
+        o.write('min_gap_sec %d\n' % self.min_gap_sec)
+        o.write('lines %d\n' % self.lines)
+        o.write('dups %d\n' % self.dups)
+        o.write('errors %d\n' % self.errors)
+        for char, count in sorted(self.types.items()):
+            o.write('type %s %d\n' % (char, count))
+        for mmsi in sorted(self.mmsi):
+            o.write('mmsi %d\n' % mmsi)
+        for start, end in self.runs:
+            o.write('run %d %d\n' % (start, end))
+        o.close()
+        os.rename(tmp, filename)
+
+    @classmethod
+    def read(cls, filename):
+        '@return: Summary saved by write()'
+        s = cls()
+        for line in open(filename):
+            fields = line.split()
+            if not fields or fields[0][0] == '#':
+                continue
+            if fields[0] == 'min_gap_sec': s.min_gap_sec = int(fields[1])
+            elif fields[0] == 'lines': s.lines = int(fields[1])
+            elif fields[0] == 'dups': s.dups = int(fields[1])
+            elif fields[0] == 'errors': s.errors = int(fields[1])
+            elif fields[0] == 'type': s.types[fields[1]] = int(fields[2])
+            elif fields[0] == 'mmsi': s.mmsi.add(int(fields[1]))
+            elif fields[0] == 'run': s.runs.append((int(fields[1]), int(fields[2])))
+        return s
+
+    def __str__(self):
+        return 'summary: %d lines, %d dups, %d errors, %d vessels, %d gaps, %d sec down' % (
+            self.lines, self.dups, self.errors, len(self.mmsi), len(self.runs) and len(self.runs) - 1,
+            self.total_gap())
+
+
+class Progress(object):
+    '''Journal of the shards that are finished.
+
+    Each line is the shard name and the file with its result, separated
+    by a tab.  Lines are flushed to disk as each shard finishes.
+    '''
+    def __init__(self, filename):
+        self.filename = filename
+        self.done = {}  # shard name -> result filename
+        if os.path.exists(filename):
+            for line in open(filename):
+                fields = line.rstrip('\r\n').split('\t')
+                if len(fields) != 2:
+                    continue  # Cut off by a crash
+                if os.path.exists(fields[1]):
+                    self.done[fields[0]] = fields[1]
+        self.out = open(filename, 'a')
+
+    def finished(self, name, result):
+        'Record that a shard is done and its result is in the file result'
+        self.out.write('%s\t%s\n' % (name, result))
+        self.out.flush()
+        os.fsync(self.out.fileno())
+        self.done[name] = result
+
+    def close(self):
+        self.out.close()
+
+
+def run(shards, worker, progress, processes=None, verbose=False):
+    '''Run worker on each shard that is not in the journal yet.
+
+    worker must be a module level function (so it can be given to a
+    multiprocessing pool) that takes a (name, args) shard and returns
+    (name, result filename).
+
+    @param shards: list of (name, args)
+    @param progress: Progress journal
+    @param processes: size of the process pool, None for one per CPU
+        or 1 to run in this process
+    @return: the results of all of the shards as {name: result filename}
+    '''
+    todo = [shard for shard in shards if shard[0] not in progress.done]
+    if verbose:
+        print 'shards: %d to run, %d already done' % (len(todo), len(shards) - len(todo))
+    if processes == 1:
+        results = (worker(shard) for shard in todo)
+        pool = None
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(worker, todo)
+    try:
+        for name, result in results:
+            progress.finished(name, result)
+            if verbose:
+                print 'finished:', name
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return dict([(name, progress.done[name]) for name, args in shards])
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
@@ -10,8 +10,6 @@ and tables.
 
 # Python standard libraries
 import datetime
-import doctest
-from optparse import OptionParser
 import os
 import sys
 
@@ -303,10 +301,20 @@ class create:
         if len(cmds)>0: retStr += ';'
         return retStr
 
+insert_sql_cache = {}
+'(dbType, paramstyle, table, fields, postGIS fields) -> INSERT string for insert.sqlParams'
+
+placeholders = {'qmark':'?', 'format':'%s'}
+'Parameter marker for each DB-API paramstyle that sqlParams can write'
+
 class insert:
     '''
     Help create an SQL insert statement for injecting data into a database.  Wee!
 
+    str() gives the statement with the values written into the SQL.
+    sqlParams() gives the statement with placeholders and the values
+    to bind separately, which lets the database reuse the statement.
+
     @todo: FIX: provide some sort of validation, maybe with the CREATE string or class?
     @todo: Put in a remove/delete call to pull a value out so that it is not inserted
 
@@ -367,7 +375,7 @@ class insert:
                     else: s2List.append('0')
                 else: s2List.append(str(self.values[i]))
 	    elif isinstance(self.values[i],BitVector): s2List.append('\''+str(self.values[i])+'\'')
-            elif str == type(self.values[i]):          s2List.append('\''+str(self.values[i])+'\'')
+            elif str == type(self.values[i]):          s2List.append('\''+self.values[i].replace('\'','\'\'')+'\'')
             elif type(self.values[i]) in (int, float): s2List.append(str(self.values[i]))
 
 	    elif not self.values[i]:
@@ -385,6 +393,52 @@ class insert:
         s += '(' + ','.join(s1List) + ') VALUES (' + ','.join(s2List) + ');'
         return s
 
+    def sqlParams(self,paramstyle=None):
+        '''Give the insert with placeholders and the values to bind.
+
+        The SQL only depends on the table and the fields, so it is
+        built once for each set of fields and the database driver can
+        reuse the prepared statement.  PostGIS geometry is bound as WKT.
+
+        >>> i = insert('position',dbType='sqlite')
+        >>> i.add('UserID',1234); i.add('name',"O'Brien")
+        >>> i.sqlParams()
+        ('INSERT INTO position (UserID,name) VALUES (?,?);', [1234, "O'Brien"])
+        >>> i = insert('position')
+        >>> i.add('UserID',1234); i.addPostGIS('Position','POINT(-70.1 42.2)')
+        >>> i.sqlParams()
+        ('INSERT INTO position (userid,position) VALUES (%s,GeomFromText(%s,4326));', [1234, 'POINT(-70.1 42.2)'])
+
+        @param paramstyle: DB-API paramstyle of the driver: 'qmark' (sqlite) or
+            'format' (psycopg2) [default: format for postgres, otherwise qmark]
+        @return: sql and the list of values for cursor.execute
+        @rtype: (str, list)
+        '''
+        if paramstyle is None:
+            if 'postgres'==self.dbType: paramstyle = 'format'
+            else: paramstyle = 'qmark'
+        postGISfields = tuple([entry[0] for entry in self.postGIS])
+        key = (self.dbType, paramstyle, self.table, tuple(self.fields), postGISfields)
+        sql = insert_sql_cache.get(key)
+        if sql is None:
+            marker = placeholders[paramstyle]
+            if 'postgres'==self.dbType:
+                table = self.table.lower()
+                fields = [f.lower() for f in self.fields]
+            else:
+                table = self.table
+                fields = list(self.fields)
+            markers = [marker] * len(fields)
+            for field in postGISfields:
+                fields.append(field.lower())
+                # FIX: this hard codes WGS 84.  Not good for a general library!
+                markers.append('GeomFromText(%s,4326)' % marker)
+            sql = insert_sql_cache[key] = 'INSERT INTO %s (%s) VALUES (%s);' % (table, ','.join(fields), ','.join(markers))
+
+        params = [str(value) if isinstance(value,BitVector) else value for value in self.values]
+        params += [entry[1] for entry in self.postGIS]
+        return sql, params
+
     def addPostGIS(self,field,value):
         '''
         Handle postGIS geometry
@@ -400,9 +454,7 @@ class insert:
 	@param value: value to be assigned to that field.
         '''
 
-        if type(value)==str:
-	    # Prevent quotes from breaking out of a string/varchar.  "" is SQL for " in a character string
-	    value = value.replace('"','""')
+        # Quotes are escaped by __str__ so that sqlParams gets the value as is.
 	self.fields.append(field)
         self.values.append(value)
         return
@@ -451,6 +503,7 @@ def sqlInsertStrFromList (table,aList,dbType='postgres'):
 
 
 if __name__=='__main__':
+    from optparse import OptionParser
     myparser = OptionParser(usage='%prog [options]')
     myparser.add_option('--test', '--doc-test', dest='doctest',
         default=False,action='store_true', help='Run the documentation tests.')
@@ -466,6 +519,7 @@ if __name__=='__main__':
       if options.verbosity >= TERSE:
         sys.argv.append('-v')
 
+      import doctest
       numfail, numtests=doctest.testmod()
       if numfail==0:
         print 'ok'
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""Merge several USCG logs into one stream in time order.
+
+Each station or receiver log is nearly in order, but the clocks are
+skewed and lines can be a little out of order.  TimeMerge reads the
+logs a line at a time and keeps the lines in a heap keyed on the
+trailing USCG timestamp.  A line is only written once every log has
+read past its time plus reorder_sec, so lines up to reorder_sec out of
+order within a log still come out in order.  The next line is always
+read from the log that is furthest behind, so the heap only holds
+about reorder_sec of lines plus one line from each of the other logs.
+
+Lines without a timestamp are given the newest time read from their
+log so they stay near the lines around them.
+
+>>> a = ['!AIVDM,1,1,,B,1a,0*00,r1,10', '!AIVDM,1,1,,B,1b,0*00,r1,12', '!AIVDM,1,1,,B,1c,0*00,r1,11']
+>>> b = ['!AIVDM,1,1,,B,1d,0*00,r2,9', '!AIVDM,1,1,,B,1e,0*00,r2,13']
+>>> [line.split(',')[5] for line in merge([a, b])]
+['1d', '1a', '1c', '1b', '1e']
+
+@license: Apache 2.0
+"""
+
+import heapq
+
+import logscan
+
+
+class TimeMerge(object):
+    '''K-way merge of logs on the USCG timestamp.
+
+    Iterate over a TimeMerge to get the lines.
+
+    @ivar lines: lines written
+    @ivar late: lines written after a line with a later timestamp,
+        because they were more than reorder_sec out of order or the
+        buffer was full
+    @ivar forced: lines written early because the buffer was full
+    @ivar max_buffered: most lines held at once
+    '''
+    def __init__(self, streams, reorder_sec=2., max_lines=100000, key=logscan.cg_sec):
+        '''
+        @param streams: iterables of log lines
+        @param reorder_sec: how far out of order lines within a log can be
+        @param max_lines: most lines to hold before writing the oldest
+            one even if it may not be in order, or None for no limit
+        @param key: function of a line that returns its time or None
+        '''
+        self.streams = [iter(stream) for stream in streams]
+        self.reorder_sec = reorder_sec
+        self.max_lines = max_lines
+        self.key = key
+        self.lines = 0
+        self.late = 0
+        self.forced = 0
+        self.max_buffered = 0
+
+    def __iter__(self):
+        reorder_sec = self.reorder_sec
+        max_lines = self.max_lines
+        key = self.key
+        streams = self.streams
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        ninf = float('-inf')
+
+        marks = [(ninf, i) for i in range(len(streams))]  # (newest time read, log), furthest behind first
+        heapq.heapify(marks)
+        buffer = []  # (time, sequence, line)
+        sequence = 0
+        newest_out = ninf
+
+        while marks:
+            mark, i = marks[0]
+            safe = mark - reorder_sec
+            while buffer and (buffer[0][0] <= safe or (max_lines is not None and len(buffer) > max_lines)):
+                t, n, line = heappop(buffer)
+                if t > safe:
+                    self.forced += 1
+                if t < newest_out:
+                    self.late += 1
+                else:
+                    newest_out = t
+                self.lines += 1
+                yield line
+
+            try:
+                line = streams[i].next()
+            except StopIteration:
+                heappop(marks)
+                continue
+            t = key(line)
+            if t is None:
+                t = mark  # Keep lines without a time next to the line before
+            heappush(buffer, (t, sequence, line))
+            sequence += 1
+            if len(buffer) > self.max_buffered:
+                self.max_buffered = len(buffer)
+            if t > mark:
+                heapq.heapreplace(marks, (t, i))
+
+        while buffer:
+            t, n, line = heappop(buffer)
+            if t < newest_out:
+                self.late += 1
+            else:
+                newest_out = t
+            self.lines += 1
+            yield line
+
+    def __str__(self):
+        return 'time merge: %d lines from %d logs, %d late, %d forced, %d most buffered' % (
+            self.lines, len(self.streams), self.late, self.forced, self.max_buffered)
+
+
+def merge(streams, reorder_sec=2., max_lines=100000):
+    '''Lazily merge logs into time order.
+
+    @param streams: iterables of log lines (e.g. open files or logscan.scan)
+    @return: iterator of the lines of all of the logs
+    '''
+    return iter(TimeMerge(streams, reorder_sec, max_lines))
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
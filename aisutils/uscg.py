@@ -4,9 +4,10 @@
 Filter to a list of AIS receivers/basestations.
 
 
-TODO: For speed, provide functions that only parse the timestamp, station, etc.
+Use UscgNmea or parse() to split a line once rather than the regex.
+get_station() and get_contents() are there for when only one field is
+needed.
 """
-import doctest
 import datetime
 import re
 import sys
@@ -122,7 +123,22 @@ def get_contents(nmeaStr):
     """Return the AIS msg string.  AIS goo"""
     return nmeaStr.split(',')[5]
 
-class UscgNmea:
+class UscgNmea(object):
+    """One USCG NMEA line split into its fields in a single pass.
+
+    The line is split on commas once and the fields are converted right
+    away.  The datetime and SQL strings are only built when asked for
+    since most of the tools never look at them.  __slots__ keeps the
+    records small when a lot of them are buffered (e.g. normalizing
+    multi-line messages).
+
+    Fields that are not on the line are None.
+    """
+    __slots__ = ('nmeaType','totalSentences','sentenceNum','sequentialMsgId','aisChannel',
+                 'contents','fillbits','checksumStr','msgTypeChar',
+                 'station','stationTypeCode','rssi','signalStrength','timeOfArrival',
+                 'slotNumber','x','receiverTime','cg_sec')
+
     def __init__(self,nmeaStr=None):
         """
         Fields:
@@ -130,12 +146,21 @@ class UscgNmea:
          - signalStrength ('d') - signal strendth in dBm
          - timeOfArrival ('T') - time of arrive from receiver - seconds within the minute
          - slotNumber ('S') - Receive slot number
+         - receiverTime ('t') - HHMMSS.SS string from the receiver
          - station ('r' or 'b') - station name or id that received the message
          - stationTypeCode - first letter of the station name indicating 'b'asestation or 'r'eceive only (I think)
          - cg_sec - receive time of the message from the logging software.  Unix UTC second timestamp
          - timestamp - python datetime object in UTC derived from the cg_sec
+         - sqlTimestampStr - cg_sec as an SQL timestamp string
+
+        >>> msg = UscgNmea('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r003669958,1085889680\\n')
+        >>> msg.contents, msg.station, msg.cg_sec, msg.rssi
+        ('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06', 'r003669958', 1085889680.0, None)
+        >>> msg.sqlTimestampStr
+        '2004-05-30 04:01:20'
 
-        @todo: parse the other fields?
+        @param nmeaStr: USCG style nmea string.  Text before the ! or $ is skipped.
+        @raise ValueError: not an AIS NMEA string
 
         @see: Maritime navigation and radiocommunication equipment and
               systems - Digital interfaces - Part 100: Single talker
@@ -143,70 +168,92 @@ class UscgNmea:
               61162-1 for the UAIS. (80_330e_PAS) Draft...
 
         """
-        if None!=nmeaStr:
-            fields = nmeaStr.split(',')
-            self.cg_sec=float(fields[-1])
-            self.timestamp = datetime.datetime.utcfromtimestamp(self.cg_sec)
-            self.sqlTimestampStr = ais.sqlhelp.sec2timestamp(self.cg_sec)
-            # See 80_330e_PAS
-            self.nmeaType=fields[0][1:]
-            self.totalSentences = int(fields[1])
-            self.sentenceNum = int(fields[2])
-            tmp = fields[3]
-            if len(tmp) > 0:
-                self.sequentialMsgId = int(tmp)
-            else:
-                self.sequentialMsgId = None
-            # FIX: make an int if the above is set
-            self.aisChannel = fields[4] # 'A' or 'B'
-            self.contents = fields[5]
-            self.fillbits = int(fields[6].split('*')[0])
-            self.checksumStr = fields[6].split('*')[1] # FIX: this is a hex string.  Convert?
-
-            if self.sentenceNum==1:
-                self.msgTypeChar=fields[5][0]
-            else:
-                self.msgTypeChar=None
-
-            for i in range(len(fields)-1,5,-1):
-                if len(fields[i])==0:
-                    continue # maybe it should throw a parse exception instead?
-                f = fields[i]
-                c = f[0] # first charater determines what the field is
-		if c in ('b','r','B','R'):
-		    self.station = f # FIX: think we want to keep the code in the first char
-                    self.stationTypeCode = self.station[0]
-                    continue
-		    #break # Found it so ditch the for loop
-                if c == 's':
-                    self.rssi=int(f[1:])
-                    continue
-                if c == 'd':
-                    self.signalStrength = int(f[1:])
-                    continue
-                if c == 'T':
-                    try:
-                        self.timeOfArrival = float(f[1:])
-                    except:
-                        #print 'warning: bogus time of arrival: %s' % (f[1:],)
-                        pass
-                    continue
-                if c == 'S':
-                    try:
-                        self.slotNumber = int(f[1:])
-                    except:
-                        self.slotNumber = None
-                    continue
-                if c == 'x':
-                    # I don't know what x is
-                    self.x = int(f[1:])
-                    continue
+        if nmeaStr is None:
+            return
+
+        if nmeaStr[:1] not in ('!','$'):
+            starts = [i for i in (nmeaStr.find('!'),nmeaStr.find('$')) if i >= 0]
+            if not starts:
+                raise ValueError('not an NMEA string: '+nmeaStr)
+            start = min(starts)
+            nmeaStr = nmeaStr[start:]
+        fields = nmeaStr.rstrip().split(',')
+        if len(fields) < 7:
+            raise ValueError('too few fields: '+nmeaStr)
+
+        # See 80_330e_PAS
+        self.nmeaType = fields[0][1:]
+        total = fields[1]
+        self.totalSentences = _digits.get(total) or int(total)
+        num = fields[2]
+        self.sentenceNum = num = _digits.get(num) or int(num)
+        seqId = fields[3]
+        if seqId:
+            self.sequentialMsgId = _digits.get(seqId) or int(seqId)
+        else:
+            self.sequentialMsgId = None
+        self.aisChannel = fields[4] # 'A' or 'B'
+        self.contents = contents = fields[5]
+        fillbits,star,self.checksumStr = fields[6].partition('*')
+        self.fillbits = _digits.get(fillbits) or int(fillbits)
+
+        if num==1 and contents:
+            self.msgTypeChar = contents[0]
+        else:
+            self.msgTypeChar = None
+
+        for f in fields[7:]:
+            if not f:
+                continue
+            c = f[0] # first charater determines what the field is
+            if c in 'brBR':
+                self.station = f # Keep the code in the first char
+                self.stationTypeCode = c
+            elif c in '0123456789':
+                self.cg_sec = float(f) # Always last
+            elif c == 's':
+                self.rssi = _int_or_none(f[1:])
+            elif c == 'd':
+                self.signalStrength = _int_or_none(f[1:])
+            elif c == 'T':
+                try:
+                    self.timeOfArrival = float(f[1:])
+                except ValueError:
+                    pass # Some receivers write bogus times of arrival
+            elif c == 'S':
+                self.slotNumber = _int_or_none(f[1:])
+            elif c == 'x':
+                self.x = _int_or_none(f[1:])
+            elif c == 't':
+                self.receiverTime = f[1:]
+
+    def __getattr__(self,name):
+        """Fields that were not on the line are never set, which saves
+        setting them all to None for every line."""
+        if name in UscgNmea.__slots__:
+            return None
+        raise AttributeError(name)
+
+    @property
+    def timestamp(self):
+        """@return: cg_sec as a UTC datetime or None"""
+        if self.cg_sec is None:
+            return None
+        return datetime.datetime.utcfromtimestamp(self.cg_sec)
+
+    @property
+    def sqlTimestampStr(self):
+        """@return: cg_sec as an SQL timestamp string or None"""
+        if self.cg_sec is None:
+            return None
+        return sqlhelp.sec2timestamp(self.cg_sec)
+
     def getBitVector(self):
         """
         @return: bits for the payload (even if this is a multipart)
         @rtype: BitVector
         """
-        return ais.binary.ais6tobitvec(self.contents)
+        return binary.ais6tobitvec(self.contents)
 
     def __eq__(self,other):
         # Try to be smart for speed
@@ -241,14 +288,16 @@ class UscgNmea:
         parts.append(self.contents)
         parts.append(str(self.fillbits)+'*'+self.checksumStr)
 
-        if 'rssi' in self.__dict__: parts.append('s'+str(self.rssi))
-        if 'signalStrength' in self.__dict__: parts.append('d'+str(self.signalStrength))
-        if 'timeOfArrival' in self.__dict__: parts.append('T'+str(self.timeOfArrival))
-        if 'slotNumber' in self.__dict__: parts.append('S'+str(self.slotNumber))
-        if 'x' in self.__dict__: parts.append('x'+str(self.x))
+        if self.rssi is not None: parts.append('s'+str(self.rssi))
+        if self.signalStrength is not None: parts.append('d'+str(self.signalStrength))
+        if self.timeOfArrival is not None: parts.append('T'+str(self.timeOfArrival))
+        if self.slotNumber is not None: parts.append('S'+str(self.slotNumber))
+        if self.x is not None: parts.append('x'+str(self.x))
+        if self.receiverTime is not None: parts.append('t'+self.receiverTime)
 
         if self.station: parts.append(self.station)
-        parts.append(str(self.cg_sec)) # Always last
+        if self.cg_sec is not None:
+            parts.append(str(self.cg_sec)) # Always last
         return ','.join(parts)
 
 #    def getDriver(self):
@@ -257,6 +306,36 @@ class UscgNmea:
 #        """
         # FIX: where did I do this nicely?
 
+_digits = dict([(str(i),i) for i in range(1,10)])
+"""Skip int() for the one digit fields.  0 is left out so that or int() can catch it."""
+
+def _int_or_none(s):
+    """USCG receivers sometimes write empty or corrupt fields"""
+    try:
+        return int(s)
+    except ValueError:
+        return None
+
+def parse(nmeaStr):
+    """Tokenize a line from a USCG log.
+
+    Use this in place of uscg_ais_nmea_regex.search to skip the lines
+    that are not AIS.
+
+    >>> parse('# a comment') is None
+    True
+    >>> parse('!AIVDM,1,1,,A,14`qQb0000o?u?DK>Smo2E`v0404,0*1A,r003669987,1152921693').station
+    'r003669987'
+
+    @param nmeaStr: one line from a log file
+    @return: the fields or None if the line is not an AIS NMEA string
+    @rtype: UscgNmea
+    """
+    try:
+        return UscgNmea(nmeaStr)
+    except (ValueError,IndexError):
+        return None
+
 class TestUscgNmea(unittest.TestCase):
     def testUscgNmea(self):
         un = UscgNmea('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,s1234,d-119,T12.34567123,r003669958,S4321,1085889680')
@@ -276,8 +355,22 @@ class TestUscgNmea(unittest.TestCase):
         self.failUnlessEqual(un.station,'r003669958')
         self.failUnlessEqual(un.stationTypeCode,'r')
         self.failUnlessEqual(un.cg_sec,float(1085889680))
-        print un.timestamp
-        print un.sqlTimestampStr  # Hmmm... they look the same
+        self.failUnlessEqual(un.timestamp,datetime.datetime(2004,5,30,4,1,20))
+        self.failUnlessEqual(un.sqlTimestampStr,'2004-05-30 04:01:20')
+
+    def testNoUscgFields(self):
+        un = UscgNmea('!AIVDM,2,2,4,B,@H8888888888880,2*2B\r\n')
+        self.failUnlessEqual((un.sequentialMsgId,un.fillbits,un.msgTypeChar),(4,2,None))
+        self.failUnlessEqual((un.station,un.cg_sec,un.timestamp),(None,None,None))
+        self.failUnlessEqual(un.buildNmea(),'!AIVDM,2,2,4,B,@H8888888888880,2*2B')
+
+    def testCorruptFields(self):
+        un = UscgNmea('junk!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,s,d-1x9,T1.2.3,x7,t123456.78,b003669958,1085889680.5')
+        self.failUnlessEqual((un.rssi,un.signalStrength,un.timeOfArrival),(None,None,None))
+        self.failUnlessEqual((un.x,un.receiverTime,un.stationTypeCode),(7,'123456.78','b'))
+        self.failUnlessEqual(un.cg_sec,1085889680.5)
+        self.failUnless(parse('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06') is None)
+        self.failUnless(parse('!AIVDM,x,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63') is None)
 
 
     def testEquality(self):
@@ -375,7 +468,7 @@ def create_nmea(bits,
     if pad:
         # Pad out to multiple of 6
         bits = bits + BitVector(size=(6 - (bitLen%6)))
-    payload = ais.binary.bitvectoais6(bits)[0]
+    payload = binary.bitvectoais6(bits)[0]
 
     fields = [nmeaType,]
     fields.append(str(totalSentences))
@@ -385,7 +478,7 @@ def create_nmea(bits,
     fields.append(payload)
     fields.append(str(pad))
     firstStr = ','.join(fields)
-    checksum = ais.nmea.checksumStr(firstStr)
+    checksum = nmea.checksumStr(firstStr)
     fields = [firstStr+'*'+checksum,]
     fields.append(station)
     if cg_sec is None:
@@ -396,6 +489,7 @@ def create_nmea(bits,
 
 
 def test():
+    import doctest
     print 'doctests ...'
     numfail, _ = doctest.testmod()
     if not numfail:
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""Keep the latest state of each vessel in memory and write it behind.
+
+The realtime loader used to read shipdata, delete and insert
+last_position and rebuild the whole track line from the position table
+for every position report.  VesselCache keeps the last position, name,
+ship type and recent track points of each MMSI instead.  Reports only
+change the cache and mark the vessel dirty.  flush() then replaces the
+last_position and track_lines rows of all of the dirty vessels with a
+few batched statements.
+
+Each vessel has a ring of its last point_limit positions, so a new
+report appends one point and the track line is written straight from
+memory as EWKB (see aisutils.wkb).  The first time vessels are flushed,
+their names, ship types and tracks are read from the database with one
+query per table so that a restart does not cut the track lines short.
+
+>>> vessels = VesselCache(point_limit=3)
+>>> for x in range(5): vessels.position(1234, x, 42, cog=0, sog=1)
+>>> list(vessels[1234].track)
+[(2.0, 42.0), (3.0, 42.0), (4.0, 42.0)]
+>>> vessels.shipdata(1234, 'EVER GIVEN@@@', 70)
+>>> vessels[1234].name, vessels[1234].shipandcargoStr()
+('EVER GIVEN', 'cargo, all ships of this type')
+
+@license: Apache 2.0
+"""
+
+from collections import deque
+import sys
+
+import wkb
+
+batch_size = 1000
+'Rows for each multi-row INSERT'
+
+last_position_columns = ('userid','name','cog','sog','position','cg_r','navigationstatus',
+                         'shipandcargo','cg_timestamp')
+
+class Vessel(object):
+    """What is known about one MMSI.
+
+    @ivar x: last longitude or None if no position yet
+    @ivar track: (x, y) of the recent positions, oldest first
+    @ivar classB: True if the last position was a class B report
+    @ivar loaded: True once the name and track have been read from the database
+    """
+    __slots__ = ('userid','name','shipandcargo','navigationstatus','cog','sog','cg_r',
+                 'cg_timestamp','x','y','track','classB','loaded')
+
+    def __init__(self,userid,point_limit):
+        self.userid = userid
+        self.name = None
+        self.shipandcargo = None
+        self.navigationstatus = None
+        self.cog = None
+        self.sog = None
+        self.cg_r = None
+        self.cg_timestamp = None
+        self.x = None
+        self.y = None
+        self.track = deque(maxlen=point_limit)
+        self.classB = False
+        self.loaded = False
+
+    def displayName(self):
+        '@return: the name or the MMSI if there is no name'
+        return self.name or str(self.userid)
+
+    def shipandcargoStr(self):
+        '@return: ship and cargo type as text for last_position'
+        if self.shipandcargo is None:
+            return 'unknown'
+        from ais.ais_msg_5 import shipandcargoDecodeLut
+        shipandcargo = shipandcargoDecodeLut.get(str(self.shipandcargo))
+        if shipandcargo is None:
+            return str(self.shipandcargo)
+        return shipandcargo[:29]
+
+    def trackWKB(self,SRID=4326):
+        '@return: hex EWKB line of the track, newest point first, or None if under 2 points'
+        if len(self.track) < 2:
+            return None
+        return wkb.lineString(reversed(self.track),SRID)
+
+
+class VesselCache(object):
+    """Vessel state by MMSI with the vessels that need to be written.
+
+    @ivar flushes: number of flushes that wrote something
+    @ivar written: last_position rows written
+    """
+    def __init__(self,point_limit=50,verbose=False):
+        '''
+        @param point_limit: most points in a track line
+        '''
+        self.point_limit = point_limit
+        self.v = verbose
+        self.vessels = {}  # userid -> Vessel
+        self.dirty = set()
+        self.flushes = 0
+        self.written = 0
+
+    def __len__(self):
+        return len(self.vessels)
+
+    def __getitem__(self,userid):
+        return self.vessels[userid]
+
+    def get(self,userid):
+        '@return: the Vessel for an MMSI, adding it if needed'
+        vessel = self.vessels.get(userid)
+        if vessel is None:
+            vessel = self.vessels[userid] = Vessel(userid,self.point_limit)
+        return vessel
+
+    def position(self,userid,x,y,cog,sog,cg_r=None,cg_timestamp=None,navigationstatus=None,classB=False):
+        '''Take a position report.
+
+        @param x: longitude
+        @param y: latitude
+        @param cog: course over ground.  511 (unknown) is stored as 0 to point north.
+        @param navigationstatus: text for class A or None
+        '''
+        vessel = self.get(userid)
+        if cog == 511:
+            cog = 0 # make unknowns point north
+        x = float(x)
+        y = float(y)
+        vessel.x = x
+        vessel.y = y
+        vessel.cog = cog
+        vessel.sog = sog
+        vessel.cg_r = cg_r
+        vessel.cg_timestamp = cg_timestamp
+        vessel.navigationstatus = navigationstatus
+        vessel.classB = classB
+        vessel.track.append((x,y))
+        self.dirty.add(userid)
+
+    def shipdata(self,userid,name=None,shipandcargo=None):
+        '''Take the name and/or ship type from a type 5 or 24 message'''
+        vessel = self.get(userid)
+        if name is not None:
+            vessel.name = name.rstrip(' @')
+        if shipandcargo is not None:
+            vessel.shipandcargo = shipandcargo
+        if vessel.x is not None:
+            self.dirty.add(userid)
+
+    def _load(self,cu,vessels):
+        'Read the names and tracks of vessels seen for the first time'
+        byId = dict([(vessel.userid,vessel) for vessel in vessels])
+        userids = byId.keys()
+
+        cu.execute('SELECT userid,name,shipandcargo FROM shipdata WHERE userid = ANY(%s);',(userids,))
+        for userid,name,shipandcargo in cu.fetchall():
+            vessel = byId[userid]
+            if vessel.name is None and name: vessel.name = name.rstrip(' @')
+            if vessel.shipandcargo is None and shipandcargo is not None: vessel.shipandcargo = shipandcargo
+        cu.execute('SELECT userid,name,shipandcargo FROM b_staticdata WHERE userid = ANY(%s);',(userids,))
+        for userid,name,shipandcargo in cu.fetchall():
+            vessel = byId[userid]
+            if vessel.name is None and name: vessel.name = name.rstrip(' @')
+            if vessel.shipandcargo is None and shipandcargo is not None: vessel.shipandcargo = shipandcargo
+
+        # The position rows of this interval are already in the tables
+        for table,classB in (('position',False),('positionb',True)):
+            userids = [vessel.userid for vessel in vessels if vessel.classB == classB]
+            if not userids:
+                continue
+            cu.execute(trackPointsSql(table,self.point_limit),(userids,))
+            tracks = {}
+            for userid,x,y in cu.fetchall():
+                if x==181 and y==91:
+                    continue
+                tracks.setdefault(userid,[]).append((x,y))
+            for userid,points in tracks.iteritems():
+                track = byId[userid].track
+                track.clear()
+                track.extend(points)
+        for vessel in vessels:
+            vessel.loaded = True
+
+    def flush(self,cu):
+        '''Write last_position and track_lines for the vessels that changed.
+
+        Does not commit.  The vessels stay dirty if a statement fails,
+        so they are written again by the next flush after the rollback.
+        @param cu: database cursor
+        @return: number of vessels written
+        '''
+        dirtyIds = self.dirty
+        self.dirty = set()
+        try:
+            return self._write(cu,[self.vessels[userid] for userid in dirtyIds])
+        except:
+            self.dirty.update(dirtyIds)
+            raise
+
+    def _write(self,cu,dirty):
+        dirty = [vessel for vessel in dirty if vessel.x is not None]
+        if not dirty:
+            return 0
+
+        new = [vessel for vessel in dirty if not vessel.loaded]
+        if new:
+            self._load(cu,new)
+
+        userids = [vessel.userid for vessel in dirty]
+        cu.execute('DELETE FROM last_position WHERE userid = ANY(%s);',(userids,))
+        cu.execute('DELETE FROM track_lines WHERE userid = ANY(%s);',(userids,))
+
+        rows = []
+        for vessel in dirty:
+            rows.append((vessel.userid, vessel.displayName(), vessel.cog, vessel.sog,
+                         wkb.point(vessel.x,vessel.y,4326), vessel.cg_r, vessel.navigationstatus,
+                         vessel.shipandcargoStr(), vessel.cg_timestamp))
+        insertRows(cu,'INSERT INTO last_position (' + ','.join(last_position_columns) + ') VALUES ',
+                   '(%s,%s,%s,%s,%s::geometry,%s,%s,%s,%s)',rows)
+
+        rows = []
+        for vessel in dirty:
+            track = vessel.trackWKB()
+            if track is not None:
+                rows.append((vessel.userid,vessel.displayName(),track))
+        insertRows(cu,'INSERT INTO track_lines (userid,name,track) VALUES ',
+                   '(%s,%s,%s::geometry)',rows)
+
+        self.flushes += 1
+        self.written += len(dirty)
+        if self.v:
+            sys.stderr.write('%s\n' % self)
+        return len(dirty)
+
+    def __str__(self):
+        return 'vessels: %d known, %d dirty, %d written in %d flushes' % (
+            len(self.vessels),len(self.dirty),self.written,self.flushes)
+
+
+def trackPointsSql(table,limitPoints,where='userid = ANY(%s)'):
+    '''
+    SQL for the newest points of each vessel in one query.
+
+    @param table: position or positionb
+    @param where: condition on the rows of the table
+    @return: SELECT of userid, x, y, oldest point first for each userid
+    '''
+    return ('SELECT userid,X(position),Y(position) FROM '
+            '(SELECT userid,position,cg_sec,'
+            'row_number() OVER (PARTITION BY userid ORDER BY cg_sec DESC) AS n '
+            'FROM ' + table + ' WHERE ' + where + ') AS recent '
+            'WHERE n <= ' + str(int(limitPoints)) + ' ORDER BY userid,cg_sec;')
+
+
+def insertRows(cu,sql,rowSql,rows):
+    '''
+    Insert many rows with one statement per batch_size rows.
+
+    @param sql: start of the INSERT up to VALUES
+    @param rowSql: placeholders for one row
+    @param rows: sequences of values
+    '''
+    for start in range(0,len(rows),batch_size):
+        batch = rows[start:start+batch_size]
+        params = []
+        for row in batch:
+            params.extend(row)
+        cu.execute(sql + ','.join([rowSql]*len(batch)) + ';', params)
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
@@ -13,7 +13,15 @@ AIS database utilities.
 @since: 2008-Feb-07
 @undocumented: __doc__ parser
 
-@requires: U{GeoTypes<http://www.initd.org/tracker/psycopg/wiki/GeoTypes>} >= 0.7.0
+The writers make hex EWKB (WKB with the SRID) that PostGIS takes
+directly, e.g. in a COPY or cast with ::geometry, without parsing WKT:
+
+>>> point(-70.1, 42.2, 4326)
+'0101000020E610000066666666668651C09A99999999194540'
+>>> lineString([(1, 2), (3, 4)])
+'010200000002000000000000000000F03F000000000000004000000000000008400000000000001040'
+
+@requires: U{GeoTypes<http://www.initd.org/tracker/psycopg/wiki/GeoTypes>} >= 0.7.0 for convert
 
 @todo: Switch to GeoDjango so that this becomes irrelevant
 '''
@@ -21,13 +29,62 @@ AIS database utilities.
 #@requires: U{psycopg2<http://http://initd.org/projects/psycopg2/>} >= 2.0.6
 #import psycopg2
 #import psycopg2.extensions
-import GeoTypes
+
+import binascii
+import struct
+
+wkbPoint = 1
+'OpenGIS geometry type number for a point'
+
+wkbLineString = 2
+'OpenGIS geometry type number for a line string'
+
+ewkbSRIDFlag = 0x20000000
+'Set in the geometry type when the SRID follows'
+
+def header(geomType,SRID=None):
+    '''
+    @param geomType: OpenGIS geometry type number (e.g. wkbPoint)
+    @return: little endian (E)WKB bytes up to the coordinates
+    '''
+    if SRID is None:
+        return struct.pack('<BI',1,geomType)
+    return struct.pack('<BII',1,geomType|ewkbSRIDFlag,int(SRID))
+
+def point(x,y,SRID=None):
+    '''
+    Little endian hex EWKB for a point.
+
+    @param x: longitude
+    @param y: latitude
+    @param SRID: spatial reference id (e.g. 4326 for WGS 84) or None for plain WKB
+    @return: hex string as PostGIS prints geometry
+    @rtype: str
+    '''
+    return binascii.hexlify(header(wkbPoint,SRID) + struct.pack('<dd',x,y)).upper()
+
+def lineString(points,SRID=None):
+    '''
+    Little endian hex EWKB for a line.
+
+    @param points: sequence of (x,y)
+    @param SRID: spatial reference id or None for plain WKB
+    @return: hex string as PostGIS prints geometry
+    @rtype: str
+    '''
+    coords = []
+    for x,y in points:
+        coords.append(x)
+        coords.append(y)
+    wkb = header(wkbLineString,SRID) + struct.pack('<I%dd' % len(coords),len(coords)//2,*coords)
+    return binascii.hexlify(wkb).upper()
 
 class convert:
     '''
     Simple wrapper to make decoding WKB Hex a lot simpler
     '''
     def __init__(self):
+        import GeoTypes
         self.factory = GeoTypes.OGGeoTypeFactory()
         self.parser = GeoTypes.HEXEWKBParser(factory)
     def decode(wkbhex):
@@ -45,3 +102,17 @@ class convert:
         parser.parseGeometry(wkbhex)
         geom = factory.getGeometry()
         return geom
+
+
+def test():
+    import doctest
+    print 'doctests ...'
+    numfail, _ = doctest.testmod()
+    if not numfail:
+        print 'ok'
+    else:
+        print 'FAILED'
+
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+__author__    = 'Kurt Schwehr'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Decode normalized USCG AIS logs once into a columnar archive with a
+directory for each UTC day, or dump positions back out of one.
+
+  ais_normalize.py -t log.ais | ais_archive.py -d archive
+  ais_archive.py -d archive --dump --start 2009-05-05 --end 2009-05-06 -m 366123456
+
+Logs can be added in any order.  The rows of a day that is already in
+the archive are merged with the new ones.
+
+@requires: U{numpy<http://numpy.scipy.org/>}
+@see: aisutils.archive
+'''
+
+import datetime
+import sys
+
+from aisutils import archive
+from aisutils import logscan
+
+
+def parse_time(value):
+    '@return: UNIX UTC seconds from seconds or YYYY-MM-DD[THH:MM:SS]'
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return archive.utcSeconds(datetime.datetime.strptime(value, fmt))
+        except ValueError:
+            pass
+    raise ValueError('unable to parse time: %s' % value)
+
+
+def dump(directory, out, start=None, end=None, mmsi=None):
+    '''Write the position reports as CSV'''
+    columns = [name for name, dtype, typecode in archive.position_columns]
+    out.write(','.join(columns) + '\n')
+    formats = [{'lon':'%r', 'lat':'%r', 'sog':'%.1f', 'cog':'%.1f'}.get(column, '%s') for column in columns]
+    p = archive.Archive(directory).positions(start, end, mmsi)
+    for row in zip(*[p[column].tolist() for column in columns]):
+        out.write(','.join([fmt % value for fmt, value in zip(formats, row)]) + '\n')
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] [file1.ais ...]")
+    parser.add_option('-d', '--directory', dest='directory', default='archive',
+                      help='Archive directory [default: %default]')
+    parser.add_option('--dump', dest='dump', default=False, action='store_true',
+                      help='Write the positions in the archive as CSV rather than adding logs')
+    parser.add_option('-s', '--start', dest='start', default=None,
+                      help='First time to dump (UNIX seconds or YYYY-MM-DD[THH:MM:SS])')
+    parser.add_option('-e', '--end', dest='end', default=None,
+                      help='Time to stop dumping before')
+    parser.add_option('-m', '--mmsi', dest='mmsi', default=None, action='append', type='int',
+                      help='Only dump this MMSI.  May be given more than once')
+    parser.add_option('-v', '--verbose', dest='verbose', default=False, action='store_true',
+                      help='Print the counts when done')
+
+    (options, args) = parser.parse_args()
+
+    if options.dump:
+        start = end = None
+        if options.start is not None: start = parse_time(options.start)
+        if options.end is not None: end = parse_time(options.end)
+        dump(options.directory, sys.stdout, start, end, options.mmsi)
+        return
+
+    writer = archive.ArchiveWriter(options.directory, verbose=options.verbose)
+    if len(args) == 0:
+        writer.add_lines(sys.stdin)
+    for filename in args:
+        writer.add_lines(logscan.scan(filename))
+    writer.close()
+    if options.verbose:
+        sys.stderr.write(str(writer) + '\n')
+
+if __name__ == '__main__':
+    main()
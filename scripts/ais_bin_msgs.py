@@ -10,29 +10,28 @@ import traceback
 
 from aisutils.BitVector import BitVector
 from aisutils import binary
-from aisutils.uscg import uscg_ais_nmea_regex
+from aisutils import uscg
 
 
 def parse_msgs(infile, verbose=False):
     for line in infile:
         line = line.strip()
 
-        try:
-            match = uscg_ais_nmea_regex.search(line).groupdict()
-        except AttributeError:
+        msg = uscg.parse(line)
+        if msg is None or not msg.contents:
             continue
 
-        msg_type = match['body'][0]
+        msg_type = msg.contents[0]
         if msg_type not in ('6', '8'):
             continue
 
-        if msg_type == '6' and len(match['body']) < 15:
+        if msg_type == '6' and len(msg.contents) < 15:
             continue
-        if msg_type == '8' and len(match['body']) < 10:
+        if msg_type == '8' and len(msg.contents) < 10:
             continue
 
         try:
-            bv = binary.ais6tobitvec(match['body'][:15])
+            bv = binary.ais6tobitvec(msg.contents[:15])
         except ValueError:
             sys.stderr.write('bad msg: %s\n' % line.strip())
             continue
@@ -53,7 +52,7 @@ def parse_msgs(infile, verbose=False):
         if verbose:
             print msg_type, dac, fi, r['UserID'], line.rstrip()
         else:
-            print msg_type, dac, fi, r['UserID'], match['station']
+            print msg_type, dac, fi, r['UserID'], msg.station
 
 
 def main():
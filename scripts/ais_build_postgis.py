@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 """Build a postgres/postgis database of the raw ais messages.
 
+Use --copy for backfills.  The position, positionb, shipdata and
+bsreport rows are sent with COPY FROM STDIN in chunks rather than an
+INSERT per message (see aisutils.pgcopy).
+
 NOTE: this following sets up postgres totally open.  You need to use a
 password and firewall on any deployment on the internet!
 
@@ -22,15 +26,20 @@ from decimal import Decimal
 import os
 import sys
 import StringIO
+import time
 
 from aisutils.BitVector import BitVector
 from aisutils import binary
+from aisutils import pgcopy
 from aisutils import sqlhelp
 
 import ais
 import ais.ais_msg_1
 import ais.ais_msg_2
 import ais.ais_msg_3
+import ais.ais_msg_4
+import ais.ais_msg_5
+import ais.ais_msg_18
 
 
 def createTables(cx,verbose=False):
@@ -49,6 +58,9 @@ def createTables(cx,verbose=False):
 
     cu.execute(str(ais.ais_msg_4.sqlCreate()))
 
+    if verbose: print str(ais.ais_msg_18.sqlCreate())
+    cu.execute(str(ais.ais_msg_18.sqlCreate()))
+
     cx.commit()
 
 
@@ -154,7 +166,7 @@ def loadData(cx,datafile,verbose=False
             print str(ins)
             print '# line:',line
         try:
-            cu.execute(str(ins))
+            cu.execute(*ins.sqlParams())
         except Exception, e:
             print params
             # TODO(schwehr): Give a better error message.
@@ -175,6 +187,26 @@ def loadData(cx,datafile,verbose=False
     cx.commit()
 
 
+def copyData(loader,datafile,verbose=False):
+    '''
+    Decode the messages in a file and COPY them into the database.
+
+    @param loader: where the rows go
+    @type loader: aisutils.pgcopy.CopyLoader
+    @param datafile: open file of normalized USCG NMEA lines
+    @return: number of lines read
+    @note: can not handle multiline AIS messages.  They must be normalized first.
+    '''
+    add_line = loader.add_line
+    lineNum = 0
+    for lineNum,line in enumerate(datafile,1):
+        add_line(line)
+        if verbose and lineNum%100000==0:
+            print lineNum,loader
+    loader.flush()
+    return lineNum
+
+
 ############################################################
 if __name__=='__main__':
     from optparse import OptionParser
@@ -199,6 +231,13 @@ if __name__=='__main__':
     parser.add_option('-U','--without-uscg',dest='uscgTail',default=True,action='store_false',
                       help='Do not look for timestamp and receive station at the end of each line [default: with-uscg]')
 
+    parser.add_option('--copy',dest='copy',default=False,action='store_true',
+                      help='Load position, positionb, shipdata and bsreport with COPY in chunks')
+    parser.add_option('--chunk-size',dest='chunkSize',default=10000,type='int',
+                      help='Rows to send in each COPY [default: %default]')
+    parser.add_option('--rejects',dest='rejects',default=None,
+                      help='File to write the rows that the database refused with --copy')
+
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
                       help='Make the test output verbose')
 
@@ -217,7 +256,26 @@ if __name__=='__main__':
     if options.createTables:
         createTables(cx,verbose=options.verbose)
 
-    if len(args)==0:
+    if options.copy:
+        rejects = None
+        if options.rejects is not None:
+            rejects = file(options.rejects,'w')
+        loader = pgcopy.CopyLoader(cx,chunk_size=options.chunkSize,rejects=rejects,
+                                   verbose=options.verbose)
+        if len(args)==0:
+            args.append(sys.stdin)
+        lines = 0
+        for datafile in args:
+            if isinstance(datafile,str):
+                print 'processing file:',datafile
+                datafile = file(datafile,'r')
+            lines += copyData(loader,datafile,verbose=options.verbose)
+        elapsed = time.time() - loader.start
+        print loader
+        print '%d lines in %.1f sec (%.0f lines/sec)' % (lines, elapsed, lines / max(elapsed,1e-6))
+        if loader.rejected:
+            print 'WARNING: %d rows rejected' % loader.rejected
+    elif len(args)==0:
         if options.verbose: print 'processing from stdin'
         loadData(cx,sys.stdin,verbose=options.verbose,uscg=options.uscgTail)
     else:
@@ -8,29 +8,23 @@ Messages are one line only.
 
 Only deals with sqlite right now.
 
-CREATE INDEX pos_userid_idx ON position(userid);
-CREATE INDEX pos_pkt_id_idx ON position(pkt_id);
-CREATE INDEX pos_cg_sec_idx ON position(cg_sec);
-CREATE INDEX pos_cg_timestamp_idx ON position(cg_timestamp);
-CREATE INDEX pos_cg_r_idx ON position(cg_r);
-CREATE INDEX pos_dup_idx ON position(dup_flag);
-
-CREATE INDEX bsrep_userid_idx ON bsreport(userid);
-CREATE INDEX bsrep_pkt_id_idx ON bsreport(pkt_id);
-CREATE INDEX bsrep_cg_sec_idx ON bsreport(cg_sec);
-CREATE INDEX bsrep_cg_timestamp_idx ON bsreport(cg_timestamp);
-CREATE INDEX bsrep_cg_r_idx ON bsreport(cg_r);
-CREATE INDEX bsrep_dup_idx ON bsreport(dup_flag);
-
-VACUUM;
+--bulk is for loading a lot of data at once.  Rows are inserted with
+executemany for each table in one large transaction with the journal
+in WAL mode and synchronous off.  The indexes are dropped first and
+built again at the end, which is much faster than keeping them up to
+date row by row.  Use --create-indexes to build the indexes after a
+normal load.  --benchmark times both modes in rows/sec.
 """
 
-import datetime
 from decimal import Decimal
 import exceptions
 from optparse import OptionParser
+import os
+import shutil
 import StringIO
 import sys
+import tempfile
+import time
 import traceback
 
 import pysqlite2.dbapi2 as sqlite
@@ -46,71 +40,38 @@ import ais.ais_msg_19
 
 from aisutils.BitVector import BitVector
 from aisutils import binary
+from aisutils.uscg import UscgNmea
+from aisutils import dedup
+from aisutils.dedup import TrackDuplicates
 
 import nmea.checksum
 
-
-class TrackDuplicates:
-    '''handle a feed and assign packet identifiers for duplicates
-    Get this out into aisutils.
-
-    Does not distinguish duplicates coming from the same receiver (should that ever happen)
-    '''
-
-    def __init__(self, lookback_length=None, lookback_time_sec=5*60):
-        self.lookback_length = lookback_length
-        self.lookback_time_sec = lookback_time_sec
-
-        self.queue = []  # dicts of (time_sec,pkt_id,payload)
-
-        self.next_new_id = 1 # skip zero: useful to not have a zero... bool(0) is False
-
-        self.newest_time_sec = 0  # Unix UTC sec
-
-
-    def check_packet(self, time_sec, payload):
-        'payload is the text in the 5th position of any message... the encoded message'
-
-        found = False
-        for pkt in reversed(self.queue): # Search backwards since dups are likely close to the front, no?
-            if payload == pkt['payload']:
-                found = True
-                break
-
-        if found:
-            return pkt['pkt_id'],True  # Skipping cleaning to save time
-
-        # ! found... add packet to queue
-        self.queue.append(dict(time_sec=time_sec, pkt_id = self.next_new_id, payload=payload))
-        pkt_id = self.next_new_id
-        self.next_new_id += 1
-        if self.newest_time_sec < time_sec:
-            self.newest_time_sec = time_sec
-
-
-        # clean up queue wrt to length
-        if self.lookback_length:
-            while len(self.queue) > self.lookback_length:
-                self.queue.pop(0) # drop oldest
-
-        #
-        # drop messages that are too old
-        #
-        span = 10 # Don't look too far back for speed.  Probably could work with just 1 or 2
-        threshold_time = self.newest_time_sec - self.lookback_time_sec
-
-        drop_list = []
-
-        if self.lookback_time_sec and len(self.queue) > span:
-            if len(self.queue) > span: span = len(self.queue)
-            for i in range(span):
-                if self.queue[i]['time_sec'] < threshold_time:
-                    drop_list.append(i)
-
-        for key in reversed(drop_list): # go backwards so we don't mess up the order
-            self.queue.pop(key)
-
-        return pkt_id,False
+msg_tables = {
+    1: 'position',
+    2: 'position',
+    3: 'position',
+    4: 'bsreport',
+    5: 'shipdata',
+    18: 'positionb',
+    19: 'b_pos_and_shipdata',
+    }
+'Table for each message number'
+
+indexes = (
+    ('pos_userid_idx', 'position', 'userid'),
+    ('pos_pkt_id_idx', 'position', 'pkt_id'),
+    ('pos_cg_sec_idx', 'position', 'cg_sec'),
+    ('pos_cg_timestamp_idx', 'position', 'cg_timestamp'),
+    ('pos_cg_r_idx', 'position', 'cg_r'),
+    ('pos_dup_idx', 'position', 'dup_flag'),
+    ('bsrep_userid_idx', 'bsreport', 'userid'),
+    ('bsrep_pkt_id_idx', 'bsreport', 'pkt_id'),
+    ('bsrep_cg_sec_idx', 'bsreport', 'cg_sec'),
+    ('bsrep_cg_timestamp_idx', 'bsreport', 'cg_timestamp'),
+    ('bsrep_cg_r_idx', 'bsreport', 'cg_r'),
+    ('bsrep_dup_idx', 'bsreport', 'dup_flag'),
+    )
+'(name, table, column) of the indexes'
 
 
 #def create_tables(cx, payload_table=False, verbose=False):
@@ -157,6 +118,42 @@ def create_tables(cx, verbose=False):
     cx.commit()
 
 
+def create_indexes(cx, verbose=False):
+    '''Build the indexes that are not already there'''
+    cu = cx.cursor()
+    for name, table, column in indexes:
+        if verbose: print 'creating index', name
+        cu.execute('CREATE INDEX IF NOT EXISTS %s ON %s(%s);' % (name, table, column))
+    cx.commit()
+
+
+def drop_indexes(cx):
+    '''Drop the indexes so that a bulk load does not have to keep them up to date'''
+    cu = cx.cursor()
+    for name, table, column in indexes:
+        cu.execute('DROP INDEX IF EXISTS %s;' % (name,))
+    cx.commit()
+
+
+def bulk_pragmas(cx):
+    '''Tune the connection for loading.  The database can be corrupted
+    if the machine crashes during the load.'''
+    cu = cx.cursor()
+    cu.execute('PRAGMA journal_mode=WAL;')
+    cu.execute('PRAGMA synchronous=OFF;')
+    cu.execute('PRAGMA temp_store=MEMORY;')
+    cu.execute('PRAGMA cache_size=-262144;') # KiB
+
+
+def sql_value(value):
+    '''Convert a decoded value to something sqlite can bind'''
+    if type(value) == Decimal:
+        return float(value)
+    if isinstance(value, BitVector):
+        return str(value)
+    return value
+
+
 def get_max_key(cx):
     '''
     return the maximum key from the database across tables
@@ -179,7 +176,8 @@ def get_max_key(cx):
     return max_key
 
 
-def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
+def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True, batch_decode=False,
+              decode_cache=None, dedup_type_windows=None, bulk=False, batch_size=10000):
     """Try to read data from an open file object.
 
     Not yet well tested.
@@ -187,8 +185,17 @@ def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
     @param cx: database connection
     @param verbose: pring out more if true
     @param uscg: Process uscg tail information to get timestamp and receive station
-    @rtype: None
-    @return: Nothing
+    @param batch_decode: Decode the 1, 2, 3, 18, and 19 position reports with ais.batch (requires numpy)
+    @param decode_cache: ais.decode_cache.DecodeCache to reuse the decode of
+        payloads already seen from another station or None
+    @param dedup_type_windows: seconds to look back for duplicates of each
+        message type character (e.g. aisutils.dedup.type_windows) or None
+        for 5 minutes for all types
+    @param bulk: insert rows with executemany and commit once at the end.
+        See also bulk_pragmas and drop_indexes.
+    @param batch_size: rows to collect before each round of executemany
+    @rtype: int
+    @return: number of rows inserted
 
     @note: can not handle multiline AIS messages.  They must be normalized first.
     """
@@ -205,19 +212,45 @@ def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
     print 'keys_starting_at:',next_key
 
     message_set = (1,2,3,4,5,18,19)
+    msg_mods = {
+        1: ais.ais_msg_1_handcoded,
+        2: ais.ais_msg_2_handcoded,
+        3: ais.ais_msg_3_handcoded,
+        4: ais.ais_msg_4_handcoded,
+        5: ais.ais_msg_5,
+        18: ais.ais_msg_18, # Class B position
+        19: ais.ais_msg_19, # Class B position
+        }
     counts = {}
     for msg_num in message_set:
         counts[msg_num] = 0
 
     counts['checksum_failed'] = 0
 
-    track_dups = TrackDuplicates(lookback_length=1000)
-
-    for line in datafile:
+    track_dups = TrackDuplicates(lookback_length=1000, type_windows=dedup_type_windows)
+
+    progress = 1000
+    numeric = 'decimal'
+    if bulk:
+        progress = 100000
+        numeric = 'float' # Skip Decimal since the rows get floats anyway
+    pending = {} # (table, columns) -> rows waiting for executemany
+    pending_count = 0
+    insert_sql = {} # (table, columns) -> INSERT string
+    rows = 0
+
+    if batch_decode:
+        from ais import batch
+        lines = batch.decoded_lines(datafile)
+    else:
+        lines = ((line, None) for line in datafile)
+
+    for line, msg_dict in lines:
         lineNum += 1
-        if lineNum%1000==0:
+        if lineNum%progress==0:
             print lineNum
-            cx.commit()
+            if not bulk:
+                cx.commit()
 
         if len(line)<15 or line[3:6] not in ('VDM|VDO'): continue # Not an AIS VHF message
 
@@ -227,10 +260,9 @@ def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
             print >> sys.stderr, '   ',nmea.checksum.checksumStr(line)
             counts['checksum_failed'] += 1
 
-        fields=line.split(',') # FIX: use this split throughout below...
-
         try:
-            msg_num = int(binary.ais6tobitvec(fields[5][0]))
+            msg = UscgNmea(line)
+            msg_num = int(binary.ais6topackedbits(msg.contents[0]))
         except:
             print 'line would not decode',line
             continue
@@ -242,7 +274,7 @@ def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
             continue
 
         try:
-            bv = binary.ais6tobitvec(fields[5])
+            bv = binary.ais6topackedbits(msg.contents)
         except:
             print >> sys.stderr, 'ERROR: Unable to decode bits in line:\n\t',line
             traceback.print_exc(file=sys.stderr)
@@ -266,16 +298,15 @@ def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
         ins = None
 
         try:
-            if   msg_num== 1: ins = ais.ais_msg_1_handcoded.sqlInsert(ais.ais_msg_1_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 2: ins = ais.ais_msg_2_handcoded.sqlInsert(ais.ais_msg_2_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 3: ins = ais.ais_msg_3_handcoded.sqlInsert(ais.ais_msg_3_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 4: ins = ais.ais_msg_4_handcoded.sqlInsert(ais.ais_msg_4_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 5: ins = ais.ais_msg_5.sqlInsert(ais.ais_msg_5.decode(bv),dbType='sqlite')
-            elif msg_num==18: ins = ais.ais_msg_18.sqlInsert(ais.ais_msg_18.decode(bv),dbType='sqlite') # Class B position
-            elif msg_num==19: ins = ais.ais_msg_19.sqlInsert(ais.ais_msg_19.decode(bv),dbType='sqlite') # Class B position
+            if msg_dict is not None: # Already done by the batch decoder
+                pass
+            elif decode_cache is not None:
+                msg_dict = decode_cache.decode(msg.contents, msg.fillbits,
+                                               msg.cg_sec if uscg else None)
             else:
-                print 'Warning... not handling type',msg_num,'line:',lineNum
-                continue
+                msg_dict = msg_mods[msg_num].decode(bv, numeric=numeric)
+            if not bulk:
+                ins = msg_mods[msg_num].sqlInsert(msg_dict,dbType='sqlite')
         except:
             print 'ERROR:  some decode error?','line:',lineNum
             print '  ',line
@@ -283,49 +314,53 @@ def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
 
         counts[msg_num] += 1
 
+        extra = [] # (field, value) to add to the decoded message
         if uscg:
-            from aisutils.uscg import uscg_ais_nmea_regex
-            match = uscg_ais_nmea_regex.search(line).groupdict()
-
             try:
-                cg_sec = int(float(match['timeStamp']))
-                ins.add('cg_sec', cg_sec)
-                #ins.add('cg_sec', int(float(match['timeStamp'])) )
-                ins.add('cg_timestamp', str(datetime.datetime.utcfromtimestamp(float(match['timeStamp']))) )
-                ins.add('cg_r', match['station'] )
+                cg_sec = int(msg.cg_sec)
+                extra.append(('cg_sec', cg_sec))
+                extra.append(('cg_timestamp', str(msg.timestamp)))
+                extra.append(('cg_r', msg.station))
             except:
-                print >> sys.stderr, match
                 print >> sys.stderr, 'bad uscg sections',line,
                 continue
 
             # Optional fields that are not always there
 
-            if match['time_of_arrival'] is not None:
-                try:
-                    ins.add('cg_t_arrival',  float(match['time_of_arrival']))
-                except:
-                    print >> sys.stderr, 'WARNING: corrupted time of arrival (T) in line.  T ignored\n\t',line
-                    pass # Not critical if corrupted
-
-
-            if match['slot'] is not None:
-                ins.add('cg_s_slotnum',  int(match['slot']) )
+            extra.append(('cg_t_arrival',  msg.timeOfArrival))
+            extra.append(('cg_s_slotnum',  msg.slotNumber))
 
         if msg_num in (1,2,3,4):
-            pkt_id,dup_flag = track_dups.check_packet(cg_sec,fields[5]) # Pass in the NMEA payload string of data
+            pkt_id,dup_flag = track_dups.check_packet(cg_sec,msg.contents) # Pass in the NMEA payload string of data
             if v:
-                print 'dup_check:',pkt_id,dup_flag,fields[5]
-            ins.add('pkt_id',pkt_id)
-            ins.add('dup_flag',dup_flag)
-
+                print 'dup_check:',pkt_id,dup_flag,msg.contents
+            extra.append(('pkt_id',pkt_id))
+            extra.append(('dup_flag',dup_flag))
 
-        ins.add('key',next_key)
+        extra.append(('key',next_key))
         next_key += 1
 
+        if bulk:
+            group = (msg_tables[msg_num], tuple(msg_dict) + tuple([field for field,value in extra]))
+            row = [sql_value(value) for value in msg_dict.itervalues()] + [value for field,value in extra]
+            try:
+                pending[group].append(row)
+            except KeyError:
+                pending[group] = [row]
+            pending_count += 1
+            if pending_count >= batch_size:
+                rows += flush_rows(cu, pending, insert_sql)
+                pending_count = 0
+            continue
+
+        for field, value in extra:
+            if value is not None:
+                ins.add(field, value)
+
         if verbose:
             print str(ins)
         try:
-            cu.execute(str(ins))
+            cu.execute(*ins.sqlParams())
         except pysqlite2.dbapi2.OperationalError, params:
         #except OperationalError,  params:
             if -1 != params.message.find('no such table'):
@@ -343,13 +378,75 @@ def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
                 ipshell = IPShellEmbed(argv=[])
                 ipshell()
                 sys.exit('Gave up')
+        else:
+            rows += 1
 
 #        if payload_table and msg_num in (1,2,3):
 #            payload = fields[5]
 #            key = cu.execute('SELECT key from')
 
+    if pending:
+        rows += flush_rows(cu, pending, insert_sql)
+
     print counts
+    if decode_cache is not None:
+        print str(decode_cache)
     cx.commit()
+    return rows
+
+
+def flush_rows(cu, pending, insert_sql):
+    '''Insert and clear the rows waiting for each table.
+
+    @param pending: dict of rows keyed by (table, columns)
+    @param insert_sql: cache of the INSERT for each (table, columns)
+    @return: number of rows inserted
+    '''
+    count = 0
+    for group, rows in pending.iteritems():
+        sql = insert_sql.get(group)
+        if sql is None:
+            table, columns = group
+            sql = insert_sql[group] = 'INSERT INTO %s (%s) VALUES (%s);' % (
+                table, ','.join(columns), ','.join(['?'] * len(columns)))
+        try:
+            cu.executemany(sql, rows)
+        except pysqlite2.dbapi2.OperationalError, params:
+            if -1 != params.message.find('no such table'):
+                print 'ERROR:',params.message
+                sys.exit('You probably need to run with --with-create')
+            raise
+        count += len(rows)
+    pending.clear()
+    return count
+
+
+def benchmark(filename, repeat=100, verbose=False):
+    '''Print the rows/sec of loading a file repeat times with and without --bulk'''
+    lines = file(filename).readlines() * repeat
+    tmp_dir = tempfile.mkdtemp()
+    results = []
+    try:
+        for bulk in (False, True):
+            db_filename = os.path.join(tmp_dir, 'bulk%d.db3' % bulk)
+            cx = sqlite.connect(db_filename)
+            create_tables(cx)
+            start = time.time()
+            if bulk:
+                bulk_pragmas(cx)
+                drop_indexes(cx)
+            else:
+                create_indexes(cx)
+            rows = load_data(cx, lines, verbose=verbose, bulk=bulk)
+            if bulk:
+                create_indexes(cx)
+            elapsed = time.time() - start
+            cx.close()
+            results.append((bulk and 'bulk' or 'normal', rows, elapsed))
+    finally:
+        shutil.rmtree(tmp_dir)
+    for name, rows, elapsed in results:
+        print '%-7s %8d rows %7.2f sec %9.0f rows/sec' % (name, rows, elapsed, rows / elapsed)
 
 
 ############################################################
@@ -367,18 +464,55 @@ if __name__=='__main__':
 #    parser.add_option('-p','--payload-table', dest='payload_table', default=False, action='store_true',
 #                      help='Add an additional table that stores the NMEA payload text')
 
+    parser.add_option('-b','--batch-decode',dest='batch_decode',default=False,action='store_true',
+                      help='Decode position reports in batches with numpy')
+
+    parser.add_option('--cache-size',dest='cache_size',default=0,type='int',
+                      help='Keep this many decoded messages to reuse for copies from other stations.  0 to disable [default: %default]')
+    parser.add_option('--cache-ttl',dest='cache_ttl',default=None,type='float',
+                      help='Seconds of message time to keep a decoded message in the cache [default: until evicted]')
+
+    parser.add_option('-T','--type-windows',dest='type_windows',default=False,action='store_true',
+                      help='Look back 30 minutes for duplicates of 1, 2 and 3 and 6 hours for 5 [default: 5 minutes]')
+
+    parser.add_option('-B','--bulk',dest='bulk',default=False,action='store_true',
+                      help='Load with executemany in one transaction and rebuild the indexes at the end')
+    parser.add_option('--batch-size',dest='batch_size',default=10000,type='int',
+                      help='Rows for each executemany with --bulk [default: %default]')
+    parser.add_option('-I','--create-indexes',dest='create_indexes',default=False,action='store_true',
+                      help='Build the indexes after loading')
+
+    parser.add_option('--benchmark',dest='benchmark',default=None,
+                      help='Report rows/sec loading this file repeated --repeat times with and without --bulk')
+    parser.add_option('-n','--repeat',dest='repeat',default=100,type='int',
+                      help='Copies of the file to load for --benchmark [default: %default]')
+
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
                       help='Make program output more verbose info as it runs')
 
     (options,args) = parser.parse_args()
+
+    if options.benchmark:
+        benchmark(options.benchmark, options.repeat)
+        sys.exit(0)
+
     cx = sqlite.connect(options.databaseFilename)
 
     if options.create_tables:
         create_tables(cx, verbose=options.verbose)
 #        create_tables(cx, options.payload_table, verbose=options.verbose)
 
+    if options.bulk:
+        bulk_pragmas(cx)
+        drop_indexes(cx)
+
 
 
+    decode_cache = None
+    if options.cache_size > 0:
+        from ais.decode_cache import DecodeCache
+        decode_cache = DecodeCache(options.cache_size, options.cache_ttl)
+
     if len(args)==0:
         args = (sys.stdin,)
         print 'processing from stdin'
@@ -390,5 +524,13 @@ if __name__=='__main__':
             file(filename,'r'),
             verbose=options.verbose,
             uscg=options.uscgTail,
+            batch_decode=options.batch_decode,
+            decode_cache=decode_cache,
+            dedup_type_windows=dedup.type_windows if options.type_windows else None,
+            bulk=options.bulk,
+            batch_size=options.batch_size,
             )
 #            payload_table=options.payload_table
+
+    if options.bulk or options.create_indexes:
+        create_indexes(cx, verbose=options.verbose)
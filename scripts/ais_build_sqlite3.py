@@ -163,7 +163,7 @@ def loadData(cx,datafile,verbose=False
         # FIX: redo this correctly???
         #try:
         print str(ins)
-        cu.execute(str(ins))
+        cu.execute(*ins.sqlParams())
     print '\nMessages found:'
     for key in countsTotal:
         if countsTotal[key]>0:
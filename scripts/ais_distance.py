@@ -18,7 +18,7 @@ from pyproj import Proj
 
 from aisutils import binary
 from aisutils import BitVector
-from aisutils.uscg import uscg_ais_nmea_regex
+from aisutils import uscg
 
 
 def lon_to_utm_zone(lon):
@@ -122,14 +122,14 @@ def build_dist_database(database_filename, log_files, verbose=False):
             sys.stdout.flush()
         for line_num, line in enumerate(file(filename)):
             if 'AIVDM,1,1' not in line: continue
-            match = uscg_ais_nmea_regex.search(line).groupdict()
-            message_id = match['body'][0] # First letter is the message type
+            msg = uscg.UscgNmea(line)
+            message_id = msg.contents[0] # First letter is the message type
             if message_id not in ('1','2','3'): continue
 
-            if len(match['body']) != 28: # 6 bits per character
-                raise AisErrorBadNumBits('expected 168, got %d' % len(match['body']) / 6)
+            if len(msg.contents) != 28: # 6 bits per character
+                raise AisErrorBadNumBits('expected 168, got %d' % len(msg.contents) / 6)
 
-            bits = binary.ais6tobitvec(match['body'][:20]) # Don't need any of the other bits, so do not waste time
+            bits = binary.ais6tobitvec(msg.contents[:20]) # Don't need any of the other bits, so do not waste time
 
             x = binary.signedIntFromBV(bits[61:89]) / 600000.
             y = binary.signedIntFromBV(bits[89:116]) / 600000.
@@ -138,9 +138,9 @@ def build_dist_database(database_filename, log_files, verbose=False):
                 counts['nogps'] += 1
                 continue
 
-            station = match['station']
+            station = msg.station
 
-            julian_day = int(datetime.datetime.utcfromtimestamp(int(match['timeStamp'])).strftime('%j'))
+            julian_day = int(datetime.datetime.utcfromtimestamp(int(msg.cg_sec)).strftime('%j'))
 
             d_km =  dist_utm_km( (x,y), station_locations[station] )
             #cu.execute('INSERT INTO distance VALUES (:julian_day, :x, :y, :dist_km, :station)',
@@ -11,8 +11,6 @@ from optparse import OptionParser
 import sys
 
 from aisutils import binary
-from aisutils import aisstring
-from aisutils.BitVector import BitVector
 
 
 if __name__=='__main__':
@@ -43,9 +41,8 @@ if __name__=='__main__':
             if '1'!=fields[2]: # Must be the start of a sequence
                 continue
             if len(fields[5])<7: continue
-            bv = binary.ais6tobitvec(fields[5][:7]) # Hacked for speed
-            int(bv[8:38])
-            mmsi = str(int(bv[8:38]))
+            # Every message type has the MMSI in bits 8-38, so this works without a decoder
+            mmsi = str(int(binary.ais6topackedbits(fields[5][:7])[8:38])) # Hacked for speed
             o.write (mmsi)
             if options.dumpLine:
                 o.write(' '+line.strip())
@@ -14,7 +14,7 @@ from ais import ais_msg_5 as ais_msg_5
 from aisutils import aisstring
 from aisutils import binary
 from aisutils.BitVector import BitVector
-from aisutils.uscg import uscg_ais_nmea_regex
+from aisutils import uscg
 
 ######################################################################
 if __name__=='__main__':
@@ -44,27 +44,26 @@ if __name__=='__main__':
 
             #try:
 
-            match_obj = uscg_ais_nmea_regex.search(line)
-            if match_obj is None:
+            msg = uscg.parse(line)
+            if msg is None:
                 sys.stderr.write(line)
                 continue
-            station = match_obj.group('station')
+            station = msg.station
 
             #except:
             #    sys.stderr.write('bad line: %s\n' %line)
             #    continue
 
 
-            fields = line.split(',')[:6]
-            if '1'!=fields[2]: # Must be the start of a sequence
+            if 1!=msg.sentenceNum: # Must be the start of a sequence
                 #if verbose:
                 #    print 'skipping based on field 2',line
                 continue
-            if len(fields[5])<39:
+            if len(msg.contents)<39:
                 #if verbose:
                 #    print 'skipping',line
                 continue
-            bv = binary.ais6tobitvec(fields[5][:39]) # Hacked for speed
+            bv = binary.ais6tobitvec(msg.contents[:39]) # Hacked for speed
             #print int(bv[8:38]),aisstring.decode(bv[112:232],True)
             name = aisstring.decode(bv[112:232],True).strip('@ ')
             mmsi = str(int(bv[8:38]))
@@ -6,6 +6,9 @@
 
 import sys
 
+from aisutils import dedup
+from aisutils import logscan
+
 
 def getMsg(nmeaMsg):
     ''' Return everything in the base nmea message'''
@@ -49,26 +52,67 @@ def filterInTimestamp(lineList):
                 break
 
 
-tsOld = None
+def filterTimestamps(infile=sys.stdin):
+    '''Drop the duplicates within each timestamp'''
+    tsOld = None
 
-linesInTS=[] # Collection of all lines in the time
+    linesInTS=[] # Collection of all lines in the time
 
-for line in sys.stdin:
-    ts = line.split(',')[-1].strip()
-    if ts!=tsOld:
-        if None!=tsOld:
-            filterInTimestamp(linesInTS)
+    for line in infile:
+        ts = line.split(',')[-1].strip()
+        if ts!=tsOld:
+            if None!=tsOld:
+                filterInTimestamp(linesInTS)
 
-        linesInTS=[]
-        tsOld=ts
-        #print 'starting timestamp',tsOld
+            linesInTS=[]
+            tsOld=ts
+            #print 'starting timestamp',tsOld
 
-    fields=line.split(',')
-    if fields[1]=='1' and fields[2]=='1':
-        # Can only handle single line messages
-        linesInTS.append(line)
-    else:
-        print line,
+        fields=line.split(',')
+        if fields[1]=='1' and fields[2]=='1':
+            # Can only handle single line messages
+            linesInTS.append(line)
+        else:
+            print line,
+
+    if None!=tsOld:
+        filterInTimestamp(linesInTS)
 
-if None!=tsOld:
-    filterInTimestamp(linesInTS)
+
+def filterBloom(dups, infile=sys.stdin, out=sys.stdout):
+    '''Drop the messages seen in the lookback of a dedup.BloomDuplicates.
+    Keeps the first copy.  Only single line messages are checked.  The
+    parts of multi line messages are passed through, since the same
+    part 2 can come from different messages.'''
+    is_dup = dups.is_dup
+    for line in infile:
+        if line[:1] != '!' or line.split(',', 2)[1] != '1':
+            out.write(line)
+            continue
+        if not is_dup(logscan.cg_sec(line), getMsg(line)):
+            out.write(line)
+
+
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] < in.ais > out.ais")
+    parser.add_option('-B', '--bloom', dest='bloom', default=False, action='store_true',
+                      help='Drop duplicates over --lookback-time with Bloom filters in bounded memory '
+                      '[default: only within each timestamp]')
+    parser.add_option('-t', '--lookback-time', dest='lookback_time', default=6*60*60, type='float',
+                      help='Seconds of USCG timestamps to track for duplicates with --bloom [default: %default]')
+    parser.add_option('--fp-rate', dest='fp_rate', default=0.001, type='float',
+                      help='False positive rate for --bloom [default: %default]')
+    parser.add_option('--max-memory', dest='max_memory', default=64, type='float',
+                      help='Megabytes of Bloom filters [default: %default]')
+    parser.add_option('--buckets', dest='buckets', default=6, type='int',
+                      help='Number of Bloom filters to split the lookback time into [default: %default]')
+    (options,args) = parser.parse_args()
+
+    if options.bloom:
+        dups = dedup.BloomDuplicates(options.lookback_time, options.fp_rate,
+                                     int(options.max_memory * (1<<20)), options.buckets)
+        filterBloom(dups)
+        sys.stderr.write(str(dups) + '\n')
+    else:
+        filterTimestamps()
@@ -4,7 +4,8 @@
 Calculate distances of receives.
 Time ranges, gaps, etc.  To calculate per receiver stats or per day,
 you will need run this per day log file.  Times must be monotonically
-increasing, sorry.
+increasing, sorry.  Use ais_merge_logs.py to put several station logs
+into time order first.
 
 Trying to do better than ais_nmea_uptime*.py
 """
@@ -16,10 +17,10 @@ import os
 import sys
 
 import ais
-from aisutils.ais import binary
-from aisutils.uscg import uscg_ais_nmea_regex
 
 from aisutils import binary
+from aisutils import logindex
+from aisutils import logscan
 
 from aisutils.BitVector import BitVector
 
@@ -332,29 +333,36 @@ class AisPositionStats:
                 raise AisErrorBadNumBits('expected 168, got 54')
                 #return
 
-            x = lon = binary.signedIntFromBV(bits[61:89]) / 600000.
-            y = lat = binary.signedIntFromBV(bits[89:116]) / 600000.
+            lon = binary.signedIntFromBV(bits[61:89]) / 600000.
+            lat = binary.signedIntFromBV(bits[89:116]) / 600000.
+            self.add_position(lon, lat)
 
-            #
-            # Check for bad messages
-            #
-            if lon > 180 or lat > 90:
-                self.count_no_gps += 1
-                return
+    def add_position(self, lon, lat):
+        '''Add an already decoded position.  Raises AisErrorPositionTooFar
+        if the position is too far from the station_location'''
+        x = lon
+        y = lat
 
-            if self.station_location is not None:
-                dist = distance_km_unit_sphere(x,y,self.station_location[0], self.station_location[1])
-                #print 'dist:', dist
-                if self.max_dist_km < dist:
-                    #print 'bbox_dropping_point:',x,y,dist,'km'
-                    self.count_bad_pos += 1
-                    raise AisErrorPositionTooFar('%.2f %.2f -> %.2f km' % (x,y,dist))
-                    #return
+        #
+        # Check for bad messages
+        #
+        if lon > 180 or lat > 90:
+            self.count_no_gps += 1
+            return
+
+        if self.station_location is not None:
+            dist = distance_km_unit_sphere(y,x,self.station_location[1], self.station_location[0])
+            #print 'dist:', dist
+            if self.max_dist_km < dist:
+                #print 'bbox_dropping_point:',x,y,dist,'km'
+                self.count_bad_pos += 1
+                raise AisErrorPositionTooFar('%.2f %.2f -> %.2f km' % (x,y,dist))
+                #return
 
-                self.dist_hist.add_point(dist)
+            self.dist_hist.add_point(dist)
 
-            self.positions.append((lon,lat))
-            self.bbox.add_point(lon,lat)
+        self.positions.append((lon,lat))
+        self.bbox.add_point(lon,lat)
 
 
     def __str__(self):
@@ -373,36 +381,41 @@ class AisStreamInfo:
             self.pos_stats = AisPositionStats()
 
 
-    def add_file(self, filename):
-        for line_num, line in enumerate(file(filename)):
-            if len(line) < 10 or line[0] == '#':
+    def add_file(self, filename, position_stats=False, start=None, end=None):
+        '''
+        @param position_stats: also decode the position reports with
+            ais.batch for the position statistics (requires numpy)
+        @param start: only read lines from this UNIX UTC time on
+        @param end: only read lines before this UNIX UTC time.  With
+            start or end, only the parts of the log that its time index
+            (see aisutils.logindex) points at are read.
+        '''
+        if start is not None or end is not None:
+            lines = logindex.scan_time(filename, start, end)
+        else:
+            lines = logscan.scan(filename) # Skips comments
+        if position_stats:
+            from ais import batch
+            lines = batch.decoded_lines(lines)
+        else:
+            lines = ((line, None) for line in lines)
+
+        for line, msg_dict in lines:
+            if len(line) < 10:
                 continue
-            line = line.rstrip()
-            try:
-                timestamp = float(line.split(',')[-1])
-            except:
+            timestamp = logscan.cg_sec(line)
+            if timestamp is None:
                 sys.stderr.write('skipping line: %s\n' % (line, ) )
                 continue
 
             self.up.add_time(timestamp)
 
-            if False:
-
-                match = uscg_ais_nmea_regex.search(line).groupdict()
-                if match['senNum'] != '1':
-                    #print 'skipping senNum',match['senNum'],line.strip()
-                    continue # later sentences in an un-normalized stream
-                bits = binary.ais6tobitvec(match['body'])
-
+            if msg_dict is not None and msg_dict['MessageID'] in (1,2,3):
                 try:
-                    self.pos_stats.add_message(match, bits)
+                    self.pos_stats.add_position(msg_dict['longitude'], msg_dict['latitude'])
                 except AisErrorPositionTooFar, e:
                     print 'ERROR: too far', str(e)
-                    print '  Line:', line.rstrip()
-                    continue
-                except AisErrorBadNumBits, e:
-                    print 'ERROR: bad bit count', str(e)
-                    print '  Line:', line.rstrip()
+                    print '  Line:', line
                     continue
 
         #print self.pos_stats.positions
@@ -418,10 +431,15 @@ def get_parser():
     parser.add_option('--min-gap-sec', default=60*6, type='int', help='Suggest 21 seconds for a busy area with a basestation [default: %default]')
     parser.add_option('-s', '--start-time', type='magicdate', default=None, help='Force a start time (magicdate) [default: use first timestamp in file]')
     parser.add_option('-e', '--end-time',   type='magicdate', default=None, help='Force an end  time (magicdate) [default: use last timestamp in file]')
+    parser.add_option('--seek', default=False, action='store_true', help='Only read the lines from the start time to the end time, using the .idx time index of each log if it has one')
     parser.add_option('--gap-file', default=None, help='base file name to store gap file [ default: %default ]')
 
     parser.add_option('--up-time-file', default=None, help='Where to write the uptime per day [default: file1.uptime]')
     parser.add_option('-v', '--verbose', default=False, action='store_true', help='Run in chatty mode')
+    parser.add_option('--position-stats', default=False, action='store_true', help='Decode the position reports for distance and bounding box stats (requires numpy)')
+    parser.add_option('--station-lon', default=None, type='float', help='Longitude of the receiver for the position distance stats [default: no distance stats]')
+    parser.add_option('--station-lat', default=None, type='float', help='Latitude of the receiver for the position distance stats [default: no distance stats]')
+    parser.add_option('--max-dist-km', default=500, type='float', help='Positions farther than this from the station are bad [default: %default]')
 
     return parser
 
@@ -438,8 +456,14 @@ def main():
     parser = get_parser()
     (options,args) = parser.parse_args()
     v = options.verbose
+    station_location = None
+    if options.station_lon is not None or options.station_lat is not None:
+        if options.station_lon is None or options.station_lat is None:
+            parser.error('--station-lon and --station-lat must be given together')
+        station_location = (options.station_lon, options.station_lat)
     print 'options.min_gap_sec',options.min_gap_sec
-    info = AisStreamInfo(station_location = (-70.7165857810977,42.1990684235934),
+    info = AisStreamInfo(station_location = station_location,
+                         max_dist_km = options.max_dist_km,
                          dt_raw_filename='dt.dat',
                          min_gap_sec=options.min_gap_sec,
                          verbose = v)
@@ -454,9 +478,14 @@ def main():
         info.up.set_start_time(ts)
         #print
 
+    seek_start = seek_end = None
+    if options.seek:
+        if options.start_time is not None: seek_start = datetime2unixtimestamp(options.start_time)
+        if options.end_time is not None: seek_end = datetime2unixtimestamp(options.end_time)
+
     for file_num, filename in enumerate(args):
         if v: print 'processing_file:', file_num, filename
-        info.add_file(filename)
+        info.add_file(filename, position_stats=options.position_stats, start=seek_start, end=seek_end)
 
     if options.end_time is not None:
         #print
@@ -513,7 +542,7 @@ def main():
             o.write('%s %6.2f\n' % (jday,entry[1]) )
 
 
-    if False:
+    if options.position_stats:
         print 'count_no_gps:',info.pos_stats.count_no_gps
         print 'count_bad_pos:',info.pos_stats.count_bad_pos
         print 'count_bad_bad_num_bits:',info.pos_stats.count_bad_num_bits
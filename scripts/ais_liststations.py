@@ -7,27 +7,16 @@
 import os
 import sys
 
+from aisutils import logscan
+
 
 def getStation(line, withR=False):
-    fields=line.split(',')
-    if '!AIVDM' != fields[0]:
+    if not line.startswith('!AIVDM,'):
         return None
-
-    foundChecksum=False
-    for i,f in enumerate(fields):
-        if i<5: continue
-        # must come after the checksum field
-        if len(f)<1: continue
-        if not foundChecksum:
-            if -1==f.find('*'): continue  # FIX: Is this sufficient to make sure this is a checksum?
-            #if '0'==f[0]: continue
-            foundChecksum=True
-            continue
-        if len(f)<2: continue
-        if f[0] not in  ('r','b'): continue
-        if withR: return f
-        return f[1:]
-    return None
+    station = logscan.station(line)
+    if station is None or withR:
+        return station
+    return station[1:]
 
 
 if __name__=='__main__':
@@ -53,7 +42,7 @@ if __name__=='__main__':
         if options.count_each_station:
             stations = {}
             for filename in args:
-                for linenum,line in enumerate(open(filename)):
+                for linenum,line in enumerate(logscan.scan(filename)):
                     if options.progress:
                         if linenum % progress_interval == 0:
                             sys.stderr.write('linenum: %d\n' % linenum)
@@ -70,7 +59,7 @@ if __name__=='__main__':
             stations = set()
             for filename in args:
                 if options.verbose: print 'Processing file:',filename
-                for linenum,line in enumerate(open(filename)):
+                for linenum,line in enumerate(logscan.scan(filename)):
                     if options.progress:
                         if linenum % progress_interval == 0:
                             sys.stderr.write('linenum: %d\n' % linenum)
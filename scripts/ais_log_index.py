@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+__author__    = 'Kurt Schwehr'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Build or update the time index (log name + .idx) of USCG log files and
+read a time range out of them.
+
+  ais_log_index.py 2009-05-05.ais                   # index the lines not indexed yet
+  ais_log_index.py -s 1241532000 -e 1241537400 2009-05-05.ais | serial_send.py
+  ais_log_index.py --summary -s 1241532000 -e 1241537400 2009-05-05.ais
+
+Logs written by port_server.py --index-bucket-sec are indexed as they
+are written.  Only the lines after the last index entry are read when
+updating.
+
+@see: aisutils.logindex
+'''
+
+import datetime
+import sys
+
+from aisutils import logindex
+
+
+def summary(filename, out, start=None, end=None):
+    '''Write the line, station and message type counts of each index entry in the range'''
+    bucket_sec, entries = logindex.readIndex(filename + logindex.index_suffix)
+    for entry in entries:
+        if not entry.overlaps(start, end):
+            continue
+        out.write('%s %s lines=%d stations=%d types=%s\n' % (
+            filename, datetime.datetime.utcfromtimestamp(entry.bucket).strftime('%Y-%m-%dT%H:%M:%S'),
+            entry.lines, len(entry.stations),
+            ','.join(['%s:%d' % item for item in sorted(entry.types.items())])))
+    lines, stations, types = logindex.counts(entries, start, end)
+    out.write('%s total lines=%d stations=%d types=%s\n' % (
+        filename, lines, len(stations), ','.join(['%s:%d' % item for item in sorted(types.items())])))
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] file1.ais [file2.ais ...]")
+    parser.add_option('-b', '--bucket-sec', dest='bucket_sec', default=60, type='float',
+                      help='Seconds of time for each entry of a new index [default: %default]')
+    parser.add_option('-s', '--start', dest='start', default=None, type='float',
+                      help='Write the lines from this UNIX UTC time on')
+    parser.add_option('-e', '--end', dest='end', default=None, type='float',
+                      help='Write the lines before this UNIX UTC time')
+    parser.add_option('--summary', dest='summary', default=False, action='store_true',
+                      help='Write the counts from the index rather than the lines')
+    parser.add_option('-v', '--verbose', dest='verbose', default=False, action='store_true',
+                      help='Say how much of each log is indexed')
+
+    (options, args) = parser.parse_args()
+
+    for filename in args:
+        indexed = logindex.updateIndex(filename, options.bucket_sec)
+        if options.verbose:
+            sys.stderr.write('%s: indexed to offset %d\n' % (filename, indexed))
+        if options.summary:
+            summary(filename, sys.stdout, options.start, options.end)
+        elif options.start is not None or options.end is not None:
+            for line in logindex.scan_time(filename, options.start, options.end):
+                sys.stdout.write(line + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+__author__    = 'Kurt Schwehr'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Merge station or receiver logs into one stream in USCG timestamp order.
+The opposite of ais_uscg_splitstations.py.
+
+  ais_merge_logs.py -r 5 2009-05-05/*/log.ais > 2009-05-05-merged.ais
+
+Only about --reorder-sec of lines are kept in memory, so days of logs
+can be merged.  Lines that are more out of order than that within one
+log are written as they come and counted as late.  Comment lines are
+dropped.
+
+@see: aisutils.timemerge
+'''
+
+import sys
+
+from aisutils import logscan
+from aisutils import timemerge
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] file1.ais [file2.ais ...]")
+    parser.add_option('-r', '--reorder-sec', dest='reorder_sec', default=2., type='float',
+                      help='How far out of order the lines within one log can be [default: %default]')
+    parser.add_option('-m', '--max-lines', dest='max_lines', default=100000, type='int',
+                      help='Most lines to hold in memory before writing the oldest one [default: %default]')
+    parser.add_option('-o', '--output-file', dest='output', default=None,
+                      help='Where to write the results [default: stdout]')
+    parser.add_option('-v', '--verbose', dest='verbose', default=False, action='store_true',
+                      help='Print the counts when done')
+
+    (options, args) = parser.parse_args()
+
+    out = sys.stdout
+    if options.output is not None:
+        out = file(options.output, 'w')
+
+    streams = []
+    for filename in args:
+        if filename == '-':
+            streams.append(line.rstrip('\r\n') for line in sys.stdin)
+        else:
+            streams.append(logscan.scan(filename))
+
+    merger = timemerge.TimeMerge(streams, options.reorder_sec, options.max_lines or None)
+    for line in merger:
+        out.write(line + '\n')
+    if options.verbose:
+        sys.stderr.write(str(merger) + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+__author__    = 'Kurt Schwehr'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Merge the copies of each AIS message heard by more than one receiver
+into one line.  The line written is the primary copy: the strongest
+(d then s) or the earliest reception.  Use --receptions to keep which
+stations heard each message along with their s, d, T and S fields.
+
+Goes between normalizing and loading the database:
+
+  ais_normalize.py -t log.ais | ais_merge_receivers.py -r receptions.csv | ais_build_sqlite.py ...
+
+Lines that are not single line AIS messages are passed through in
+their place among the merged lines.
+
+@requires: U{Python<http://python.org/>} >= 2.6
+@see: aisutils.merge
+'''
+
+import sys
+
+from aisutils import merge
+
+
+def merge_receivers(in_file, outfile, window=2, best='strongest', receptions_file=None):
+    '''
+    @param in_file: normalized USCG NMEA lines
+    @param outfile: where to write one line per transmission
+    @param receptions_file: where to write a CSV line for each reception or None
+    @return: the ReceiverMerge with the counts
+    '''
+    merger = merge.ReceiverMerge(window, best)
+    o = outfile
+    r = receptions_file
+
+    for t in merge.ordered(merger, in_file):
+        if isinstance(t, str):
+            o.write(t + '\n')  # Passed through
+            continue
+        o.write(t.line + '\n')
+        if r is None:
+            continue
+        for msg in t.receptions:
+            r.write(','.join([str(field) if field is not None else '' for field in
+                              (t.first_sec, msg.contents, msg.station, msg.rssi, msg.signalStrength,
+                               msg.timeOfArrival, msg.slotNumber, int(msg is t.primary))]) + '\n')
+    return merger
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] [file1.ais ...]")
+    parser.add_option('-w', '--window', dest='window', default=2, type='float',
+                      help='Seconds after the first copy to look for more copies [default: %default]')
+    parser.add_option('-b', '--best', dest='best', default='strongest', type='choice',
+                      choices=sorted(merge.best_functions.keys()),
+                      help='Which copy to keep (%s) [default: %%default]' % ', '.join(sorted(merge.best_functions.keys())))
+    parser.add_option('-r', '--receptions', dest='receptions', default=None,
+                      help='CSV file to write the station metadata of every copy to')
+    parser.add_option('-o', '--output-file', dest='output', default=None,
+                      help='Where to write the results [default: stdout]')
+    parser.add_option('-v', '--verbose', dest='verbose', default=False, action='store_true',
+                      help='Print the counts when done')
+
+    (options, args) = parser.parse_args()
+
+    out = sys.stdout
+    if options.output is not None:
+        out = file(options.output, 'w')
+    receptions = None
+    if options.receptions is not None:
+        receptions = file(options.receptions, 'w')
+        receptions.write('cg_sec,payload,station,rssi,signal_strength,time_of_arrival,slot,primary\n')
+
+    if len(args) == 0:
+        args.append(sys.stdin)
+
+    for in_file in args:
+        if isinstance(in_file, str):
+            in_file = file(in_file)
+        merger = merge_receivers(in_file, out, options.window, options.best, receptions)
+        if options.verbose and merger.transmissions:
+            sys.stderr.write('receptions: %d transmissions: %d (%.2f receivers per message)\n' %
+                             (merger.receptions, merger.transmissions,
+                              merger.receptions / float(merger.transmissions)))
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,11 @@ data from a more coherent logger.
 
 Trying to do better than ais_nmea_uptime*.py
 
+usage: ais_nmea_find_matches.py file1 file2 [start end]
+
+With start and end (UNIX UTC seconds), only the lines of file2 in that
+time range are looked up, using the time index of file2 if it has one.
+
 @requires: U{epydoc<http://epydoc.sourceforge.net/>} > 3.0
 @since: 2010-Mar-26
 @var __date__: Date of last svn commit
@@ -20,21 +25,21 @@ Trying to do better than ais_nmea_uptime*.py
 @status: In progress
 '''
 import sys
-from aisutils.uscg import uscg_ais_nmea_regex
+from aisutils import logindex
+from aisutils import uscg
 
 use_line_num = True # else use timestamp
 
 msg_lut = {}
 for line_num, line in enumerate(file(sys.argv[1])):
-    line = line.strip()
-    try:
-        match = uscg_ais_nmea_regex.search(line).groupdict()
-    except:
+    msg = uscg.parse(line)
+    if msg is None:
         print 'ignoring line:',line.strip()
+        continue
     if use_line_num:
-        msg_lut[match['body']] = line_num + 1
+        msg_lut[msg.contents] = line_num + 1
     else:
-        msg_lut[match['body']] = msg['timeStamp']
+        msg_lut[msg.contents] = msg.cg_sec
 print 'msgs in lut:', len(msg_lut),'from',line_num+1,'lines'
 
 #o = file(sys.argv[2]+'.inboth','w')
@@ -44,16 +49,21 @@ else:
     o = file(sys.argv[2]+'.time','w')
 
 
+lines = file(sys.argv[2])
+if len(sys.argv) > 4:
+    lines = logindex.scan_time(sys.argv[2], float(sys.argv[3]), float(sys.argv[4]))
+
 matches = 0
-for line_num, line in enumerate(file(sys.argv[2])):
+line_num = -1
+for line_num, line in enumerate(lines):
     if line_num % 500 == 0: sys.stderr.write('line %d\n' % line_num)
-    try:
-        match = uscg_ais_nmea_regex.search(line).groupdict()
-    except:
+    msg = uscg.parse(line)
+    if msg is None:
         print 'ignoring line:',line.strip()
-    if match['body'] in msg_lut:
+        continue
+    if msg.contents in msg_lut:
         matches += 1
-        o.write( str(msg_lut[match['body']]) + ' ' + line )
+        o.write( str(msg_lut[msg.contents]) + ' ' + line.rstrip('\r\n') + '\n' )
     else:
         print 'no match for line:',line.strip()
 
@@ -21,7 +21,7 @@ Summarize the AIS message traffic at the NMEA level without decoding the content
 from optparse import OptionParser
 
 import ais
-from aisutils.uscg import uscg_ais_nmea_regex
+from aisutils import logscan
 from aisutils import binary
 
 
@@ -30,22 +30,21 @@ def nmea_summary(filename):
 
     station_counts = {}
     channel_counts = {'A':0, 'B':0}
-    for line in file(filename):
-        match = uscg_ais_nmea_regex.search(line)
-        if match is None:
+    for line in logscan.scan(filename):
+        if line[3:6] not in ('VDM','VDO'):
+            continue
+        fields = line.split(',',6) # Only need up to the payload
+        if len(fields) < 7:
             continue
-        match = match.groupdict()
-        msg = match
 
-        if msg['senNum']=='1':
-            first_char = msg['body'][0]
-            msgs[first_char] += 1
+        if fields[2]=='1' and fields[5][:1] in msgs:
+            msgs[fields[5][0]] += 1
 
-        if match['chan'] is not None:
-            channel_counts[match['chan']] += 1
+        if fields[4] in channel_counts:
+            channel_counts[fields[4]] += 1
 
-        if match['station'] is not None:
-            station = match['station']
+        station = logscan.station(line)
+        if station is not None:
             if station in station_counts:
                 station_counts[station] += 1
             else:
@@ -26,13 +26,30 @@ batch of messages.
 import sys
 import os
 
-
-def remove_dups(in_file, outfile, lookback_dist=1000, pos_only=False, verbose = False):
-    payloads = []
+from aisutils import dedup
+from aisutils import logscan
+
+
+def remove_dups(in_file, outfile, lookback_dist=1000, pos_only=False, verbose = False,
+                lookback_time=None, type_windows=None, dups=None):
+    '''
+    @param lookback_dist: number of payloads to remember
+    @param lookback_time: seconds of USCG time to remember payloads
+    @param type_windows: seconds to remember each message type character
+    @param dups: dedup.TrackDuplicates or dedup.BloomDuplicates to use
+        in place of the lookback parameters (e.g. to share across files)
+    @return: number of duplicates dropped
+    '''
     if isinstance(in_file,str):
         in_file = file(in_file)
 
     o = outfile
+    use_time = True
+    if dups is None:
+        # The original list version held lookback_dist+1 payloads, so keep doing that
+        dups = dedup.TrackDuplicates(lookback_dist + 1, lookback_time, type_windows)
+        use_time = bool(lookback_time or type_windows)
+    is_dup = dups.is_dup
 
     dropped = 0
     for line_num, line in enumerate(in_file):
@@ -44,21 +61,18 @@ def remove_dups(in_file, outfile, lookback_dist=1000, pos_only=False, verbose =
             o.write(line)
             continue
 
-        payload = line.split(',')[5]
+        payload = line.split(',',6)[5]
 
         if pos_only and payload[0] not in ('1','2','3'):
             o.write(line)
             continue
 
-        if payload in payloads:
+        if is_dup(logscan.cg_sec(line) if use_time else None, payload):
             dropped += 1
             continue
 
-        if len(payloads) > lookback_dist:
-            payloads.pop(0)
-
-        payloads.append(payload)
         o.write(line)
+    return dropped
 
 def main():
     from optparse import OptionParser
@@ -67,6 +81,19 @@ def main():
     parser.add_option('-l', '--lookback-dist', dest='lookback_dist',
                       default=1000, type='int',
                       help='Number of message payloads to track for duplicates [default: %default]')
+    parser.add_option('-t', '--lookback-time', dest='lookback_time', default=None, type='float',
+                      help='Seconds of USCG timestamps to track for duplicates [default: no limit, 6 hours for --bloom]')
+    parser.add_option('-T', '--type-windows', dest='type_windows', default=False, action='store_true',
+                      help='Track 1, 2 and 3 for 30 minutes and 5 for 6 hours')
+    parser.add_option('-B', '--bloom', dest='bloom', default=False, action='store_true',
+                      help='Use Bloom filters for a long --lookback-time in bounded memory.  '
+                      'A few new messages will be dropped as duplicates.')
+    parser.add_option('--fp-rate', dest='fp_rate', default=0.001, type='float',
+                      help='False positive rate for --bloom [default: %default]')
+    parser.add_option('--max-memory', dest='max_memory', default=64, type='float',
+                      help='Megabytes of Bloom filters [default: %default]')
+    parser.add_option('--buckets', dest='buckets', default=6, type='int',
+                      help='Number of Bloom filters to split the lookback time into [default: %default]')
     parser.add_option('-p', '--pos-only', dest='pos_only', default=False, action='store_true',
                       help='Only apply the duplicate check to position messages')
     parser.add_option('-o','--output-file', dest='output', default=sys.stdout,
@@ -83,8 +110,18 @@ def main():
     if len(args) == 0:
         args.append(sys.stdin)
 
+    dups = None
+    if options.bloom:
+        dups = dedup.BloomDuplicates(options.lookback_time or 6*60*60, options.fp_rate,
+                                     int(options.max_memory * (1<<20)), options.buckets)
+
     for in_file in args:
-        remove_dups(in_file, options.output, options.lookback_dist, options.pos_only, v)
+        remove_dups(in_file, options.output, options.lookback_dist, options.pos_only, v,
+                    options.lookback_time, dedup.type_windows if options.type_windows else None,
+                    dups)
+
+    if dups is not None:
+        sys.stderr.write(str(dups) + '\n')
 
 if __name__ == '__main__':
     main()
@@ -6,13 +6,12 @@ that they all move together.  I thought that this was done by the
 receiver, but no, it appears to be done by the java logging code.
 """
 
-import datetime
 import sys
 
 import ais.ais_msg_1_handcoded as ais_msg_1
 import ais.ais_msg_4_handcoded as ais_msg_4
 
-from aisutils.uscg import uscg_ais_nmea_regex
+from aisutils.uscg import UscgNmea
 from aisutils import binary
 
 
@@ -29,10 +28,10 @@ for line in file(sys.argv[1]):
     line = line.rstrip()
     if len(line) < 5 or 'AIVDM' not in line:
         continue
-    match = uscg_ais_nmea_regex.search(line).groupdict()
+    cg_msg = UscgNmea(line)
 
-    cg_s = float(match['timeStamp'])
-    uscg = datetime.datetime.utcfromtimestamp(float(match['timeStamp']))
+    cg_s = cg_msg.cg_sec
+    uscg = cg_msg.timestamp
     if cg_s_prev is not None:
         dt = cg_s - cg_s_prev
         dt = '%5d' % dt
@@ -40,10 +39,7 @@ for line in file(sys.argv[1]):
         dt = 'N/A'.rjust(5)
     cg_s_prev = cg_s
 
-    try:
-        time_of_arrival = float(match['time_of_arrival'])
-    except:
-        time_of_arrival = None
+    time_of_arrival = cg_msg.timeOfArrival
 
     if time_of_arrival is None:
         dt_time_of_arrival = 'N/A'.rjust(8)
@@ -55,19 +51,19 @@ for line in file(sys.argv[1]):
             dt_time_of_arrival = 'N/A'.rjust(8)
         time_of_arrival_prev = time_of_arrival
 
-    try:
-        slot_num = int(match['slot'])
+    slot_num = cg_msg.slotNumber
+    if slot_num is not None:
         slot_t = slot_num / 2250. * 60
         slot_t = '%5.2f' % slot_t
-    except:
+    else:
         slot_num = 'N/A'
         slot_t = 'N/A'
 
 
-    print '|',uscg,'|',cg_s,'|',dt,'|',time_of_arrival,'|', dt_time_of_arrival,'|', match['t_recver_hhmmss'], '|',slot_num, '|',slot_t , '|',
+    print '|',uscg,'|',cg_s,'|',dt,'|',time_of_arrival,'|', dt_time_of_arrival,'|', cg_msg.receiverTime, '|',slot_num, '|',slot_t , '|',
 
-    if match['body'][0] in ('1','2','3'):
-        bits = binary.ais6tobitvec(match['body'])
+    if cg_msg.contents[0] in ('1','2','3'):
+        bits = binary.ais6tobitvec(cg_msg.contents)
         msg = ais_msg_1.decode(bits)
         #print msg.keys()
         #all_keys.update(set(msg.keys()))
@@ -81,8 +77,8 @@ for line in file(sys.argv[1]):
             msg['commstate_utc_hour'] = msg['commstate_utc_min'] = 'N/A'
 
         print '{slot_number}|{slot_time}|{commstate_utc_hour}|{commstate_utc_min}|{TimeStamp}|{UserID}|'.format(**msg)
-    elif match['body'][0] == '4':
-        bits = binary.ais6tobitvec(match['body'])
+    elif cg_msg.contents[0] == '4':
+        bits = binary.ais6tobitvec(cg_msg.contents)
         msg = ais_msg_4.decode(bits)
         all_keys.update(set(msg.keys()))
         #print msg
@@ -47,8 +47,7 @@ egrep '!AIVDM,1,1,[0-9]?,[AB],[1-3]' biglog.ais > pos_msgs.ais
 '''
 
 import sys, os
-import ais.ais_msg_1 as ais_msg_1
-from aisutils import binary
+import ais
 from cartography.geometry import Geometry
 
 
@@ -359,15 +358,13 @@ def filter_file(infile, outfile, polygonWKT, verbose=False):
         # Trick: Only handle the first 19 characters since that contains the lon/lat
         txt = line.split(',')[5][:25]
         #print txt
-        bv = binary.ais6tobitvec(txt) #line[5][:19]
 
-        # Try to throw out points as soon as possible.  Use float rather than decimal.  faster??  Maybe not
-        #lon = ais_msg_1.decodelongitude(bv)
-        lon = binary.signedIntFromBV(bv[61:89])/600000.0
+        # Try to throw out points as soon as possible.  Use float rather than decimal.
+        pos = ais.decode_fields(txt,('longitude','latitude'),numeric='float')
+        lon = pos['longitude']
         if lon<minx or lon>maxx: continue
         #print 'close1:',lon
-        #lat = ais_msg_1.decodelatitude(bv)
-        lat = binary.signedIntFromBV(bv[89:116])/600000.0
+        lat = pos['latitude']
         if lat<miny or lat>maxy: continue
 
         #print 'close2: POINT ('+str(lon)+' '+str(lat)+')'
@@ -402,9 +399,9 @@ def filter_box(infile, outfile, west, east, lower, upper, verbose=False):
         if linenum%1000==0: sys.stderr.write('line '+str(linenum)+'\n')
         # Trick: Only handle the first 19 characters since that contains the lon/lat
         txt = line.split(',')[5][:25]
-        bv = binary.ais6tobitvec(txt) #line[5][:19]
-        lon = float(ais_msg_1.decodelongitude(bv))
-        lat = float(ais_msg_1.decodelatitude(bv))
+        pos = ais.decode_fields(txt,('longitude','latitude'),numeric='float')
+        lon = pos['longitude']
+        lat = pos['latitude']
 
         if west>lon or lon>east:
             #print 'skip on lon',type(west),type(lon),type(east), west>lon,lon>east
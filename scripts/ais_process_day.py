@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+__author__    = 'Kurt Schwehr'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Process a day of USCG N-AIS logs in parallel.  Replaces the one file
+at a time loops of daily.sh and ais-process-day.bash.
+
+The work is split into shards, either one for each input file or one
+for each receive station.  Each shard is normalized (multi-line
+messages put together), has its duplicates dropped, is decoded and
+then either summarized or loaded into its own sqlite database.  The
+shards run in a pool of processes and their results are merged at the
+end:
+
+  - message type counts in the format of ais_traffic_analysis.py for
+    each shard and for the whole day
+  - percent uptime for each UTC day as in ais_info.py (for each shard
+    and for all of the shards together)
+  - with --sqlite, the shard databases are combined into one.  What
+    ais_build_sqlite.py prints for each shard is kept in its .log and
+    the number of errors is in the report.
+
+  ais_process_day.py -j 32 -w work-2009-05-05 uscg-nais-dl1-2009-05-05.bz2
+  ais_process_day.py --shard station -w work-2009-05-05 --sqlite 2009-05-05.db3 2009-05-05.ais
+
+Everything is kept in the work directory.  If a day crashes, run the
+same command again and only the shards that did not finish are redone.
+
+Duplicates are only found within a shard.  With station shards this
+only drops what a station repeats itself, so each station is counted
+for all that it heard.
+
+@requires: U{numpy<http://numpy.scipy.org/>} for the decoding
+@see: aisutils.shards
+'''
+
+import bz2
+import os
+import sys
+
+from aisutils import dedup
+from aisutils import logscan
+from aisutils import reassemble
+from aisutils import shards
+
+db_tables = ('position', 'bsreport', 'shipdata', 'positionb', 'b_pos_and_shipdata')
+'Tables of ais_build_sqlite that are copied into the combined database'
+
+error_prefixes = ('ERROR', 'WARNING', 'line would not decode', 'bad uscg sections')
+'Start of the ais_build_sqlite.load_data messages about lines it could not load'
+
+
+def open_log(filename):
+    '@return: iterator of the lines of a log, which may be compressed with bzip2'
+    if filename.endswith('.bz2'):
+        return (line.rstrip('\r\n') for line in bz2.BZ2File(filename) if line.strip() and line[0] != '#')
+    return logscan.scan(filename)
+
+
+def shard_filename(name):
+    '@return: shard name made safe for a file name'
+    return name.replace(os.sep, '_')
+
+
+def split_stations(filenames, directory, verbose=False):
+    '''Write the lines of each station into directory/station.ais.
+
+    Lines without a station go to unknown.ais.
+
+    @return: list of the station file names
+    '''
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    outs = {}
+    for filename in filenames:
+        if verbose: print 'splitting:', filename
+        for line in open_log(filename):
+            station = logscan.station(line) or 'unknown'
+            try:
+                out = outs[station]
+            except KeyError:
+                out = outs[station] = open(os.path.join(directory, station + '.ais'), 'w')
+            out.write(line + '\n')
+    for out in outs.itervalues():
+        out.close()
+    return sorted([out.name for out in outs.itervalues()])
+
+
+def clean_lines(lines, summary, tracker):
+    '''Normalize the lines and drop the duplicates, counting what is
+    kept in summary.
+
+    @param tracker: dedup.TrackDuplicates
+    '''
+    is_dup = tracker.is_dup
+    add_line = summary.add_line
+    for line in reassemble.reassemble(lines):
+        payload = logscan.payload(line)
+        if payload is not None and is_dup(logscan.cg_sec(line), payload):
+            summary.dups += 1
+            continue
+        add_line(line)
+        yield line
+
+
+def process_shard(shard):
+    '''Normalize, dedup, decode and summarize or load one shard.
+
+    The pool worker for shards.run.
+
+    @param shard: (name, (input file names, work directory, options dict))
+    @return: (name, summary file name)
+    '''
+    name, (filenames, workdir, options) = shard
+    base = os.path.join(workdir, 'shards', shard_filename(name))
+    summary = shards.Summary(options['min_gap_sec'])
+    window = options['type_windows'] and dedup.type_windows or None
+    tracker = dedup.TrackDuplicates(lookback_time_sec=options['lookback_sec'], type_windows=window)
+
+    lines = (line for filename in filenames for line in open_log(filename))
+    lines = clean_lines(lines, summary, tracker)
+
+    if options['sqlite']:
+        import ais_build_sqlite
+        tmp = base + '.db3.tmp'
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        cx = ais_build_sqlite.sqlite.connect(tmp)
+        ais_build_sqlite.create_tables(cx)
+        ais_build_sqlite.bulk_pragmas(cx)
+        ais_build_sqlite.drop_indexes(cx)
+        summary.errors = load_shard(cx, lines, base + '.log')
+        cu = cx.cursor()
+        for table in ('position', 'positionb'):
+            cu.execute('SELECT DISTINCT UserID FROM %s;' % table)
+            summary.mmsi.update([row[0] for row in cu.fetchall()])
+        cu.execute('PRAGMA journal_mode=DELETE;')  # Fold the WAL back in before the rename
+        cx.close()
+        os.rename(tmp, base + '.db3')
+    else:
+        from ais import batch
+        add = summary.mmsi.add
+        for line, msg in batch.decoded_lines(lines):
+            if msg is not None:
+                add(msg['UserID'])
+
+    summary.write(base + '.summary')
+    return name, base + '.summary'
+
+
+def load_shard(cx, lines, log_filename):
+    '''Load the lines into a shard database with ais_build_sqlite.
+
+    The loader prints its progress and errors.  In a pool worker that
+    would mix with the other workers and the report, so the output goes
+    to a log file for the shard.
+
+    @return: number of errors in the log
+    '''
+    import ais_build_sqlite
+    log = open(log_filename, 'w')
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = log
+    try:
+        ais_build_sqlite.load_data(cx, lines, batch_decode=True, bulk=True)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+        log.close()
+    return len([line for line in open(log_filename) if line.startswith(error_prefixes)])
+
+
+def combine_databases(db_filename, shard_dbs, verbose=False):
+    '''Copy the rows of the shard databases into one database.
+
+    The keys of each shard are moved past the keys already in the
+    database.  The database is built under a temporary name and
+    renamed when done.
+    '''
+    import ais_build_sqlite
+    tmp = db_filename + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    cx = ais_build_sqlite.sqlite.connect(tmp)
+    ais_build_sqlite.create_tables(cx)
+    ais_build_sqlite.bulk_pragmas(cx)
+    cu = cx.cursor()
+    for shard_db in shard_dbs:
+        if verbose: print 'combining:', shard_db
+        offset = 0
+        max_key = ais_build_sqlite.get_max_key(cx)
+        if max_key is not None:
+            offset = max_key + 1
+        cu.execute('ATTACH DATABASE ? AS shard;', (shard_db,))
+        for table in db_tables:
+            cu.execute('PRAGMA table_info(%s);' % table)
+            columns = [row[1] for row in cu.fetchall()]
+            values = [column == 'key' and 'key + %d' % offset or column for column in columns]
+            cu.execute('INSERT INTO main.%s (%s) SELECT %s FROM shard.%s;' % (
+                table, ','.join(columns), ','.join(values), table))
+        cx.commit()
+        cu.execute('DETACH DATABASE shard;')
+    ais_build_sqlite.create_indexes(cx, verbose=verbose)
+    cu.execute('PRAGMA journal_mode=DELETE;')
+    cx.close()
+    os.rename(tmp, db_filename)
+
+
+def report(out, results, min_gap_sec):
+    '''Write the counts and uptime of each shard and of all of them.
+
+    @param results: list of (shard name, summary file name)
+    @return: Summary of all of the shards
+    '''
+    total = shards.Summary(min_gap_sec)
+    summaries = []
+    logs = []
+    for name, filename in results:
+        summary = shards.Summary.read(filename)
+        summaries.append((name, summary))
+        total.merge(summary)
+        if summary.errors:
+            logs.append((name, filename[:-len('.summary')] + '.log'))
+    summaries.append(('all', total))
+
+    out.write('# counts of message types 1..63 as from ais_traffic_analysis.py\n')
+    for name, summary in summaries:
+        out.write(' '.join([str(count) for count in summary.type_counts()[1:]]) + ' ' + name + '\n')
+    out.write('# uptime: name YYYYJJJ percent\n')
+    for name, summary in summaries:
+        for key, uptime in summary.up_time():
+            out.write('uptime: %s %d %.2f\n' % (name, key, uptime))
+    for name, summary in summaries:
+        out.write('%s %s\n' % (name, summary))
+    for name, log in logs:
+        out.write('# errors of %s are in %s\n' % (name, log))
+    return total
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] file1.ais [file2.ais ...]")
+    parser.add_option('-w', '--work-dir', dest='workdir', default='work',
+                      help='Directory for the shards and the progress journal [default: %default]')
+    parser.add_option('-s', '--shard', dest='shard', default='file', type='choice', choices=('file', 'station'),
+                      help='Split the work by input file or by receive station [default: %default]')
+    parser.add_option('-j', '--processes', dest='processes', default=None, type='int',
+                      help='Number of processes [default: one per CPU]')
+    parser.add_option('--sqlite', dest='sqlite', default=None,
+                      help='Load the shards into sqlite and combine them into this database')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='Write the counts and uptime to this file [default: stdout]')
+    parser.add_option('--min-gap-sec', dest='min_gap_sec', default=2, type='int',
+                      help='Seconds without traffic to consider a station offline [default: %default]')
+    parser.add_option('-l', '--lookback-sec', dest='lookback_sec', default=5*60, type='int',
+                      help='Seconds to look back for duplicates [default: %default]')
+    parser.add_option('-T', '--type-windows', dest='type_windows', default=False, action='store_true',
+                      help='Look back 30 minutes for duplicates of 1, 2 and 3 and 6 hours for 5')
+    parser.add_option('-v', '--verbose', dest='verbose', default=False, action='store_true',
+                      help='Make program output more verbose info as it runs')
+
+    (options, args) = parser.parse_args()
+    if len(args) == 0:
+        parser.error('no log files given')
+
+    workdir = options.workdir
+    if not os.path.exists(os.path.join(workdir, 'shards')):
+        os.makedirs(os.path.join(workdir, 'shards'))
+    progress = shards.Progress(os.path.join(workdir, shards.journal_name))
+
+    if options.shard == 'station':
+        station_dir = os.path.join(workdir, 'stations')
+        if 'split' not in progress.done:
+            split_stations(args, station_dir, options.verbose)
+            progress.finished('split', station_dir)
+        inputs = sorted([os.path.join(station_dir, name) for name in os.listdir(station_dir)])
+        names = [os.path.basename(filename)[:-len('.ais')] for filename in inputs]
+    else:
+        inputs = args
+        names = args
+
+    shard_options = {
+        'min_gap_sec': options.min_gap_sec,
+        'lookback_sec': options.lookback_sec,
+        'type_windows': options.type_windows,
+        'sqlite': options.sqlite is not None,
+        }
+    todo = [(name, ([filename], workdir, shard_options)) for name, filename in zip(names, inputs)]
+    done = shards.run(todo, process_shard, progress, options.processes, options.verbose)
+    progress.close()
+
+    results = [(name, done[name]) for name in names]
+    out = sys.stdout
+    if options.output is not None:
+        out = open(options.output, 'w')
+    report(out, results, options.min_gap_sec)
+
+    if options.sqlite is not None:
+        combine_databases(options.sqlite, [filename[:-len('.summary')] + '.db3' for name, filename in results],
+                          options.verbose)
+
+if __name__ == '__main__':
+    main()
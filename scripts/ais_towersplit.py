@@ -16,6 +16,8 @@ Split an USCG N-AIS log file into one file per receiving station.
 
 import sys, os
 
+from aisutils import logscan
+
 def getStation(msg,withR=True):
     '''
     Return the station/tower portion of the message
@@ -23,18 +25,11 @@ def getStation(msg,withR=True):
     @rtype: str or None
     @return: Station name
     '''
-    fields = msg.split(',')
-    numFields = len(fields)
-    #for i in range(numFields):
-    for i in range(numFields-1,-1,-1):
-        #curField = fields[numFields-i-1]
-        curField = fields[i]
-        if curField[0]=='r':
-            if withR: return curField
-            return curField[1:]
-        if curField[1]=='*': # Checksum
-            return None
-    return None
+    station = logscan.station(msg)
+    if station is None or station[0] != 'r':
+        return None
+    if withR: return station
+    return station[1:]
 
 
 def towersplit(options, filenames):
@@ -60,15 +55,16 @@ def towersplit(options, filenames):
     stationFiles={}
     for filename in filenames:
         lineNum = 0
-        for line in file(filename):
+        for line in logscan.scan(filename): # Skips comments
             lineNum += 1
             if lineNum % 20000 == 0: print 'line',lineNum
-            if line[0]=='#': continue # Allow for comments
+            line += '\n'
             station = getStation(line)
             if None==station:
-                print 'Line had no station:',line
+                print 'Line had no station:',line,
                 if None==unknown: unknown = file(subdir+'unknown','w')
                 unknown.write(line)
+                continue
             if station not in stationFiles:
                 stationFilename = subdir+station
                 #print 'Creating station file',stationFilename,'for',station
@@ -16,6 +16,8 @@ Basic traffic analysis by counting message types.
 
 import sys
 
+from aisutils import logscan
+
 
 #AIS NMEA tables
 encode = {0: '0',
@@ -97,27 +99,17 @@ if __name__=='__main__':
 
     for filename in args:
         counts = [ 0 for i in range(64) ]
-        for line in file(filename):
-            # FIX: switch to regex
-            "!AIVDM,2,1,9,A,55MwkdP09`"
-            "01234567890123"
-            if line[0]=='#': continue
+        for line in logscan.scan(filename):
             if line[1:7] != 'AIVDM,': continue
 
-            fields=line.split(',')
+            fields=line.split(',',6) # Only need up to the payload
 
             try:
                 if fields[2]!='1': continue
-            except:
-                sys.stderr.write('skipping too few fields\n')
-                sys.stderr.write('  '+line)
-                print '  ',line,
-                continue
-            try:
                 index=decode[fields[5][0]]
-            except:
-                sys.stderr.write('What index is this? '+fields[5][0]+'\n')
-                sys.stderr.write('  '+line)
+            except (IndexError,KeyError):
+                sys.stderr.write('What index is this?\n')
+                sys.stderr.write('  '+line+'\n')
                 continue
             counts[index]+=1
 
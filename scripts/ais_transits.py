@@ -51,6 +51,7 @@ convert -delay 200 -loop  100 2006-01-31.xymt*.gif anim.gif
 
 import sys
 import os
+import itertools
 import pyExcelerator as excel
 from datetime import datetime
 
@@ -61,16 +62,56 @@ def lon_to_utm_zone(lon):
    return int(( float(lon) + 180 ) / 6) + 1
 
 
+def xymt_from_nmea(lines):
+   '''
+   Turn normalized USCG AIS NMEA position reports (1, 2, 3, 18 and 19)
+   into xymt lines using the ais.batch numpy decoder.  Reports without
+   a valid position are skipped.
+
+   @param lines: iterable of NMEA lines with the USCG timestamp last
+   @return: generator of "x y m t" strings
+   '''
+   from ais import batch
+   for line, msg_dict in batch.decoded_lines(lines):
+      if msg_dict is None:
+         continue
+      x,y = msg_dict['longitude'], msg_dict['latitude']
+      if x > 180 or y > 90:
+         continue # 181/91 is no position available
+      t = line.rstrip().split(',')[-1]
+      yield '%s %s %d %s' % (repr(x), repr(y), msg_dict['UserID'], t)
+
+def xymt_from_archive(directory):
+   '''
+   Read the position reports of an aisutils.archive directory as xymt
+   lines in time order without decoding any NMEA.
+
+   @param directory: archive made by ais_archive.py
+   @return: generator of "x y m t" strings
+   '''
+   from aisutils import archive
+   p = archive.Archive(directory).positions(columns=('lon','lat','mmsi','cg_sec'))
+   for x,y,m,t in zip(p['lon'].tolist(), p['lat'].tolist(), p['mmsi'].tolist(), p['cg_sec'].tolist()):
+      if x > 180 or y > 90:
+         continue # 181/91 is no position available
+      yield '%s %s %d %d' % (repr(x), repr(y), m, t)
+
 def detectTransits(inFile, basename, options):
    '''
-   @param inFile: open file like object containing data
+   @param inFile: open file like object containing data, either xymt
+       lines or normalized USCG AIS NMEA.  Pass xymt_from_archive() to
+       use an archive directory.
    @param basename: prepend this str to filenames written
    @param options: FIX... list options
-
-    TODO(schwehr):detect if the input is AIS VDM or XYMT messages
    '''
    ships={}
 
+   inFile = iter(inFile)
+   first = inFile.next()
+   inFile = itertools.chain((first,), inFile)
+   if first[:1] in ('!', '$'):
+      inFile = xymt_from_nmea(inFile)
+
    for line in inFile:
        x,y,m,t = line.split()
        if m not in ships:
@@ -398,7 +439,10 @@ if __name__ == '__main__':
           basename=options.basename
           if None==basename:
              basename=filename
-          detectTransits(file(filename), basename, options)
+          if os.path.isdir(filename):
+             detectTransits(xymt_from_archive(filename), basename, options)
+          else:
+             detectTransits(file(filename), basename, options)
 
     del options
     del args
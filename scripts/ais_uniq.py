@@ -4,18 +4,19 @@ __date__ = '$Date: 2007-11-06 10:31:44 -0500 (Tue, 06 Nov 2007) $'.split()[1]
 __author__ = 'Kurt Schwehr'
 '''Find unique ais messages within a stream and give only those.
 
-This would be wise to drop messages after a fixed set of time so
-that the list of messages does not get too large.  Perhaps 30
-minutes for 123 and 6 hours for msg 5?
+Use --line-max, --lookback-time or --type-windows (30 minutes for 123
+and 6 hours for msg 5) so that the table of messages does not get too
+large.
 
 @license: Apache 2.0
 @since: 2007-Jun-28
-
- TODO(schwehr):need a real ring buffer!
 '''
 
 import sys
 
+from aisutils import dedup
+from aisutils import logscan
+
 if __name__=='__main__':
     from optparse import OptionParser
     parser = OptionParser(usage="%prog [options] file1.ais [file2.ais ...]",version="%prog "+__version__)
@@ -24,14 +25,23 @@ if __name__=='__main__':
                       ,type='int'
                       ,default=None
                       ,help='How many lines to keep in the table of known messages'
-                      +'[default: unlimited (aka SLOW)]'
+                      +'[default: unlimited]'
                       )
 
+    parser.add_option('-t','--lookback-time',dest='lookbackTime'
+                      ,type='float'
+                      ,default=None
+                      ,help='Seconds of USCG timestamps to keep in the table of known messages'
+                      +'[default: unlimited]'
+                      )
+
+    parser.add_option('-T','--type-windows',dest='typeWindows',default=False,action='store_true',
+                      help='Keep 1, 2 and 3 for 30 minutes and 5 for 6 hours')
+
     parser.add_option('-i','--interval-check',dest='intervalCheck'
                       ,type='int'
                       ,default=100
-                      ,help='How many lines to read before shrinking the known message buffer'
-                      +'[default: %default]'
+                      ,help='Ignored.  The known message buffer is trimmed as it goes.'
                       )
 
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
@@ -48,24 +58,22 @@ if __name__=='__main__':
 
     for filename in args:
         if verbose: sys.stderr.write('FILE: '+filename+'\n')
-        msgs=[]
+        typeWindows = None
+        if options.typeWindows: typeWindows = dedup.type_windows
+        msgs = dedup.TrackDuplicates(options.maxLines,options.lookbackTime,typeWindows)
+        useTime = bool(options.lookbackTime or typeWindows)
         linenum=0
         dropcount=0
         for line in file(filename):
             linenum += 1
             if verbose and linenum % 1000==0:
                 sys.stderr.write('line '+str(linenum)+'   dropcount: '+str(dropcount)+'  bufferlen:'+str(len(msgs))+ '\n')
-            data = line.split(',')[5]
-            if data not in msgs:
+            data = line.split(',',6)[5]
+            if not msgs.is_dup(logscan.cg_sec(line) if useTime else None, data):
                 out.write(line)
-                msgs.append(data)
             else:
                 dropcount += 1
 
-            if options.maxLines!=None and linenum%options.intervalCheck==0 and len(msgs)>options.maxLines:
-                overflow = len(msgs)-options.maxLines
-                msgs=msgs[overflow:] # Chop from the front.  What is the fastest way to do this?
-
         sys.stderr.write('#   FILE: '+filename
                          +'   lines: '+str(linenum)
                          +'   dropcount: '+str(dropcount)
@@ -99,7 +99,6 @@ which should be packaged with the resulting files.
     o.write('''
  TODO(schwehr):FIX: put in a description of the message here with fields and types.
 \"\"\"
-import doctest
 import sys
 from decimal import Decimal
 import unittest
@@ -109,7 +108,6 @@ from aisutils.BitVector import BitVector
 from aisutils import aisstring
 from aisutils import binary
 from aisutils import sqlhelp
-from aisutils import uscg
 
 # FIX: check to see if these will be needed
 TrueBV  = BitVector(bitstring="1")
@@ -121,10 +119,11 @@ FalseBV = BitVector(bitstring="0")
 ''')
     return
 
-def generatePython(infile,outfile, prefixName=False,verbose=False):
+def generatePython(infile,outfile, prefixName=False,verbose=False,packed=False):
     '''
     @param infile: xml ais binary message definition file
     @param outfile: where to dump the python code
+    @param packed: emit decoders that shift and mask one integer rather than slice the BitVector
     '''
 
     aisMsgsET = etree.parse(infile).getroot()
@@ -142,8 +141,11 @@ def generatePython(infile,outfile, prefixName=False,verbose=False):
             sys.exit("ERROR: cannot handle xml that still has include-struct tags.\n  Please use expandais.py.")
         buildHelpers(o,msgET,prefixName=prefixName,verbose=verbose)
         buildEncode(o,msgET,prefixName=prefixName,verbose=verbose)
-        buildDecode(o,msgET,prefixName=prefixName)
-        buildDecodeParts(o,msgET,prefixName=prefixName) # functions that only decode one field
+        buildEncodePacked(o,msgET,prefixName=prefixName,verbose=verbose)
+        if packed:
+            buildPackedConstants(o,msgET)
+        buildDecode(o,msgET,prefixName=prefixName,packed=packed)
+        buildDecodeParts(o,msgET,prefixName=prefixName,packed=packed) # functions that only decode one field
         buildPrint(o,msgET,prefixName=prefixName)
         buildLUT(o,msgET,prefixName=prefixName)
         buildSQL(o,msgET,prefixName=prefixName)
@@ -1396,6 +1398,148 @@ def encodeBinary(o,name,type,numbits,required=None,arraylen=1,unavailable=None,
     if verbose: o.write('\n')
 
 
+######################################################################
+# PACKED ENCODER - shift each field into one integer
+######################################################################
+
+def encodePackedField(o,name,type,numbits,required=None,arraylen=1,unavailable=None,
+                      scale=None,offset=None,value='v'):
+    '''
+    Build the code that shifts one field onto the integer holding the
+    message bits.  Gives the same bits as the BitVector encoders above
+    for values that fit in the field and raises a ValueError for
+    values that do not, rather than growing the message.
+
+    @param value: name of the integer accumulating the message bits
+    @return: number of bits added, or None for a binary field that is
+        however long the BitVector passed in is
+    '''
+    def shiftIn(expr,bits):
+        o.write('    '+value+' = ('+value+' << '+str(bits)+') | '+expr+'\n')
+
+    def getParam(default):
+        if default is None:
+            o.write('    x = params[\''+name+'\']\n')
+        else:
+            o.write('    x = params.get(\''+name+'\','+default+')\n')
+
+    if arraylen != 1: assert type=='aisstr6' # FIX... handle arrays
+    if type=='binary':
+        o.write('    x = params[\''+name+'\']\n')
+        shiftIn('int(x)','len(x)')
+        return None
+
+    if type=='aisstr6':
+        totLen = str(numbits*arraylen)
+        if None != required:
+            shiftIn('aisstring.encodeInt(\''+str(int(required))+'\','+totLen+')',totLen)
+            return numbits*arraylen
+        getParam(None if not unavailable else repr(str(unavailable)))
+        shiftIn('aisstring.encodeInt(x,'+totLen+')',totLen)
+        return numbits*arraylen
+
+    if type=='bool':
+        if None != required:
+            shiftIn(str(int(required.lower() in ('1','true'))),1)
+            return 1
+        getParam(None if not unavailable else str(unavailable.lower() in ('1','true')))
+        shiftIn('(1 if x else 0)',1)
+        return 1
+
+    if type=='float':
+        if None != required:
+            shiftIn('binary.float2uint('+str(int(required))+')',32)
+            return 32
+        getParam(None if not unavailable else str(int(unavailable)))
+        shiftIn('binary.float2uint(x)',32)
+        return 32
+
+    if type in ('decimal','udecimal'):
+        if None == scale: scale='1'
+        if None != required:
+            shiftIn(str(int(Decimal(int(required))*Decimal(scale)) & ((1 << numbits)-1)),numbits)
+            return numbits
+        offsetStr=''
+        if None != offset:
+            offsetStr='-('+offset+')'
+        if not unavailable:
+            o.write('    x = int(Decimal(params[\''+name+'\']'+offsetStr+')*Decimal(\''+scale+'\'))\n')
+        else:
+            o.write("    if '"+name+"' in params:\n")
+            o.write('        x = int(Decimal(params[\''+name+'\']'+offsetStr+')*Decimal(\''+scale+'\'))\n')
+            o.write('    else:\n')
+            o.write('        x = '+str(int(Decimal(unavailable)*Decimal(scale)))+'\n')
+    elif type in ('uint','int'):
+        if None != required:
+            shiftIn(str(int(required) & ((1 << numbits)-1)),numbits)
+            return numbits
+        getParam(None if not unavailable else str(int(unavailable)))
+    else:
+        print 'WARNING: In encodePackedField - Unhandled field type for',name,'...',type
+        suggestType (name,type)
+        assert False
+
+    if type in ('uint','udecimal'):
+        o.write('    if x >> '+str(numbits)+': raise ValueError(\''+name+' does not fit in '+str(numbits)+' bits: %r\' % (x,))\n')
+        shiftIn('x',numbits)
+    else:
+        o.write('    if not -0x%x <= x < 0x%x: raise ValueError(\'' % (1 << (numbits-1), 1 << (numbits-1))
+                +name+' does not fit in '+str(numbits)+' bits: %r\' % (x,))\n')
+        shiftIn('(x & 0x%x)' % ((1 << numbits)-1),numbits)
+    return numbits
+
+
+def buildEncodePacked(o,msgET, verbose=False, prefixName=False):
+    '''
+    Write an encoder that builds the same bits as encode() in one
+    integer rather than joining a BitVector per field.
+
+    @param o: open file where resulting code will be written
+    @param msgET: Element Tree starting at a message node
+    '''
+    assert(msgET.tag=='message')
+    msgName = msgET.attrib['name']
+
+    funcName = 'encodePacked'
+    if prefixName: funcName = msgName+'EncodePacked'
+    o.write('def '+funcName+'(params, validate=False):\n')
+    o.write("    '''Create the same bits as encode(), but shift each field into one integer\n")
+    o.write("    rather than joining a BitVector per field.\n\n")
+    o.write('    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing\n')
+    o.write('    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.\n')
+    o.write("    @rtype: binary.PackedBits\n")
+    o.write("    @return: encoded binary message.  binary.packedbitstoais6 gives the nmea payload and fill bits\n")
+    o.write("    @raise ValueError: a field value does not fit in its number of bits\n")
+    o.write("    '''\n")
+    o.write('    v = 0\n')
+
+    totalbits = 0
+    binaryFields = []
+    for field in msgET.xpath('field'):
+        name = field.attrib['name']
+        type = field.attrib['type']
+        numbits = int(field.attrib['numberofbits'])
+        required = None
+        if hasSubTag(field,'required'): required = field.xpath('required')[0].text
+        unavailable = None
+        if hasSubTag(field,'unavailable'): unavailable = field.xpath('unavailable')[0].text
+        arraylen = 1
+        if 'arraylength' in field.attrib: arraylen = int(field.attrib['arraylength'])
+        scale = None
+        if hasSubTag(field,'scale'): scale = field.xpath('scale')[0].text
+        offset = None
+        if hasSubTag(field,'offset'): offset = field.xpath('offset')[0].text
+
+        bits = encodePackedField(o,name,type,numbits,required,arraylen,unavailable,scale=scale,offset=offset)
+        if bits is None: binaryFields.append(name)
+        else: totalbits += bits
+
+    size = str(totalbits)
+    for name in binaryFields:
+        size += '+len(params[\''+name+'\'])'
+    o.write('    return binary.PackedBits(v,'+size+')\n\n')
+
+
 ######################################################################
 # DECODERS
 ######################################################################
@@ -1661,6 +1805,39 @@ def decodeAisstr6(o,name,type,startindex,numbits,required=None,arraylen=1,unavai
     return end
 
 
+def floatScaled(value,scale,offset=None):
+    '''
+    Python expression that scales an integer expression to a float
+
+    >>> floatScaled('int(bv[50:60])','10')
+    'int(bv[50:60])/10.0'
+    >>> floatScaled('int(bv[50:60])','10','-10')
+    'int(bv[50:60])/10.0-10.0'
+
+    @param value: expression for the raw integer
+    @param scale: text of the scale from the xml
+    @param offset: text of the offset from the xml or None
+    @rtype: str
+    '''
+    expr = value+'/'+repr(float(scale))
+    if offset is not None:
+        if float(offset) < 0: expr += repr(float(offset))
+        else: expr += '+'+repr(float(offset))
+    return expr
+
+def numericChoice(decimalExpr,floatExpr):
+    '''
+    Python expression for a scaled field that gives a Decimal unless the
+    decoder was called with numeric='float'
+
+    >>> numericChoice("Decimal(x)/Decimal('10')",'x/10.0')
+    "Decimal(x)/Decimal('10') if 'float'!=numeric else x/10.0"
+    '''
+    return decimalExpr+' if \'float\'!=numeric else '+floatExpr
+
+numericCheck = '    if numeric not in (\'decimal\',\'float\'): raise ValueError(\'numeric must be decimal or float: %r\' % (numeric,))\n'
+'Line at the start of a decoder so a misspelled numeric is not taken as decimal'
+
 def decodeDecimal(o,name,type,startindex,numbits,required=None,arraylen=1,unavailable=None,
                bv='bv',dataDict='r',verbose=False,scale=None, decodeOnly=False,offset=None):
     '''
@@ -1703,7 +1880,8 @@ def decodeDecimal(o,name,type,startindex,numbits,required=None,arraylen=1,unavai
     if None != required:
         Decimal(required) # Make sure required is a number
         if not decodeOnly: o.write('    '+dataDict+'[\''+name+'\']=')
-        o.write(str(Decimal(required))+'/Decimal(\''+scale+'\')')
+        o.write(numericChoice(str(Decimal(required))+'/Decimal(\''+scale+'\')',
+                              floatScaled(str(Decimal(required)),scale)))
         if not decodeOnly: o.write('\n')
         return end
 
@@ -1712,7 +1890,9 @@ def decodeDecimal(o,name,type,startindex,numbits,required=None,arraylen=1,unavai
         offsetStr += '+Decimal(\''+offset+'\')'
 
     if not decodeOnly: o.write('    '+dataDict+'[\''+name+'\']=')
-    o.write('Decimal(binary.signedIntFromBV('+bv+'['+str(startindex)+':'+str(end)+']))/Decimal(\''+scale+'\')'+offsetStr+'')
+    value = 'binary.signedIntFromBV('+bv+'['+str(startindex)+':'+str(end)+'])'
+    o.write(numericChoice('Decimal('+value+')/Decimal(\''+scale+'\')'+offsetStr,
+                          floatScaled(value,scale,offset)))
     if not decodeOnly: o.write('\n')
 
     return end
@@ -1763,7 +1943,8 @@ def decodeUDecimal(o,name,type,startindex,numbits,required=None,arraylen=1,unava
         assert (Decimal(required)>=0.) # Make sure required is a number and not negative
         if not decodeOnly:
             o.write('    '+dataDict+'[\''+name+'\']=')
-        o.write(str(Decimal(required))+'/Decimal(\''+scale+'\')')
+        o.write(numericChoice(str(Decimal(required))+'/Decimal(\''+scale+'\')',
+                              floatScaled(str(Decimal(required)),scale)))
         if not decodeOnly: o.write('\n')
         return end
 
@@ -1772,7 +1953,9 @@ def decodeUDecimal(o,name,type,startindex,numbits,required=None,arraylen=1,unava
         offsetStr += '+Decimal(\''+offset+'\')'
 
     if not decodeOnly: o.write('    '+dataDict+'[\''+name+'\']=')
-    o.write('Decimal(int('+bv+'['+str(startindex)+':'+str(end)+']))/Decimal(\''+scale+'\')'+offsetStr+'')
+    value = 'int('+bv+'['+str(startindex)+':'+str(end)+'])'
+    o.write(numericChoice('Decimal('+value+')/Decimal(\''+scale+'\')'+offsetStr,
+                          floatScaled(value,scale,offset)))
     if not decodeOnly: o.write('\n')
 
     return end
@@ -1826,6 +2009,149 @@ def decodeBinary(o,name,type,startindex,numbits,required=None,arraylen=1,unavail
     return end
 
 
+######################################################################
+# PACKED DECODERS - shift and mask one integer rather than slicing bits
+
+def messageNumBits(msgET):
+    '''
+    Number of fixed position bits in a message.  Stops at the first
+    field that runs to the end of the message.
+
+    @type msgET: elementtree
+    @param msgET: Element Tree starting at a message node
+    @rtype: int
+    '''
+    total = 0
+    for field in msgET.xpath('field'):
+        numbits = int(field.attrib['numberofbits'])
+        if numbits == -1: break
+        arraylen = 1
+        if 'arraylength' in field.attrib:
+            arraylen = int(field.attrib['arraylength'])
+        total += numbits*arraylen
+    return total
+
+
+def decimalConstName(text):
+    '''
+    Name of the module level Decimal constant for a scale or offset
+
+    >>> decimalConstName('600000')
+    'Decimal600000'
+    >>> decimalConstName('0.1')
+    'Decimal0_1'
+    >>> decimalConstName('-10')
+    'DecimalNeg10'
+    '''
+    return 'Decimal'+text.strip().replace('-','Neg').replace('.','_')
+
+
+def buildPackedConstants(o,msgET):
+    '''
+    Write the Decimal scale and offset constants used by the packed decoders
+    so that they are not rebuilt for every message.
+    '''
+    values = []
+    for field in msgET.xpath('field'):
+        if field.attrib['type'] not in ('decimal','udecimal'): continue
+        if hasSubTag(field,'required'): continue
+        scale = '1'
+        if hasSubTag(field,'scale'): scale = field.xpath('scale')[0].text
+        values.append(scale)
+        if hasSubTag(field,'offset'): values.append(field.xpath('offset')[0].text)
+    written = []
+    for text in values:
+        if text in written: continue
+        o.write(decimalConstName(text)+' = Decimal(\''+text+'\')\n')
+        written.append(text)
+    if len(written)>0: o.write('\n')
+
+
+def packedField(startindex,end,totalbits,value='v',signed=False):
+    '''
+    Python expression to pull the bits [startindex:end) out of an integer
+    that holds totalbits bits.
+
+    >>> packedField(8,38,168)
+    '((v >> 130) & 0x3fffffff)'
+    >>> packedField(154,168,168)
+    '(v & 0x3fff)'
+    >>> packedField(42,50,168,signed=True)
+    '((((v >> 118) & 0xff) ^ 0x80) - 0x80)'
+
+    @param value: expression for the integer holding the message bits
+    @param signed: sign extend the field as a twos complement number
+    @rtype: str
+    '''
+    shift = totalbits-end
+    assert shift >= 0
+    numbits = end-startindex
+    expr = value
+    if shift: expr = '('+value+' >> '+str(shift)+')'
+    expr = '('+expr+' & 0x%x)' % ((1 << numbits)-1)
+    if signed:
+        expr = '(('+expr+' ^ 0x%x) - 0x%x)' % (1 << (numbits-1), 1 << (numbits-1))
+    return expr
+
+
+def decodePacked(o,name,type,startindex,numbits,totalbits,required=None,arraylen=1,unavailable=None,
+                 bv='bv',value='v',dataDict='r',verbose=False,scale=None,decodeOnly=False,offset=None):
+    '''
+    Build a shift and mask decoder for one field.  Types that do not
+    reduce to an integer (aisstr6, float, binary) and required fields
+    use the same code as the BitVector decoders.
+
+    @type totalbits: int
+    @param totalbits: number of bits held in value (see messageNumBits)
+    @type value: str
+    @param value: expression of the integer holding the message bits aligned to totalbits
+    @rtype: int
+    @return: index one past the end of where this read
+    '''
+    if arraylen is None: arraylen=1
+    args = (o,name,type,startindex,numbits,required,arraylen,unavailable)
+    kwargs = {'bv':bv,'dataDict':dataDict,'verbose':verbose,'decodeOnly':decodeOnly}
+    if required is not None or type in ('float','aisstr6','binary'):
+        if   type=='bool'    : return decodeBool    (*args,**kwargs)
+        elif type=='uint'    : return decodeUInt    (*args,**kwargs)
+        elif type=='int'     : return decodeInt     (*args,**kwargs)
+        elif type=='float'   : return decodeFloat   (*args,**kwargs)
+        elif type=='aisstr6' : return decodeAisstr6 (*args,**kwargs)
+        elif type=='binary'  : return decodeBinary  (*args,**kwargs)
+        elif type=='decimal' : return decodeDecimal (*args,scale=scale,offset=offset,**kwargs)
+        elif type=='udecimal': return decodeUDecimal(*args,scale=scale,offset=offset,**kwargs)
+
+    if verbose: print type,'packed decode',name,'  numbits:',numbits,'  startindex=',startindex
+    assert arraylen == 1 # FIX... handle arrays
+    assert numbits >= 1
+    end = startindex+int(numbits)
+
+    if type=='bool':
+        expr = 'bool('+packedField(startindex,end,totalbits,value)+')'
+    elif type=='uint':
+        # int() so that small fields come back as int rather than long, the same as int(bv[a:b])
+        expr = 'int('+packedField(startindex,end,totalbits,value)+')'
+    elif type=='int':
+        expr = 'int('+packedField(startindex,end,totalbits,value,signed=True)+')'
+    elif type in ('decimal','udecimal'):
+        if None == scale: scale='1'
+        field = packedField(startindex,end,totalbits,value,signed=(type=='decimal'))
+        expr = 'Decimal('+field+')/'+decimalConstName(scale)
+        if offset is not None:
+            expr += '+'+decimalConstName(offset)
+        expr = numericChoice(expr,floatScaled(field,scale,offset))
+    else:
+        print 'WARNING: In decodePacked - Unhandled field type for',name,'...',type
+        suggestType (name,type)
+        assert False
+
+    if not decodeOnly: o.write('    '+dataDict+'[\''+name+'\']=')
+    o.write(expr)
+    if not decodeOnly: o.write('\n')
+
+    return end
+
+
 
 ######################################################################
 # THE REST
@@ -2024,7 +2350,7 @@ def buildEncode(o,msgET, verbose=False, prefixName=False):
 
 
 #, msgDict=None):
-def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
+def buildDecodeParts(o,msgET, verbose=False, prefixName=False, packed=False):
 
     '''
     Write the decoder for a message
@@ -2033,6 +2359,7 @@ def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
     @type msgET: elementtree
     @param prefixName: if True, put the name of the message on the functions.
     @param msgET: Element Tree starting at a message node
+    @param packed: if True, write shift and mask decoders (see decodePacked)
     @return: None
 
      TODO(schwehr):FIX: doc strings for each decode!
@@ -2050,12 +2377,14 @@ def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
     if not prefixName: baseName = 'decode'
 
     startindex = 0 # Where we are in the bitvector... FIX: what about variable length jobs?
+    totalbits = messageNumBits(msgET)
 
     for field in msgET.xpath('field'):
         name = field.attrib['name']
         type = field.attrib['type']
 
-        o.write('def '+baseName+name+'(bv, validate=False):\n')
+        o.write('def '+baseName+name+'(bv, validate=False, numeric=\'decimal\'):\n')
+        if type in ('decimal','udecimal'): o.write(numericCheck)
         # Follow the same convention of decoding into a dict so that code is the same
         #o.write('    r={};')
         o.write('    return ')
@@ -2073,7 +2402,15 @@ def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
 
         assert None!=startindex
         if verbose: print 'startindex',startindex
-        if   type=='bool'   : startindex = decodeBool   (o,name,type,startindex,numbits,required,arraylen,unavailable,decodeOnly=True)
+        if packed:
+            scale = None
+            if hasSubTag(field,'scale'): scale = field.xpath('scale')[0].text
+            offset = None
+            if hasSubTag(field,'offset'): offset = field.xpath('offset')[0].text
+            value = 'binary.alignedIntFromBV(bv,'+str(totalbits)+')'
+            startindex = decodePacked(o,name,type,startindex,numbits,totalbits,required,arraylen,unavailable,
+                                      value=value,scale=scale,offset=offset,decodeOnly=True)
+        elif type=='bool'   : startindex = decodeBool   (o,name,type,startindex,numbits,required,arraylen,unavailable,decodeOnly=True)
         elif type=='uint'   : startindex = decodeUInt   (o,name,type,startindex,numbits,required,arraylen,unavailable,decodeOnly=True)
         elif type=='int'    : startindex = decodeInt    (o,name,type,startindex,numbits,required,arraylen,unavailable,decodeOnly=True)
         elif type=='float'  : startindex = decodeFloat  (o,name,type,startindex,numbits,required,arraylen,unavailable,decodeOnly=True)
@@ -2105,13 +2442,14 @@ def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
 ######################################################################
 # DECODER RING
 
-def buildDecode(o,msgET, verbose=False, prefixName=False):
+def buildDecode(o,msgET, verbose=False, prefixName=False, packed=False):
     '''
     Write the decoder for a message
 
     @param o: open file where resulting code will be written
     @type msgET: elementtree
     @param msgET: Element Tree starting at a message node
+    @param packed: if True, convert the bits to one integer and shift and mask out the fields
     @return: None
 
      TODO(schwehr):FIX: check for a dac,fid, or efid.  If exists, then this is an AIS Msg 8 payload
@@ -2123,7 +2461,7 @@ def buildDecode(o,msgET, verbose=False, prefixName=False):
     print 'Generating decoder ...',name
     funcName = 'decode'
     if prefixName: funcName = name+'Decode'
-    o.write('def '+funcName+'(bv, validate=False):\n')
+    o.write('def '+funcName+'(bv, validate=False, numeric=\'decimal\'):\n')
 
     ########################################
     # doc string
@@ -2139,11 +2477,14 @@ def buildDecode(o,msgET, verbose=False, prefixName=False):
     o.write('    @type bv: BitVector\n')
     o.write('    @param bv: Bits defining a message\n')
     o.write('    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.\n')
+    o.write('    @param numeric: \'decimal\' for exact Decimal values or \'float\' for faster floats\n')
 
     o.write("    @rtype: dict\n")
     o.write("    @return: params\n")
+    o.write("    @raise ValueError: numeric is not 'decimal' or 'float'\n")
     o.write("    '''\n\n")
 
+    o.write(numericCheck)
 
     o.write('    #Would be nice to check the bit count here..\n')
     o.write('    #if validate:\n')
@@ -2154,6 +2495,9 @@ def buildDecode(o,msgET, verbose=False, prefixName=False):
     # Actually build the code
 
     o.write('    r = {}\n')
+    totalbits = messageNumBits(msgET)
+    if packed:
+        o.write('    v = binary.alignedIntFromBV(bv,'+str(totalbits)+')\n')
 
 
     if verbose: print 'number of fields = ', len(msgET.xpath('field'))
@@ -2196,7 +2540,14 @@ def buildDecode(o,msgET, verbose=False, prefixName=False):
             elif text != 'NoReturn':
                 sys.exit ('ERROR: optional text must be NoReturn or empty')
 
-        if   type=='bool'   : startindex = decodeBool   (o,name,type,startindex,numbits,required,arraylen,unavailable)
+        if packed:
+            scale = None
+            if hasSubTag(field,'scale'): scale = field.xpath('scale')[0].text
+            offset = None
+            if hasSubTag(field,'offset'): offset = field.xpath('offset')[0].text
+            startindex = decodePacked(o,name,type,startindex,numbits,totalbits,required,arraylen,unavailable,
+                                      scale=scale,offset=offset)
+        elif type=='bool'   : startindex = decodeBool   (o,name,type,startindex,numbits,required,arraylen,unavailable)
         elif type=='uint'   : startindex = decodeUInt   (o,name,type,startindex,numbits,required,arraylen,unavailable)
         elif type=='int'    : startindex = decodeInt    (o,name,type,startindex,numbits,required,arraylen,unavailable)
         elif type=='float'  : startindex = decodeFloat  (o,name,type,startindex,numbits,required,arraylen,unavailable)
@@ -2396,6 +2747,7 @@ def main():
             if options.verbose:
               sys.argv.append('-v')
 
+            import doctest
             numfail, numtests = doctest.testmod()
             if not numfail:
                 print 'ok'
@@ -2460,6 +2812,7 @@ def main():
 
     # FIX: Do not emit this option for the binary message payloads.  Does not make sense.
     elif 'nmea' == options.ioType:
+        from aisutils import uscg
         nmea = uscg.create_nmea(bits)
         print nmea
     else:
@@ -2550,6 +2903,10 @@ if __name__=='__main__':
                         help='put the field name in front of all function names.'
                         +'  Allows multiple messages in one file')
 
+    parser.add_option('--packed',dest='packed',default=False,action='store_true',
+                        help='emit decoders that use shifts and masks on an integer payload'
+                        +' rather than BitVector slices')
+
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
                         help='run the tests run in verbose mode')
 
@@ -2584,7 +2941,8 @@ if __name__=='__main__':
         sys.exit('ERROR: must specify an xml definition file.')
     if None==options.outputFileName:
         sys.exit('ERROR: must specify an python file to write to.')
-    generatePython(options.xmlFileName,options.outputFileName,prefixName=options.prefix, verbose=options.verbose)
+    generatePython(options.xmlFileName,options.outputFileName,prefixName=options.prefix, verbose=options.verbose,
+                   packed=options.packed)
 
     print '\nrecommend running pychecker like this:'
     print '  pychecker -q',options.outputFileName
@@ -11,6 +11,11 @@ Connect to N-AIS and pump the data into Postgres/Postgis.  This is a
 non-threaded rewrite of ais-port-forward and ais-net-to-postgis.
 Which are just cranky.
 
+With --backfill, log files given on the command line are loaded with
+COPY instead (see aisutils.pgcopy) and the program exits.  Only the
+newest shipdata and bsreport row of each vessel is kept, as with the
+live feed.  last_position and track_lines are not touched.
+
 @since: 05-May-2009
 '''
 
@@ -28,70 +33,46 @@ import aisutils.daemon
 import aisutils.uscg
 import aisutils.normalize
 
+from aisutils import binary
+from aisutils import pgcopy
 from aisutils import sqlhelp
+from aisutils.reassemble import reassemble
 import aisutils.database
+from aisutils.vessels import VesselCache
 
 #import ais.ais_msg_1 as msg1
 import ais
 
 from ais.ais_msg_1 import NavigationStatusDecodeLut
-from ais.ais_msg_5 import shipandcargoDecodeLut
 
 #ais_msgs_supported = ('B','C','H')
 ais_msgs_supported = ('1','2','3','4','5','B','H') # ,'C', 'H')
 ''' Which AIS messages will be handled.  The rest will be dropped. '''
 
-def rebuild_track_line(cu,userid,name,start_time=None,point_limit=50):
-    q = 'SELECT AsText(position) FROM position WHERE userid=%s ORDER BY cg_sec DESC LIMIT %s;'
-
-    cu.execute(q,(userid, point_limit))
-    linePoints=[]
-    for row in cu.fetchall():
-        x,y = row[0].split()
-        x = x.split('(')[1]
-        y = y.split(')')[0]
-        if x=='181' and y=='91':
-            continue
-        linePoints.append(row[0].split('(')[1].split(')')[0])
-    if len(linePoints)<2:
-        #print 'Not enough points.  Delete if exists'
-        cu.execute('DELETE FROM track_lines WHERE userid = %s;',(userid,))
-        return
-    lineWKT='LINESTRING('+','.join(linePoints)+')'
-
-    cu.execute('DELETE FROM track_lines WHERE userid=%s;', (userid,) )
-    q = 'INSERT INTO track_lines (userid,name,track) VALUES (%s,%s,GeomFromText(%s,4326));'
-    cu.execute(q, (userid,name,lineWKT) )
-
-
-def rebuild_b_track_line(cu,userid,name,start_time=None,point_limit=50):
-
-    q = 'SELECT AsText(position) FROM positionb WHERE userid=%s ORDER BY cg_sec DESC LIMIT %s;'
-
-    cu.execute(q,(userid, point_limit))
-    linePoints=[]
-    for row in cu.fetchall():
-        x,y = row[0].split()
-        x = x.split('(')[1]
-        y = y.split(')')[0]
-        if x=='181' and y=='91':
-            continue
-        linePoints.append(row[0].split('(')[1].split(')')[0])
-    if len(linePoints)<2:
-        #print 'Not enough points.  Delete if exists'
-        cu.execute('DELETE FROM track_lines WHERE userid = %s;',(userid,))
-        return
-    lineWKT='LINESTRING('+','.join(linePoints)+')'
-
-    cu.execute('DELETE FROM track_lines WHERE userid=%s;', (userid,) )
-    q = 'INSERT INTO track_lines (userid,name,track) VALUES (%s,%s,GeomFromText(%s,4326));'
-    cu.execute(q, (userid,name,lineWKT) )
-
-
-    return
-
-
-def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
+position_msgs = ('1','2','3','B')
+''' Messages with a longitude and latitude that get checked against the bounding box. '''
+
+def position_wanted(x,y):
+    '''
+    @return: False for the invalid position or for points outside of the bounding box options
+    '''
+    if x > 180 or y > 90:
+        return False # 181, 91 is the invalid gps value
+
+    if options.lon_min is not None and options.lon_min > x: return False
+    if options.lon_max is not None and options.lon_max < x: return False
+    if options.lat_min is not None and options.lat_min > y: return False
+    if options.lat_max is not None and options.lat_max < y: return False
+    return True
+
+def handle_insert_update(cx, uscg_msg, msg_dict, aismsg, vessels):
+    '''
+    Insert the message and update the vessel state.  last_position and
+    track_lines are written later by vessels.flush.
+
+    @type vessels: aisutils.vessels.VesselCache
+    @return: True if the database needs a commit
+    '''
     db_uncommitted_count = 0 # how many commits were done... return this
 
     msg_type = msg_dict['MessageID']
@@ -101,18 +82,8 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
     cu = cx.cursor()
 
     if msg_type in (1,2,3):
-        x = msg_dict['longitude']
-        y = msg_dict['latitude']
-
-        #print 'FIX:',x,y
-
-        if x > 180 or y > 90:
-            return # 181, 91 is the invalid gps value
-
-        if options.lon_min is not None and options.lon_min > x: return
-        if options.lon_max is not None and options.lon_max < x: return
-        if options.lat_min is not None and options.lat_min > y: return
-        if options.lat_max is not None and options.lat_max < y: return
+        if not position_wanted(msg_dict['longitude'],msg_dict['latitude']):
+            return
 
         ins = aismsg.sqlInsert(msg_dict, dbType='postgres')
         ins.add('cg_sec',       uscg_msg.cg_sec)
@@ -120,7 +91,7 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
         ins.add('cg_r',         uscg_msg.station)
 
         try:
-            cu.execute(str(ins))
+            cu.execute(*ins.sqlParams())
             #print 'Added pos'
         except Exception,e:
             errors_file.write('pos SQL INSERT ERROR for line: %s\t\n',str(msg_dict))
@@ -136,41 +107,11 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
         db_uncommitted_count += 1
 
         navigationstatus = msg_dict['NavigationStatus']
-        shipandcargo = 'unknown'
-        cg_r = uscg_msg.station
-
         if str(navigationstatus) in NavigationStatusDecodeLut:
             navigationstatus = NavigationStatusDecodeLut[str(navigationstatus)]
 
-        # get key of the old value
-        cu.execute('SELECT key FROM last_position WHERE userid=%s;', (userid,))
-        row = cu.fetchall()
-        if len(row)>0:
-            cu.execute('DELETE FROM last_position WHERE userid = %s;', (userid,))
-        cu.execute('SELECT name,shipandcargo FROM shipdata WHERE userid=%s LIMIT 1;',(userid,))
-        row = cu.fetchall()
-        if len(row)>0:
-            name = row[0][0].rstrip(' @')
-            shipandcargo = int(row[0][1])
-            if str(shipandcargo) in shipandcargoDecodeLut:
-                shipandcargo = shipandcargoDecodeLut[str(shipandcargo)]
-                if len(shipandcargo) > 29:
-                    shipandcargo = shipandcargo[:29]
-            else:
-                shipandcargo = str(shipandcargo)
-
-        else:
-            name = str(userid)
-
-        q = 'INSERT INTO last_position (userid,name,cog,sog,position,cg_r,navigationstatus, shipandcargo) VALUES (%s,%s,%s,%s,GeomFromText(\'POINT('+str(msg_dict['longitude'])+' '+str(msg_dict['latitude']) +')\',4326),%s,%s,%s);'
-
-        if msg_dict['COG'] == 511:
-            msg_dict['COG'] = 0 # make unknowns point north
-
-        cu.execute(q,(userid,name,msg_dict['COG'],msg_dict['SOG'],cg_r,navigationstatus,shipandcargo))
-
-        # drop the old value
-        rebuild_track_line(cu,userid,name)  # This will leave out the current point
+        vessels.position(userid, msg_dict['longitude'], msg_dict['latitude'], msg_dict['COG'], msg_dict['SOG'],
+                         uscg_msg.station, uscg_msg.sqlTimestampStr, navigationstatus)
 
         return True # need to commit db
 
@@ -183,7 +124,7 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
         ins.add('cg_timestamp', uscg_msg.sqlTimestampStr)
         ins.add('cg_r',         uscg_msg.station)
 
-        cu.execute(str(ins))
+        cu.execute(*ins.sqlParams())
 
         return True # need to commit db
 
@@ -195,8 +136,10 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
         ins.add('cg_timestamp', uscg_msg.sqlTimestampStr)
         ins.add('cg_r',         uscg_msg.station)
 
+        vessels.shipdata(userid, msg_dict['name'], msg_dict['shipandcargo'])
+
         try:
-            cu.execute(str(ins))
+            cu.execute(*ins.sqlParams())
         except Exception,e:
             #errors_file = file('errors-nais2postgis','w+')
             errors_file.write('SQL INSERT ERROR for line: %s\t\n',str(msg_dict))
@@ -212,17 +155,8 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
 
     if msg_type == 18:
 
-        x = msg_dict['longitude']
-        y = msg_dict['latitude']
-
-        if x > 180 or y > 90:
-            return # 181, 91 is the invalid gps value
-        #print 'trying class b',x,y
-
-        if options.lon_min is not None and options.lon_min > x: return
-        if options.lon_max is not None and options.lon_max < x: return
-        if options.lat_min is not None and options.lat_min > y: return
-        if options.lat_max is not None and options.lat_max < y: return
+        if not position_wanted(msg_dict['longitude'],msg_dict['latitude']):
+            return
 
         #print 'inserting class b'
 
@@ -231,44 +165,11 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
         ins.add('cg_timestamp', uscg_msg.sqlTimestampStr)
         ins.add('cg_r',         uscg_msg.station)
 
-        cu.execute(str(ins))
-
-        #navigationstatus = msg_dict['NavigationStatus']
-        shipandcargo = 'unknown'
-        cg_r = uscg_msg.station
-
-        cu.execute('SELECT key FROM last_position WHERE userid=%s;', (userid,))
-        row = cu.fetchall()
-        if len(row)>0:
-            cu.execute('DELETE FROM last_position WHERE userid = %s;', (userid,))
-
-        cu.execute('SELECT name FROM b_staticdata WHERE partnum=0 AND userid=%s LIMIT 1;',(userid,))
-        row = cu.fetchall()
-        if len(row)>0:
-            name = row[0][0].rstrip(' @')
-        else:
-            name = str(userid)
-
-        cu.execute('SELECT shipandcargo FROM b_staticdata WHERE partnum=1 AND userid=%s LIMIT 1;',(userid,))
-        row = cu.fetchall()
-        if len(row)>0:
-            shipandcargo = int(row[0][0])
-            if str(shipandcargo) in shipandcargoDecodeLut:
-                shipandcargo = shipandcargoDecodeLut[str(shipandcargo)]
-                if len(shipandcargo) > 29:
-                    shipandcargo = shipandcargo[:29]
-            else:
-                shipandcargo = str(shipandcargo)
+        cu.execute(*ins.sqlParams())
 
         # FIX: add navigation status
-        q = 'INSERT INTO last_position (userid,name,cog,sog,position,cg_r,shipandcargo) VALUES (%s,%s,%s,%s,GeomFromText(\'POINT('+str(msg_dict['longitude'])+' '+str(msg_dict['latitude']) +')\',4326),%s,%s);'
-
-        if msg_dict['COG'] == 511:
-            msg_dict['COG'] = 0 # make unknowns point north
-
-        cu.execute(q,(userid,name,msg_dict['COG'],msg_dict['SOG'],cg_r,shipandcargo) )
-
-        rebuild_b_track_line(cu,userid,name)
+        vessels.position(userid, msg_dict['longitude'], msg_dict['latitude'], msg_dict['COG'], msg_dict['SOG'],
+                         uscg_msg.station, uscg_msg.sqlTimestampStr, classB=True)
 
         return True # need to commit db
 
@@ -282,7 +183,7 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
         ins.add('cg_r',         uscg_msg.station)
         print 'msg 19:',str(ins)
 
-        cu.execute(str(ins))
+        cu.execute(*ins.sqlParams())
 
         return True # need to commit db
 
@@ -295,7 +196,9 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
         ins.add('cg_timestamp', uscg_msg.sqlTimestampStr)
         ins.add('cg_r',         uscg_msg.station)
 
-        cu.execute(str(ins))
+        cu.execute(*ins.sqlParams())
+
+        vessels.shipdata(userid, msg_dict.get('name'), msg_dict.get('shipandcargo'))
 
         return True
 
@@ -319,6 +222,15 @@ class Nais2Postgis:
         self.db_last_commit_time = 0
         self.db_uncommitted_count = 0
 
+        # last_position and track_lines are written at each commit
+        self.vessels = VesselCache(point_limit=options.track_points)
+
+        # Copies of a message from other stations do not need to be decoded again
+        self.decode_cache = None
+        if options.cache_size > 0:
+            from ais.decode_cache import DecodeCache
+            self.decode_cache = DecodeCache(options.cache_size, options.cache_ttl)
+
 
     def do_one_loop(self):
         '''
@@ -416,9 +328,17 @@ class Nais2Postgis:
                 self.bad.write(msg+'\n')
                 continue
 
-            bv = ais.binary.ais6tobitvec(uscg_msg.contents)
             try:
-                msg_dict = aismsg.decode(bv)
+                if uscg_msg.msgTypeChar in position_msgs:
+                    # Only pay for the full decode if the position is wanted
+                    pos = ais.decode_fields(uscg_msg.contents,('longitude','latitude'),numeric='float')
+                    if not position_wanted(pos['longitude'],pos['latitude']):
+                        continue
+                if self.decode_cache is not None:
+                    msg_dict = self.decode_cache.decode(uscg_msg.contents, uscg_msg.fillbits, uscg_msg.cg_sec)
+                else:
+                    bv = binary.ais6topackedbits(uscg_msg.contents)
+                    msg_dict = aismsg.decode(bv)
             except Exception, e:
                 sys.stderr.write('   Dropping bad msg and calling continue: %s,%s\n' % (str(e),msg,) )
                 self.bad.write(msg+'\n')
@@ -428,7 +348,7 @@ class Nais2Postgis:
             #print msg_dict
             #print 'uscg_msg:',type(uscg_msg)
             try:
-                if handle_insert_update(self.cx, uscg_msg, msg_dict, aismsg):
+                if handle_insert_update(self.cx, uscg_msg, msg_dict, aismsg, self.vessels):
                     self.db_uncommitted_count += 1
 
             except Exception, e:
@@ -442,13 +362,18 @@ class Nais2Postgis:
         #print 'Should commit?',self.db_last_commit_time, time.time() - self.db_last_commit_time, self.db_uncommitted_count
 
         # Check on database commits
-        if (self.db_last_commit_time is None) or (time.time() - self.db_last_commit_time > 30. and self.db_uncommitted_count > 0):
+        if (self.db_last_commit_time is None) or (time.time() - self.db_last_commit_time > self.options.flush_interval and self.db_uncommitted_count > 0):
             #print 'committing:',self.db_last_commit_time,self.db_uncommitted_count
             self.db_last_commit_time = time.time()
             self.db_uncommitted_count = 0
+            if self.decode_cache is not None:
+                logging.info(str(self.decode_cache))
+            logging.info(str(self.norm_queue))
             try:
                 #print 'Committing'
+                self.vessels.flush(self.cu)
                 self.cx.commit()
+                logging.info(str(self.vessels))
                 #print '  Successful'
             except Exception, e:
                 # FIX: What are we likely to see here?
@@ -461,6 +386,28 @@ class Nais2Postgis:
                 self.cx.commit() # reset the transaction
 
 
+def backfill(options,filenames):
+    '''
+    COPY the messages in log files into the position, positionb,
+    shipdata and bsreport tables.
+
+    @param filenames: USCG log files.  Multi-line messages are put together.
+    @return: the loader with the counts
+    @rtype: pgcopy.CopyLoader
+    '''
+    cx = aisutils.database.connect(options, dbType='postgres')
+    wanted = lambda msg_dict: position_wanted(msg_dict['longitude'],msg_dict['latitude'])
+    loader = pgcopy.CopyLoader(cx, chunk_size=options.chunk_size, rejects=file('rejects-nais2postgis','w'),
+                               wanted=wanted, latest=('shipdata','bsreport'), verbose=options.verbose)
+    for filename in filenames:
+        sys.stderr.write('backfill: %s\n' % filename)
+        for line in reassemble(file(filename)):
+            loader.add_line(line)
+        logging.info(str(loader))
+    loader.finish()
+    return loader
+
+
 ######################################################################
 
 
@@ -468,7 +415,7 @@ if __name__=='__main__':
     from optparse import OptionParser
 
     # FIX: is importing __init__ safe?
-    parser = OptionParser(usage="%prog [options]"
+    parser = OptionParser(usage="%prog [options] [--backfill file1.ais ...]"
                           ,version="%prog "+__version__ + " ("+__date__+")")
 
     parser.add_option('-i','--in-port',dest='inPort',type='int', default=31414
@@ -498,6 +445,21 @@ if __name__=='__main__':
                       ,help=' [default: %default]')
 
 
+    parser.add_option('--cache-size', dest='cache_size', type='int', default=10000
+                      ,help='Decoded messages to keep for copies from other stations.  0 to disable [default: %default]')
+    parser.add_option('--cache-ttl', dest='cache_ttl', type='float', default=60
+                      ,help='Seconds to keep a decoded message in the cache [default: %default]')
+
+    parser.add_option('--flush-interval', dest='flush_interval', type='float', default=30
+                      ,help='Seconds between commits, which also write last_position and track_lines [default: %default]')
+    parser.add_option('--track-points', dest='track_points', type='int', default=50
+                      ,help='Most points in each track line [default: %default]')
+
+    parser.add_option('--backfill', dest='backfill', default=False, action='store_true'
+                      ,help='COPY the log files given as arguments into the database and exit')
+    parser.add_option('--chunk-size', dest='chunk_size', type='int', default=10000
+                      ,help='Rows to send in each COPY for --backfill [default: %default]')
+
     aisutils.daemon.stdCmdlineOptions(parser, skip_short=True)
 
     aisutils.database.stdCmdlineOptions(parser, 'postgres')
@@ -521,6 +483,13 @@ if __name__=='__main__':
 
     sys.stderr.write('Bounding box: X: %s to %s \t\t Y: %s to %s\n' % (options.lon_min,options.lon_max,options.lat_min,options.lat_max))
 
+    if options.backfill:
+        loader = backfill(options, args)
+        sys.stderr.write(str(loader)+'\n')
+        if loader.rejected:
+            sys.stderr.write('rejected rows are in rejects-nais2postgis\n')
+        sys.exit(0)
+
     if options.inHostname:
         options.inHost=socket.gethostname()
 
@@ -22,6 +22,7 @@ import pytz
 
 import aisutils.daemon
 import aisutils.database
+from aisutils import partition
 
 def mark_utc(dt):
     '''Take a datetime object in UTC without timezone set and return one with utc marked'''
@@ -54,12 +55,19 @@ class Clean:
 
             cu.execute('DELETE FROM track_lines WHERE update_timestamp < %s;', (track_start,))
 
-            # if the points are too old to be in a track_line, then delete them
-            if v:
-                cu.execute('SELECT COUNT(*) FROM position WHERE cg_timestamp < %s;', (track_start,))
-                print 'Deleting from position:',cu.fetchone()[0]
+            # if the points are too old to be in a track_line, then delete them.
+            # Whole days or hours of a partitioned table are dropped, which
+            # leaves the delete with at most one partition and the parent to scan.
+            for table in partition.partitioned_tables:
+                dropped = partition.dropPartitions(cx, table, track_start)
+                if v and dropped:
+                    print 'Dropped partitions:',' '.join(dropped)
+
+                if v:
+                    cu.execute('SELECT COUNT(*) FROM '+table+' WHERE cg_timestamp < %s;', (track_start,))
+                    print 'Deleting from '+table+':',cu.fetchone()[0]
 
-            cu.execute('DELETE FROM position WHERE cg_timestamp < %s;', (track_start,))
+                cu.execute('DELETE FROM '+table+' WHERE cg_timestamp < %s;', (track_start,))
 
 
 
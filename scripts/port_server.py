@@ -35,6 +35,8 @@ import exceptions # For KeyboardInterupt pychecker complaint
 import traceback
 import nmea.znt # NTP tracking
 
+from aisutils import logindex
+
 ######################################################################
 
 BOMBASTIC = 4
@@ -79,7 +81,7 @@ class PassThroughServer:
         self.options = options
         if options.log_file:
             self.curLogFile = self.getLogFileName()
-            self.log = open(self.curLogFile,'a')
+            self.log = self.openLogFile(self.curLogFile)
             self.logfile_add_start()
         else: self.log = None
         self.count = 0
@@ -128,6 +130,12 @@ class PassThroughServer:
         return self.options.log_file
 
 
+    def openLogFile(self, filename):
+        '''Open a log for append, with a time index if --index-bucket-sec is set'''
+        if self.options.index_bucket_sec:
+            return logindex.IndexedLog(filename, self.options.index_bucket_sec)
+        return open(filename, 'a')
+
     def logfile_add_start(self):
         self.log.write('# Opening log file at %s UTC,%s\n' % ( datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'), time.time() ) )
         try:
@@ -194,7 +202,7 @@ class PassThroughServer:
                     self.log.write('# Closing log file at %s UTC,%s\n' % ( datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'), time.time() ) )
                     self.log.close()
                     self.curLogFile = new_log_file
-                    self.log = open(self.curLogFile, 'a')
+                    self.log = self.openLogFile(self.curLogFile)
                     self.logfile_add_start()
                     self.znt.out_file = self.log # Make the znt handler know about the new log file.
 
@@ -290,6 +298,10 @@ def main():
                         help='File extension to put on the end of the filename.  '
                         'Suggest ".ais" for AIS NMEA or ".gps" for GPS NMEA [default: "%default"]')
 
+    parser.add_option('--index-bucket-sec', dest='index_bucket_sec', type='float', default=None,
+                        help='Keep a time index (log name + .idx) with this many seconds per entry '
+                        'for seeking by time.  Needs --uscg [default: no index]')
+
     parser.add_option('-i', '--in-port', dest='inPort', type='int', default=31414,
                         help='Where the data comes from [default: %default]')
     parser.add_option('-I', '--in-host', dest='inHost', type='string', default='localhost',
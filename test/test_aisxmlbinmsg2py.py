@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for the packed (shift and mask) decoders from
+aisxmlbinmsg2py.py --packed.
+
+Each message xml is regenerated with --packed into a temporary
+directory and the decoders are checked against the checked in
+BitVector modules for the messages in test.ais and for the
+testParams() of each module, in both the Decimal and numeric='float' modes.
+The IMO and St. Lawrence Seaway (ais/sls) binary messages are only
+checked with their testParams().
+
+@license: Apache 2.0
+"""
+
+import os
+import imp
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+from aisutils import binary
+import ais
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+top_dir = os.path.dirname(test_dir)
+ais_dir = os.path.join(top_dir,'ais')
+test_ais = os.path.join(test_dir,'test.ais')
+
+msgNums = (1,2,3,4,5,7,9,10,11,12,14,15,17,18,19,20,21,22)
+'Messages that can be compared.  6, 8, and 23 have variable length or unchecked payloads'
+
+binaryMsgs = (('ais','imo_001_11'),
+              ('ais.sls','estlocktimes'),
+              ('ais.sls','lockorder'),
+              ('ais.sls','lockschedule'),
+              ('ais.sls','waterflow'),
+              ('ais.sls','waterlevel'),
+              ('ais.sls','weatherreport'),
+              ('ais.sls','wind'))
+'(package, name) of the binary message xml definitions to compare'
+
+def generate_packed(msgNum,outdir,package='ais'):
+    '''
+    Run expandais.py and aisxmlbinmsg2py.py --packed for one message
+
+    @param msgNum: AIS message number or the name of an xml file in package
+    @return: the generated module
+    '''
+    basename = msgNum
+    if isinstance(msgNum,int):
+        basename = 'ais_msg_%d' % msgNum
+    xml_dir = os.path.join(top_dir,*package.split('.'))
+    expanded = os.path.join(outdir,basename+'.xml')
+    pyfile = os.path.join(outdir,basename+'_packed.py')
+    devnull = file(os.devnull,'w')
+    subprocess.check_call([sys.executable,os.path.join(ais_dir,'expandais.py'),'-i',basename+'.xml','-o',expanded],
+                          cwd=xml_dir,stdout=devnull)
+    subprocess.check_call([sys.executable,os.path.join(top_dir,'scripts','aisxmlbinmsg2py.py'),
+                           '-i',expanded,'-o',pyfile,'--packed'],
+                          stdout=devnull)
+    return imp.load_source(basename+'_packed',pyfile)
+
+def msg_module(msgNum,package='ais'):
+    '''The checked in BitVector decoder module for a message number or xml name'''
+    name = msgNum
+    if isinstance(msgNum,int):
+        name = 'ais_msg_%d' % msgNum
+    __import__(package+'.'+name)
+    return sys.modules[package+'.'+name]
+
+def payloads(msgNum,filename=test_ais):
+    '''Payloads from test.ais for one message number, joining multi sentence messages'''
+    payloads = []
+    parts = []
+    for line in file(filename):
+        if line[0] == '#': continue
+        fields = line.split(',')
+        if len(fields) < 7: continue
+        if fields[2] == '1': parts = []
+        parts.append(fields[5])
+        if fields[1] != fields[2]: continue
+        payload = ''.join(parts)
+        if 0 == len(payload) or payload[0] not in ais.msgModByFirstChar: continue
+        if int(binary.ais6tobitvec(payload[0])) != msgNum: continue
+        payloads.append(payload)
+    return payloads
+
+
+class TestPackedDecoders(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def checkSame(self,packedMod,msgMod,bv):
+        expected = msgMod.decode(bv)
+        for bits in (bv,binary.PackedBits(int(bv),len(bv))):
+            r = packedMod.decode(bits)
+            self.failUnlessEqual(sorted(r.keys()),sorted(expected.keys()))
+            for key in expected:
+                self.failUnlessEqual(str(r[key]),str(expected[key]),'%s %s' % (msgMod.__name__,key))
+                if bits is bv: # binary fields are slices of whatever was passed in
+                    self.failUnlessEqual(type(r[key]),type(expected[key]))
+                decodePart = getattr(packedMod,'decode'+key)
+                self.failUnlessEqual(str(decodePart(bits)),str(expected[key]))
+
+    def checkFloat(self,decodeFunc,bv):
+        'numeric=\'float\' must give floats close to the Decimal values and leave the other fields alone'
+        expected = decodeFunc(bv)
+        r = decodeFunc(bv,numeric='float')
+        self.failUnlessEqual(sorted(r.keys()),sorted(expected.keys()))
+        for key in expected:
+            if isinstance(expected[key],Decimal):
+                self.failUnless(isinstance(r[key],float))
+                self.failUnlessAlmostEqual(r[key],float(expected[key]),9)
+            else:
+                self.failUnlessEqual(str(r[key]),str(expected[key]))
+
+    def testRoundTrip(self):
+        'encode the testParams of each message and decode with both decoders'
+        for msgNum in msgNums:
+            msgMod = msg_module(msgNum)
+            packedMod = generate_packed(msgNum,self.tmpdir)
+            bv = msgMod.encode(msgMod.testParams())
+            self.checkSame(packedMod,msgMod,bv)
+            self.checkFloat(msgMod.decode,bv)
+            self.checkFloat(packedMod.decode,bv)
+
+    def testBinaryMessages(self):
+        'encode the testParams of the IMO and sls binary messages and decode with both decoders'
+        for package,name in binaryMsgs:
+            msgMod = msg_module(name,package)
+            packedMod = generate_packed(name,self.tmpdir,package)
+            bv = msgMod.encode(msgMod.testParams())
+            self.checkSame(packedMod,msgMod,bv)
+            self.checkFloat(msgMod.decode,bv)
+            self.checkFloat(packedMod.decode,bv)
+
+    def testLogFile(self):
+        'Same results as the BitVector decoders for the messages in test.ais'
+        count = 0
+        for msgNum in (1,2,3,4,5,18,19):
+            msgMod = msg_module(msgNum)
+            packedMod = generate_packed(msgNum,self.tmpdir)
+            for payload in payloads(msgNum):
+                bv = binary.ais6tobitvec(payload)
+                try:
+                    msgMod.decode(bv)
+                except Exception:
+                    continue  # Corrupt message that would not decode before either
+                self.checkSame(packedMod,msgMod,bv)
+                self.checkFloat(packedMod.decode,bv)
+                self.checkFloat(ais.msgModByNumber[msgNum].decode,bv)
+                count += 1
+        self.failUnless(count > 500)
+
+    def testNumericMisspelled(self):
+        'Only decimal and float are allowed for numeric'
+        packedMod = generate_packed(1,self.tmpdir)
+        bv = msg_module(1).encode(msg_module(1).testParams())
+        for decodeFunc in (packedMod.decode,packedMod.decodeSOG,msg_module(1).decode,
+                           msg_module(1).decodelongitude,ais.msgModByNumber[1].decode):
+            self.failUnlessRaises(ValueError,decodeFunc,bv,numeric='Float')
+
+    def testTruncated(self):
+        'The first sentence of a type 5 is too short and must not decode'
+        payload = '53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j'
+        packedMod = generate_packed(5,self.tmpdir)
+        for bits in (binary.ais6tobitvec(payload),binary.ais6topackedbits(payload)):
+            self.failUnlessRaises(ValueError,packedMod.decode,bits)
+            self.failUnlessRaises(ValueError,msg_module(5).decode,bits)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.archive.
+
+@license: Apache 2.0
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from aisutils import archive
+
+test_ais = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.ais')
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testSelect(self):
+        writer = archive.ArchiveWriter(self.dir)
+        writer.add_lines(open(test_ais))
+        writer.close()
+        a = archive.Archive(self.dir)
+        everything = a.positions()
+        self.failUnlessEqual(len(everything['mmsi']), writer.positions)
+        self.failUnless((everything['cg_sec'][1:] >= everything['cg_sec'][:-1]).all())
+
+        p = a.positions(start=1152921700, end=1152921720, mmsi=[366772750, 311321000])
+        expected = [i for i, (m, t) in enumerate(zip(everything['mmsi'], everything['cg_sec']))
+                    if m in (366772750, 311321000) and 1152921700 <= t < 1152921720]
+        self.failUnlessEqual(p['cg_sec'].tolist(), everything['cg_sec'][expected].tolist())
+        self.failUnlessEqual(p['station'].tolist(), everything['station'][expected].tolist())
+        self.failUnlessEqual(len(a.static()), writer.statics)
+
+        static = a.static()
+        s = a.static(start=1152921700, end=1152921720)
+        self.failUnlessEqual(s['cg_sec'].tolist(),
+                             [t for t in static['cg_sec'] if 1152921700 <= t < 1152921720])
+        self.failUnless(0 < len(s) < len(static))
+
+    def testMerge(self):
+        lines = ['!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r003669958,1085889690',
+                 '!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r003669959,1085889680']
+        for line in lines:
+            writer = archive.ArchiveWriter(self.dir)
+            writer.add_lines([line])
+            writer.close()
+        p = archive.Archive(self.dir).positions()
+        self.failUnlessEqual(p['cg_sec'].tolist(), [1085889680, 1085889690])
+        self.failUnlessEqual(p['station'].tolist(), ['r003669959', 'r003669958'])
+
+    def testMultiLine(self):
+        'The two sentences of a type 5 make one static row and half of one makes none'
+        lines = ['!AIVDM,2,1,4,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j,0*56,r003669708,1152921692',
+                 '!AIVDM,2,2,4,B,@H8888888888880,2*2B,r003669708,1152921692']
+        writer = archive.ArchiveWriter(self.dir)
+        writer.add_lines(lines[:1])
+        writer.add_lines(lines)
+        writer.close()
+        static = archive.Archive(self.dir).static()
+        self.failUnlessEqual(len(static), 1)
+        self.failUnlessEqual(static['mmsi'].tolist(), [212251000])
+        self.failUnlessEqual(static['destination'].tolist(), ['BENICIA'])
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
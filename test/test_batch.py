@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for ais.batch, the numpy batch decoder for position reports.
+
+Compare against the one message at a time decoders for the messages
+in test.ais.
+
+@license: Apache 2.0
+"""
+
+import os
+import unittest
+
+from aisutils import binary
+import ais
+import ais.ais_msg_18
+import ais.ais_msg_19
+from ais import batch
+
+test_ais = os.path.join(os.path.dirname(os.path.abspath(__file__)),'test.ais')
+
+def position_payloads(filename=test_ais):
+    '''Payloads from test.ais that ais.batch.decoded_lines will decode'''
+    payloads = []
+    for line in file(filename):
+        fields = line.split(',')
+        if line[0] == '#' or len(fields) < 7 or fields[1] != '1': continue
+        payload = fields[5]
+        if payload[:1] in batch.layouts and len(payload) == batch.payload_chars[payload[0]]:
+            payloads.append(payload)
+    return payloads
+
+
+class TestBatch(unittest.TestCase):
+    def checkSame(self,msg_dict,payload):
+        msgMod = ais.msgModByFirstChar[payload[0]]
+        expected = msgMod.decode(binary.ais6topackedbits(payload),numeric='float')
+        self.failUnlessEqual(sorted(msg_dict.keys()),sorted(expected.keys()))
+        for key in expected:
+            if isinstance(expected[key],float):
+                self.failUnlessAlmostEqual(msg_dict[key],expected[key],9)
+            else:
+                self.failUnlessEqual(msg_dict[key],expected[key],'%s %s' % (payload,key))
+                self.failUnlessEqual(type(msg_dict[key]),type(expected[key]))
+
+    def testDecode(self):
+        payloads = position_payloads()
+        self.failUnless(len(payloads) > 500)
+        for first in ('1','3'):
+            group = [p for p in payloads if batch.layouts[p[0]] is batch.layouts[first]]
+            self.failUnless(len(group) > 0)
+            records = batch.decode(group)
+            self.failUnlessEqual(len(records),len(group))
+            for payload,record in zip(group,records):
+                self.checkSame(batch.record_to_dict(record),payload)
+
+    def testClassB(self):
+        'There are no class B messages in test.ais, so use the testParams'
+        for msgMod in (ais.ais_msg_18, ais.ais_msg_19):
+            payload = binary.bitvectoais6(msgMod.encode(msgMod.testParams()))[0]
+            records = batch.decode([payload,payload])
+            self.failUnlessEqual(len(records),2)
+            self.checkSame(batch.record_to_dict(records[1]),payload)
+
+    def testColumns(self):
+        payloads = [p for p in position_payloads() if p[0]=='1']
+        columns = batch.decode(payloads,columns=True)
+        self.failUnlessEqual(columns['UserID'].tolist(),
+                             [ais.decode_fields(p,('UserID',))['UserID'] for p in payloads])
+
+    def testMixedLayouts(self):
+        self.failUnlessRaises(ValueError,batch.decode,['15Cjtd0Oj;Jp7ilG7=UkKBoB0<06','B52K>;h00Fc>jpUlNV@ikwpUoP06'])
+
+    def testDecodedLines(self):
+        lines = file(test_ais).readlines()
+        count = 0
+        for (line,msg_dict),original in zip(batch.decoded_lines(lines,chunk_size=100),lines):
+            self.failUnless(line is original)
+            if msg_dict is None: continue
+            self.checkSame(msg_dict,line.split(',')[5])
+            count += 1
+        self.failUnlessEqual(count,len(position_payloads()))
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        import sys
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for the aisutils.binary payload conversions.
+
+Compare decoding with PackedBits to the original BitVector path for
+the messages in test.ais.
+
+@license: Apache 2.0
+"""
+
+import os
+import unittest
+
+from aisutils.BitVector import BitVector
+from aisutils import binary
+import ais
+
+test_ais = os.path.join(os.path.dirname(os.path.abspath(__file__)),'test.ais')
+
+def single_line_payloads(filename=test_ais):
+    '''Payloads from test.ais that are one sentence and have a decoder'''
+    payloads = []
+    for line in file(filename):
+        if line[0] == '#': continue
+        fields = line.split(',')
+        if len(fields) < 7 or fields[1] != '1': continue
+        if fields[5][:1] not in ais.msgModByFirstChar: continue
+        payloads.append(fields[5])
+    return payloads
+
+
+class TestPackedBits(unittest.TestCase):
+    def testSameBitsAsBitVector(self):
+        for payload in single_line_payloads():
+            self.failUnlessEqual(str(binary.ais6topackedbits(payload)),
+                                 str(binary.ais6tobitvec(payload)))
+
+    def testSlices(self):
+        bv = BitVector(bitstring='1011001110001111')
+        bits = binary.PackedBits(int('1011001110001111',2),16)
+        for start in range(16):
+            for end in range(start+1,17):
+                self.failUnlessEqual(int(bits[start:end]),int(bv[start:end]))
+                self.failUnlessEqual(binary.signedIntFromBV(bits[start:end]),
+                                     binary.signedIntFromBV(bv[start:end]))
+        self.failUnlessEqual(str(bits[-4:]),'1111')
+        self.failUnlessRaises(ValueError,bits.__getitem__,slice(10,100))
+        self.failUnlessEqual(len(bits[5:5]),0)
+
+    def testSignedInt(self):
+        for val in (-128,-127,-2,-1,0,1,2,126,127):
+            bv = binary.bvFromSignedInt(val,8)
+            bits = binary.PackedBits(int(bv),8)
+            self.failUnlessEqual(binary.signedIntFromBV(bv),val)
+            self.failUnlessEqual(binary.signedIntFromBV(bits),val)
+
+    def testDecodeMatches(self):
+        'Every decoder must give the same results for BitVector and PackedBits'
+        count = 0
+        for payload in single_line_payloads():
+            msgMod = ais.msgModByFirstChar[payload[0]]
+            try:
+                expected = msgMod.decode(binary.ais6tobitvec(payload))
+            except Exception:
+                continue  # Corrupt message that would not decode before either
+            r = msgMod.decode(binary.ais6topackedbits(payload))
+            self.failUnlessEqual(sorted(r.keys()),sorted(expected.keys()))
+            for key in expected:
+                self.failUnlessEqual(str(r[key]),str(expected[key]))
+            count += 1
+        self.failUnless(count > 500)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        import sys
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
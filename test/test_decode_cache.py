@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for ais.decode_cache.
+
+@license: Apache 2.0
+"""
+
+import os
+import sys
+import unittest
+
+from aisutils import binary
+import ais
+from ais.decode_cache import DecodeCache
+
+test_ais = os.path.join(os.path.dirname(os.path.abspath(__file__)),'test.ais')
+
+payload1 = '15Cjtd0Oj;Jp7ilG7=UkKBoB0<06'
+payload2 = '15NOdr?001o?v:RK@p@QDQBv0D1<'
+payload3 = '138kgf5000GRmf@CDFu18VW00404'
+
+class TestDecodeCache(unittest.TestCase):
+    def testSameAsDecode(self):
+        cache = DecodeCache(max_size=100)
+        count = 0
+        for line in file(test_ais):
+            fields = line.split(',')
+            if line[0] == '#' or len(fields) < 7 or fields[1] != '1': continue
+            payload = fields[5]
+            if payload[0] not in '1235': continue
+            fill_bits = int(fields[6].split('*')[0])
+            try:
+                expected = ais.msgModByFirstChar[payload[0]].decode(binary.ais6topackedbits(payload))
+            except Exception:
+                continue  # Corrupt messages
+            for i in range(2):
+                self.failUnlessEqual(cache.decode(payload,fill_bits),expected)
+            count += 1
+        self.failUnless(count > 500)
+        self.failUnlessEqual(cache.hits,count)
+        self.failUnlessEqual(cache.misses,count)
+        self.failUnlessEqual(len(cache),100)
+        self.failUnlessEqual(cache.evictions,count-100)
+
+    def testCopy(self):
+        cache = DecodeCache()
+        cache.decode(payload1)['UserID'] = 1
+        self.failUnlessEqual(cache.decode(payload1)['UserID'],356302000)
+
+    def testLeastRecentlyUsed(self):
+        cache = DecodeCache(max_size=2)
+        cache.decode(payload1)
+        cache.decode(payload2)
+        cache.decode(payload1)  # payload2 is now the oldest
+        cache.decode(payload3)
+        self.failUnlessEqual(cache.evictions,1)
+        cache.decode(payload1)
+        self.failUnlessEqual(cache.hits,2)
+        cache.decode(payload2)
+        self.failUnlessEqual(cache.misses,4)
+
+    def testTimeToLive(self):
+        cache = DecodeCache(ttl_sec=5)
+        cache.decode(payload1,timestamp=1000)
+        cache.decode(payload1,timestamp=1005)
+        self.failUnlessEqual((cache.hits,cache.expired),(1,0))
+        cache.decode(payload1,timestamp=1006)
+        self.failUnlessEqual((cache.hits,cache.misses,cache.expired),(1,2,1))
+
+    def testFillBits(self):
+        'Different fill bits are different messages'
+        cache = DecodeCache()
+        cache.decode(payload1,0)
+        cache.decode(payload1,2)
+        self.failUnlessEqual((cache.hits,cache.misses),(0,2))
+
+    def testStats(self):
+        cache = DecodeCache()
+        cache.decode(payload1)
+        cache.decode(payload1)
+        self.failUnlessEqual(cache.stats(),{'size':1,'hits':1,'misses':1,'evictions':0,'expired':0})
+        self.failUnless('50.0% hit rate' in str(cache))
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
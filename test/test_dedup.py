@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.dedup.
+
+@license: Apache 2.0
+"""
+
+import sys
+import unittest
+
+from aisutils import dedup
+from aisutils.dedup import TrackDuplicates
+
+class TestDedup(unittest.TestCase):
+    def testLength(self):
+        dups = TrackDuplicates(lookback_length=3, lookback_time_sec=None)
+        for payload in 'abcd':
+            self.failIf(dups.is_dup(None,payload))
+        self.failUnlessEqual(len(dups),3)
+        self.failIf(dups.is_dup(None,'a'))
+        self.failUnless(dups.is_dup(None,'d'))
+        self.failUnlessEqual(dups.dups,1)
+
+    def testTime(self):
+        dups = TrackDuplicates(lookback_time_sec=60)
+        self.failUnlessEqual(dups.check_packet(1000,'a'),(1,False))
+        self.failUnlessEqual(dups.check_packet(1060,'a'),(1,True))
+        self.failUnlessEqual(dups.check_packet(1061,'a'),(2,False))
+        self.failUnlessEqual(len(dups),1)
+
+    def testTypeWindows(self):
+        dups = TrackDuplicates(lookback_time_sec=60, type_windows=dedup.type_windows)
+        for payload in ('15Mwq1','55Mwq1','85Mwq1'):
+            dups.check_packet(0,payload)
+        dups.check_packet(3600,'B5Mwq1')
+        self.failIf(dups.is_dup(3600,'15Mwq1'))
+        self.failUnless(dups.is_dup(3600,'55Mwq1'))
+        self.failIf(dups.is_dup(3600,'85Mwq1'))
+
+    def testNoTimestamps(self):
+        'Lines without a timestamp use the newest time seen'
+        dups = TrackDuplicates(lookback_time_sec=60)
+        dups.check_packet(1000,'a')
+        self.failUnless(dups.is_dup(None,'a'))
+        dups.check_packet(2000,'b')
+        self.failIf(dups.is_dup(None,'a'))
+
+    def testBloom(self):
+        dups = dedup.BloomDuplicates(lookback_time_sec=400, fp_rate=0.01, max_bytes=1<<20, buckets=4,
+                                     capacity=1000)
+        self.failUnless(dups.memory() <= 1<<20)
+        false_positives = sum([dups.is_dup(i/10,'%d' % i) for i in range(1000)])
+        self.failUnless(false_positives < 30,false_positives)
+        self.failUnless(0 < dups.fp_rate() < 0.05,dups.fp_rate())
+        self.failUnless(dups.is_dup(99,'990'))
+        dups.is_dup(500,'new')
+        self.failIf(dups.is_dup(500,'5'))
+        self.failUnlessEqual(len(dups.buckets),1)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
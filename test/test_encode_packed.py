@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for the encodePacked functions written by aisxmlbinmsg2py.py.
+
+encodePacked must give exactly the same bits as the BitVector encode
+for every generated module, both for the testParams() and for the
+messages in test.ais decoded and encoded again.
+
+@license: Apache 2.0
+"""
+
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+from aisutils.BitVector import BitVector
+from aisutils import binary
+import ais.ais_msg_1
+import ais.ais_msg_8
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+test_ais = os.path.join(test_dir,'test.ais')
+
+moduleNames = ['ais_msg_%d' % i for i in (1,2,3,4,5,6,7,8,9,10,11,12,14,15,17,18,19,20,21,22,23)]
+moduleNames += ['allaistypes', 'imo_001_11', 'imo_001_13', 'imo_001_14', 'timed_circular_notice',
+                'waterlevel2', 'whalenotice', 'whalenotice1', 'whalenotice2', 'ris.waterlevel',
+                'sls.estlocktimes', 'sls.lockorder', 'sls.lockschedule', 'sls.waterflow',
+                'sls.waterlevel', 'sls.weatherreport', 'sls.wind']
+'Generated modules that have encodePacked'
+
+def load(name):
+    __import__('ais.'+name)
+    return sys.modules['ais.'+name]
+
+
+class TestEncodePacked(unittest.TestCase):
+    def checkSame(self,msgMod,params):
+        bv = msgMod.encode(params)
+        bits = msgMod.encodePacked(params)
+        self.failUnless(isinstance(bits,binary.PackedBits))
+        self.failUnlessEqual(str(bits),str(bv),msgMod.__name__)
+        pad = binary.getPadding(bv)
+        self.failUnlessEqual(binary.packedbitstoais6(bits),
+                             (binary.bitvectoais6(bv+BitVector(size=pad))[0],pad))
+        return bv
+
+    def testParams(self):
+        for name in moduleNames:
+            msgMod = load(name)
+            self.checkSame(msgMod,msgMod.testParams())
+
+    def testLogFile(self):
+        'Decode the messages in test.ais and encode them again'
+        count = 0
+        for line in file(test_ais):
+            fields = line.split(',')
+            if line[0] == '#' or len(fields) < 7 or fields[1] != '1': continue
+            payload = fields[5]
+            if payload[0] not in '123459': continue # single sentence messages
+            msgMod = load('ais_msg_%d' % int(binary.ais6tobitvec(payload[0])))
+            bv = binary.ais6tobitvec(payload)
+            try:
+                params = msgMod.decode(bv)
+            except Exception:
+                continue  # Corrupt message that will not decode
+            self.checkSame(msgMod,params)
+            count += 1
+        self.failUnless(count > 500)
+
+    def testLimits(self):
+        'Largest and smallest values that fit in the fields'
+        msgMod = ais.ais_msg_1
+        for longitude,latitude,rot,userID in ((Decimal('-180'),Decimal('-90'),-128,0),
+                                              (Decimal('181'),Decimal('91'),127,(1<<30)-1),
+                                              (Decimal('-0.0000016'),Decimal('0'),-1,1)):
+            params = msgMod.testParams()
+            params.update({'longitude':longitude,'latitude':latitude,'ROT':rot,'UserID':userID})
+            self.checkSame(msgMod,params)
+        params = msgMod.testParams()
+        del params['SOG'], params['TrueHeading'], params['longitude']
+        self.checkSame(msgMod,params)
+
+    def testOutOfRange(self):
+        msgMod = ais.ais_msg_1
+        for key,value in (('UserID',1<<30),('UserID',-1),('ROT',128),('ROT',-129),
+                          ('latitude',Decimal('112'))):
+            params = msgMod.testParams()
+            params[key] = value
+            self.failUnlessRaises(ValueError,msgMod.encodePacked,params)
+
+    def testBinaryField(self):
+        'Message 8 takes the BinaryData as a BitVector or PackedBits'
+        msgMod = ais.ais_msg_8
+        params = msgMod.testParams()
+        waterlevel = load('waterlevel2')
+        bv = waterlevel.encode(waterlevel.testParams())
+        expected = str(msgMod.encode(dict(params,BinaryData=bv)))
+        for data in (bv, waterlevel.encodePacked(waterlevel.testParams())):
+            params['BinaryData'] = data
+            self.failUnlessEqual(str(msgMod.encodePacked(params)),expected)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.logindex.
+
+@license: Apache 2.0
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from aisutils import logindex
+
+def line(cg_sec, station='r1'):
+    return '!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,%s,%d' % (station, cg_sec)
+
+class TestLogIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.dir, 'log.ais')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testOutOfOrder(self):
+        times = [0, 30, 65, 10, 130, 1000, 70, 200, 5]
+        out = open(self.log, 'w')
+        out.write('# START LOGGING\n')
+        for t in times:
+            out.write(line(t) + '\n')
+        out.close()
+        logindex.updateIndex(self.log, 60)
+        bucket_sec, entries = logindex.readIndex(self.log + logindex.index_suffix)
+        self.failUnlessEqual(bucket_sec, 60)
+        self.failUnlessEqual(sum([e.lines for e in entries]), len(times))
+        for start, end in ((0, 60), (60, 120), (5, 11), (900, None)):
+            expected = [line(t) for t in times if t >= start and (end is None or t < end)]
+            self.failUnlessEqual(list(logindex.scan_time(self.log, start, end)), expected)
+        self.failUnless(len(logindex.ranges(entries, 100, 140)) < len(entries))
+
+    def testIndexedLog(self):
+        out = open(self.log, 'w')
+        out.write(line(0) + '\n' + line(61)[:20])
+        out.close()
+        log = logindex.IndexedLog(self.log, 60)
+        log.write(line(61)[20:] + '\n' + line(120, 'r2'))
+        log.write('\n')
+        log.close()
+        bucket_sec, entries = logindex.readIndex(self.log + logindex.index_suffix)
+        self.failUnlessEqual([(e.bucket, e.lines) for e in entries], [(0, 1), (60, 1), (120, 1)])
+        self.failUnlessEqual(entries[-1].stations, {'r2': 1})
+        self.failUnlessEqual(entries[-1].end, os.path.getsize(self.log))
+        self.failUnlessEqual(list(logindex.scan_time(self.log, 60, 61.5)), [line(61)])
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
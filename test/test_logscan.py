@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.logscan.
+
+@license: Apache 2.0
+"""
+
+import os
+import sys
+import unittest
+
+from aisutils import logscan
+from aisutils import uscg
+
+test_ais = os.path.join(os.path.dirname(os.path.abspath(__file__)),'test.ais')
+
+class TestLogScan(unittest.TestCase):
+    def testSameAsFile(self):
+        expected = [line.rstrip('\r\n') for line in file(test_ais) if line[0] != '#']
+        self.failUnlessEqual(list(logscan.scan(test_ais)),expected)
+        self.failUnlessEqual(list(logscan.scan(file(test_ais))),expected)
+        with_comments = list(logscan.scan(test_ais,comments=True))
+        self.failUnlessEqual(with_comments[0],'# 2006-07-15')
+        self.failUnlessEqual(with_comments[1:],expected)
+
+    def testBlocks(self):
+        'Lines that cross the block boundaries'
+        data = file(test_ais).read()
+        for block_size in (1,7,100,4096):
+            lines = []
+            for block in logscan.scan_blocks(data,block_size=block_size):
+                lines += block
+            self.failUnlessEqual(lines,list(logscan.scan_string(data)))
+        self.failUnlessEqual(list(logscan.scan_string('a\n\n#b\r\nc\n#d')),['a','c'])
+
+    def testFields(self):
+        count = 0
+        for line in logscan.scan(test_ais):
+            msg = uscg.parse(line)
+            if msg is None: continue
+            self.failUnlessEqual(logscan.payload(line),msg.contents)
+            self.failUnlessEqual(logscan.first_char(line),msg.contents[:1])
+            self.failUnlessEqual(logscan.sentence_num(line),str(msg.sentenceNum))
+            self.failUnlessEqual(logscan.channel(line),msg.aisChannel)
+            self.failUnlessEqual(logscan.station(line),msg.station)
+            self.failUnlessEqual(logscan.cg_sec(line),msg.cg_sec)
+            count += 1
+        self.failUnless(count > 900)
+
+    def testShortLines(self):
+        for line in ('!AIVDM,1','!AIVDM,1,1,,A'):
+            self.failUnless(logscan.payload(line) is None)
+            self.failUnless(logscan.first_char(line) is None)
+            self.failUnless(logscan.station(line) is None)
+        self.failUnless(logscan.cg_sec('!AIVDM,1,1,,A') is None)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.merge.
+
+@license: Apache 2.0
+"""
+
+import sys
+import unittest
+
+from aisutils import merge
+
+line = '!AIVDM,1,1,,B,15Mwq1WP01rB2crBh5G:6?v200Rj,0*59,%s,%d'
+
+class TestMerge(unittest.TestCase):
+    def testBest(self):
+        lines = [line % ('s28057,d-95,T49.5,rA',1000), line % ('s29001,d-88,T49.9,rB',1000),
+                 line % ('T49.1,rC',1001)]
+        t, = list(merge.merge(lines))
+        self.failUnlessEqual(t.stations(),['rA','rB','rC'])
+        self.failUnlessEqual(t.primary.station,'rB')
+        self.failUnless(t.line.endswith('rB,1000'))
+        t, = list(merge.merge(lines,best='earliest'))
+        self.failUnlessEqual(t.primary.station,'rA')
+
+    def testWindow(self):
+        lines = [line % ('rA',1000), line % ('rB',1002), line % ('rC',1003)]
+        self.failUnlessEqual([t.stations() for t in merge.merge(lines,window=2)],[['rA','rB'],['rC']])
+
+    def testPassThrough(self):
+        merger = merge.ReceiverMerge()
+        self.failUnlessEqual(merger.add('# comment\n'),'# comment')
+        fragment = '!AIVDM,2,2,4,B,@H8888888888880,2*2B,r003669708,1000'
+        self.failUnlessEqual(merger.add(fragment),fragment)
+        self.failUnless(merger.add(line % ('rA',1000)) is None)
+        self.failUnlessEqual(list(merger.done()),[])
+        self.failUnlessEqual(len(list(merger.flush())),1)
+
+    def testOrdered(self):
+        'Lines that are passed through stay in their place among the transmissions'
+        lines = ['# start', line % ('rA',1000), '$PAIS,0B,1*00,rA,1000', line % ('rB',1001),
+                 line.replace('15Mw','14`q') % ('rA',1001), '# middle', line % ('rA',1010), '# end']
+        out = [getattr(item,'line',item) for item in merge.ordered(merge.ReceiverMerge(),lines)]
+        self.failUnlessEqual(out,['# start', line % ('rA',1000), '$PAIS,0B,1*00,rA,1000',
+                                  line.replace('15Mw','14`q') % ('rA',1001), '# middle',
+                                  line % ('rA',1010), '# end'])
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.normalize.
+
+@license: Apache 2.0
+"""
+
+import os
+import StringIO
+import sys
+import unittest
+
+from aisutils import nmea
+from aisutils.normalize import Normalize
+from aisutils.reassemble import reassemble
+
+test_ais = os.path.join(os.path.dirname(os.path.abspath(__file__)),'test.ais')
+
+part1 = '!AIVDM,2,1,4,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j,0*56,r003669708,%d'
+part2 = '!AIVDM,2,2,4,B,@H8888888888880,2*2B,r003669708,%d'
+
+def run(norm,lines):
+    results = []
+    for line in lines:
+        norm.put(line)
+        while norm.qsize() > 0:
+            results.append(norm.get())
+    return results
+
+class TestNormalize(unittest.TestCase):
+    def testLogFile(self):
+        norm = Normalize()
+        lines = [line.strip() for line in file(test_ais) if line[1:6] == 'AIVDM']
+        results = run(norm,lines)
+        singles = [line for line in lines if line.startswith('!AIVDM,1,1')]
+        self.failUnlessEqual([line for line in results if line.startswith('!AIVDM,1,1,,')],singles)
+        self.failUnlessEqual(len(results),len(singles)+norm.completed)
+        self.failUnlessEqual(norm.completed,132)
+        for line in results:
+            self.failUnless(nmea.isChecksumValid(line),line)
+        self.failUnlessEqual(norm.fragments(),0)
+
+    def testJoin(self):
+        norm = Normalize()
+        self.failUnlessEqual(run(norm,[part1 % 1000, part2 % 1001]),
+                             ['!AIVDM,1,1,4,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j'
+                              '@H8888888888880,2*6F,r003669708,1001'])
+        self.failUnlessEqual(norm.stats(),{'stations':0,'fragments':0,'completed':1,'dropped':0,'expired':0,
+                                           'invalid_checksums':0})
+
+    def testExpire(self):
+        norm = Normalize(ttl=30)
+        self.failUnlessEqual(run(norm,[part1 % 1000, part2 % 1031]),[])
+        self.failUnlessEqual((norm.expired,norm.dropped),(1,1))
+
+    def testDangling(self):
+        errors = StringIO.StringIO()
+        norm = Normalize(errors=errors)
+        self.failUnlessEqual(run(norm,[part2 % 1000]),[])
+        self.failUnlessEqual(norm.dropped,1)
+        self.failUnless(errors.getvalue().startswith('ERROR line 1: do not have the preceding packets'))
+
+    def testPassThrough(self):
+        'Lines that need no help come back with their line endings'
+        lines = ['$PSHI,1\n','!AIVDM,1,1,,A,14`qQb0000o?u?DK>Smo2E`v0404,0*1A,r003669987,1152921693\r\n']
+        self.failUnlessEqual(run(Normalize(),lines),lines)
+
+    def testSeqIdReused(self):
+        norm = Normalize()
+        self.failUnlessEqual(len(run(norm,[part1 % 1000, part1 % 1001, part2 % 1002])),1)
+        self.failUnlessEqual((norm.dropped,norm.completed),(1,1))
+
+    def testBounded(self):
+        'Orphaned first sentences do not pile up'
+        norm = Normalize(ttl=30,max_per_station=5)
+        for i in range(1000):
+            line = part1.replace(',4,B,',',%d,%s,' % (i%10,'AB'[i%2])) % (1000+i/10)
+            norm.put(line.replace('r003669708','r%d' % (i%3)))
+            self.failUnless(norm.fragments() <= 15)
+        self.failUnlessEqual(norm.dropped+norm.expired+norm.fragments(),1000)
+        norm.put(part1.replace('r003669708','r0') % 2000)
+        self.failUnlessEqual(norm.fragments(),1)
+
+class TestReassemble(unittest.TestCase):
+    def testPassThrough(self):
+        lines = ['$PSHI,1','!AIVDM,1,1,,A,14`qQb0000o?u?DK>Smo2E`v0404,0*1A,r003669987,1152921693\r\n']
+        self.failUnlessEqual(list(reassemble(lines)),[line.strip() for line in lines])
+
+    def testWindow(self):
+        lines = [part1 % 1000, part2 % 1003]
+        self.failUnlessEqual(list(reassemble(lines,window=2)),[])
+        self.failUnlessEqual(len(list(reassemble(lines,window=3))),1)
+
+    def testTreatABequal(self):
+        lines = [part1 % 1000, part2.replace(',B,',',A,') % 1000]
+        self.failUnlessEqual(list(reassemble(lines)),[])
+        self.failUnlessEqual(len(list(reassemble(lines,treatABequal=True))),1)
+
+    def testMissingTimestamps(self):
+        lines = [part1 % 1000, part2.replace('%d','')]
+        self.failUnlessEqual(list(reassemble(lines)),[])
+        self.failUnlessEqual(list(reassemble(lines,allow_missing_timestamps=True)),
+                             ['!AIVDM,1,1,4,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j'
+                              '@H8888888888880,2*6F,r003669708'])
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.pgcopy.  A connection that keeps the COPY text
+stands in for PostgreSQL.
+
+@license: Apache 2.0
+"""
+
+import sys
+import unittest
+
+import ais
+from aisutils import pgcopy
+from aisutils import wkb
+
+class CopyCursor:
+    def __init__(self):
+        self.copied = []   # (sql, text) committed
+        self.pending = []
+    def copy_expert(self,sql,infile):
+        text = infile.read()
+        if 'REJECT' in text:
+            raise ValueError('value too long')
+        self.pending.append((sql,text))
+    def execute(self,sql,params=None):
+        self.pending.append((sql,params))
+
+class CopyConnection:
+    def __init__(self):
+        self.cu = CopyCursor()
+    def cursor(self):
+        return self.cu
+    def commit(self):
+        self.cu.copied += self.cu.pending
+        self.cu.pending = []
+    def rollback(self):
+        self.cu.pending = []
+
+class TestPgCopy(unittest.TestCase):
+    def testRow(self):
+        t = pgcopy.Table(ais.msgModByNumber[1])
+        self.failUnless(t.sql.startswith('COPY position (messageid,repeatindicator,userid,'))
+        self.failUnless(t.sql.endswith(',cg_r,cg_sec,cg_timestamp,position) FROM STDIN'))
+        row = t.row({'UserID':1234,'RAIM':False,'longitude':-70.1,'latitude':42.2,'cg_r':'r\t1'})
+        values = row[:-1].split('\t')
+        self.failUnlessEqual(len(values),len(t.fields)+1)
+        self.failUnlessEqual(values[t.fields.index('UserID')],'1234')
+        self.failUnlessEqual(values[t.fields.index('RAIM')],'f')
+        self.failUnlessEqual(values[t.fields.index('MessageID')],'\\N')
+        self.failUnlessEqual(values[t.fields.index('cg_r')],'r\\t1')
+        self.failUnlessEqual(values[-1],wkb.point(-70.1,42.2,4326))
+
+    def testRejects(self):
+        cx = CopyConnection()
+        t = pgcopy.Table(ais.msgModByNumber[18])
+        loader = pgcopy.CopyLoader(cx,chunk_size=8)
+        for i in range(10):
+            cg_r = 'r%d' % i
+            if i in (2,5):
+                cg_r = 'REJECT'
+            loader.add(t,{'UserID':i,'cg_r':cg_r})
+        loader.flush()
+        self.failUnlessEqual(loader.rows,8)
+        self.failUnlessEqual(loader.rejected,2)
+        self.failUnlessEqual(loader.counts,{'positionb':8})
+        copied = ''.join([text for sql,text in cx.cu.copied])
+        self.failUnlessEqual(copied.count('\n'),8)
+        self.failIf('REJECT' in copied)
+
+    def testLatest(self):
+        cx = CopyConnection()
+        loader = pgcopy.CopyLoader(cx,latest=('shipdata',))
+        t = pgcopy.Table(ais.msgModByNumber[5])
+        loader.add(t,{'UserID':1,'name':'OLD'})
+        loader.add(t,{'UserID':1,'name':'NEW'})
+        loader.add(t,{'UserID':2,'name':'OTHER'})
+        loader.finish()
+        self.failUnlessEqual(cx.cu.copied[0],('DELETE FROM shipdata WHERE userid = ANY(%s);',([1,2],)))
+        self.failUnlessEqual(loader.rows,2)
+        self.failIf('OLD' in cx.cu.copied[1][1])
+
+    def testAddLine(self):
+        cx = CopyConnection()
+        loader = pgcopy.CopyLoader(cx)
+        self.failUnless(loader.add_line('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r003669958,1085889680'))
+        self.failIf(loader.add_line('!AIVDM,1,1,,B,85Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r003669958,1085889680'))
+        self.failIf(loader.add_line('# comment'))
+        loader.flush()
+        self.failUnlessEqual(loader.counts,{'position':1})
+        row = cx.cu.copied[0][1]
+        self.failUnless('\tr003669958\t1085889680\t2004-05-30 04:01:20\t0101000020E6100000' in row)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.shards.
+
+@license: Apache 2.0
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+from aisutils import shards
+
+def line(cg_sec, station='r1'):
+    return '!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,%s,%d' % (station, cg_sec)
+
+def work(shard):
+    name, value = shard
+    return name, str(value)
+
+class TestSummary(unittest.TestCase):
+    def testMergeMatchesOneSummary(self):
+        'Splitting the times into shards gives the same downtime as ais_info gaps of the sorted times'
+        random.seed(3)
+        times = []
+        t = 1241481600
+        while len(times) < 2000:
+            t += random.choice((0, 1, 1, 2, 5, 400))
+            times.append(t)
+        down = sum([b - a for a, b in zip(times, times[1:]) if b - a >= 2])
+
+        total = shards.Summary(min_gap_sec=2)
+        for i in range(4):
+            s = shards.Summary(min_gap_sec=2)
+            for t in times[i::4]:
+                s.add_line(line(t))
+            total.merge(s)
+        self.failUnlessEqual(total.lines, 2000)
+        self.failUnlessEqual(total.total_gap(), down)
+        self.failUnlessEqual(total.time_range(), (times[0], times[-1]))
+
+    def testWriteRead(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            s = shards.Summary(min_gap_sec=5)
+            for t in (100, 101, 90, 200):
+                s.add_line(line(t))
+            s.dups = 3
+            s.errors = 2
+            s.mmsi.update([366123456, 1])
+            s.write(os.path.join(tmp, 's'))
+            r = shards.Summary.read(os.path.join(tmp, 's'))
+            self.failUnlessEqual((r.min_gap_sec, r.lines, r.dups, r.errors, r.types, r.mmsi, r.runs),
+                                 (5, 4, 3, 2, {'1': 4}, set([1, 366123456]), [(90, 90), (100, 101), (200, 200)]))
+        finally:
+            shutil.rmtree(tmp)
+
+class TestProgress(unittest.TestCase):
+    def testResume(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            journal = os.path.join(tmp, shards.journal_name)
+            for name in ('a', 'b'):
+                open(os.path.join(tmp, name), 'w').close()
+            progress = shards.Progress(journal)
+            progress.finished('a', os.path.join(tmp, 'a'))
+            progress.close()
+            open(journal, 'a').write('b\t')  # Cut off by a crash
+
+            progress = shards.Progress(journal)
+            self.failUnlessEqual(progress.done.keys(), ['a'])
+            ran = []
+            def worker(shard):
+                ran.append(shard[0])
+                return shard[0], os.path.join(tmp, shard[0])
+            done = shards.run([('a', None), ('b', None)], worker, progress, processes=1)
+            progress.close()
+            self.failUnlessEqual(ran, ['b'])
+            self.failUnlessEqual(sorted(done), ['a', 'b'])
+        finally:
+            shutil.rmtree(tmp)
+
+    def testPool(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            progress = shards.Progress(os.path.join(tmp, shards.journal_name))
+            done = shards.run([('s%d' % i, tmp) for i in range(8)], work, progress, processes=3)
+            progress.close()
+            self.failUnlessEqual(done, dict([('s%d' % i, tmp) for i in range(8)]))
+        finally:
+            shutil.rmtree(tmp)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Keep import ais cheap for short lived scripts.
+
+The unit tests check which modules get imported in a fresh python.
+Run with --benchmark to time the startup of a new python process:
+
+  ./test_startup.py --benchmark
+
+@license: Apache 2.0
+"""
+
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+top_dir = os.path.dirname(test_dir)
+
+def run_python(code):
+    '''
+    Run code in a new python with the package on the path
+
+    @return: stdout
+    '''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([top_dir,os.path.join(top_dir,'aisutils')]
+                                        + env.get('PYTHONPATH','').split(os.pathsep))
+    proc = subprocess.Popen([sys.executable,'-c',code],stdout=subprocess.PIPE,env=env)
+    out = proc.communicate()[0]
+    assert proc.returncode == 0, 'python failed for: '+code
+    return out
+
+def loaded_modules(code):
+    '@return: names in sys.modules after running code'
+    return set(run_python(code+'\nimport sys\nprint " ".join(sys.modules.keys())').split())
+
+benchmarks = (
+    ('python', 'pass'),
+    ('import ais', 'import ais'),
+    ('one message', "import ais\nais.msgModByFirstChar['1']"),
+    ('all messages', "import ais\nfor key in ais.msgModByNumber: ais.msgModByNumber[key]"),
+    )
+'Name and code to time with --benchmark'
+
+
+class TestStartup(unittest.TestCase):
+    def testImportAis(self):
+        'Importing the package does not pull in any of the messages'
+        modules = loaded_modules('import ais')
+        self.failUnlessEqual([m for m in modules if m.startswith('ais.ais_msg')],[])
+        for name in ('doctest','unittest','optparse'):
+            self.failIf(name in modules,name)
+
+    def testOneMessage(self):
+        modules = loaded_modules("import ais\nais.msgModByFirstChar['1'].decode")
+        self.failUnless('ais.ais_msg_1_handcoded' in modules)
+        self.failIf('ais.ais_msg_5' in modules)
+        for name in ('doctest','optparse'):
+            self.failIf(name in modules,name)
+
+    def testRegistry(self):
+        import ais
+        self.failUnless(5 in ais.msgModByNumber)
+        self.failIf(13 in ais.msgModByNumber)
+        self.failUnlessRaises(KeyError,ais.msgModByFirstChar.__getitem__,'=')
+        for key in ais.msgModByNumber:
+            msgMod = ais.msgModByNumber[key]
+            self.failUnless(msgMod is sys.modules[msgMod.__name__])
+            self.failUnless(hasattr(msgMod,'decode'))
+        self.failUnless(ais.msgModByFirstChar['5'] is ais.msgModByNumber[5])
+        self.failUnlessEqual(len(ais.msgModByFirstChar.items()),len(ais.msgModByFirstChar))
+
+
+def benchmark(repeat=10):
+    '''Print the best wall clock time of a new python process for each
+    of the benchmarks'''
+    for name,code in benchmarks:
+        best = None
+        for i in range(repeat):
+            start = time.time()
+            run_python(code)
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        print '%-14s %7.1f ms' % (name,best*1000)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('--benchmark',dest='benchmark',default=False,action='store_true',
+                      help='time python startup with the ais package')
+    parser.add_option('-n','--repeat',dest='repeat',default=10,type='int',
+                      help='runs of each benchmark to take the best of [default: %default]')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.benchmark:
+        benchmark(options.repeat)
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.timemerge.
+
+@license: Apache 2.0
+"""
+
+import random
+import sys
+import unittest
+
+from aisutils import logscan
+from aisutils import timemerge
+
+def line(cg_sec, station='r1'):
+    return '!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,%s,%.2f' % (station, cg_sec)
+
+class TestTimeMerge(unittest.TestCase):
+    def testSkew(self):
+        random.seed(42)
+        streams = []
+        for s in range(5):
+            skew = random.uniform(0, 3)
+            streams.append([line(skew + i + random.uniform(0, 1.5), 'r%d' % s) for i in range(2000)])
+        merger = timemerge.TimeMerge(streams, reorder_sec=2)
+        times = [logscan.cg_sec(l) for l in merger]
+        self.failUnlessEqual(len(times), 10000)
+        self.failUnlessEqual(times, sorted(times))
+        self.failUnlessEqual(merger.late, 0)
+        self.failUnless(merger.max_buffered < 50)
+
+    def testLate(self):
+        merger = timemerge.TimeMerge([[line(1), line(20), line(5)], ['# comment', line(10), line(30)]], reorder_sec=2)
+        out = list(merger)
+        self.failUnlessEqual(out, ['# comment', line(1), line(10), line(5), line(20), line(30)])
+        self.failUnlessEqual(merger.late, 1)
+
+    def testMaxLines(self):
+        merger = timemerge.TimeMerge([[line(i) for i in range(100)]], reorder_sec=1000, max_lines=10)
+        self.failUnlessEqual(len(list(merger)), 100)
+        self.failUnlessEqual(merger.max_buffered, 11)
+        self.failUnlessEqual(merger.late, 0)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
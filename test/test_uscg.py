@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Check the aisutils.uscg tokenizer against uscg_ais_nmea_regex.
+
+Run with --benchmark to compare the lines per second of the regex and
+UscgNmea:
+
+  ./test_uscg.py --benchmark
+
+@license: Apache 2.0
+"""
+
+import os
+import sys
+import time
+import unittest
+
+from aisutils import uscg
+
+test_ais = os.path.join(os.path.dirname(os.path.abspath(__file__)),'test.ais')
+
+def regex_fields(line):
+    match = uscg.uscg_ais_nmea_regex.search(line)
+    if match is None:
+        return None
+    return match.groupdict()
+
+benchmarks = (
+    ('regex', regex_fields),
+    ('UscgNmea', uscg.parse),
+    )
+'Name and function of one line to time with --benchmark'
+
+
+class TestUscg(unittest.TestCase):
+    def testSameAsRegex(self):
+        count = 0
+        for line in file(test_ais):
+            match = regex_fields(line)
+            msg = uscg.parse(line)
+            if match is None:
+                continue
+            count += 1
+            self.failUnlessEqual(msg.nmeaType,match['talker']+match['stringType'])
+            self.failUnlessEqual(msg.contents,match['body'])
+            self.failUnlessEqual(msg.aisChannel,match['chan'])
+            self.failUnlessEqual(msg.fillbits,int(match['fillBits']))
+            self.failUnlessEqual(msg.checksumStr,match['checksum'])
+            self.failUnlessEqual(msg.station,match['station'])
+            self.failUnlessEqual(msg.cg_sec,float(match['timeStamp']))
+        self.failUnless(count > 900)
+
+    def testComments(self):
+        for line in ('# 2006-07-15\n','\n','AIVDM'):
+            self.failUnless(uscg.parse(line) is None)
+
+    def testRoundTrip(self):
+        line = '!AIVDM,1,1,,B,15Mwq1WP01rB2crBh5G:6?v200Rj,0*59,s28057,d-95,T49.46179499,x91028,rRDSULI1,1224516422'
+        self.failUnlessEqual(str(uscg.UscgNmea(line)),line+'.0')
+
+    def testPrefix(self):
+        'Text before the NMEA string is skipped up to the first ! or $'
+        msg = uscg.UscgNmea('1241481600 !AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,r$1,1085889680')
+        self.failUnlessEqual((msg.contents,msg.station),('15Cjtd0Oj;Jp7ilG7=UkKBoB0<06','r$1'))
+
+    def testSlots(self):
+        msg = uscg.UscgNmea()
+        self.failUnlessRaises(AttributeError,setattr,msg,'bogus',1)
+
+
+def benchmark(filename=test_ais, repeat=5):
+    '''Print the best lines per second for each of the benchmarks'''
+    lines = file(filename).readlines()
+    for name,function in benchmarks:
+        best = None
+        for i in range(repeat):
+            start = time.time()
+            for line in lines:
+                function(line)
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        print '%-10s %9.0f lines/sec' % (name,len(lines)/best)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('--benchmark',dest='benchmark',default=False,action='store_true',
+                      help='time parsing the lines of a log file')
+    parser.add_option('-f','--filename',dest='filename',default=test_ais,
+                      help='log file for the benchmark [default: %default]')
+    parser.add_option('-n','--repeat',dest='repeat',default=5,type='int',
+                      help='runs of each benchmark to take the best of [default: %default]')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.benchmark:
+        benchmark(options.filename,options.repeat)
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+__author__ = 'Kurt Schwehr'
+
+__doc__="""
+Unit tests for aisutils.vessels.  A cursor that keeps the SQL stands in
+for PostgreSQL.
+
+@license: Apache 2.0
+"""
+
+import sys
+import unittest
+
+from aisutils import wkb
+from aisutils.vessels import VesselCache
+
+class SqlCursor:
+    def __init__(self,results=None):
+        self.sql = []
+        self.results = results or {}
+        self.last = None
+    def execute(self,sql,params=None):
+        self.sql.append((sql,params))
+        self.last = sql
+    def fetchall(self):
+        for start,rows in self.results.iteritems():
+            if self.last.startswith(start):
+                return rows
+        return []
+
+class TestVessels(unittest.TestCase):
+    def testFlush(self):
+        cu = SqlCursor({'SELECT userid,name,shipandcargo FROM shipdata':[(1,'ONE@@',70)],
+                        'SELECT userid,X(position),Y(position)':[(1,-71.,41.),(1,181.,91.),(1,-70.,42.)]})
+        vessels = VesselCache()
+        for i in range(100):
+            vessels.position(i % 3,-70,42,511,0.1*i,'r1','2009-05-05 00:00:00','under way')
+        vessels.shipdata(5,'NO POSITION',30)
+        self.failUnlessEqual(vessels.flush(cu),3)
+        statements = [sql.split(' (')[0].split(' WHERE')[0] for sql,params in cu.sql]
+        self.failUnlessEqual(statements.count('INSERT INTO last_position'),1)
+        self.failUnlessEqual(statements.count('INSERT INTO track_lines'),1)
+        sql,params = [(sql,params) for sql,params in cu.sql if sql.startswith('INSERT INTO last_position')][0]
+        self.failUnlessEqual(len(params),3*9)
+        self.failUnless((1,'ONE',0,0.1*97,wkb.point(-70,42,4326),'r1','under way','cargo, all ships of this type','2009-05-05 00:00:00') in
+                        [tuple(params[i:i+9]) for i in range(0,len(params),9)])
+        self.failUnlessEqual(list(vessels[1].track),[(-71,41),(-70,42)])
+        sql,params = [(sql,params) for sql,params in cu.sql if sql.startswith('INSERT INTO track_lines')][0]
+        self.failUnlessEqual(params[:3],[0,'0',wkb.lineString([(-70,42)]*34,4326)])
+
+        # Loaded vessels are not read again and clean ones are not written
+        cu = SqlCursor()
+        self.failUnlessEqual(vessels.flush(cu),0)
+        vessels.position(1,-69,43,10,1)
+        self.failUnlessEqual(vessels.flush(cu),1)
+        self.failIf([sql for sql,params in cu.sql if sql.startswith('SELECT')])
+        self.failUnlessEqual(vessels[1].trackWKB(),wkb.lineString([(-69,43),(-70,42),(-71,41)],4326))
+
+    def testFlushFails(self):
+        'Vessels are written by the next flush when a statement fails and the transaction is rolled back'
+        class FailingCursor(SqlCursor):
+            def execute(self,sql,params=None):
+                if sql.startswith('INSERT INTO last_position'):
+                    raise RuntimeError('connection lost')
+                SqlCursor.execute(self,sql,params)
+        vessels = VesselCache()
+        vessels.position(1,-70,42,511,1)
+        vessels.position(2,-71,41,511,1)
+        self.failUnlessRaises(RuntimeError,vessels.flush,FailingCursor())
+        self.failUnlessEqual(vessels.flush(SqlCursor()),2)
+        self.failUnlessEqual(vessels.flush(SqlCursor()),0)
+
+
+############################################################
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--unit-test',dest='unittest',default=False,action='store_true',
+                      help='run the unit tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+    (options,args) = parser.parse_args()
+
+    if options.unittest:
+        sys.argv = [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        unittest.main()